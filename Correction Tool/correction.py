@@ -1,11 +1,31 @@
-import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-from scipy import stats
 import os
+import sys
+import json
 import glob
 import re
+import time
 import traceback
+import contextlib
+from itertools import zip_longest
+
+# Utilidades comunes (pipeline/tool_support.py, en la carpeta 'pipeline' del repositorio o copiado junto al script)
+_PIPELINE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'pipeline') if '__file__' in globals() else ''
+if _PIPELINE_DIR and os.path.isdir(_PIPELINE_DIR) and _PIPELINE_DIR not in sys.path:
+    sys.path.append(_PIPELINE_DIR)
+try:
+    import tool_support
+except ImportError: # Script pegado en Colab o copiado sin pipeline/: se ejecuta como antes, sin medir tiempos ni módulos opcionales
+    tool_support = None
+
+if tool_support is not None: # pandas, scipy y matplotlib solo se cargan al leer los CSV, ajustar regresiones o dibujar
+    pd = tool_support.LazyModule('pandas')
+    stats = tool_support.LazyModule('scipy.stats')
+    plt = tool_support.LazyModule('matplotlib.pyplot')
+else:
+    import pandas as pd
+    from scipy import stats
+    import matplotlib.pyplot as plt
 
 # --- Configuración ---
 # Rutas de los archivos de entrada para DERIVAR parámetros de corrección (datos resumidos)
@@ -18,6 +38,9 @@ RESULTS_FOLDER = '/content/drive/MyDrive/Beca Colaboracion 2024-2025/02_Validaci
 # --- NUEVA CONFIGURACIÓN PARA CORRECCIÓN DE ARCHIVOS .RPT ---
 # Carpeta raíz donde se encuentran los directorios de cada simulación
 REPORTS_ROOT_DIR_FOR_CORRECTION = '/content/drive/MyDrive/Beca Colaboracion 2024-2025/10_Resultados Simulaciones/Reports_Nahum_v3'
+# Archivo de campaña (.npz de pipeline/campaign_store.py) del que leer los .rpt en lugar del árbol anterior.
+# Los archivos corregidos se siguen escribiendo en REPORTS_ROOT_DIR_FOR_CORRECTION/<simulación>/.
+CAMPAIGN_STORE_FILE_FOR_CORRECTION = None
 
 # Nombres base de los archivos .rpt a procesar
 ACCEL_COMPONENT_RPT_FILES = ['A1_Acc_mean.rpt', 'A2_Acc_mean.rpt', 'A3_Acc_mean.rpt']
@@ -27,12 +50,79 @@ OUTPUT_MAGNITUDE_ACCEL_FIXED_RPT_FILE = 'Magnitude_Acc_mean_fixed.rpt'
 PCOUP_RPT_FILE = 'Pressure_FRONTREF_mean.rpt'
 PCONTRECOUP_RPT_FILE = 'Pressure_BACKREF_mean.rpt'
 
+# Parámetros de corrección guardados para que los procesadores los apliquen al cargar las series originales.
+# Por defecto se guardan junto a los reportes, donde rpt_processor_individual.py los busca.
+CORRECTION_PARAMS_FILE = os.path.join(REPORTS_ROOT_DIR_FOR_CORRECTION, 'parametros_correccion.json')
+# Escribir además copias corregidas (*_fixed.rpt) en cada carpeta de simulación (Fase 4).
+# Ya no es necesario: los procesadores corrigen al vuelo con CORRECTION_PARAMS_FILE.
+WRITE_FIXED_RPT_FILES = False
+
+# Calcular las columnas *_Sim_* de los CSV resumidos a partir de los .rpt de REPORTS_ROOT_DIR_FOR_CORRECTION
+# en lugar de leerlas de los CSV (donde se rellenaban a mano). Los valores experimentales siguen saliendo de los CSV.
+AUTO_SIM_COLUMNS_FROM_REPORTS = False
+# Expresión para obtener el nº de ensayo del nombre de la carpeta de simulación (p. ej. 'Nahum_E37_v3000' -> '37')
+ENSAYO_ID_PATTERN = r'[_\-]E(?:nsayo)?_?(\d+)'
+# Si el nombre no incluye el ensayo, se asigna el de velocidad 'v_cabeza_m_s' más próxima a la de la carpeta (_vNNNN en mm/s)
+ENSAYO_VELOCITY_TOLERANCE_M_S = 0.05
+# Tabla con los valores extraídos (mismo formato que los CSV de entrada)
+SIM_COLUMNS_OUTPUT_FILE = os.path.join(RESULTS_FOLDER, 'datos_simulacion_extraidos.csv')
+
+# Ajuste en el dominio del tiempo (función de transferencia) frente a las curvas experimentales de Nahum.
+# Carpeta con un CSV por ensayo y métrica (NAHUM_TRACE_FILE_TEMPLATE): columnas tiempo (ms) y valor (m/s² o mmHg),
+# con sep=';' y decimal=','. None = no se ajusta.
+NAHUM_TRACES_DIR = None
+NAHUM_TRACE_FILE_TEMPLATE = 'Ensayo_{ensayo}_{metric}.csv'
+# Modelo: nahum(t) = amplitud * sim(escala_tiempo * (t - retardo)). Sin término independiente.
+TRANSFER_FIT_GRID_POINTS = 1000 # Puntos de la rejilla común de tiempo
+TRANSFER_FIT_TIME_SCALES = (0.7, 1.3, 61) # (mínimo, máximo, nº de valores) de la escala de tiempo
+TRANSFER_FIT_MAX_LAG_MS = 2.0 # Retardo máximo buscado por correlación cruzada
+TRANSFER_FIT_LAG_REFINE_SAMPLES = 5 # Muestras a cada lado del retardo de la correlación que se prueban por mínimos cuadrados
+
+# Estabilidad de los parámetros de la Fase 2: intervalos de confianza bootstrap y MAPE con validación "leave-one-out"
+BOOTSTRAP_RESAMPLES = 5000
+BOOTSTRAP_CONFIDENCE = 0.95
+BOOTSTRAP_SEED = 0 # Semilla fija para que los intervalos sean reproducibles entre ejecuciones
+
+# Registro versionado de modelos de corrección (pipeline/correction_registry.py). Cada ejecución de las Fases 1-3
+# guarda una versión con las huellas de los datos de origen. None = no se registra.
+CORRECTION_REGISTRY_DIR = '/content/drive/MyDrive/Beca Colaboracion 2024-2025/02_Validacion del modelo/modelos_correccion'
+# Aplicar un modelo ya registrado ('latest' o nº de versión) sin repetir las Fases 1-3: se escribe CORRECTION_PARAMS_FILE
+# (y los *_fixed.rpt si WRITE_FIXED_RPT_FILES) a partir de esa versión. None = flujo completo.
+APPLY_REGISTERED_MODEL = None
+
 # --- Fin de Nueva Configuración ---
 
-# Crear la carpeta de resultados del análisis si no existe
-if not os.path.exists(RESULTS_FOLDER):
-    os.makedirs(RESULTS_FOLDER)
-    print(f"Carpeta '{RESULTS_FOLDER}' creada.")
+# Utilidades de tool_support.py (sin él: sin medir tiempos y plt.savefig directo)
+if tool_support is not None:
+    _optional_module = tool_support.optional_module
+    _timed = tool_support.timed
+    save_figure = tool_support.save_figure
+else:
+    _optional_module = lambda module_name: None
+    _timed = lambda stage: contextlib.nullcontext()
+    save_figure = lambda path, **savefig_kwargs: plt.savefig(path, **savefig_kwargs)
+
+# Módulos opcionales de pipeline/ (None si no están disponibles)
+campaign_store = _optional_module('campaign_store')
+correction_registry = _optional_module('correction_registry')
+stage_timing = tool_support.stage_timing if tool_support is not None else None
+accel_batch = _optional_module('accel_batch')
+
+# Informe de tiempos por etapa (pipeline/stage_timing.py), en RESULTS_FOLDER
+TIMING_REPORT_FILE_NAME = 'informe_tiempos_correccion.json'
+
+_ACTIVE_CAMPAIGN_STORE = None # Se abre en la Fase 4 cuando CAMPAIGN_STORE_FILE_FOR_CORRECTION está configurado
+
+def rpt_exists(filepath):
+    """os.path.exists que también consulta el archivo de campaña activo."""
+    if tool_support is None: return bool(filepath) and os.path.exists(filepath)
+    return tool_support.rpt_exists(filepath, _ACTIVE_CAMPAIGN_STORE)
+
+def ensure_results_folder():
+    """Crea la carpeta de resultados del análisis si no existe (al ejecutar, no al importar el script)."""
+    if not os.path.exists(RESULTS_FOLDER):
+        os.makedirs(RESULTS_FOLDER)
+        print(f"Carpeta '{RESULTS_FOLDER}' creada.")
 
 # Columnas esperadas en los CSV de datos resumidos (para derivar params)
 cols_accel = [
@@ -50,14 +140,17 @@ cols_pressure = [
 def load_and_preprocess_data():
     # ... (código igual que antes)
     """Carga los datos de los archivos CSV y realiza un preprocesamiento básico."""
+    # Con AUTO_SIM_COLUMNS_FROM_REPORTS las columnas *_Sim_* pueden faltar en los CSV
+    usecols_accel = (lambda c: c in cols_accel) if AUTO_SIM_COLUMNS_FROM_REPORTS else cols_accel
+    usecols_pressure = (lambda c: c in cols_pressure) if AUTO_SIM_COLUMNS_FROM_REPORTS else cols_pressure
     try:
         df_accel = pd.read_csv(ACCELERATION_DATA_FILE,
-                               usecols=cols_accel,
+                               usecols=usecols_accel,
                                na_values=['---', ''],
                                sep=';',
                                decimal=',')
         df_pressure = pd.read_csv(PRESSURE_DATA_FILE,
-                                  usecols=cols_pressure,
+                                  usecols=usecols_pressure,
                                   na_values=['---', ''],
                                   sep=';',
                                   decimal=',')
@@ -86,6 +179,12 @@ def load_and_preprocess_data():
     print("Fusionando DataFrames de datos resumidos...")
     df_accel['N_Ensayo'] = df_accel['N_Ensayo'].astype(str)
     df_pressure['N_Ensayo'] = df_pressure['N_Ensayo'].astype(str)
+    if AUTO_SIM_COLUMNS_FROM_REPORTS:
+        df_sim = extract_sim_columns_from_reports(REPORTS_ROOT_DIR_FOR_CORRECTION, df_accel[['N_Ensayo', 'v_cabeza_m_s']])
+        if df_sim is None:
+            return None
+        df_accel = replace_sim_columns(df_accel, df_sim, ['Acc_Sim_m_s2', 'T_pico_Sim_ms'])
+        df_pressure = replace_sim_columns(df_pressure, df_sim, ['PCoup_Sim_mmHg', 'PContrecoup_Sim_mmHg'])
     try:
         df_merged = pd.merge(df_accel, df_pressure, on='N_Ensayo', suffixes=('_acc', '_pres'))
     except Exception as e:
@@ -143,8 +242,8 @@ def plot_scatter_comparison(df, sim_col, nahum_col, title_prefix, metric_unit, f
         plt.xlabel(xlabel, fontsize=14)
         plt.ylabel(ylabel, fontsize=14)
         plt.grid(True)
-        plt.savefig(filename_png)
-        plt.savefig(filename_eps, format='eps', bbox_inches='tight')
+        save_figure(filename_png)
+        save_figure(filename_eps, format='eps', bbox_inches='tight')
         plt.close()
         print(f"Gráficos vacíos guardados en: {filename_png} y {filename_eps}")
         return None
@@ -160,8 +259,8 @@ def plot_scatter_comparison(df, sim_col, nahum_col, title_prefix, metric_unit, f
     plt.legend(fontsize=12)
     plt.grid(True, linestyle=':', alpha=0.6)
     plt.tight_layout()
-    plt.savefig(filename_png)
-    plt.savefig(filename_eps, format='eps', bbox_inches='tight')
+    save_figure(filename_png)
+    save_figure(filename_eps, format='eps', bbox_inches='tight')
     plt.close()
     print(f"Gráficos guardados en: {filename_png} y {filename_eps}")
     return valid_data
@@ -187,8 +286,8 @@ def plot_ratio_vs_severity(df, ratio_col, severity_col, title_prefix, ratio_name
         plt.xlabel(xlabel, fontsize=14)
         plt.ylabel(ylabel, fontsize=14)
         plt.grid(True)
-        plt.savefig(filename_png)
-        plt.savefig(filename_eps, format='eps', bbox_inches='tight')
+        save_figure(filename_png)
+        save_figure(filename_eps, format='eps', bbox_inches='tight')
         plt.close()
         print(f"Gráficos vacíos guardados en: {filename_png} y {filename_eps}")
         return
@@ -202,8 +301,8 @@ def plot_ratio_vs_severity(df, ratio_col, severity_col, title_prefix, ratio_name
     plt.legend(fontsize=12)
     plt.grid(True, linestyle=':', alpha=0.6)
     plt.tight_layout()
-    plt.savefig(filename_png)
-    plt.savefig(filename_eps, format='eps', bbox_inches='tight')
+    save_figure(filename_png)
+    save_figure(filename_eps, format='eps', bbox_inches='tight')
     plt.close()
     print(f"Gráficos guardados en: {filename_png} y {filename_eps}")
 
@@ -225,6 +324,68 @@ def linear_regression_correction(valid_data, sim_col, nahum_col, metric_name):
     if r_squared < 0.5: print(f"  NOTA: R-cuadrado < 0.5, el modelo lineal explica poca varianza.")
     return result
 
+def bootstrap_regression_params(x, y, n_resamples=BOOTSTRAP_RESAMPLES, confidence=BOOTSTRAP_CONFIDENCE, seed=BOOTSTRAP_SEED):
+    """
+    Intervalos de confianza bootstrap de pendiente, intercepto y R². Todas las remuestras se generan
+    como una matriz (n_resamples, n) de índices y se resuelven con las fórmulas cerradas de mínimos cuadrados.
+    Las remuestras degeneradas (todos los x iguales) se descartan.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    idx = np.random.default_rng(seed).integers(0, len(x), size=(n_resamples, len(x)))
+    xs, ys = x[idx], y[idx]
+    dx = xs - xs.mean(axis=1, keepdims=True)
+    dy = ys - ys.mean(axis=1, keepdims=True)
+    sxx, syy, sxy = np.einsum('ij,ij->i', dx, dx), np.einsum('ij,ij->i', dy, dy), np.einsum('ij,ij->i', dx, dy)
+    valid = sxx > 1e-12 * max(float(np.max(sxx)), 1.0)
+    slopes = sxy[valid] / sxx[valid]
+    intercepts = ys[valid].mean(axis=1) - slopes * xs[valid].mean(axis=1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        r_squared = np.where(syy[valid] > 0, sxy[valid] ** 2 / (sxx[valid] * syy[valid]), np.nan)
+    alpha = (1.0 - confidence) / 2.0 * 100.0
+    result = {'n_resamples_validas': int(valid.sum())}
+    for name, values in (('slope', slopes), ('intercept', intercepts), ('r_squared', r_squared)):
+        low, high = np.nanpercentile(values, [alpha, 100.0 - alpha]) if len(values) else (np.nan, np.nan)
+        result[f'{name}_ic_inf'] = low
+        result[f'{name}_ic_sup'] = high
+        result[f'{name}_std_bootstrap'] = np.nanstd(values) if len(values) else np.nan
+    return result
+
+def leave_one_out_mape(x, y):
+    """
+    MAPE (%) de la corrección lineal validada dejando fuera cada ensayo: la recta se ajusta con los n-1
+    restantes (sumas totales menos el ensayo excluido, sin bucle) y se evalúa en el excluido.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    n = len(x)
+    if n < 3:
+        return np.nan
+    m = n - 1
+    sum_x, sum_y = x.sum() - x, y.sum() - y
+    sum_xx, sum_xy = (x * x).sum() - x * x, (x * y).sum() - x * y
+    sxx = sum_xx - sum_x ** 2 / m
+    with np.errstate(divide='ignore', invalid='ignore'):
+        slopes = (sum_xy - sum_x * sum_y / m) / sxx
+        predictions = slopes * x + (sum_y - slopes * sum_x) / m
+        errors = np.abs((y - predictions) / y)
+    valid = np.isfinite(errors) & (y != 0)
+    return float(np.mean(errors[valid]) * 100.0) if valid.any() else np.nan
+
+def regression_stability_summary(valid_data, sim_col, nahum_col, metric_name):
+    """Fila del resumen de estabilidad (IC bootstrap y MAPE leave-one-out) de una métrica."""
+    if valid_data is None or len(valid_data) < 3:
+        print(f"ADVERTENCIA: No hay suficientes datos válidos para estimar la estabilidad de {metric_name}.")
+        return None
+    x = valid_data[sim_col].to_numpy(dtype=np.float64)
+    y = valid_data[nahum_col].to_numpy(dtype=np.float64)
+    row = {'name': metric_name, 'n_ensayos': len(x)}
+    row.update(bootstrap_regression_params(x, y))
+    row['MAPE_LOO_%'] = leave_one_out_mape(x, y)
+    print(f"  {metric_name}: pendiente IC{BOOTSTRAP_CONFIDENCE:.0%} [{row['slope_ic_inf']:.4e}, {row['slope_ic_sup']:.4e}], "
+          f"intercepto [{row['intercept_ic_inf']:.2f}, {row['intercept_ic_sup']:.2f}], MAPE LOO = {row['MAPE_LOO_%']:.2f}%")
+    return row
+
 def apply_correction(df, sim_col, correction_params, corrected_col_name):
     # ... (código igual que antes)
     """Aplica la corrección lineal a una columna de un DataFrame (para datos resumidos)."""
@@ -256,8 +417,8 @@ def plot_corrected_scatter(df, corrected_sim_col, nahum_col, title_prefix, metri
         plt.xlabel(xlabel, fontsize=14)
         plt.ylabel(ylabel, fontsize=14)
         plt.grid(True)
-        plt.savefig(filename_png)
-        plt.savefig(filename_eps, format='eps', bbox_inches='tight')
+        save_figure(filename_png)
+        save_figure(filename_eps, format='eps', bbox_inches='tight')
         plt.close()
         print(f"Gráficos vacíos guardados en: {filename_png} y {filename_eps}")
         return
@@ -272,8 +433,8 @@ def plot_corrected_scatter(df, corrected_sim_col, nahum_col, title_prefix, metri
     plt.legend(fontsize=12)
     plt.grid(True, linestyle=':', alpha=0.6)
     plt.tight_layout()
-    plt.savefig(filename_png)
-    plt.savefig(filename_eps, format='eps', bbox_inches='tight')
+    save_figure(filename_png)
+    save_figure(filename_eps, format='eps', bbox_inches='tight')
     plt.close()
     print(f"Gráficos guardados en: {filename_png} y {filename_eps}")
 
@@ -292,40 +453,143 @@ def calculate_mape(y_true, y_pred):
     if len(y_true_final) == 0: return np.nan
     return np.mean(np.abs((y_true_final - y_pred_final) / y_true_final)) * 100
 
-# --- FUNCIÓN ADAPTADA PARA LEER .RPT (sin cambios) ---
-def read_rpt_file_for_correction(filepath: str):
+# --- PARÁMETROS DE CORRECCIÓN PERSISTENTES ---
+# Métrica -> (unidades de los parámetros, columna simulada del CSV resumido)
+CORRECTION_METRICS = {
+    'accel': ('m/s2', 'Acc_Sim_m_s2'),
+    'pcoup': ('mmHg', 'PCoup_Sim_mmHg'),
+    'pcontrecoup': ('mmHg', 'PContrecoup_Sim_mmHg'),
+    'tpico': ('ms', 'T_pico_Sim_ms'),
+}
+
+def correction_metrics_dict(params_by_metric):
+    """Parámetros serializables de cada métrica (claves de CORRECTION_METRICS); las métricas sin parámetros se omiten."""
+    metrics = {}
+    for metric, params in params_by_metric.items():
+        if not params:
+            continue
+        metrics[metric] = {
+            'slope': float(params['slope']), 'intercept': float(params['intercept']),
+            'r_squared': float(params['r_squared']), 'units': CORRECTION_METRICS[metric][0],
+            'equation': params.get('equation', ''),
+        }
+    return metrics
+
+def save_correction_params(filepath, params_by_metric, transfer_functions=None, model=None):
     """
-    Lee un archivo .rpt esperando columnas de tiempo y valor.
-    Devuelve un DataFrame de Pandas con columnas 'Time' y 'Value_Original' o None si falla.
+    Guarda pendiente/intercepto de cada métrica (claves de CORRECTION_METRICS) en un JSON.
+    Las métricas sin parámetros se omiten. Las funciones de transferencia ajustadas, si las hay,
+    se guardan en la clave 'transfer_functions'; si el modelo está registrado se anota su versión.
+    Devuelve True si se pudo escribir el archivo.
     """
-    time_values = []
-    data_values = []
-    data_pattern = re.compile(r"^\s*([-+]?\d*\.?\d+(?:[eE][-+]?\d+)?)\s+([-+]?\d*\.?\d+(?:[eE][-+]?\d+)?)")
-    header_skip_pattern = re.compile(r"^\s*\*\*|^\s*X\s+PLOT")
-
+    metrics = correction_metrics_dict(params_by_metric)
+    if not metrics:
+        print("ADVERTENCIA: No hay parámetros de corrección que guardar.")
+        return False
+    content = {'created': time.strftime('%Y-%m-%d %H:%M:%S'), 'metrics': metrics}
+    if transfer_functions:
+        content['transfer_functions'] = transfer_functions
+    if model:
+        content['model_version'] = model['version']
+        content['source_fingerprint'] = model['sources']['fingerprint']
     try:
-        with open(filepath, 'r', encoding='utf-8', errors='ignore') as f:
-            lines = f.readlines()
-        for line_num, line_content in enumerate(lines):
-            line_stripped = line_content.strip()
-            if not line_stripped or header_skip_pattern.match(line_stripped):
-                continue
-            match_data = data_pattern.match(line_stripped)
-            if match_data:
-                try:
-                    time_str = match_data.group(1)
-                    data_val_str = match_data.group(2)
-                    current_time = float(time_str)
-                    current_data_val = float(data_val_str)
-                    time_values.append(current_time)
-                    data_values.append(current_data_val)
-                except (ValueError, IndexError) as e_parse:
-                    print(f"    WARN (read_rpt): Error al parsear datos en línea {line_num + 1} de {os.path.basename(filepath)} ('{line_stripped}'): {e_parse}. Omitiendo línea.")
-        if not time_values or not data_values:
+        os.makedirs(os.path.dirname(filepath) or '.', exist_ok=True)
+        tmp_path = filepath + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(content, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_path, filepath)
+    except (IOError, OSError) as e:
+        print(f"ERROR al guardar los parámetros de corrección en '{filepath}': {e}")
+        return False
+    print(f"Parámetros de corrección guardados en: {filepath}")
+    return True
+
+def register_correction_model(params_by_metric, transfer_functions=None):
+    """Registra los parámetros en CORRECTION_REGISTRY_DIR junto con las huellas de los datos de los que salen."""
+    if not CORRECTION_REGISTRY_DIR:
+        return None
+    if correction_registry is None:
+        print("AVISO: CORRECTION_REGISTRY_DIR configurado pero no se encontró el módulo 'correction_registry'. No se registra el modelo.")
+        return None
+    source_files = [ACCELERATION_DATA_FILE, PRESSURE_DATA_FILE]
+    if AUTO_SIM_COLUMNS_FROM_REPORTS:
+        source_files.append(SIM_COLUMNS_OUTPUT_FILE)
+    if transfer_functions and NAHUM_TRACES_DIR and os.path.isdir(NAHUM_TRACES_DIR):
+        source_files.extend(sorted(glob.glob(os.path.join(NAHUM_TRACES_DIR, '*.csv'))))
+    description = f"Fases 1-3 sobre {os.path.basename(ACCELERATION_DATA_FILE)} y {os.path.basename(PRESSURE_DATA_FILE)}"
+    try:
+        return correction_registry.CorrectionRegistry(CORRECTION_REGISTRY_DIR).register(
+            correction_metrics_dict(params_by_metric), transfer_functions, source_files, description)
+    except (IOError, OSError) as e:
+        print(f"ERROR al registrar el modelo de corrección en '{CORRECTION_REGISTRY_DIR}': {e}")
+        return None
+
+def load_registered_model(version):
+    """
+    Carga una versión del registro y la devuelve como (params_accel, params_pcoup, params_pcontrecoup, modelo),
+    con el mismo formato de diccionario que linear_regression_correction.
+    """
+    if correction_registry is None or not CORRECTION_REGISTRY_DIR:
+        print("Error: APPLY_REGISTERED_MODEL requiere CORRECTION_REGISTRY_DIR y el módulo 'correction_registry'.")
+        return None, None, None, None
+    registry = correction_registry.CorrectionRegistry(CORRECTION_REGISTRY_DIR)
+    model = registry.load(version)
+    if model is None:
+        return None, None, None, None
+    changed = registry.verify(model)
+    print(f"Modelo de corrección v{model['version']} ({model.get('created', '')}) cargado del registro.")
+    if changed:
+        print(f"  AVISO: Los datos de origen han cambiado desde que se registró el modelo: {', '.join(changed)}")
+    metrics = model.get('metrics', {})
+    return metrics.get('accel'), metrics.get('pcoup'), metrics.get('pcontrecoup'), model
+
+# --- API DE CORRECCIÓN SOBRE ARRAYS DE NUMPY (sin pandas) ---
+# Constantes de conversión de unidades (.rpt <-> unidades de los parámetros de corrección)
+MM_S2_TO_M_S2 = 0.001
+M_S2_TO_MM_S2 = 1000.0
+MPA_TO_MMHG = 7500.62
+MMHG_TO_MPA = 1.0 / MPA_TO_MMHG
+
+# Nº de simulaciones que se leen, corrigen y escriben juntas en la Fase 4
+CORRECTION_BATCH_SIZE = 64
+# Procesos para la Fase 4 (cada uno corrige una carpeta de simulación completa). 1 = pasada en serie.
+CORRECTION_WORKERS = os.cpu_count() or 1
+# Líneas de datos por bloque en la lectura/escritura en streaming de la pasada en paralelo
+CORRECTION_CHUNK_LINES = 50000
+# Leer los .rpt de ancho fijo de writeXYReport proyectándolos en memoria y convirtiendo solo las columnas de tiempo
+# y valor (pipeline/rpt_fixed_width.py). Si el archivo no tiene ese formato (p. ej. los *_fixed.rpt) se filtran sus líneas.
+USE_FIXED_WIDTH_RPT_READER = True
+
+# Números como los escribe Abaqus en formato ENGINEERING: también "10.E-06" (punto sin decimales antes del exponente)
+RPT_DATA_LINE_PATTERN = re.compile(r"^\s*([-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?)\s+([-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?)")
+RPT_HEADER_SKIP_PATTERN = re.compile(r"^\s*\*\*|^\s*X\s+PLOT")
+
+def read_rpt_arrays_for_correction(filepath: str):
+    """
+    Lee un archivo .rpt esperando columnas de tiempo y valor.
+    Devuelve una tupla (tiempo, valor) de arrays float64 contiguos o None si falla.
+    Si el archivo es de ancho fijo se decodifican solo esas dos columnas (rpt_fixed_width); si no,
+    las líneas de datos se filtran con la misma expresión regular de siempre y se convierten
+    de una vez con np.loadtxt.
+    """
+    if _ACTIVE_CAMPAIGN_STORE is not None and _ACTIVE_CAMPAIGN_STORE.exists(filepath):
+        data = _ACTIVE_CAMPAIGN_STORE.read_path(filepath)
+        if data is None or data.shape[1] < 2:
             print(f"    ERROR (read_rpt): No se encontraron pares de datos tiempo-valor válidos en {os.path.basename(filepath)}.")
             return None
-        df_rpt = pd.DataFrame({'Time': time_values, 'Value_Original': data_values})
-        return df_rpt
+        return np.ascontiguousarray(data[:, 0]), np.ascontiguousarray(data[:, 1])
+
+    if USE_FIXED_WIDTH_RPT_READER and tool_support is not None:
+        data = tool_support.read_fixed_width_columns(filepath, (0, 1))
+        if data is not None:
+            return np.ascontiguousarray(data[:, 0]), np.ascontiguousarray(data[:, 1])
+
+    try:
+        with _timed('rpt.read'), open(filepath, 'r', encoding='utf-8', errors='ignore') as f:
+            data_lines = [line for line in f
+                          if RPT_DATA_LINE_PATTERN.match(line) and not RPT_HEADER_SKIP_PATTERN.match(line)]
+        if stage_timing is not None:
+            stage_timing.add_file_read(filepath)
     except FileNotFoundError:
         return None # Será manejado en la función llamadora
     except Exception as e_read:
@@ -333,194 +597,712 @@ def read_rpt_file_for_correction(filepath: str):
         traceback.print_exc()
         return None
 
-# --- FUNCIÓN PRINCIPAL MODIFICADA PARA PROCESAR ARCHIVOS .RPT POR DIRECTORIO ---
-def process_simulation_rpts_in_directory_structure(
-    reports_root_folder,
-    params_accel,
-    params_pcoup,
-    params_pcontrecoup):
+    if not data_lines:
+        print(f"    ERROR (read_rpt): No se encontraron pares de datos tiempo-valor válidos en {os.path.basename(filepath)}.")
+        return None
+    return _parse_rpt_data_lines(data_lines)
+
+def _parse_rpt_data_lines(data_lines):
+    """Convierte líneas de datos ya filtradas en (tiempo, valor)."""
+    with _timed('rpt.parse'):
+        try:
+            data = np.loadtxt(data_lines, usecols=(0, 1), ndmin=2, dtype=np.float64)
+        except ValueError:
+            # Alguna línea tiene columnas extra no numéricas: se convierten solo los dos primeros campos
+            pairs = [RPT_DATA_LINE_PATTERN.match(line).groups() for line in data_lines]
+            data = np.array(pairs, dtype=np.float64)
+    return np.ascontiguousarray(data[:, 0]), np.ascontiguousarray(data[:, 1])
+
+def iter_rpt_array_chunks(filepath: str, chunk_lines: int = CORRECTION_CHUNK_LINES):
+    """Lee un .rpt en bloques de como máximo 'chunk_lines' líneas de datos, devolviendo (tiempo, valor) por bloque."""
+    buffer = []
+    with open(filepath, 'r', encoding='utf-8', errors='ignore') as f:
+        for line in f:
+            if RPT_DATA_LINE_PATTERN.match(line) and not RPT_HEADER_SKIP_PATTERN.match(line):
+                buffer.append(line)
+                if len(buffer) >= chunk_lines:
+                    yield _parse_rpt_data_lines(buffer)
+                    buffer = []
+    if buffer:
+        yield _parse_rpt_data_lines(buffer)
+    if stage_timing is not None:
+        stage_timing.add_file_read(filepath)
+
+def read_rpt_file_for_correction(filepath: str):
     """
-    Busca directorios de simulación. En cada uno:
-    1. Lee componentes de aceleración, calcula magnitud.
-    2. Corrige la magnitud de aceleración y las presiones.
-    3. Guarda los archivos corregidos.
+    Lee un archivo .rpt esperando columnas de tiempo y valor.
+    Devuelve un DataFrame de Pandas con columnas 'Time' y 'Value_Original' o None si falla.
     """
-    print(f"\n\n=== FASE 4: APLICACIÓN DE CORRECCIÓN A ARCHIVOS .RPT EN '{reports_root_folder}' ===")
+    data = read_rpt_arrays_for_correction(filepath)
+    if data is None:
+        return None
+    return pd.DataFrame({'Time': data[0], 'Value_Original': data[1]})
+
+def write_rpt_arrays(filepath: str, time_values, data_values):
+    """
+    Escribe dos columnas (tiempo, valor) en formato fijo '%.6e', igual que
+    DataFrame.to_csv(sep=' ', header=False, index=False, float_format='%.6e'),
+    formateando todo el bloque en una sola operación.
+    """
+    with _timed('rpt.write'), open(filepath, 'w') as f:
+        _write_rpt_block(f, time_values, data_values)
+    if stage_timing is not None:
+        stage_timing.add_file_written(filepath)
+
+def _write_rpt_block(f, time_values, data_values):
+    n_rows = len(time_values)
+    interleaved = np.empty(2 * n_rows, dtype=np.float64)
+    interleaved[0::2] = time_values
+    interleaved[1::2] = data_values
+    f.write(('%.6e %.6e\n' * n_rows) % tuple(interleaved.tolist()))
+
+def apply_linear_correction_inplace(values, correction_params, rpt_to_param_unit=1.0, param_to_rpt_unit=1.0):
+    """
+    Aplica slope * x + intercept (parámetros de linear_regression_correction, en sus unidades)
+    a un array en unidades del .rpt, sin crear arrays temporales:
+        x_rpt <- (slope * (x_rpt * rpt_to_param_unit) + intercept) * param_to_rpt_unit
+    """
+    slope = correction_params['slope']
+    intercept = correction_params['intercept']
+    np.multiply(values, slope * rpt_to_param_unit * param_to_rpt_unit, out=values)
+    np.add(values, intercept * param_to_rpt_unit, out=values)
+    return values
+
+def acceleration_magnitude_inplace(a1, a2, a3):
+    """Magnitud sqrt(a1² + a2² + a3²) reutilizando los buffers de las componentes (se sobrescriben)."""
+    with _timed('accel.magnitude'):
+        np.square(a1, out=a1)
+        a1 += np.square(a2, out=a2)
+        a1 += np.square(a3, out=a3)
+        return np.sqrt(a1, out=a1)
+
+def correct_simulation_batch(batch, params_accel, params_pcoup, params_pcontrecoup):
+    """
+    Corrige en memoria un lote de simulaciones. Cada elemento de 'batch' es un diccionario con:
+      'accel': (tiempo, a1, a2, a3) en unidades del .rpt (mm/s²) o None
+      'pcoup', 'pcontrecoup': (tiempo, presión en MPa) o None
+    Añade 'accel_magnitude_fixed' (tiempo, magnitud corregida en mm/s²) y sustituye las presiones
+    por sus valores corregidos (MPa). Todas las operaciones se hacen sobre los arrays leídos; con
+    pipeline/accel_batch.py la magnitud corregida de todo el lote sale de una sola operación.
+    """
+    if params_accel:
+        with_accel = [entry for entry in batch if entry.get('accel') is not None]
+        if accel_batch is not None and with_accel:
+            _correct_accel_magnitudes_stacked(with_accel, params_accel)
+        for entry in (e for e in with_accel if e['accel'] is not None): # Sin accel_batch, una a una
+            time_vector, a1, a2, a3 = entry['accel']
+            magnitude = acceleration_magnitude_inplace(a1, a2, a3) # mm/s²
+            apply_linear_correction_inplace(magnitude, params_accel, MM_S2_TO_M_S2, M_S2_TO_MM_S2)
+            entry['accel_magnitude_fixed'] = (time_vector, magnitude)
+            entry['accel'] = None
+    for entry in batch:
+        for key, params in (('pcoup', params_pcoup), ('pcontrecoup', params_pcontrecoup)):
+            if params and entry.get(key) is not None:
+                apply_linear_correction_inplace(entry[key][1], params, MPA_TO_MMHG, MMHG_TO_MPA)
+    return batch
+
+def _correct_accel_magnitudes_stacked(entries, params_accel):
+    """
+    Magnitud corregida (mm/s²) de las entradas del lote con el mismo nº de instantes, apiladas en un array
+    (3, n_sims, n_t): slope * |a| + intercept en una sola pasada. Deja 'accel' a None en las que calcula.
+    """
+    slope = params_accel['slope'] # (slope * (|a| * MM_S2_TO_M_S2) + intercept) * M_S2_TO_MM_S2
+    intercept_mm_s2 = params_accel['intercept'] * M_S2_TO_MM_S2
+    for group in accel_batch.group_by_length(entries, lambda entry: len(entry['accel'][0])).values():
+        with _timed('accel.magnitude'):
+            stack = accel_batch.stack_components([entry['accel'][1:] for entry in group])
+            magnitudes = accel_batch.batched_magnitude(stack, slope=slope, intercept=intercept_mm_s2)
+        for entry, magnitude in zip(group, magnitudes):
+            entry['accel_magnitude_fixed'] = (entry['accel'][0], magnitude)
+            entry['accel'] = None
+
+def _load_simulation_for_correction(sim_dir_path, sim_dir_name, params_accel, params_pcoup, params_pcontrecoup, counters):
+    """Lee las series de una simulación necesarias para la corrección (Fase 4)."""
+    entry = {'sim_dir_path': sim_dir_path, 'sim_dir_name': sim_dir_name, 'accel': None, 'pcoup': None, 'pcontrecoup': None}
+
+    # --- Componentes de Aceleración ---
+    if params_accel:
+        components = []
+        time_vector_ref = None
+        components_ok = True
+        for comp_file_base in ACCEL_COMPONENT_RPT_FILES:
+            comp_file_path = os.path.join(sim_dir_path, comp_file_base)
+            if not rpt_exists(comp_file_path):
+                print(f"    AVISO: Archivo de componente de aceleración {comp_file_base} no encontrado en {sim_dir_name}. No se puede calcular magnitud.")
+                components_ok = False
+                break
+            data_comp = read_rpt_arrays_for_correction(comp_file_path)
+            if data_comp is None or len(data_comp[0]) == 0:
+                print(f"    AVISO: No se pudieron leer datos del componente {comp_file_base}. No se puede calcular magnitud.")
+                components_ok = False
+                break
+            time_comp, values_comp = data_comp # valores en mm/s^2
+            if time_vector_ref is None:
+                time_vector_ref = time_comp
+            elif len(time_vector_ref) != len(time_comp) or \
+                 not np.allclose(time_vector_ref, time_comp, atol=1e-7, rtol=1e-7): # Tolerancia para comparación de flotantes
+                print(f"    ERROR: Vectores de tiempo no coinciden entre componentes de aceleración en {sim_dir_name}. No se puede calcular magnitud.")
+                components_ok = False
+                break
+            components.append(values_comp)
+
+        if components_ok and time_vector_ref is not None and len(components) == 3:
+            counters['accel_mag'] += 1
+            entry['accel'] = (time_vector_ref, components[0], components[1], components[2])
+        elif components_ok:
+            print(f"    INFO: No se procesó la magnitud de aceleración para {sim_dir_name} debido a falta de datos o inconsistencias.")
+    else:
+        print(f"  ADVERTENCIA: No hay parámetros de corrección para Aceleración. Se omitirá el cálculo y corrección de magnitud.")
+
+    # --- Presiones Coup / Contrecoup ---
+    for key, params, rpt_file, label in (('pcoup', params_pcoup, PCOUP_RPT_FILE, 'Coup'),
+                                         ('pcontrecoup', params_pcontrecoup, PCONTRECOUP_RPT_FILE, 'Contrecoup')):
+        if params and rpt_file:
+            rpt_file_path = os.path.join(sim_dir_path, rpt_file)
+            if rpt_exists(rpt_file_path):
+                counters['pressure'] += 1
+                print(f"  Procesando archivo de Presión {label}: {rpt_file}")
+                data_rpt = read_rpt_arrays_for_correction(rpt_file_path)
+                if data_rpt is not None and len(data_rpt[0]) > 0:
+                    entry[key] = data_rpt
+                else:
+                    print(f"    ADVERTENCIA: No se pudieron leer datos de {rpt_file}. Omitiendo corrección.")
+            else:
+                print(f"    INFO: Archivo {rpt_file} no encontrado en {sim_dir_name}. Omitiendo.")
+        elif not rpt_file:
+            print(f"  INFO: No se ha especificado el archivo de presión {label.lower()}. Omitiendo corrección de presión {label.lower()}.")
+        else:
+            print(f"  ADVERTENCIA: No hay parámetros de corrección para Presión {label}. Se omitirá {rpt_file}.")
+    return entry
+
+def _write_corrected_simulation(entry, counters):
+    """Escribe los .rpt corregidos de una simulación ya procesada por correct_simulation_batch."""
+    sim_dir_path = entry['sim_dir_path']
+    if entry.get('accel_magnitude_fixed') is not None:
+        print(f"  Guardando magnitud de aceleración corregida para {entry['sim_dir_name']}...")
+        output_rpt_path = os.path.join(sim_dir_path, OUTPUT_MAGNITUDE_ACCEL_FIXED_RPT_FILE)
+        try:
+            write_rpt_arrays(output_rpt_path, *entry['accel_magnitude_fixed'])
+            print(f"    Magnitud de aceleración corregida guardada en: {OUTPUT_MAGNITUDE_ACCEL_FIXED_RPT_FILE}")
+            counters['corrected'] += 1
+        except Exception as e_save:
+            print(f"    ERROR al guardar magnitud de aceleración corregida '{OUTPUT_MAGNITUDE_ACCEL_FIXED_RPT_FILE}': {e_save}")
+
+    for key, rpt_file in (('pcoup', PCOUP_RPT_FILE), ('pcontrecoup', PCONTRECOUP_RPT_FILE)):
+        if entry.get(key) is None:
+            continue
+        base, ext = os.path.splitext(rpt_file)
+        output_rpt_name = f"{base}_fixed{ext}"
+        try:
+            write_rpt_arrays(os.path.join(sim_dir_path, output_rpt_name), *entry[key])
+            print(f"    Archivo corregido guardado en: {output_rpt_name}")
+            counters['corrected'] += 1
+        except Exception as e_save:
+            print(f"    ERROR al guardar archivo corregido '{output_rpt_name}': {e_save}")
+
+# --- EXTRACCIÓN DE LAS COLUMNAS DE SIMULACIÓN (PICOS) DESDE LOS .RPT ---
+def _stack_padded(arrays):
+    """Apila series de distinta longitud en una matriz (n_series, n_max) rellenando con NaN."""
+    n_max = max(len(a) for a in arrays)
+    matrix = np.full((len(arrays), n_max), np.nan)
+    for i, a in enumerate(arrays):
+        matrix[i, :len(a)] = a
+    return matrix
+
+def peak_values_and_times(time_matrix, value_matrix, signed=False):
+    """
+    Pico de cada fila de 'value_matrix' y su instante en 'time_matrix'.
+    Con signed=True se devuelve el valor con signo de mayor valor absoluto (presión de contragolpe negativa).
+    """
+    search = np.abs(value_matrix) if signed else value_matrix
+    idx = np.nanargmax(search, axis=1)
+    rows = np.arange(value_matrix.shape[0])
+    return value_matrix[rows, idx], time_matrix[rows, idx]
+
+def match_simulations_to_ensayos(sim_names, df_ensayos):
+    """Asigna cada carpeta de simulación a un N_Ensayo por nombre (ENSAYO_ID_PATTERN) o por velocidad más próxima."""
+    ensayo_ids = df_ensayos['N_Ensayo'].astype(str).tolist()
+    known_ids = {str(int(e)) if e.isdigit() else e: e for e in ensayo_ids}
+    ensayo_velocities = df_ensayos['v_cabeza_m_s'].to_numpy(dtype=np.float64)
+    matches = {}
+    for sim_name in sim_names:
+        match_id = re.search(ENSAYO_ID_PATTERN, sim_name, re.IGNORECASE)
+        if match_id and str(int(match_id.group(1))) in known_ids:
+            matches[sim_name] = known_ids[str(int(match_id.group(1)))]
+            continue
+        match_vel = re.search(r'_?[vV](\d+)', sim_name)
+        if match_vel and np.isfinite(ensayo_velocities).any():
+            differences = np.abs(ensayo_velocities - int(match_vel.group(1)) / 1000.0)
+            best = int(np.nanargmin(differences))
+            if differences[best] <= ENSAYO_VELOCITY_TOLERANCE_M_S:
+                matches[sim_name] = ensayo_ids[best]
+                continue
+        print(f"  AVISO: No se pudo asociar la simulación '{sim_name}' a ningún N_Ensayo. Se omite.")
+    return matches
+
+def extract_sim_columns_from_reports(reports_root_folder, df_ensayos):
+    """
+    Calcula Acc_Sim_m_s2, T_pico_Sim_ms, PCoup_Sim_mmHg y PContrecoup_Sim_mmHg de cada simulación
+    a partir de sus .rpt. Las series se apilan en matrices y los picos se calculan de una vez para todas.
+    Devuelve un DataFrame con una fila por N_Ensayo, o None si no hay datos.
+    """
+    print(f"\nExtrayendo columnas de simulación desde los .rpt de '{reports_root_folder}'...")
     if not os.path.isdir(reports_root_folder):
         print(f"Error: La carpeta raíz de reportes '{reports_root_folder}' no existe.")
-        return
+        return None
+    sim_names = sorted(d for d in os.listdir(reports_root_folder) if os.path.isdir(os.path.join(reports_root_folder, d)))
+    matches = match_simulations_to_ensayos(sim_names, df_ensayos)
+    if not matches:
+        print("Error: Ninguna carpeta de simulación se pudo asociar a un ensayo.")
+        return None
 
+    df_sim = pd.DataFrame({'N_Ensayo': list(matches.values()), 'Simulacion': list(matches.keys())})
+    # Magnitud de aceleración (.rpt en mm/s², tiempo en s)
+    accel_rows, accel_t, accel_mag = [], [], []
+    for row, sim_name in enumerate(df_sim['Simulacion']):
+        components = [read_rpt_arrays_for_correction(os.path.join(reports_root_folder, sim_name, f)) for f in ACCEL_COMPONENT_RPT_FILES]
+        if any(c is None for c in components) or len({len(c[0]) for c in components}) != 1:
+            print(f"  AVISO: Componentes de aceleración ausentes o de distinta longitud en '{sim_name}'.")
+            continue
+        accel_rows.append(row)
+        accel_t.append(components[0][0])
+        accel_mag.append(acceleration_magnitude_inplace(components[0][1], components[1][1], components[2][1]))
+    df_sim['Acc_Sim_m_s2'] = np.nan
+    df_sim['T_pico_Sim_ms'] = np.nan
+    if accel_rows:
+        peaks, times = peak_values_and_times(_stack_padded(accel_t), _stack_padded(accel_mag))
+        df_sim.loc[accel_rows, 'Acc_Sim_m_s2'] = peaks * MM_S2_TO_M_S2
+        df_sim.loc[accel_rows, 'T_pico_Sim_ms'] = times * 1000.0
+
+    # Presiones (.rpt en MPa): pico con signo de mayor valor absoluto
+    for rpt_file, column in ((PCOUP_RPT_FILE, 'PCoup_Sim_mmHg'), (PCONTRECOUP_RPT_FILE, 'PContrecoup_Sim_mmHg')):
+        df_sim[column] = np.nan
+        rows, times, values = [], [], []
+        for row, sim_name in enumerate(df_sim['Simulacion']):
+            data = read_rpt_arrays_for_correction(os.path.join(reports_root_folder, sim_name, rpt_file)) if rpt_file else None
+            if data is None:
+                continue
+            rows.append(row); times.append(data[0]); values.append(data[1])
+        if rows:
+            peaks, _ = peak_values_and_times(_stack_padded(times), _stack_padded(values), signed=True)
+            df_sim.loc[rows, column] = peaks * MPA_TO_MMHG
+
+    duplicated = df_sim['N_Ensayo'].duplicated(keep='first')
+    if duplicated.any():
+        print(f"  AVISO: Varias simulaciones para los ensayos {sorted(set(df_sim.loc[duplicated, 'N_Ensayo']))}. Se usa la primera.")
+        df_sim = df_sim[~duplicated]
+    print(f"Columnas de simulación extraídas para {len(df_sim)} ensayos.")
     try:
-        simulation_dirs = [d for d in os.listdir(reports_root_folder)
-                           if os.path.isdir(os.path.join(reports_root_folder, d))]
+        df_sim.to_csv(SIM_COLUMNS_OUTPUT_FILE, index=False, sep=';', decimal=',', float_format='%.4f')
+        print(f"Valores extraídos guardados en: {SIM_COLUMNS_OUTPUT_FILE}")
     except Exception as e:
-        print(f"Error al listar directorios en '{reports_root_folder}': {e}")
-        return
+        print(f"AVISO: No se pudo guardar '{SIM_COLUMNS_OUTPUT_FILE}': {e}")
+    return df_sim
+
+def replace_sim_columns(df, df_sim, sim_columns):
+    """Sustituye (o añade) las columnas de simulación de 'df' por las extraídas, uniendo por N_Ensayo."""
+    df = df.drop(columns=[c for c in sim_columns if c in df.columns])
+    return pd.merge(df, df_sim[['N_Ensayo'] + sim_columns], on='N_Ensayo', how='left')
+
+# --- AJUSTE EN EL DOMINIO DEL TIEMPO (FUNCIÓN DE TRANSFERENCIA) ---
+# Métrica -> unidades de la curva experimental. Las series simuladas se convierten a estas unidades y a ms.
+TRANSFER_FIT_METRICS = {'accel': 'm/s2', 'pcoup': 'mmHg', 'pcontrecoup': 'mmHg'}
+
+def load_nahum_trace(ensayo, metric):
+    """Curva experimental (tiempo_ms, valor) de un ensayo, o None si no existe."""
+    trace_path = os.path.join(NAHUM_TRACES_DIR, NAHUM_TRACE_FILE_TEMPLATE.format(ensayo=ensayo, metric=metric))
+    if not os.path.exists(trace_path):
+        return None
+    try:
+        df_trace = pd.read_csv(trace_path, sep=';', decimal=',').apply(pd.to_numeric, errors='coerce').dropna()
+    except Exception as e:
+        print(f"  AVISO: No se pudo leer la curva experimental '{trace_path}': {e}")
+        return None
+    if df_trace.shape[0] < 2 or df_trace.shape[1] < 2:
+        return None
+    return df_trace.iloc[:, 0].to_numpy(dtype=np.float64), df_trace.iloc[:, 1].to_numpy(dtype=np.float64)
 
-    if not simulation_dirs:
-        print(f"No se encontraron directorios de simulación en '{reports_root_folder}'.")
-        return
+def load_simulation_trace(sim_dir_path, metric):
+    """Serie simulada (tiempo_ms, valor) en las unidades de la curva experimental, o None."""
+    if metric == 'accel':
+        components = [read_rpt_arrays_for_correction(os.path.join(sim_dir_path, f)) for f in ACCEL_COMPONENT_RPT_FILES]
+        if any(c is None for c in components) or len({len(c[0]) for c in components}) != 1:
+            return None
+        magnitude = acceleration_magnitude_inplace(components[0][1], components[1][1], components[2][1])
+        return components[0][0] * 1000.0, magnitude * MM_S2_TO_M_S2
+    rpt_file = PCOUP_RPT_FILE if metric == 'pcoup' else PCONTRECOUP_RPT_FILE
+    data = read_rpt_arrays_for_correction(os.path.join(sim_dir_path, rpt_file)) if rpt_file else None
+    if data is None:
+        return None
+    return data[0] * 1000.0, data[1] * MPA_TO_MMHG
 
-    print(f"Se encontraron {len(simulation_dirs)} directorios de simulación para procesar.")
-    total_files_processed_accel_mag = 0
-    total_files_processed_pressure = 0
-    total_files_corrected = 0
-
-    # Constantes de conversión de unidades
-    MM_S2_TO_M_S2 = 0.001
-    M_S2_TO_MM_S2 = 1000.0
-    MPA_TO_MMHG = 7500.62
-    MMHG_TO_MPA = 1.0 / MPA_TO_MMHG
-
-    for sim_dir_name in simulation_dirs:
-        sim_dir_path = os.path.join(reports_root_folder, sim_dir_name)
-        print(f"\nProcesando simulación en directorio: {sim_dir_path}")
-
-        # --- Procesar y Corregir Magnitud de Aceleración ---
-        if params_accel:
-            accel_components_data = {}
-            time_vector_ref = None
-            components_ok = True
-
-            for comp_file_base in ACCEL_COMPONENT_RPT_FILES:
-                comp_file_path = os.path.join(sim_dir_path, comp_file_base)
-                if not os.path.exists(comp_file_path):
-                    print(f"    AVISO: Archivo de componente de aceleración {comp_file_base} no encontrado en {sim_dir_name}. No se puede calcular magnitud.")
-                    components_ok = False
-                    break
-                
-                df_comp = read_rpt_file_for_correction(comp_file_path)
-                if df_comp is None or df_comp.empty:
-                    print(f"    AVISO: No se pudieron leer datos del componente {comp_file_base}. No se puede calcular magnitud.")
-                    components_ok = False
-                    break
-
-                # Guardar datos del componente (original en mm/s^2)
-                component_key = comp_file_base.split('_')[0] # A1, A2, A3
-                accel_components_data[component_key] = df_comp['Value_Original'].values # en mm/s^2
-
-                if time_vector_ref is None:
-                    time_vector_ref = df_comp['Time'].values
-                elif len(time_vector_ref) != len(df_comp['Time'].values) or \
-                     not np.allclose(time_vector_ref, df_comp['Time'].values, atol=1e-7, rtol=1e-7): # Tolerancia para comparación de flotantes
-                    print(f"    ERROR: Vectores de tiempo no coinciden entre componentes de aceleración en {sim_dir_name}. No se puede calcular magnitud.")
-                    components_ok = False
-                    break
-            
-            if components_ok and time_vector_ref is not None and \
-               all(key in accel_components_data for key in ['A1', 'A2', 'A3']):
-                total_files_processed_accel_mag += 1
-                print(f"  Calculando magnitud de aceleración para {sim_dir_name}...")
-                
-                # Convertir componentes a m/s^2 para cálculo de magnitud y corrección
-                a1_m_s2 = accel_components_data['A1'] * MM_S2_TO_M_S2
-                a2_m_s2 = accel_components_data['A2'] * MM_S2_TO_M_S2
-                a3_m_s2 = accel_components_data['A3'] * MM_S2_TO_M_S2
-                
-                magnitude_accel_m_s2 = np.sqrt(a1_m_s2**2 + a2_m_s2**2 + a3_m_s2**2)
-                
-                # Aplicar corrección a la magnitud (que está en m/s^2)
-                slope = params_accel['slope']
-                intercept = params_accel['intercept']
-                magnitude_accel_corrected_m_s2 = slope * magnitude_accel_m_s2 + intercept
-                
-                # Convertir magnitud corregida de nuevo a mm/s^2 para guardar
-                magnitude_accel_corrected_rpt_unit = magnitude_accel_corrected_m_s2 * M_S2_TO_MM_S2
-                
-                # Crear DataFrame para guardar
-                df_magnitude_corrected = pd.DataFrame({
-                    'Time': time_vector_ref,
-                    'Corrected_Magnitude_Acc_mm_s2': magnitude_accel_corrected_rpt_unit
-                })
-                
-                output_rpt_path = os.path.join(sim_dir_path, OUTPUT_MAGNITUDE_ACCEL_FIXED_RPT_FILE)
-                try:
-                    df_magnitude_corrected.to_csv(output_rpt_path, sep=' ', header=False, index=False, float_format='%.6e')
-                    print(f"    Magnitud de aceleración corregida guardada en: {OUTPUT_MAGNITUDE_ACCEL_FIXED_RPT_FILE}")
-                    total_files_corrected += 1
-                except Exception as e_save:
-                    print(f"    ERROR al guardar magnitud de aceleración corregida '{OUTPUT_MAGNITUDE_ACCEL_FIXED_RPT_FILE}': {e_save}")
-            elif components_ok : # pero algo falló con los datos
-                 print(f"    INFO: No se procesó la magnitud de aceleración para {sim_dir_name} debido a falta de datos o inconsistencias.")
-
-        else: # params_accel es None
-            print(f"  ADVERTENCIA: No hay parámetros de corrección para Aceleración. Se omitirá el cálculo y corrección de magnitud.")
-
-        # --- Procesar archivo de Presión Coup ---
-        if params_pcoup and PCOUP_RPT_FILE:
-            rpt_file_path = os.path.join(sim_dir_path, PCOUP_RPT_FILE)
-            if os.path.exists(rpt_file_path):
-                total_files_processed_pressure += 1
-                print(f"  Procesando archivo de Presión Coup: {PCOUP_RPT_FILE}")
-                df_rpt = read_rpt_file_for_correction(rpt_file_path)
-                if df_rpt is not None and not df_rpt.empty:
-                    df_rpt['Value_Original_param_unit'] = df_rpt['Value_Original'] * MPA_TO_MMHG
-                    slope = params_pcoup['slope']
-                    intercept = params_pcoup['intercept']
-                    df_rpt['Value_Corrected_param_unit'] = slope * df_rpt['Value_Original_param_unit'] + intercept
-                    df_rpt['Value_Corrected_rpt_unit'] = df_rpt['Value_Corrected_param_unit'] * MMHG_TO_MPA
-                    base, ext = os.path.splitext(PCOUP_RPT_FILE)
-                    output_rpt_name = f"{base}_fixed{ext}"
-                    output_rpt_path = os.path.join(sim_dir_path, output_rpt_name)
-                    try:
-                        df_to_save = df_rpt[['Time', 'Value_Corrected_rpt_unit']].copy()
-                        df_to_save.columns = ['Time', 'Corrected_Value_MPa']
-                        df_to_save.to_csv(output_rpt_path, sep=' ', header=False, index=False, float_format='%.6e')
-                        print(f"    Archivo corregido guardado en: {output_rpt_name}")
-                        total_files_corrected += 1
-                    except Exception as e_save:
-                        print(f"    ERROR al guardar archivo corregido '{output_rpt_name}': {e_save}")
-                else:
-                    print(f"    ADVERTENCIA: No se pudieron leer datos de {PCOUP_RPT_FILE}. Omitiendo corrección.")
-            else:
-                print(f"    INFO: Archivo {PCOUP_RPT_FILE} no encontrado en {sim_dir_name}. Omitiendo.")
-        elif not PCOUP_RPT_FILE:
-             print(f"  INFO: No se ha especificado PCOUP_RPT_FILE. Omitiendo corrección de presión coup.")
+def resample_trace_pairs(pairs, n_points):
+    """
+    Lleva todas las parejas (simulación, experimento) a una rejilla uniforme común (la ventana de tiempo
+    que cubren todas las curvas). Devuelve (rejilla, X simuladas, Y experimentales) con X, Y de forma (n, n_points).
+    """
+    t_start = max(max(ts[0], te[0]) for (ts, _), (te, _) in pairs)
+    t_end = min(min(ts[-1], te[-1]) for (ts, _), (te, _) in pairs)
+    if t_end <= t_start:
+        return None
+    grid = np.linspace(t_start, t_end, n_points)
+    X = np.array([np.interp(grid, ts, xs) for (ts, xs), _ in pairs])
+    Y = np.array([np.interp(grid, te, ye) for _, (te, ye) in pairs])
+    return grid, X, Y
+
+def estimate_lags_fft(X, Y, dt, max_lag):
+    """
+    Retardo de cada fila de Y respecto a X por correlación cruzada con FFT (todas las filas a la vez).
+    Las series se prolongan con su último valor en lugar de con ceros, porque no siempre vuelven a cero.
+    """
+    n = X.shape[1]
+    n_fft = 1 << (2 * n - 1).bit_length()
+    X = np.pad(X, ((0, 0), (0, n_fft - n)), mode='edge')
+    Y = np.pad(Y, ((0, 0), (0, n_fft - n)), mode='edge')
+    correlation = np.fft.irfft(np.fft.rfft(Y, axis=1) * np.conj(np.fft.rfft(X, axis=1)), n_fft, axis=1)
+    shifts = np.arange(n_fft)
+    shifts = np.where(shifts < n, shifts, shifts - n_fft)
+    correlation[:, np.abs(shifts) * dt > max_lag] = -np.inf
+    return shifts[np.argmax(correlation, axis=1)] * dt
+
+def warp_traces(X, grid, lags, scales):
+    """
+    Evalúa x_i(escala_s * (t - retardo_is)) para todas las simulaciones y escalas con interpolación lineal.
+    'lags' tiene forma (n_sims, n_escalas). Devuelve un array (n_sims, n_escalas, n_t).
+    Fuera de la ventana se repite el primer/último valor.
+    """
+    n_t = X.shape[1]
+    dt = grid[1] - grid[0]
+    positions = (scales[None, :, None] * (grid[None, None, :] - lags[:, :, None]) - grid[0]) / dt
+    np.clip(positions, 0.0, n_t - 1, out=positions)
+    i0 = np.minimum(positions.astype(np.intp), n_t - 2)
+    frac = positions - i0
+    rows = np.arange(X.shape[0])[:, None, None]
+    return X[rows, i0] * (1.0 - frac) + X[rows, i0 + 1] * frac
+
+def fit_transfer_function(pairs):
+    """
+    Ajusta nahum(t) = amplitud * sim(escala * (t - retardo)) para todas las simulaciones a la vez.
+    Para cada escala de la rejilla, el retardo de cada pareja sale de la correlación cruzada de la serie ya
+    escalada con la experimental, y la amplitud común es la solución de mínimos cuadrados sin término
+    independiente sobre todas las curvas juntas. Se elige la escala con menor error.
+    Devuelve (parámetros, amplitudes por simulación, retardos por simulación).
+    """
+    resampled = resample_trace_pairs(pairs, TRANSFER_FIT_GRID_POINTS)
+    if resampled is None:
+        return None
+    grid, X, Y = resampled
+    n_sims, n_t = X.shape
+    dt = grid[1] - grid[0]
+    scales = np.linspace(*TRANSFER_FIT_TIME_SCALES)
+    scaled = warp_traces(X, grid, np.zeros((n_sims, len(scales))), scales)
+    coarse_lags = estimate_lags_fft(scaled.reshape(-1, n_t), np.repeat(Y, len(scales), axis=0), dt,
+                                    TRANSFER_FIT_MAX_LAG_MS).reshape(n_sims, len(scales))
+
+    # Refinamiento: alrededor del retardo de la correlación, el que mejor explica cada curva por mínimos cuadrados
+    best_explained = np.full(coarse_lags.shape, -np.inf)
+    lags = coarse_lags.copy()
+    xy_per_sim = np.zeros(coarse_lags.shape)
+    xx_per_sim = np.zeros(coarse_lags.shape)
+    for offset in range(-TRANSFER_FIT_LAG_REFINE_SAMPLES, TRANSFER_FIT_LAG_REFINE_SAMPLES + 1):
+        candidate_lags = coarse_lags + offset * dt
+        W = warp_traces(X, grid, candidate_lags, scales)
+        xy_candidate = np.einsum('nst,nt->ns', W, Y)
+        xx_candidate = np.einsum('nst,nst->ns', W, W)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            explained = np.where(xx_candidate > 0, xy_candidate ** 2 / xx_candidate, -np.inf)
+        improved = explained > best_explained
+        best_explained[improved] = explained[improved]
+        lags[improved] = candidate_lags[improved]
+        xy_per_sim[improved] = xy_candidate[improved]
+        xx_per_sim[improved] = xx_candidate[improved]
+
+    xy, xx = xy_per_sim.sum(axis=0), xx_per_sim.sum(axis=0)
+    yy = np.einsum('nt,nt->', Y, Y)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        sse = np.where(xx > 0, yy - xy ** 2 / xx, np.inf)
+    best = int(np.argmin(sse))
+    amplitude = xy[best] / xx[best]
+    ss_tot = np.sum((Y - Y.mean()) ** 2)
+    params = {
+        'model': 'transfer', 'amplitude': float(amplitude), 'time_scale': float(scales[best]),
+        'lag_ms': float(np.median(lags[:, best])), 'r_squared': float(1.0 - sse[best] / ss_tot) if ss_tot > 0 else float('nan'),
+        'n_sims': int(X.shape[0]),
+    }
+    with np.errstate(divide='ignore', invalid='ignore'):
+        amplitudes_per_sim = np.where(xx_per_sim[:, best] > 0, xy_per_sim[:, best] / xx_per_sim[:, best], np.nan)
+    return params, amplitudes_per_sim, lags[:, best]
+
+def apply_transfer_function(time_ms, values, transfer_params):
+    """Aplica amplitud * x(escala * (t - retardo)) sobre la rejilla de tiempo original de la serie."""
+    warped_time = transfer_params['time_scale'] * (time_ms - transfer_params['lag_ms'])
+    return transfer_params['amplitude'] * np.interp(warped_time, time_ms, values)
+
+def fit_transfer_functions(reports_root_folder, df_ensayos):
+    """Ajusta una función de transferencia por métrica con las simulaciones que tienen curva experimental."""
+    if not NAHUM_TRACES_DIR or not os.path.isdir(NAHUM_TRACES_DIR):
+        print(f"AVISO: La carpeta de curvas experimentales '{NAHUM_TRACES_DIR}' no existe. No se ajusta en el dominio del tiempo.")
+        return {}
+    if not os.path.isdir(reports_root_folder):
+        print(f"Error: La carpeta raíz de reportes '{reports_root_folder}' no existe.")
+        return {}
+    sim_names = sorted(d for d in os.listdir(reports_root_folder) if os.path.isdir(os.path.join(reports_root_folder, d)))
+    matches = match_simulations_to_ensayos(sim_names, df_ensayos)
+
+    transfer_functions = {}
+    detail_rows = []
+    for metric, units in TRANSFER_FIT_METRICS.items():
+        pairs, pair_names = [], []
+        for sim_name, ensayo in matches.items():
+            experimental = load_nahum_trace(ensayo, metric)
+            simulated = load_simulation_trace(os.path.join(reports_root_folder, sim_name), metric) if experimental else None
+            if simulated is not None:
+                pairs.append((simulated, experimental))
+                pair_names.append((sim_name, ensayo))
+        if not pairs:
+            print(f"  {metric}: sin parejas simulación/experimento. Se omite.")
+            continue
+        fit = fit_transfer_function(pairs)
+        if fit is None:
+            print(f"  {metric}: las curvas no comparten ventana de tiempo. Se omite.")
+            continue
+        params, amplitudes, lags = fit
+        params['units'] = units
+        transfer_functions[metric] = params
+        print(f"  {metric}: amplitud={params['amplitude']:.4f}, escala de tiempo={params['time_scale']:.3f}, "
+              f"retardo={params['lag_ms']:.3f} ms, R²={params['r_squared']:.4f} ({params['n_sims']} simulaciones)")
+        for (sim_name, ensayo), amplitude_i, lag_i in zip(pair_names, amplitudes, lags):
+            detail_rows.append({'Metrica': metric, 'N_Ensayo': ensayo, 'Simulacion': sim_name,
+                                'Amplitud_individual': amplitude_i, 'Retardo_ms': lag_i})
+    if detail_rows:
+        detail_path = os.path.join(RESULTS_FOLDER, 'ajuste_funcion_transferencia.csv')
+        pd.DataFrame(detail_rows).to_csv(detail_path, index=False, sep=';', decimal=',')
+        print(f"Detalle del ajuste por simulación guardado en: {detail_path}")
+    return transfer_functions
+
+# --- PASADA DE CORRECCIÓN EN PARALELO Y EN STREAMING (un proceso por carpeta de simulación) ---
+def _stream_corrected_rpt(output_path, chunk_source):
+    """
+    Escribe los bloques (tiempo, valor) de 'chunk_source' en un temporal y lo renombra al terminar,
+    de modo que nunca queda un archivo corregido a medias. Devuelve True si se escribió algún dato.
+    """
+    tmp_path = output_path + '.tmp'
+    rows_written = 0
+    try:
+        with open(tmp_path, 'w') as f:
+            for time_chunk, value_chunk in chunk_source:
+                _write_rpt_block(f, time_chunk, value_chunk)
+                rows_written += len(time_chunk)
+        if rows_written == 0:
+            os.remove(tmp_path)
+            return False
+        os.replace(tmp_path, output_path)
+        if stage_timing is not None:
+            stage_timing.add_file_written(output_path)
+        return True
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+def _corrected_magnitude_chunks(component_paths, sim_dir_name, params_accel, counters):
+    """
+    Magnitud corregida por bloques. Al terminar de leer los tres componentes con tiempos coincidentes suma la
+    simulación a counters['accel_mag'], igual que la pasada en serie al cargarlos.
+    """
+    iterators = [iter_rpt_array_chunks(path) for path in component_paths]
+    any_chunk = False
+    for chunks in zip_longest(*iterators):
+        if any(chunk is None for chunk in chunks) or len({len(chunk[0]) for chunk in chunks}) != 1:
+            raise ValueError(f"Vectores de tiempo no coinciden entre componentes de aceleración en {sim_dir_name}.")
+        time_chunk = chunks[0][0]
+        if not all(np.allclose(time_chunk, chunk[0], atol=1e-7, rtol=1e-7) for chunk in chunks[1:]):
+            raise ValueError(f"Vectores de tiempo no coinciden entre componentes de aceleración en {sim_dir_name}.")
+        magnitude = acceleration_magnitude_inplace(chunks[0][1], chunks[1][1], chunks[2][1])
+        any_chunk = True
+        yield time_chunk, apply_linear_correction_inplace(magnitude, params_accel, MM_S2_TO_M_S2, M_S2_TO_MM_S2)
+    if any_chunk:
+        counters['accel_mag'] += 1
+
+def _corrected_pressure_chunks(rpt_file_path, params):
+    for time_chunk, value_chunk in iter_rpt_array_chunks(rpt_file_path):
+        yield time_chunk, apply_linear_correction_inplace(value_chunk, params, MPA_TO_MMHG, MMHG_TO_MPA)
+
+def correct_simulation_directory(sim_dir_path, params_accel, params_pcoup, params_pcontrecoup):
+    """
+    Corrige una carpeta de simulación de principio a fin leyendo y escribiendo por bloques.
+    Devuelve (contadores, líneas de log) para que el proceso principal los agregue e imprima en orden.
+    """
+    sim_dir_name = os.path.basename(sim_dir_path)
+    counters = {'accel_mag': 0, 'pressure': 0, 'corrected': 0}
+    log = [f"\nProcesando simulación en directorio: {sim_dir_path}"]
+
+    if params_accel:
+        component_paths = [os.path.join(sim_dir_path, name) for name in ACCEL_COMPONENT_RPT_FILES]
+        missing = [os.path.basename(p) for p in component_paths if not os.path.exists(p)]
+        if missing:
+            log.append(f"    AVISO: Archivo de componente de aceleración {missing[0]} no encontrado en {sim_dir_name}. No se puede calcular magnitud.")
         else:
-            print(f"  ADVERTENCIA: No hay parámetros de corrección para Presión Coup. Se omitirá {PCOUP_RPT_FILE}.")
-
-        # --- Procesar archivo de Presión Contrecoup ---
-        if params_pcontrecoup and PCONTRECOUP_RPT_FILE:
-            rpt_file_path = os.path.join(sim_dir_path, PCONTRECOUP_RPT_FILE)
-            if os.path.exists(rpt_file_path):
-                total_files_processed_pressure += 1
-                print(f"  Procesando archivo de Presión Contrecoup: {PCONTRECOUP_RPT_FILE}")
-                df_rpt = read_rpt_file_for_correction(rpt_file_path)
-                if df_rpt is not None and not df_rpt.empty:
-                    df_rpt['Value_Original_param_unit'] = df_rpt['Value_Original'] * MPA_TO_MMHG
-                    slope = params_pcontrecoup['slope']
-                    intercept = params_pcontrecoup['intercept']
-                    df_rpt['Value_Corrected_param_unit'] = slope * df_rpt['Value_Original_param_unit'] + intercept
-                    df_rpt['Value_Corrected_rpt_unit'] = df_rpt['Value_Corrected_param_unit'] * MMHG_TO_MPA
-                    base, ext = os.path.splitext(PCONTRECOUP_RPT_FILE)
-                    output_rpt_name = f"{base}_fixed{ext}"
-                    output_rpt_path = os.path.join(sim_dir_path, output_rpt_name)
-                    try:
-                        df_to_save = df_rpt[['Time', 'Value_Corrected_rpt_unit']].copy()
-                        df_to_save.columns = ['Time', 'Corrected_Value_MPa']
-                        df_to_save.to_csv(output_rpt_path, sep=' ', header=False, index=False, float_format='%.6e')
-                        print(f"    Archivo corregido guardado en: {output_rpt_name}")
-                        total_files_corrected +=1
-                    except Exception as e_save:
-                        print(f"    ERROR al guardar archivo corregido '{output_rpt_name}': {e_save}")
+            try:
+                written = _stream_corrected_rpt(os.path.join(sim_dir_path, OUTPUT_MAGNITUDE_ACCEL_FIXED_RPT_FILE),
+                                                _corrected_magnitude_chunks(component_paths, sim_dir_name, params_accel, counters))
+                if written:
+                    counters['corrected'] += 1
+                    log.append(f"    Magnitud de aceleración corregida guardada en: {OUTPUT_MAGNITUDE_ACCEL_FIXED_RPT_FILE}")
                 else:
-                    print(f"    ADVERTENCIA: No se pudieron leer datos de {PCONTRECOUP_RPT_FILE}. Omitiendo corrección.")
+                    log.append(f"    AVISO: No se pudieron leer datos de los componentes de aceleración. No se puede calcular magnitud.")
+            except ValueError as e:
+                log.append(f"    ERROR: {e} No se puede calcular magnitud.")
+            except Exception as e_save:
+                log.append(f"    ERROR al guardar magnitud de aceleración corregida '{OUTPUT_MAGNITUDE_ACCEL_FIXED_RPT_FILE}': {e_save}")
+    else:
+        log.append(f"  ADVERTENCIA: No hay parámetros de corrección para Aceleración. Se omitirá el cálculo y corrección de magnitud.")
+
+    for params, rpt_file, label in ((params_pcoup, PCOUP_RPT_FILE, 'Coup'), (params_pcontrecoup, PCONTRECOUP_RPT_FILE, 'Contrecoup')):
+        if not (params and rpt_file):
+            if rpt_file:
+                log.append(f"  ADVERTENCIA: No hay parámetros de corrección para Presión {label}. Se omitirá {rpt_file}.")
+            continue
+        rpt_file_path = os.path.join(sim_dir_path, rpt_file)
+        if not os.path.exists(rpt_file_path):
+            log.append(f"    INFO: Archivo {rpt_file} no encontrado en {sim_dir_name}. Omitiendo.")
+            continue
+        counters['pressure'] += 1
+        base, ext = os.path.splitext(rpt_file)
+        output_rpt_name = f"{base}_fixed{ext}"
+        try:
+            if _stream_corrected_rpt(os.path.join(sim_dir_path, output_rpt_name), _corrected_pressure_chunks(rpt_file_path, params)):
+                counters['corrected'] += 1
+                log.append(f"    Archivo corregido guardado en: {output_rpt_name}")
             else:
-                print(f"    INFO: Archivo {PCONTRECOUP_RPT_FILE} no encontrado en {sim_dir_name}. Omitiendo.")
-        elif not PCONTRECOUP_RPT_FILE:
-            print(f"  INFO: No se ha especificado PCONTRECOUP_RPT_FILE. Omitiendo corrección de presión contrecoup.")
-        else:
-             print(f"  ADVERTENCIA: No hay parámetros de corrección para Presión Contrecoup. Se omitirá {PCONTRECOUP_RPT_FILE}.")
+                log.append(f"    ADVERTENCIA: No se pudieron leer datos de {rpt_file}. Omitiendo corrección.")
+        except Exception as e_save:
+            log.append(f"    ERROR al guardar archivo corregido '{output_rpt_name}': {e_save}")
+    return counters, log
+
+def _correct_simulation_directory_worker(job):
+    """Proceso auxiliar de la Fase 4 en paralelo: devuelve ((contadores, log), tiempos medidos en el proceso)."""
+    if stage_timing is None:
+        return correct_simulation_directory(*job), None
+    return stage_timing.timed_call((_correct_simulation_directory_timed, job))
+
+def _correct_simulation_directory_timed(job):
+    with _timed('fase4.simulacion'):
+        return correct_simulation_directory(*job)
+
+def process_simulation_rpts_parallel(reports_root_folder, params_accel, params_pcoup, params_pcontrecoup,
+                                     max_workers=CORRECTION_WORKERS):
+    """Fase 4 en paralelo: un proceso por carpeta de simulación, con lectura y escritura por bloques."""
+    print(f"\n\n=== FASE 4: APLICACIÓN DE CORRECCIÓN A ARCHIVOS .RPT EN '{reports_root_folder}' ({max_workers} procesos) ===")
+    if not os.path.isdir(reports_root_folder):
+        print(f"Error: La carpeta raíz de reportes '{reports_root_folder}' no existe.")
+        return None
+    simulation_dirs = sorted(d for d in os.listdir(reports_root_folder)
+                             if os.path.isdir(os.path.join(reports_root_folder, d)))
+    if not simulation_dirs:
+        print(f"No se encontraron directorios de simulación en '{reports_root_folder}'.")
+        return None
+
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+    print(f"Se encontraron {len(simulation_dirs)} directorios de simulación para procesar.")
+    totals = {'accel_mag': 0, 'pressure': 0, 'corrected': 0}
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = {executor.submit(_correct_simulation_directory_worker, (os.path.join(reports_root_folder, d),
+                                   params_accel, params_pcoup, params_pcontrecoup)): d for d in simulation_dirs}
+        for future in as_completed(futures):
+            try:
+                (counters, log), worker_timing = future.result()
+            except Exception as e:
+                print(f"\nERROR inesperado corrigiendo '{futures[future]}': {e}")
+                continue
+            if stage_timing is not None:
+                stage_timing.merge(worker_timing)
+            print("\n".join(log))
+            for key in totals:
+                totals[key] += counters[key]
 
     print(f"\n--- Resumen de Corrección de Archivos .RPT ---")
-    print(f"Simulaciones donde se intentó calcular y corregir magnitud de aceleración: {total_files_processed_accel_mag}")
-    print(f"Archivos de presión (coup/contrecoup) intentados procesar: {total_files_processed_pressure}")
-    print(f"Total de archivos .rpt corregidos y guardados (incluye magnitud de aceleración y presiones): {total_files_corrected}")
+    print(f"Simulaciones donde se intentó calcular y corregir magnitud de aceleración: {totals['accel_mag']}")
+    print(f"Archivos de presión (coup/contrecoup) intentados procesar: {totals['pressure']}")
+    print(f"Total de archivos .rpt corregidos y guardados (incluye magnitud de aceleración y presiones): {totals['corrected']}")
+    return totals
+
+# --- FUNCIÓN PRINCIPAL MODIFICADA PARA PROCESAR ARCHIVOS .RPT POR DIRECTORIO ---
+def process_simulation_rpts_in_directory_structure(
+    reports_root_folder,
+    params_accel,
+    params_pcoup,
+    params_pcontrecoup):
+    """
+    Busca directorios de simulación y los procesa en lotes de CORRECTION_BATCH_SIZE:
+    1. Lee componentes de aceleración y presiones como arrays de NumPy.
+    2. Calcula la magnitud y corrige magnitud y presiones en memoria (correct_simulation_batch).
+    3. Guarda los archivos corregidos.
+    """
+    global _ACTIVE_CAMPAIGN_STORE
+    print(f"\n\n=== FASE 4: APLICACIÓN DE CORRECCIÓN A ARCHIVOS .RPT EN '{reports_root_folder}' ===")
+    try:
+        if CAMPAIGN_STORE_FILE_FOR_CORRECTION:
+            if campaign_store is None:
+                print("Error: CAMPAIGN_STORE_FILE_FOR_CORRECTION configurado pero no se encontró el módulo 'campaign_store'.")
+                return
+            _ACTIVE_CAMPAIGN_STORE = campaign_store.open_campaign_store(CAMPAIGN_STORE_FILE_FOR_CORRECTION)
+            if _ACTIVE_CAMPAIGN_STORE is None:
+                return
+            print(f"Leyendo series desde el archivo de campaña '{CAMPAIGN_STORE_FILE_FOR_CORRECTION}'.")
+            simulation_dirs = _ACTIVE_CAMPAIGN_STORE.simulations()
+        elif not os.path.isdir(reports_root_folder):
+            print(f"Error: La carpeta raíz de reportes '{reports_root_folder}' no existe.")
+            return
+        else:
+            try:
+                simulation_dirs = [d for d in os.listdir(reports_root_folder)
+                                   if os.path.isdir(os.path.join(reports_root_folder, d))]
+            except Exception as e:
+                print(f"Error al listar directorios en '{reports_root_folder}': {e}")
+                return
+
+        if not simulation_dirs:
+            print(f"No se encontraron directorios de simulación en '{reports_root_folder}'.")
+            return
+
+        print(f"Se encontraron {len(simulation_dirs)} directorios de simulación para procesar.")
+        counters = {'accel_mag': 0, 'pressure': 0, 'corrected': 0}
+
+        for batch_start in range(0, len(simulation_dirs), CORRECTION_BATCH_SIZE):
+            batch = []
+            for sim_dir_name in simulation_dirs[batch_start:batch_start + CORRECTION_BATCH_SIZE]:
+                sim_dir_path = os.path.join(reports_root_folder, sim_dir_name)
+                print(f"\nProcesando simulación en directorio: {sim_dir_path}")
+                if _ACTIVE_CAMPAIGN_STORE is not None:
+                    os.makedirs(sim_dir_path, exist_ok=True) # Destino de los archivos corregidos
+                with _timed('fase4.lectura'):
+                    batch.append(_load_simulation_for_correction(sim_dir_path, sim_dir_name, params_accel,
+                                                                 params_pcoup, params_pcontrecoup, counters))
+            with _timed('fase4.correccion_lote'):
+                correct_simulation_batch(batch, params_accel, params_pcoup, params_pcontrecoup)
+            with _timed('fase4.escritura'):
+                for entry in batch:
+                    _write_corrected_simulation(entry, counters)
+
+        print(f"\n--- Resumen de Corrección de Archivos .RPT ---")
+        print(f"Simulaciones donde se intentó calcular y corregir magnitud de aceleración: {counters['accel_mag']}")
+        print(f"Archivos de presión (coup/contrecoup) intentados procesar: {counters['pressure']}")
+        print(f"Total de archivos .rpt corregidos y guardados (incluye magnitud de aceleración y presiones): {counters['corrected']}")
+    finally:
+        if _ACTIVE_CAMPAIGN_STORE is not None:
+            _ACTIVE_CAMPAIGN_STORE.close()
+            _ACTIVE_CAMPAIGN_STORE = None
 # --- FIN DE NUEVAS FUNCIONES ---
 
 
 # --- Flujo Principal ---
-if __name__ == "__main__":
+def _record_phase(stage, start):
+    if stage_timing is not None:
+        stage_timing.record(stage, time.perf_counter() - start)
+
+def main() -> bool:
+    """Fases 1-4 con la configuración del módulo. Devuelve True si se obtuvieron parámetros de corrección."""
     print("--- Iniciando Proceso de Análisis, Corrección y Aplicación a .RPT ---")
     # Montar Google Drive si se está en Colab
     try:
@@ -530,15 +1312,29 @@ if __name__ == "__main__":
     except ImportError:
         print("No se está ejecutando en Google Colab o 'google.colab' no está disponible. Se asumirá que los archivos están localmente.")
         pass
-
-    # FASES 1, 2 y 3: DERIVACIÓN DE PARÁMETROS Y VALIDACIÓN EN DATOS RESUMIDOS
-    df_data = load_and_preprocess_data()
+    ensure_results_folder()
+    if stage_timing is not None:
+        stage_timing.start_run()
 
     params_accel = None
     params_pcoup = None
     params_pcontrecoup = None
 
+    if APPLY_REGISTERED_MODEL is not None:
+        # Modelo ya registrado: sin repetir las Fases 1-3
+        print(f"\n\n=== APLICACIÓN DEL MODELO REGISTRADO '{APPLY_REGISTERED_MODEL}' (se omiten las Fases 1-3) ===")
+        params_accel, params_pcoup, params_pcontrecoup, registered_model = load_registered_model(APPLY_REGISTERED_MODEL)
+        if registered_model is not None:
+            target = correction_registry.export_params_file(registered_model, CORRECTION_PARAMS_FILE)
+            print(f"Parámetros de corrección guardados en: {target}")
+        df_data = None
+    else:
+        # FASES 1, 2 y 3: DERIVACIÓN DE PARÁMETROS Y VALIDACIÓN EN DATOS RESUMIDOS
+        with _timed('fase0.carga_datos'):
+            df_data = load_and_preprocess_data()
+
     if df_data is not None and not df_data.empty:
+        phase_start = time.perf_counter()
         print("\n\n=== FASE 1: ANÁLISIS DEL ERROR SISTEMÁTICO (SOBRE DATOS RESUMIDOS) ===")
         valid_accel_data = plot_scatter_comparison(df_data, 'Acc_Sim_m_s2', 'Acc_Nahum_m_s2',
                                  'Aceleración (Magnitud)', 'm/s²', 'aceleracion_magnitud')
@@ -563,6 +1359,8 @@ if __name__ == "__main__":
                                'Ratio Tiempo de Pico', 'T.Pico', 'Velocidad de Impacto Sim. (m/s)', 'tpico')
 
 
+        _record_phase('fase1.analisis_error', phase_start)
+        phase_start = time.perf_counter()
         print("\n\n=== FASE 2: DESARROLLO DEL MODELO DE CORRECCIÓN (REGRESIÓN LINEAL SOBRE DATOS RESUMIDOS) ===")
         all_regression_params_list = []
         params_accel = linear_regression_correction(valid_accel_data, 'Acc_Sim_m_s2', 'Acc_Nahum_m_s2', 'Aceleración (Magnitud)')
@@ -588,6 +1386,36 @@ if __name__ == "__main__":
                 f.write(df_regression_summary.to_string(index=False))
             print(f"\nResumen de parámetros de regresión (para datos resumidos) guardado en: {regression_txt_path} y {regression_csv_path}")
 
+            print(f"\n--- Estabilidad de los parámetros ({BOOTSTRAP_RESAMPLES} remuestras bootstrap, validación leave-one-out) ---")
+            stability_rows = [regression_stability_summary(data, sim_col, nahum_col, name) for data, sim_col, nahum_col, name in (
+                (valid_accel_data, 'Acc_Sim_m_s2', 'Acc_Nahum_m_s2', 'Aceleración (Magnitud)'),
+                (valid_pcoup_data, 'PCoup_Sim_mmHg', 'PCoup_Nahum_mmHg', 'Presión Coup'),
+                (valid_pcontrecoup_data_signed, 'PContrecoup_Sim_mmHg', 'PContrecoup_Nahum_mmHg', 'Presión Contrecoup (con signo)'),
+                (valid_tpico_data, 'T_pico_Sim_ms', 'T_pico_Nahum_ms', 'Tiempo de Pico'))]
+            stability_rows = [row for row in stability_rows if row]
+            if stability_rows:
+                df_stability = pd.DataFrame(stability_rows)
+                stability_csv_path = os.path.join(RESULTS_FOLDER, 'resumen_parametros_regresion_ic.csv')
+                stability_txt_path = os.path.join(RESULTS_FOLDER, 'resumen_parametros_regresion_ic.txt')
+                df_stability.to_csv(stability_csv_path, index=False, sep=';', decimal=',')
+                with open(stability_txt_path, 'w') as f:
+                    f.write(f"Intervalos de confianza bootstrap ({BOOTSTRAP_CONFIDENCE:.0%}, {BOOTSTRAP_RESAMPLES} remuestras) "
+                            "y MAPE leave-one-out de la regresión lineal:\n\n")
+                    f.write(df_stability.to_string(index=False))
+                print(f"Intervalos de confianza guardados en: {stability_txt_path} y {stability_csv_path}")
+
+        transfer_functions = None
+        if NAHUM_TRACES_DIR:
+            print("\n--- Ajuste en el dominio del tiempo (función de transferencia frente a curvas de Nahum) ---")
+            transfer_functions = fit_transfer_functions(REPORTS_ROOT_DIR_FOR_CORRECTION, df_data[['N_Ensayo', 'v_cabeza_m_s']])
+
+        params_by_metric = {'accel': params_accel, 'pcoup': params_pcoup,
+                            'pcontrecoup': params_pcontrecoup, 'tpico': params_tpico}
+        registered_model = register_correction_model(params_by_metric, transfer_functions)
+        save_correction_params(CORRECTION_PARAMS_FILE, params_by_metric, transfer_functions, registered_model)
+
+        _record_phase('fase2.regresion', phase_start)
+        phase_start = time.perf_counter()
         print("\n\n=== FASE 3: APLICACIÓN Y VALIDACIÓN DE LA CORRECCIÓN (SOBRE DATOS RESUMIDOS) ===")
         df_data = apply_correction(df_data, 'Acc_Sim_m_s2', params_accel, 'Acc_Sim_Corregida')
         df_data = apply_correction(df_data, 'PCoup_Sim_mmHg', params_pcoup, 'PCoup_Sim_Corregida')
@@ -653,23 +1481,47 @@ if __name__ == "__main__":
         df_data.to_csv(full_data_csv_path, index=False, sep=';', decimal=',')
         print(f"\nDataFrame completo con todos los cálculos (datos resumidos) guardado en: {full_data_csv_path}")
 
+        _record_phase('fase3.validacion', phase_start)
         print("\n--- Análisis de Datos Resumidos Completado ---")
         print(f"Resultados del análisis de datos resumidos guardados en: '{RESULTS_FOLDER}'")
 
-    else:
+    elif APPLY_REGISTERED_MODEL is None:
         print("Error: No se pudieron cargar o preprocesar los datos resumidos. El análisis de datos resumidos y la corrección de .RPT se detuvieron.")
         params_accel, params_pcoup, params_pcontrecoup = None, None, None
 
-    # FASE 4: APLICACIÓN DE CORRECCIÓN A ARCHIVOS .RPT
-    if params_accel or params_pcoup or params_pcontrecoup:
-        process_simulation_rpts_in_directory_structure(
-            REPORTS_ROOT_DIR_FOR_CORRECTION,
-            params_accel,
-            params_pcoup,
-            params_pcontrecoup
-        )
+    # FASE 4: APLICACIÓN DE CORRECCIÓN A ARCHIVOS .RPT (solo si se piden copias *_fixed.rpt)
+    if not WRITE_FIXED_RPT_FILES:
+        print("\nINFO: WRITE_FIXED_RPT_FILES = False. No se escriben archivos *_fixed.rpt; los procesadores aplican")
+        print(f"      la corrección al cargar las series originales usando '{CORRECTION_PARAMS_FILE}'.")
+    elif params_accel or params_pcoup or params_pcontrecoup:
+        phase_start = time.perf_counter()
+        if CORRECTION_WORKERS > 1 and not CAMPAIGN_STORE_FILE_FOR_CORRECTION:
+            process_simulation_rpts_parallel(
+                REPORTS_ROOT_DIR_FOR_CORRECTION,
+                params_accel,
+                params_pcoup,
+                params_pcontrecoup,
+                max_workers=CORRECTION_WORKERS
+            )
+        else:
+            if CORRECTION_WORKERS > 1:
+                print(f"\nAVISO: CORRECTION_WORKERS = {CORRECTION_WORKERS}, pero con CAMPAIGN_STORE_FILE_FOR_CORRECTION la corrección de los .rpt se hace en un solo proceso.")
+            process_simulation_rpts_in_directory_structure(
+                REPORTS_ROOT_DIR_FOR_CORRECTION,
+                params_accel,
+                params_pcoup,
+                params_pcontrecoup
+            )
+        _record_phase('fase4.correccion_rpt', phase_start)
     else:
         print("\nADVERTENCIA: No se obtuvieron parámetros de corrección de las fases anteriores (datos resumidos).")
         print("No se procederá con la corrección de archivos .RPT.")
 
     print("\n--- Proceso General Completado ---")
+    if stage_timing is not None:
+        stage_timing.write_run_report(os.path.join(RESULTS_FOLDER, TIMING_REPORT_FILE_NAME), 'correction',
+                                      {'workers': CORRECTION_WORKERS, 'write_fixed_rpt_files': WRITE_FIXED_RPT_FILES})
+    return bool(params_accel or params_pcoup or params_pcontrecoup)
+
+if __name__ == "__main__":
+    main()
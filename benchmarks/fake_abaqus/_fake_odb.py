@@ -0,0 +1,365 @@
+# -*- coding: utf-8 -*-
+# Nucleo de la API de Abaqus simulada: session, ODB sinteticos y operaciones XY que usa rpt_manager.py.
+# Compatible con el Python 2 de Abaqus y con Python 3; sin dependencias externas.
+from __future__ import print_function, division
+import os
+import json
+import math
+import random
+
+# --- Configuracion del Modelo Sintetico ---
+# Un ".odb" simulado es un archivo JSON con las claves que se quieran cambiar de este diccionario
+# (lo crea fake_abaqus_cae.py crear). Los nombres por defecto son los que espera rpt_manager.py.
+DEFAULT_MODEL = {
+    'instance': 'PART-1-1',
+    'step': 'Step-1',
+    'element_sets': ['BACKREF', 'BOTTOMREF', 'CENTREOFMASSREF', 'FRONTREF', 'LEFTREF', 'RIGHTREF', 'TOPREF'],
+    'elements_per_set': 8,
+    'integration_points': 1,
+    'node_set': 'SET-ACC-NODAL',
+    'nodes': 20,
+    'rot_node_set': 'SET-ROT-NODAL', # Nodos con velocidad y aceleracion angular (VR/AR)
+    'rot_nodes': 1,                  # 0 = ODB sin cinematica de rotacion
+    'sets_on': 'instance', # 'instance' o 'assembly' (en el ensamblaje los nodos llegan como OdbMeshNodeArray anidado)
+    'frames': 201,         # Frames de field output (presion)
+    'history_points': 2001, # Puntos de history output (aceleracion)
+    'duration': 0.02,
+    'velocity_m_s': 3.0,
+    'seed': 0,
+}
+FAKE_ODB_FORMAT = 'tfg-fake-odb'
+_STRING_TYPES = (str, type(u''))
+
+
+class OdbError(Exception):
+    pass
+
+
+class SymbolicConstant(str):
+    """Las constantes de abaqusConstants se comparan y se imprimen por su nombre."""
+    def __repr__(self):
+        return str(self)
+
+
+class Repository(dict):
+    """Repositorio de Abaqus: diccionario cuyo keys() devuelve una lista (como en el Python 2 de Abaqus)."""
+    def keys(self):
+        return list(dict.keys(self))
+
+    def changeKey(self, fromName, toName):
+        obj = self.pop(fromName)
+        if hasattr(obj, 'name'): obj.name = toName
+        self[toName] = obj
+
+
+# --- Malla y regiones de historia ---
+class OdbMeshNode(object):
+    __slots__ = ('label',)
+    def __init__(self, label):
+        self.label = label
+
+
+class OdbMeshElement(object):
+    __slots__ = ('label',)
+    def __init__(self, label):
+        self.label = label
+
+
+class OdbMeshNodeArray(list):
+    pass
+
+
+class OdbMeshElementArray(list):
+    pass
+
+
+class OdbSet(object):
+    def __init__(self, name, nodes=None, elements=None, instance_name=None):
+        self.name = name
+        self.instanceName = instance_name
+        self.nodes = nodes
+        self.elements = elements
+
+
+class HistoryOutput(object):
+    """La serie se genera al leer .data, para que el coste quede en XYDataFromHistory como en un ODB real."""
+    def __init__(self, name, generator):
+        self.name = name
+        self._generator = generator
+
+    @property
+    def data(self):
+        return self._generator()
+
+
+class HistoryRegion(object):
+    def __init__(self, name):
+        self.name = name
+        self.historyOutputs = Repository()
+
+
+class OdbStep(object):
+    def __init__(self, name, time_period):
+        self.name = name
+        self.timePeriod = time_period
+        self.historyRegions = Repository()
+
+
+class OdbInstance(object):
+    def __init__(self, name):
+        self.name = name
+        self.elementSets = Repository()
+        self.nodeSets = Repository()
+
+
+class OdbAssembly(object):
+    def __init__(self):
+        self.instances = Repository()
+        self.elementSets = Repository()
+        self.nodeSets = Repository()
+
+
+# --- Senales ---
+def _time_vector(n_points, duration):
+    if n_points < 2: return [0.0] * max(n_points, 0)
+    dt = duration / (n_points - 1)
+    return [i * dt for i in range(n_points)]
+
+
+def _pulse(times, peak, t_peak, width, rng, noise=0.02):
+    return [peak * math.exp(-0.5 * ((t - t_peak) / width) ** 2) + noise * abs(peak) * rng.gauss(0.0, 1.0) for t in times]
+
+
+# --- ODB ---
+class Odb(object):
+    def __init__(self, path, model):
+        self.name = path
+        self.path = path
+        self.model = model
+        self.isReadOnly = True
+        self.rootAssembly = OdbAssembly()
+        self.steps = Repository()
+        self._field_times = _time_vector(model['frames'], model['duration'])
+        self._history_times = _time_vector(model['history_points'], model['duration'])
+        self._element_set_of = {} # etiqueta de elemento -> set (para elegir el pico de presion)
+        self._build()
+
+    def _build(self):
+        m = self.model
+        instance = OdbInstance(m['instance'])
+        self.rootAssembly.instances[m['instance']] = instance
+        step = OdbStep(m['step'], m['duration'])
+        self.steps[m['step']] = step
+
+        label = 1
+        for set_name in m['element_sets']:
+            elements = OdbMeshElementArray(OdbMeshElement(label + k) for k in range(m['elements_per_set']))
+            for element in elements: self._element_set_of[element.label] = set_name
+            label += m['elements_per_set']
+            if m['sets_on'] == 'assembly':
+                self.rootAssembly.elementSets[set_name] = OdbSet(set_name, elements=(elements,))
+            else:
+                instance.elementSets[set_name] = OdbSet(set_name, elements=elements, instance_name=m['instance'])
+
+        nodes = OdbMeshNodeArray(OdbMeshNode(1000 + k) for k in range(m['nodes']))
+        if m['sets_on'] == 'assembly':
+            self.rootAssembly.nodeSets[m['node_set']] = OdbSet(m['node_set'], nodes=(nodes,))
+        else:
+            instance.nodeSets[m['node_set']] = OdbSet(m['node_set'], nodes=nodes, instance_name=m['instance'])
+        for node in nodes:
+            region = HistoryRegion('Node %s.%d' % (m['instance'], node.label))
+            for component in ('A1', 'A2', 'A3'):
+                region.historyOutputs[component] = HistoryOutput(component, self._accel_generator(node.label, component))
+            step.historyRegions[region.name] = region
+
+        rot_nodes = OdbMeshNodeArray(OdbMeshNode(900 + k) for k in range(m['rot_nodes']))
+        if rot_nodes:
+            if m['sets_on'] == 'assembly':
+                self.rootAssembly.nodeSets[m['rot_node_set']] = OdbSet(m['rot_node_set'], nodes=(rot_nodes,))
+            else:
+                instance.nodeSets[m['rot_node_set']] = OdbSet(m['rot_node_set'], nodes=rot_nodes, instance_name=m['instance'])
+        for node in rot_nodes:
+            region = HistoryRegion('Node %s.%d' % (m['instance'], node.label))
+            for axis in ('1', '2', '3'):
+                region.historyOutputs['VR' + axis] = HistoryOutput('VR' + axis, self._rotation_generator(node.label, axis, False))
+                region.historyOutputs['AR' + axis] = HistoryOutput('AR' + axis, self._rotation_generator(node.label, axis, True))
+            step.historyRegions[region.name] = region
+
+    def _rotation_generator(self, node_label, axis, derivative):
+        """Pulso gaussiano de velocidad angular (rad/s) o su derivada exacta (rad/s2), coherentes entre si."""
+        peak = {'1': 12.0, '2': 30.0, '3': -8.0}[axis] * self.model['velocity_m_s'] / 3.0
+        t_peak, width = 0.007, 0.002
+        def generate():
+            rng = random.Random('%s-R%d-%s' % (self.model['seed'], node_label, axis))
+            amplitude = peak * rng.uniform(0.9, 1.1)
+            values = []
+            for t in self._history_times:
+                omega = amplitude * math.exp(-0.5 * ((t - t_peak) / width) ** 2)
+                values.append(-omega * (t - t_peak) / width ** 2 if derivative else omega)
+            return tuple(zip(self._history_times, values))
+        return generate
+
+    def _accel_generator(self, node_label, component):
+        peak = {'A1': 1.8e6, 'A2': 0.4e6, 'A3': -0.6e6}[component] * self.model['velocity_m_s'] / 3.0
+        def generate():
+            rng = random.Random('%s-%d-%s' % (self.model['seed'], node_label, component))
+            values = _pulse(self._history_times, peak * rng.uniform(0.9, 1.1), 0.006, 0.0015, rng)
+            return tuple(zip(self._history_times, values))
+        return generate
+
+    def pressure_data(self, element_label, integration_point):
+        set_name = self._element_set_of.get(element_label, '')
+        peak = {'FRONTREF': 0.16, 'BACKREF': -0.08}.get(set_name, 0.02) * self.model['velocity_m_s'] / 3.0
+        rng = random.Random('%s-E%d-%d' % (self.model['seed'], element_label, integration_point))
+        values = _pulse(self._field_times, peak * rng.uniform(0.9, 1.1), 0.0065, 0.0018, rng)
+        return tuple(zip(self._field_times, values))
+
+    def close(self):
+        session.odbs.pop(self.name, None)
+
+
+def load_model(path):
+    """Lee la descripcion JSON de un ODB sintetico. Un archivo que no la contiene da OdbError, como un ODB danado."""
+    if not os.path.exists(path):
+        raise OdbError('File %s does not exist.' % path)
+    try:
+        with open(path, 'r') as f:
+            description = json.load(f)
+    except ValueError:
+        raise OdbError('%s no es un ODB sintetico (se esperaba JSON con "format": "%s").' % (path, FAKE_ODB_FORMAT))
+    if not isinstance(description, dict) or description.get('format') != FAKE_ODB_FORMAT:
+        raise OdbError('%s no es un ODB sintetico (se esperaba JSON con "format": "%s").' % (path, FAKE_ODB_FORMAT))
+    model = dict(DEFAULT_MODEL)
+    model.update(dict((k, v) for k, v in description.items() if k in DEFAULT_MODEL))
+    return model
+
+
+def write_fake_odb(path, **overrides):
+    """Crea un ODB sintetico con los valores indicados (el resto, los de DEFAULT_MODEL)."""
+    description = {'format': FAKE_ODB_FORMAT}
+    description.update(dict((k, v) for k, v in overrides.items() if k in DEFAULT_MODEL))
+    with open(path, 'w') as f:
+        json.dump(description, f, indent=1, sort_keys=True)
+
+
+# --- XYData ---
+class XYData(object):
+    def __init__(self, name, data):
+        self.name = name
+        self.data = data
+
+
+_temp_counter = [0]
+
+def _register_xy(name, data):
+    if name is None:
+        _temp_counter[0] += 1
+        name = '_temp_%d' % _temp_counter[0]
+    xy = XYData(name, data)
+    session.xyDataObjects[name] = xy
+    return xy
+
+
+def xyDataListFromField(odb, outputPosition, variable, elementSets=(), **kwargs):
+    """Una curva de presion por elemento y punto de integracion de los sets indicados (por nombre o como objeto)."""
+    result = []
+    for element_set in elementSets:
+        if isinstance(element_set, _STRING_TYPES):
+            if element_set not in odb.rootAssembly.elementSets:
+                raise OdbError('Element set %s not found in the assembly.' % element_set)
+            element_set = odb.rootAssembly.elementSets[element_set]
+        groups = element_set.elements
+        if len(groups) and isinstance(groups[0], OdbMeshElementArray): # Set de ensamblaje: un array por instancia
+            elements = [e for group in groups for e in group]
+        else:
+            elements = list(groups)
+        instance_name = element_set.instanceName or odb.model['instance']
+        for element in elements:
+            for ip in range(1, odb.model['integration_points'] + 1):
+                name = 'S:Pressure PI: %s E: %d IP: %d' % (instance_name, element.label, ip)
+                result.append(_register_xy(name, odb.pressure_data(element.label, ip)))
+    return result
+
+
+def XYDataFromHistory(odb, outputVariableName, steps, suppressQuery=True, name=None, **kwargs):
+    """Interpreta '<variable>: A1 PI: <instancia> Node <n> in NSET <set>' y lee la historia del nodo."""
+    try:
+        head, rest = outputVariableName.split(': ', 1)
+        component, rest = rest.split(' PI: ', 1)
+        instance_name, rest = rest.split(' Node ', 1)
+        node_label = int(rest.split(' ')[0])
+    except ValueError:
+        raise OdbError('Output variable %s not found.' % outputVariableName)
+    data = []
+    for step_name in steps:
+        step = odb.steps[step_name]
+        region_name = 'Node %s.%d' % (instance_name, node_label)
+        if region_name not in step.historyRegions or component not in step.historyRegions[region_name].historyOutputs:
+            raise OdbError('Output variable %s not found.' % outputVariableName)
+        data.extend(step.historyRegions[region_name].historyOutputs[component].data)
+    return _register_xy(name, tuple(data))
+
+
+def avg(xy_data_tuple):
+    """Media punto a punto de curvas con el mismo eje X."""
+    curves = [xy.data for xy in xy_data_tuple]
+    if not curves: raise TypeError('avg() necesita al menos un XYData.')
+    n = min(len(c) for c in curves)
+    k = float(len(curves))
+    data = tuple((curves[0][i][0], sum(c[i][1] for c in curves) / k) for i in range(n))
+    return _register_xy(None, data)
+
+
+# --- writeXYReport ---
+def format_abaqus_number(value, digits=6):
+    """Formato ENGINEERING del informe XY de Abaqus: '0.', '12.3456', '100.E-06', '-1.5E+03'."""
+    if value == 0: return '0.'
+    exponent = int(math.floor(math.log10(abs(value)) / 3.0)) * 3
+    mantissa = value / 10.0 ** exponent if exponent else value
+    text = '%.*g' % (digits, mantissa)
+    if 'e' in text:
+        mantissa /= 1000.0; exponent += 3; text = '%.*g' % (digits, mantissa)
+    if '.' not in text: text += '.'
+    return text + ('E%+03d' % exponent if exponent else '')
+
+
+def write_xy_report(fileName, xyData, appendMode=False):
+    curves = [xy.data for xy in xyData]
+    n = min(len(c) for c in curves) if curves else 0
+    widths = [max(28, len(xy.name) + 2) for xy in xyData]
+    with open(fileName, 'a' if appendMode in (True, 'ON') else 'w') as f:
+        f.write('\n' + 'X'.rjust(20) + ''.join(xy.name.rjust(w) for xy, w in zip(xyData, widths)) + '\n\n')
+        for i in range(n):
+            f.write(format_abaqus_number(curves[0][i][0]).rjust(20)
+                    + ''.join(format_abaqus_number(c[i][1]).rjust(w) for c, w in zip(curves, widths)) + '\n')
+
+
+# --- session ---
+class Viewport(object):
+    def __init__(self, name):
+        self.name = name
+        self.displayedObject = None
+
+    def setValues(self, displayedObject=None, **kwargs):
+        self.displayedObject = displayedObject
+
+
+class Session(object):
+    def __init__(self):
+        self.odbs = Repository()
+        self.xyDataObjects = Repository()
+        self.xyPlots = Repository()
+        self.viewports = Repository()
+        self.viewports['Viewport: 1'] = Viewport('Viewport: 1')
+
+    def openOdb(self, name, readOnly=True, **kwargs):
+        if name in self.odbs: return self.odbs[name]
+        odb = Odb(name, load_model(name))
+        self.odbs[name] = odb
+        return odb
+
+    def writeXYReport(self, fileName, xyData, appendMode=False):
+        write_xy_report(fileName, xyData, appendMode)
+
+
+session = Session()
@@ -0,0 +1,5 @@
+# -*- coding: utf-8 -*-
+# Modulo 'abaqus' simulado (ver Readme de benchmarks/): lo que rpt_manager.py recibe con 'from abaqus import *'
+from _fake_odb import session, avg
+
+__all__ = ['session', 'avg']
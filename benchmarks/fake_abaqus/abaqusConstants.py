@@ -0,0 +1,14 @@
+# -*- coding: utf-8 -*-
+# Constantes simbolicas de Abaqus usadas por los scripts del repositorio
+from _fake_odb import SymbolicConstant
+
+ON = SymbolicConstant('ON')
+OFF = SymbolicConstant('OFF')
+INTEGRATION_POINT = SymbolicConstant('INTEGRATION_POINT')
+NODAL = SymbolicConstant('NODAL')
+ELEMENT_NODAL = SymbolicConstant('ELEMENT_NODAL')
+CENTROID = SymbolicConstant('CENTROID')
+INVARIANT = SymbolicConstant('INVARIANT')
+COMPONENT = SymbolicConstant('COMPONENT')
+
+__all__ = ['ON', 'OFF', 'INTEGRATION_POINT', 'NODAL', 'ELEMENT_NODAL', 'CENTROID', 'INVARIANT', 'COMPONENT']
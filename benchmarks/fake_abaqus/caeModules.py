@@ -0,0 +1,3 @@
+# -*- coding: utf-8 -*-
+# Modulo 'caeModules' simulado: en Abaqus/CAE carga los modulos de la interfaz; aqui no hace falta nada
+__all__ = []
@@ -0,0 +1,2 @@
+# -*- coding: utf-8 -*-
+# Modulo 'displayGroupOdbToolset' simulado: rpt_manager.py solo lo importa
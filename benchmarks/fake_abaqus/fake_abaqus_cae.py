@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+# Sustituto de 'abaqus cae noGUI=...' que ejecuta un script de Abaqus con la API simulada de esta carpeta.
+#
+#   python2.7 fake_abaqus_cae.py crear <carpeta> [--odbs N] [--nodes N] [--rot-nodes N] [--elements-per-set N] [--frames N] ...
+#   python2.7 fake_abaqus_cae.py cae noGUI=<script.py> [-- Sim_A.odb Sim_B.odb]
+#
+# El modo 'cae' acepta los mismos argumentos que Abaqus, asi que sirve como abaqus_command de tfg_cli.py.
+# rpt_manager.py esta escrito para el Python 2 de Abaqus 6.12: ese modo necesita un interprete Python 2.7.
+from __future__ import print_function, division
+import os
+import re
+import sys
+import time
+import argparse
+
+FAKE_DIR = os.path.dirname(os.path.abspath(__file__))
+if FAKE_DIR not in sys.path: sys.path.insert(0, FAKE_DIR)
+import _fake_odb
+
+CODING_COOKIE = re.compile(r'^[ \t\f]*#.*?coding[:=][ \t]*([-\w.]+)')
+
+
+def create_odbs(folder, n_odbs, **model):
+    """Crea n_odbs ODB sinteticos con nombres de simulacion (alternando con y sin casco)."""
+    if not os.path.isdir(folder): os.makedirs(folder)
+    paths = []
+    for k in range(n_odbs):
+        velocity_mm_s = 2000 + 5 * k
+        name = ('Impacto%04d_ConCasco_v%d' if k % 2 else 'Nahum_E%04d_v%d') % (k, velocity_mm_s)
+        path = os.path.join(folder, name + '.odb')
+        settings = dict(model)
+        settings.setdefault('velocity_m_s', velocity_mm_s / 1000.0)
+        settings.setdefault('seed', k)
+        _fake_odb.write_fake_odb(path, **settings)
+        paths.append(path)
+    return paths
+
+
+def run_script(script_path, script_args):
+    """Ejecuta el script como lo haria 'abaqus cae noGUI=script -- args' en el directorio actual."""
+    with open(script_path, 'rb') as f:
+        source = f.read().decode('latin-1')
+    # Los scripts de Abaqus declaran '# -*- coding: mbcs -*-', que solo existe en Windows
+    lines = source.split('\n')
+    for i in range(min(2, len(lines))):
+        if CODING_COOKIE.match(lines[i]): lines[i] = '# -*- coding: latin-1 -*-'
+    source = '\n'.join(lines)
+    if sys.version_info[0] < 3: source = source.encode('latin-1')
+    try:
+        code = compile(source, script_path, 'exec', 0, True) # Sin heredar los __future__ de este archivo
+    except SyntaxError as e:
+        print('ERROR: No se pudo compilar %s: %s' % (script_path, e))
+        if sys.version_info[0] >= 3:
+            print('       Los scripts de Abaqus 6.12 son Python 2: ejecuta este programa con python2.7.')
+        return 1
+    sys.argv = [script_path] + list(script_args)
+    namespace = {'__name__': '__main__', '__file__': script_path}
+    t0 = time.time()
+    exec(code, namespace)
+    print('INFO (Abaqus simulado): %s terminado en %.2f s.' % (os.path.basename(script_path), time.time() - t0))
+    return 0
+
+
+def main(argv):
+    if argv and argv[0] == 'cae':
+        scripts = [a.split('=', 1)[1] for a in argv[1:] if a.startswith('noGUI=') or a.startswith('script=')]
+        if not scripts:
+            print('ERROR: Falta noGUI=<script.py>.')
+            return 2
+        script_args = argv[argv.index('--') + 1:] if '--' in argv else []
+        return run_script(os.path.abspath(scripts[0]), script_args)
+
+    parser = argparse.ArgumentParser(description='ODB sinteticos y ejecucion de scripts con la API de Abaqus simulada.')
+    sub = parser.add_subparsers(dest='command')
+    p_create = sub.add_parser('crear', help='Crear ODB sinteticos (archivos JSON con el tamano del modelo)')
+    p_create.add_argument('folder')
+    p_create.add_argument('--odbs', type=int, default=4)
+    p_create.add_argument('--nodes', type=int, default=_fake_odb.DEFAULT_MODEL['nodes'])
+    p_create.add_argument('--rot-nodes', type=int, default=_fake_odb.DEFAULT_MODEL['rot_nodes'])
+    p_create.add_argument('--elements-per-set', type=int, default=_fake_odb.DEFAULT_MODEL['elements_per_set'])
+    p_create.add_argument('--integration-points', type=int, default=_fake_odb.DEFAULT_MODEL['integration_points'])
+    p_create.add_argument('--frames', type=int, default=_fake_odb.DEFAULT_MODEL['frames'])
+    p_create.add_argument('--history-points', type=int, default=_fake_odb.DEFAULT_MODEL['history_points'])
+    p_create.add_argument('--sets-on', choices=['instance', 'assembly'], default=_fake_odb.DEFAULT_MODEL['sets_on'])
+    args = parser.parse_args(argv)
+    if args.command != 'crear':
+        parser.print_help()
+        return 2
+    paths = create_odbs(args.folder, args.odbs, nodes=args.nodes, rot_nodes=args.rot_nodes, elements_per_set=args.elements_per_set,
+                        integration_points=args.integration_points, frames=args.frames,
+                        history_points=args.history_points, sets_on=args.sets_on)
+    print('%d ODB sinteticos creados en %s' % (len(paths), args.folder))
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,7 @@
+# -*- coding: utf-8 -*-
+# Modulo 'odbAccess' simulado
+from _fake_odb import OdbError, session
+
+
+def openOdb(path, readOnly=True, **kwargs):
+    return session.openOdb(name=path, readOnly=readOnly)
@@ -0,0 +1,3 @@
+# -*- coding: utf-8 -*-
+# Modulo 'xyPlot' simulado: extraccion de curvas XY de los ODB sinteticos
+from _fake_odb import xyDataListFromField, XYDataFromHistory, avg
@@ -0,0 +1,430 @@
+import os
+import io
+import sys
+import glob
+import json
+import time
+import shutil
+import platform
+import argparse
+import tempfile
+import statistics
+import subprocess
+import contextlib
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# --- Configuración de los Benchmarks ---
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.dirname(BENCHMARKS_DIR)
+HISTORY_FILE = os.path.join(BENCHMARKS_DIR, 'historial_benchmarks.jsonl') # Una línea JSON por ejecución
+DATA_ROOT = os.path.join(tempfile.gettempdir(), 'tfg_benchmarks') # Los datos sintéticos se reutilizan entre ejecuciones
+FAKE_ABAQUS_CAE = os.path.join(BENCHMARKS_DIR, 'fake_abaqus', 'fake_abaqus_cae.py')
+PYTHON2_CANDIDATES = ['python2.7', 'python2'] # rpt_manager.py es Python 2; TFG_PYTHON2 indica otro intérprete
+DEFAULT_REPEAT = 3
+REGRESSION_THRESHOLD = 0.10 # Aumento relativo de la mediana a partir del cual se marca una regresión
+
+# Tamaños de cada escala. 'sims': simulaciones del árbol de Reports; 'main_sims': simulaciones del árbol que procesan
+# los main() completos (generan figuras, así que se mantiene pequeño); 'wide_nodes': columnas de A1_Acc.rpt;
+# 'long_points': puntos de las series largas de plot_long_series (se generan en memoria).
+SCALES = {
+    'small':  {'sims': 10,   'main_sims': 4,  'points': 2001, 'wide_nodes': 20,  'sta_files': 10,   'sta_increments': 50000,
+               'long_points': 100000},
+    'medium': {'sims': 100,  'main_sims': 8,  'points': 2001, 'wide_nodes': 50,  'sta_files': 100,  'sta_increments': 10000,
+               'long_points': 500000},
+    'large':  {'sims': 1000, 'main_sims': 16, 'points': 2001, 'wide_nodes': 100, 'sta_files': 1000, 'sta_increments': 2000,
+               'long_points': 2000000},
+}
+
+sys.path.insert(0, BENCHMARKS_DIR)
+sys.path.insert(0, os.path.join(REPO_ROOT, 'pipeline'))
+os.environ.setdefault('MPLBACKEND', 'Agg')
+import synthetic_data # noqa: E402
+from tfg_cli import load_tool # noqa: E402
+
+
+class BenchmarkSkipped(Exception):
+    pass
+
+
+# --- Utilidades ---
+def find_python2() -> Optional[str]:
+    candidates = [os.environ['TFG_PYTHON2']] if os.environ.get('TFG_PYTHON2') else PYTHON2_CANDIDATES
+    for candidate in candidates:
+        path = shutil.which(candidate)
+        if path is None: continue
+        try: # Los 'shims' de pyenv existen aunque la versión no esté activada
+            check = subprocess.run([path, '-c', 'import sys; sys.exit(sys.version_info[0] != 2)'], capture_output=True)
+        except OSError:
+            continue
+        if check.returncode == 0: return path
+    return None
+
+
+def git_revision() -> Optional[str]:
+    try:
+        rev = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO_ROOT, capture_output=True, text=True)
+        dirty = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=REPO_ROOT,
+                               capture_output=True, text=True)
+    except OSError:
+        return None
+    if rev.returncode != 0: return None
+    return rev.stdout.strip() + ('+cambios' if dirty.stdout.strip() else '')
+
+
+def tree_size(paths: List[str]) -> int:
+    return sum(os.path.getsize(p) for p in paths)
+
+
+def measure(func: Callable[[], Any], repeat: int) -> Tuple[List[float], Optional[Dict[str, Any]]]:
+    """
+    Ejecuta func() 'repeat' veces con la salida estándar y de errores silenciadas. Devuelve las duraciones en segundos
+    y, si func() devuelve un diccionario, las métricas adicionales de la última repetición.
+    """
+    durations, extra = [], None
+    for _ in range(repeat):
+        with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+            t0 = time.perf_counter()
+            result = func()
+            durations.append(time.perf_counter() - t0)
+        extra = result if isinstance(result, dict) else None
+    return durations, extra
+
+
+@contextlib.contextmanager
+def count_figure_renders():
+    """Cuenta las llamadas a Figure.draw (cada render completo: canvas.draw() o savefig())."""
+    from matplotlib.figure import Figure
+    counter = {'renders': 0}
+    original_draw = Figure.draw
+    def draw(self, renderer):
+        counter['renders'] += 1
+        return original_draw(self, renderer)
+    Figure.draw = draw
+    try:
+        yield counter
+    finally:
+        Figure.draw = original_draw
+
+
+# --- Definición de los Benchmarks ---
+# Cada benchmark recibe el contexto (rutas de los datos, opciones) y devuelve (función a medir, elementos, bytes leídos).
+BENCHMARKS: "OrderedDict[str, Tuple[str, Callable[[Dict[str, Any]], Tuple[Callable[[], Any], int, int]]]]" = OrderedDict()
+
+def benchmark(name: str, description: str):
+    def register(setup):
+        BENCHMARKS[name] = (description, setup)
+        return setup
+    return register
+
+
+def individual_processor(ctx: Dict[str, Any], reports_dir: str):
+    processor = load_tool('rpt_processor_individual')
+    processor.REPORTS_ROOT_DIR = reports_dir
+    processor.RESULTS_COMPARISON_DIR_BASE = os.path.join(ctx['work_dir'], 'Results_Individual')
+    processor.CAMPAIGN_STORE_FILE = None
+    processor.USE_FIXED_RPT_FILES = False
+    processor.APPLY_CORRECTION_ON_LOAD = False
+    processor.DEFER_VECTOR_EXPORT = False # Los benchmarks de gráficas miden también el guardado de los EPS
+    return processor
+
+
+def reports_files(ctx: Dict[str, Any], pattern: str) -> List[str]:
+    return sorted(glob.glob(os.path.join(ctx['data_dir'], 'Reports', '*', pattern)))
+
+
+@benchmark('read_rpt_data', "rpt_processor_individual.read_rpt_data sobre todos los .rpt *_mean del árbol")
+def bench_read_rpt_data(ctx):
+    processor = individual_processor(ctx, os.path.join(ctx['data_dir'], 'Reports'))
+    files = reports_files(ctx, '*_mean.rpt')
+    return (lambda: [processor.read_rpt_data(p) for p in files]), len(files), tree_size(files)
+
+
+@benchmark('read_rpt_data_wide', "read_rpt_data sobre A1/A2/A3_Acc.rpt con una columna por nodo")
+def bench_read_rpt_data_wide(ctx):
+    processor = individual_processor(ctx, os.path.join(ctx['data_dir'], 'Reports'))
+    files = sorted(glob.glob(os.path.join(ctx['data_dir'], 'wide', '*', '*_Acc.rpt')))
+    return (lambda: [processor.read_rpt_data(p) for p in files]), len(files), tree_size(files)
+
+
+@benchmark('read_rpt_arrays_for_correction', "correction.read_rpt_arrays_for_correction sobre todos los .rpt *_mean")
+def bench_read_rpt_arrays_for_correction(ctx):
+    correction = load_tool('correction')
+    files = reports_files(ctx, '*_mean.rpt')
+    return (lambda: [correction.read_rpt_arrays_for_correction(p) for p in files]), len(files), tree_size(files)
+
+
+@benchmark('read_rpt_file_for_correction', "correction.read_rpt_file_for_correction (DataFrame) sobre todos los .rpt *_mean")
+def bench_read_rpt_file_for_correction(ctx):
+    correction = load_tool('correction')
+    files = reports_files(ctx, '*_mean.rpt')
+    return (lambda: [correction.read_rpt_file_for_correction(p) for p in files]), len(files), tree_size(files)
+
+
+@benchmark('calculate_acceleration_magnitude', "Módulo de la aceleración (A1/A2/A3_Acc_mean.rpt) de cada simulación")
+def bench_calculate_acceleration_magnitude(ctx):
+    processor = individual_processor(ctx, os.path.join(ctx['data_dir'], 'Reports'))
+    sim_dirs = sorted(glob.glob(os.path.join(ctx['data_dir'], 'Reports', '*')))
+    files = reports_files(ctx, 'A?_Acc_mean.rpt')
+    run = lambda: [processor.calculate_acceleration_magnitude(d, os.path.basename(d), False) for d in sim_dirs]
+    return run, len(sim_dirs), tree_size(files)
+
+
+@benchmark('accel_magnitude_batch', "Módulo de la aceleración de todas las simulaciones por lotes (preload_acceleration_batch)")
+def bench_accel_magnitude_batch(ctx):
+    processor = individual_processor(ctx, os.path.join(ctx['data_dir'], 'Reports'))
+    if processor.accel_batch is None: raise BenchmarkSkipped("pipeline/accel_batch.py no disponible")
+    sim_dirs = sorted(glob.glob(os.path.join(ctx['data_dir'], 'Reports', '*')))
+    records = [r for r in (processor.get_simulation_data(d, False) for d in sim_dirs) if r is not None]
+    files = reports_files(ctx, 'A?_Acc_mean.rpt')
+
+    def run():
+        processor.SERIES_CACHE.clear()
+        for batch in processor.simulation_batches(records):
+            processor.preload_acceleration_batch(batch)
+        processor._ACCEL_BATCH.clear()
+    return run, len(records), tree_size(files)
+
+
+@benchmark('get_simulation_data', "get_simulation_data de cada simulación y lectura de sus tres series")
+def bench_get_simulation_data(ctx):
+    processor = individual_processor(ctx, os.path.join(ctx['data_dir'], 'Reports'))
+    sim_dirs = sorted(glob.glob(os.path.join(ctx['data_dir'], 'Reports', '*')))
+
+    def run():
+        processor.SERIES_CACHE.clear()
+        for d in sim_dirs:
+            record = processor.get_simulation_data(d, False)
+            if record is not None:
+                record.get('acc_mag_m_s2'); record.get('pressure_coup_mpa'); record.get('pressure_contrecoup_mpa')
+    files = reports_files(ctx, 'A?_Acc_mean.rpt') + reports_files(ctx, 'Pressure_FRONTREF_mean.rpt') \
+        + reports_files(ctx, 'Pressure_BACKREF_mean.rpt')
+    return run, len(sim_dirs), tree_size(files)
+
+
+@benchmark('status_scan', "status_manager.check_analysis_status sobre la carpeta de .sta")
+def bench_status_scan(ctx):
+    status_manager = load_tool('status_manager')
+    sta_dir = os.path.join(ctx['data_dir'], 'sta')
+    files = sorted(glob.glob(os.path.join(sta_dir, '*.sta')))
+    return (lambda: status_manager.check_analysis_status(sta_dir)), len(files), tree_size(files)
+
+
+@benchmark('plot_figures', "Gráficas individuales y de grupos Nahum de Reports_main (cuenta los renders por figura)")
+def bench_plot_figures(ctx):
+    reports_dir = os.path.join(ctx['data_dir'], 'Reports_main')
+    processor = individual_processor(ctx, reports_dir)
+    results_dir = os.path.join(ctx['work_dir'], 'Results_Figures')
+    os.makedirs(results_dir, exist_ok=True)
+    records = [processor.get_simulation_data(os.path.join(reports_dir, d), False) for d in sorted(os.listdir(reports_dir))]
+    records = [r for r in records if r is not None]
+    saved = {'figures': 0}
+    original_save_figure = processor.save_figure
+
+    def run():
+        saved['figures'] = 0
+        def save_figure(path, **savefig_kwargs):
+            saved['figures'] += 1
+            original_save_figure(path, **savefig_kwargs)
+        processor.save_figure = save_figure
+        try:
+            with count_figure_renders() as counter:
+                for record in records:
+                    processor.plot_individual_figures(record, results_dir, False)
+                processor.plot_nahum_group_figures(processor.select_nahum_sims(list(records)), results_dir, False)
+        finally:
+            processor.save_figure = original_save_figure
+        return {'renders': counter['renders'], 'archivos': saved['figures'],
+                'renders_por_archivo': counter['renders'] / max(saved['figures'], 1)}
+    return run, len(records), 0
+
+
+@benchmark('plot_long_series', "Gráficas individuales de una simulación con series de 'long_points' puntos (PNG + EPS)")
+def bench_plot_long_series(ctx):
+    processor = individual_processor(ctx, os.path.join(ctx['data_dir'], 'Reports_main'))
+    results_dir = os.path.join(ctx['work_dir'], 'Results_Long')
+    os.makedirs(results_dir, exist_ok=True)
+    n_points = ctx['params']['long_points']
+    rng = synthetic_data.np.random.default_rng(0)
+    time_ms = synthetic_data.time_vector(n_points) * 1000.0
+    record = {'name': 'Nahum_E9998_v3000', 'helmet_status': 'Sin Casco', 'velocity_m_s': 3.0, 'short_id': 'E9998',
+              'time_acc_ms': time_ms, 'acc_mag_m_s2': synthetic_data.pulse(time_ms, 1500.0, 6.0, 1.0, rng),
+              'time_p_coup_ms': time_ms, 'pressure_coup_mpa': synthetic_data.pulse(time_ms, 0.15, 6.5, 1.2, rng),
+              'time_p_contrecoup_ms': time_ms, 'pressure_contrecoup_mpa': synthetic_data.pulse(time_ms, -0.08, 6.5, 1.2, rng)}
+    fig = processor.plt.figure(figsize=(14, 8)) # Tamaño de la gráfica de aceleración y presión
+    drawn = len(processor.plot_series(fig, time_ms, record['acc_mag_m_s2'])[0])
+    processor.plt.close(fig)
+
+    def run():
+        processor.plot_individual_figures(record, results_dir, False)
+        processor.close_figure_templates()
+        eps_files = glob.glob(os.path.join(results_dir, '*.eps'))
+        return {'puntos_dibujados_por_serie': drawn, 'bytes_eps': tree_size(eps_files)}
+    return run, 3 * n_points, 0
+
+
+@benchmark('main_individual', "rpt_processor_individual.main() completo (figuras incluidas) sobre Reports_main")
+def bench_main_individual(ctx):
+    reports_dir = os.path.join(ctx['data_dir'], 'Reports_main')
+    processor = individual_processor(ctx, reports_dir)
+    files = sorted(glob.glob(os.path.join(reports_dir, '*', '*.rpt')))
+    n_sims = len(os.listdir(reports_dir))
+    return (lambda: processor.main(workers=ctx['workers'])), n_sims, tree_size(files)
+
+
+@benchmark('main_comparison', "rpt_processor_comparison.main() completo para el par '1a' sobre Reports_main")
+def bench_main_comparison(ctx):
+    processor = load_tool('rpt_processor_comparison')
+    processor.REPORTS_ROOT_DIR = os.path.join(ctx['data_dir'], 'Reports_main')
+    processor.RESULTS_COMPARISON_DIR = os.path.join(ctx['work_dir'], 'Results_Comparison')
+    processor.CAMPAIGN_STORE_FILE = None
+    return (lambda: processor.main(pairs='1a', workers=1)), 1, 0
+
+
+@benchmark('rpt_manager_extract', "rpt_manager.py con la API de Abaqus simulada sobre 'main_sims' ODB sintéticos (Python 2)")
+def bench_rpt_manager_extract(ctx):
+    python2 = find_python2()
+    if python2 is None: raise BenchmarkSkipped("no hay intérprete Python 2 (TFG_PYTHON2)")
+    params = ctx['params']
+    odb_dir = os.path.join(ctx['work_dir'], 'odb')
+    subprocess.run([sys.executable, FAKE_ABAQUS_CAE, 'crear', odb_dir, '--odbs', str(params['main_sims']),
+                    '--nodes', str(params['wide_nodes']), '--history-points', str(params['points'])],
+                   check=True, stdout=subprocess.DEVNULL)
+    command = [python2, FAKE_ABAQUS_CAE, 'cae', f"noGUI={os.path.join(REPO_ROOT, 'rpt manager', 'rpt_manager.py')}"]
+    run = lambda: subprocess.run(command, cwd=odb_dir, check=True, stdout=subprocess.DEVNULL)
+    return run, params['main_sims'], 0
+
+
+# --- Historial ---
+def load_history(path: str = HISTORY_FILE) -> List[Dict[str, Any]]:
+    if not os.path.exists(path): return []
+    entries = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line: continue
+            try:
+                entries.append(json.loads(line))
+            except json.JSONDecodeError:
+                print(f"AVISO: Línea no válida en el historial '{path}', se ignora.")
+    return entries
+
+
+def append_history(entry: Dict[str, Any], path: str = HISTORY_FILE):
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write(json.dumps(entry, sort_keys=True) + '\n')
+
+
+def find_baseline(history: List[Dict[str, Any]], scale: str, baseline: Optional[str]) -> Optional[Dict[str, Any]]:
+    """La última ejecución de la misma escala o, con 'baseline', la última cuyo commit o fecha empiece por ese texto."""
+    candidates = [e for e in history if e.get('scale') == scale]
+    if baseline:
+        candidates = [e for e in candidates if str(e.get('git') or '').startswith(baseline)
+                      or str(e.get('timestamp', '')).startswith(baseline)]
+    return candidates[-1] if candidates else None
+
+
+def print_results(results: Dict[str, Dict[str, Any]], reference: Optional[Dict[str, Any]]):
+    ref_results = reference.get('results', {}) if reference else {}
+    if reference:
+        print(f"\nComparación con la ejecución del {reference.get('timestamp')} (commit {reference.get('git') or '?'}):")
+    header = f"{'Benchmark':<34} {'Mediana (s)':>12} {'Mín (s)':>10} {'Elem/s':>10} {'MB/s':>8} {'Anterior (s)':>13} {'Cambio':>9}"
+    print('\n' + header + '\n' + '-' * len(header))
+    regressions = []
+    for name, r in results.items():
+        if r.get('skipped'):
+            print(f"{name:<34} {'omitido: ' + r['skipped']}")
+            continue
+        previous = ref_results.get(name, {}).get('median_s')
+        change = '' if not previous else f"{(r['median_s'] - previous) / previous * 100.0:+.1f}%"
+        if previous and r['median_s'] > previous * (1.0 + REGRESSION_THRESHOLD):
+            change += ' !'; regressions.append(name)
+        mb_s = f"{r['mb_per_s']:.1f}" if r.get('mb_per_s') else '-'
+        print(f"{name:<34} {r['median_s']:>12.4f} {r['min_s']:>10.4f} {r['items_per_s']:>10.1f} {mb_s:>8} "
+              f"{(f'{previous:.4f}' if previous else '-'):>13} {change:>9}")
+        for key, value in (r.get('extra') or {}).items():
+            previous_value = (ref_results.get(name, {}).get('extra') or {}).get(key)
+            print(f"    {key}: {value:.4g}" + (f" (anterior: {previous_value:.4g})" if previous_value is not None else ''))
+    if regressions:
+        print(f"\nAVISO: {len(regressions)} benchmark(s) más de un {REGRESSION_THRESHOLD:.0%} más lentos: {', '.join(regressions)}")
+
+
+# --- Ejecución ---
+def run_benchmarks(names: List[str], scale: str, repeat: int, workers: int) -> Dict[str, Dict[str, Any]]:
+    params = SCALES[scale]
+    data_dir = os.path.join(DATA_ROOT, scale)
+    t0 = time.perf_counter()
+    if synthetic_data.ensure_dataset(data_dir, params):
+        print(f"INFO: Datos generados en {time.perf_counter() - t0:.1f} s.")
+    else:
+        print(f"INFO: Reutilizando los datos sintéticos de '{data_dir}'.")
+    work_dir = tempfile.mkdtemp(prefix='tfg_bench_')
+    ctx = {'data_dir': data_dir, 'work_dir': work_dir, 'workers': workers, 'params': params}
+
+    results: Dict[str, Dict[str, Any]] = OrderedDict()
+    try:
+        for name in names:
+            description, setup = BENCHMARKS[name]
+            print(f"  {name}: {description} ...", flush=True)
+            try:
+                func, items, n_bytes = setup(ctx)
+                durations, extra = measure(func, repeat)
+            except ImportError as e:
+                results[name] = {'skipped': f"falta una dependencia ({e})"}
+                continue
+            except BenchmarkSkipped as e:
+                results[name] = {'skipped': str(e)}
+                continue
+            median = statistics.median(durations)
+            results[name] = {
+                'median_s': median, 'min_s': min(durations), 'mean_s': statistics.mean(durations),
+                'repeat': repeat, 'items': items, 'bytes': n_bytes,
+                'items_per_s': items / median if median > 0 else 0.0,
+                'mb_per_s': n_bytes / 2.0 ** 20 / median if median > 0 and n_bytes else None,
+            }
+            if extra: results[name]['extra'] = extra
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    return results
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmarks de lectura de .rpt/.sta y de los procesadores con datos sintéticos.")
+    parser.add_argument('--scale', choices=sorted(SCALES), default='small', help="Tamaño de los datos (por defecto: small)")
+    parser.add_argument('--only', nargs='+', metavar='BENCHMARK', help="Ejecutar solo estos benchmarks")
+    parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT, help="Repeticiones de cada benchmark")
+    parser.add_argument('--workers', type=int, default=1, help="Procesos para main_individual")
+    parser.add_argument('--baseline', help="Commit o fecha (prefijo) de la ejecución del historial con la que comparar")
+    parser.add_argument('--no-save', action='store_true', help="No añadir los resultados al historial")
+    parser.add_argument('--list', action='store_true', help="Listar los benchmarks disponibles")
+    args = parser.parse_args(argv)
+
+    if args.list:
+        for name, (description, _) in BENCHMARKS.items():
+            print(f"{name:<34} {description}")
+        return 0
+    names = args.only or list(BENCHMARKS)
+    unknown = [n for n in names if n not in BENCHMARKS]
+    if unknown:
+        print(f"ERROR: Benchmarks desconocidos: {', '.join(unknown)} (ver --list)")
+        return 2
+
+    print(f"--- Benchmarks (escala '{args.scale}', {args.repeat} repeticiones) ---")
+    results = run_benchmarks(names, args.scale, max(1, args.repeat), max(1, args.workers))
+    history = load_history()
+    reference = find_baseline(history, args.scale, args.baseline)
+    if args.baseline and reference is None:
+        print(f"AVISO: No hay ninguna ejecución '{args.baseline}' de la escala '{args.scale}' en el historial.")
+    print_results(results, reference)
+
+    if not args.no_save:
+        append_history({
+            'timestamp': time.strftime('%Y-%m-%d %H:%M:%S'), 'git': git_revision(), 'scale': args.scale,
+            'params': SCALES[args.scale], 'python': platform.python_version(), 'platform': platform.platform(),
+            'cpus': os.cpu_count(), 'results': results,
+        })
+        print(f"\nResultados añadidos al historial: {HISTORY_FILE}")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
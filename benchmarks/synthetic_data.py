@@ -0,0 +1,223 @@
+import os
+import sys
+import math
+import json
+import argparse
+import numpy as np
+from typing import List, Dict, Optional, Sequence
+
+# --- Configuración de los Datos Sintéticos ---
+# Reproducen la forma de los archivos reales: .rpt con el formato de session.writeXYReport (columna X + una columna
+# por curva, números en formato ENGINEERING de Abaqus) y .sta de Abaqus/Explicit con una línea por incremento.
+GENERATOR_VERSION = 1 # Cambiar si cambia el formato generado (invalida los datos guardados por run_benchmarks.py)
+DURATION_S = 0.02 # Duración del impacto simulado
+DEFAULT_POINTS = 2001 # Puntos por curva (salida cada 10 µs durante 20 ms)
+SIGNIFICANT_DIGITS = 6
+X_COLUMN_WIDTH = 20
+VALUE_COLUMN_WIDTH = 28
+
+# Mismos sets que extrae rpt_manager.py
+ELEMENT_SETS_PRESSURE = ['BACKREF', 'BOTTOMREF', 'CENTREOFMASSREF', 'FRONTREF', 'LEFTREF', 'RIGHTREF', 'TOPREF']
+ACCEL_COMPONENTS = ['A1', 'A2', 'A3']
+NODE_SET_ACC = 'SET-ACC-NODAL'
+INSTANCE_NAME = 'PART-1-1'
+
+STA_SUCCESS_PHRASE = " THE ANALYSIS HAS COMPLETED SUCCESSFULLY"
+STA_FAILURE_PHRASE = " THE ANALYSIS HAS NOT BEEN COMPLETED"
+
+
+# --- Formato de session.writeXYReport ---
+def format_abaqus_number(value: float, digits: int = SIGNIFICANT_DIGITS) -> str:
+    """Número en el formato ENGINEERING de Abaqus: '0.', '12.3456', '100.E-06', '-1.5E+03'."""
+    if value == 0 or not math.isfinite(value):
+        return '0.' if value == 0 else str(value)
+    exponent = int(math.floor(math.log10(abs(value)) / 3.0)) * 3
+    mantissa = value / 10.0 ** exponent if exponent else value
+    text = f"{mantissa:.{digits}g}"
+    if 'e' in text: # El redondeo ha llevado la mantisa a 1000
+        mantissa /= 1000.0; exponent += 3; text = f"{mantissa:.{digits}g}"
+    if '.' not in text: text += '.'
+    return text + (f"E{exponent:+03d}" if exponent else '')
+
+
+def write_xy_report(path: str, time_s: np.ndarray, columns: Sequence[np.ndarray], names: Sequence[str]):
+    """Escribe un .rpt con la cabecera y el formato de columnas de session.writeXYReport (appendMode=OFF)."""
+    with open(path, 'w') as f:
+        f.write('\n' + 'X'.rjust(X_COLUMN_WIDTH) + ''.join(name.rjust(VALUE_COLUMN_WIDTH) for name in names) + '\n\n')
+        for i, t in enumerate(time_s):
+            f.write(format_abaqus_number(t).rjust(X_COLUMN_WIDTH)
+                    + ''.join(format_abaqus_number(col[i]).rjust(VALUE_COLUMN_WIDTH) for col in columns) + '\n')
+
+
+# --- Señales ---
+def time_vector(n_points: int = DEFAULT_POINTS, duration_s: float = DURATION_S) -> np.ndarray:
+    return np.linspace(0.0, duration_s, n_points)
+
+
+def pulse(time_s: np.ndarray, peak: float, t_peak_s: float, width_s: float, rng: np.random.Generator,
+          noise: float = 0.02) -> np.ndarray:
+    """Pulso gaussiano con algo de ruido, parecido a una curva de aceleración o presión de impacto."""
+    signal = peak * np.exp(-0.5 * ((time_s - t_peak_s) / width_s) ** 2)
+    return signal + noise * abs(peak) * rng.standard_normal(len(time_s))
+
+
+def simulation_name(index: int, velocity_mm_s: int, helmet: bool) -> str:
+    """Nombres con el estado y la velocidad (_vNNNN en mm/s) que reconocen los procesadores."""
+    return f"Impacto{index:04d}_ConCasco_v{velocity_mm_s}" if helmet else f"Nahum_E{index:04d}_v{velocity_mm_s}"
+
+
+# --- Árbol de Reports ---
+def write_simulation_reports(sim_dir: str, velocity_m_s: float, n_points: int = DEFAULT_POINTS, wide_nodes: int = 0,
+                             seed: int = 0) -> List[str]:
+    """
+    Escribe los .rpt de una simulación tal como los deja rpt_manager.py: A1/A2/A3_Acc_mean.rpt, un
+    Pressure_<SET>_mean.rpt por set y, si wide_nodes > 0, A1/A2/A3_Acc.rpt con una columna por nodo.
+    Las unidades son las del modelo: aceleración en mm/s² y presión en MPa.
+    """
+    os.makedirs(sim_dir, exist_ok=True)
+    rng = np.random.default_rng(seed)
+    t = time_vector(n_points)
+    scale = velocity_m_s / 3.0
+    written = []
+    accel_peaks_mm_s2 = {'A1': 1.8e6 * scale, 'A2': 0.4e6 * scale, 'A3': -0.6e6 * scale}
+    for component in ACCEL_COMPONENTS:
+        peak = accel_peaks_mm_s2[component]
+        if wide_nodes > 0:
+            nodes = [pulse(t, peak * rng.uniform(0.9, 1.1), 0.006, 0.0015, rng) for _ in range(wide_nodes)]
+            names = [f"temp_node_{1000 + n}_{component}" for n in range(wide_nodes)]
+            path = os.path.join(sim_dir, f"{component}_Acc.rpt")
+            write_xy_report(path, t, nodes, names); written.append(path)
+            mean = np.mean(nodes, axis=0)
+        else:
+            mean = pulse(t, peak, 0.006, 0.0015, rng)
+        path = os.path.join(sim_dir, f"{component}_Acc_mean.rpt")
+        write_xy_report(path, t, [mean], [f"{component}_Acc_mean"]); written.append(path)
+    for elem_set in ELEMENT_SETS_PRESSURE:
+        peak_mpa = {'FRONTREF': 0.16, 'BACKREF': -0.08}.get(elem_set, 0.05 * rng.uniform(-1.0, 1.0)) * scale
+        path = os.path.join(sim_dir, f"Pressure_{elem_set}_mean.rpt")
+        write_xy_report(path, t, [pulse(t, peak_mpa, 0.0065, 0.0018, rng)], [f"Pressure_{elem_set}_mean"])
+        written.append(path)
+    return written
+
+
+def generate_reports_tree(root: str, n_sims: int, n_points: int = DEFAULT_POINTS, wide_nodes: int = 0,
+                          helmet_fraction: float = 0.5, seed: int = 0) -> List[str]:
+    """
+    Árbol Reports/<simulación>/ con n_sims simulaciones, alternando con casco y Nahum (sin casco) según
+    helmet_fraction. Las velocidades son distintas para que cada simulación tenga un identificador propio.
+    """
+    names = []
+    for k in range(n_sims):
+        helmet = int((k + 1) * helmet_fraction) > int(k * helmet_fraction) # Reparto uniforme a lo largo del árbol
+        velocity_mm_s = 2000 + 5 * k
+        name = simulation_name(k, velocity_mm_s, helmet)
+        write_simulation_reports(os.path.join(root, name), velocity_mm_s / 1000.0, n_points, wide_nodes, seed + k)
+        names.append(name)
+    return names
+
+
+# --- Archivos .sta ---
+def write_sta_file(path: str, n_increments: int, outcome: str = 'ok', seed: int = 0):
+    """
+    Archivo .sta de Abaqus/Explicit con n_increments líneas de incremento.
+    outcome: 'ok' (termina con la frase de éxito), 'fail' (frase de fallo) o 'running' (sin frase final).
+    """
+    rng = np.random.default_rng(seed)
+    stable_inc = 1.0e-7 * rng.uniform(0.9, 1.1)
+    with open(path, 'w') as f:
+        f.write("Abaqus/Explicit 6.12-1                  DATE 12-may-2025 TIME 10:11:12\n\n")
+        f.write(" SUMMARY OF JOB INFORMATION:\n")
+        f.write("      STEP     INCREMENT     TOTAL TIME     CPU TIME     STABLE      CRITICAL    KINETIC      TOTAL    PERCENT\n")
+        f.write("                                                     INCREMENT    ELEMENT     ENERGY       ENERGY   CHNG MASS\n")
+        f.write(" STEP 1  ORIGIN 0.0000\n")
+        f.write("  Total memory used for step 1 is approximately 412.3 megabytes.\n")
+        f.write("  Global time estimation algorithm will be used.\n")
+        f.write("  Scaling factor:  1.0000\n")
+        kinetic = 0.0
+        for inc in range(n_increments):
+            total_time = inc * stable_inc
+            kinetic = 1.2e3 * math.exp(-total_time / DURATION_S)
+            f.write(f"       {1:>3d} {inc:>12d}  {total_time:.3E}  {inc * 4.1e-3:.3E}  {stable_inc:.3E}  "
+                    f"{100000 + inc % 5000:>8d}  {kinetic:.3E}  {1.21e3:.3E}  {0.0:.3E}\n")
+        if outcome == 'ok':
+            f.write(f"\n{STA_SUCCESS_PHRASE}\n")
+        elif outcome == 'fail':
+            f.write(f"\n ***ERROR: THE ANALYSIS HAS BEEN TERMINATED DUE TO AN EXCESSIVELY DISTORTED ELEMENT\n{STA_FAILURE_PHRASE}\n")
+
+
+def generate_sta_dir(root: str, n_files: int, n_increments: int, fail_every: int = 10, running_every: int = 25,
+                     seed: int = 0) -> List[str]:
+    """Carpeta con n_files .sta: uno de cada fail_every falla y uno de cada running_every sigue en ejecución."""
+    os.makedirs(root, exist_ok=True)
+    paths = []
+    for k in range(n_files):
+        outcome = 'fail' if fail_every and k % fail_every == fail_every - 1 else \
+                  'running' if running_every and k % running_every == running_every - 1 else 'ok'
+        path = os.path.join(root, f"{simulation_name(k, 2000 + 5 * k, k % 2 == 1)}.sta")
+        write_sta_file(path, n_increments, outcome, seed + k)
+        paths.append(path)
+    return paths
+
+
+# --- Datos de una escala completa (usado por run_benchmarks.py) ---
+def dataset_manifest(params: Dict[str, int]) -> Dict[str, object]:
+    return {'generator_version': GENERATOR_VERSION, 'params': dict(params)}
+
+
+def ensure_dataset(data_dir: str, params: Dict[str, int], quiet: bool = False) -> bool:
+    """
+    Genera (si no existen ya con los mismos parámetros) en data_dir:
+      Reports/       árbol de 'sims' simulaciones de 'points' puntos
+      Reports_main/  árbol pequeño de 'main_sims' simulaciones para las ejecuciones completas de main()
+      wide/          una simulación con A1/A2/A3_Acc.rpt de 'wide_nodes' columnas
+      sta/           'sta_files' archivos .sta de 'sta_increments' incrementos
+    Devuelve True si se han generado los datos.
+    """
+    manifest_path = os.path.join(data_dir, 'manifest.json')
+    manifest = dataset_manifest(params)
+    if os.path.exists(manifest_path):
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            if json.load(f) == manifest: return False
+    if not quiet: print(f"Generando datos sintéticos en '{data_dir}' ({params}) ...")
+    import shutil
+    for sub in ('Reports', 'Reports_main', 'wide', 'sta'):
+        shutil.rmtree(os.path.join(data_dir, sub), ignore_errors=True)
+    generate_reports_tree(os.path.join(data_dir, 'Reports'), params['sims'], params['points'])
+    generate_reports_tree(os.path.join(data_dir, 'Reports_main'), params['main_sims'], params['points'], seed=10000)
+    write_simulation_reports(os.path.join(data_dir, 'wide', 'Nahum_E9999_v3000'), 3.0, params['points'],
+                             wide_nodes=params['wide_nodes'], seed=20000)
+    generate_sta_dir(os.path.join(data_dir, 'sta'), params['sta_files'], params['sta_increments'])
+    os.makedirs(data_dir, exist_ok=True)
+    with open(manifest_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=1)
+    return True
+
+
+# --- Línea de comandos ---
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Generador de .rpt y .sta sintéticos con el formato de Abaqus.")
+    sub = parser.add_subparsers(dest='command', required=True)
+    p_reports = sub.add_parser('reports', help="Árbol Reports/<simulación>/ con los .rpt de cada simulación")
+    p_reports.add_argument('output_dir')
+    p_reports.add_argument('--sims', type=int, default=10)
+    p_reports.add_argument('--points', type=int, default=DEFAULT_POINTS)
+    p_reports.add_argument('--wide-nodes', type=int, default=0, help="Columnas de A1/A2/A3_Acc.rpt (0 = no se escriben)")
+    p_reports.add_argument('--helmet-fraction', type=float, default=0.5)
+    p_reports.add_argument('--seed', type=int, default=0)
+    p_sta = sub.add_parser('sta', help="Carpeta con archivos .sta de Abaqus/Explicit")
+    p_sta.add_argument('output_dir')
+    p_sta.add_argument('--files', type=int, default=10)
+    p_sta.add_argument('--increments', type=int, default=20000)
+    p_sta.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    if args.command == 'reports':
+        names = generate_reports_tree(args.output_dir, args.sims, args.points, args.wide_nodes, args.helmet_fraction, args.seed)
+        print(f"{len(names)} simulaciones generadas en '{args.output_dir}'.")
+    else:
+        paths = generate_sta_dir(args.output_dir, args.files, args.increments, seed=args.seed)
+        print(f"{len(paths)} archivos .sta generados en '{args.output_dir}'.")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
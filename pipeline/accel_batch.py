@@ -0,0 +1,79 @@
+import numpy as np
+from typing import Dict, Hashable, Iterable, List, Optional, Sequence, Tuple, TypeVar
+
+# --- Configuración del Cálculo por Lotes del Módulo de la Aceleración ---
+# Las componentes A1/A2/A3 de todas las simulaciones con el mismo nº de instantes se apilan en un solo array y el
+# módulo, el cambio de unidades y la corrección lineal se calculan de una vez, sin arrays temporales por simulación.
+# El array es (3, n_sims, n_t) y no (n_sims, n_t, 3): con la componente como primer eje cada una es un bloque
+# contiguo y la suma de cuadrados de np.einsum recorre la memoria en orden (con el eje de 3 al final es más lenta
+# que el cálculo simulación a simulación).
+DEFAULT_BATCH_SIMS = 64
+
+T = TypeVar('T')
+
+
+def stack_components(components: Sequence[Sequence[np.ndarray]], out: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Apila [(a1, a2, a3), ...] de n simulaciones con el mismo nº de instantes en un array (3, n, n_t) (una copia por
+    componente). 'out' permite reutilizar el array de un lote anterior del mismo tamaño.
+    """
+    n_sims, n_t = len(components), len(components[0][0])
+    if out is None or out.shape != (3, n_sims, n_t): out = np.empty((3, n_sims, n_t), dtype=np.float64)
+    for i, sim_components in enumerate(components):
+        for k in range(3):
+            out[k, i] = sim_components[k]
+    return out
+
+
+def batched_magnitude(stack: np.ndarray, scale: float = 1.0, slope: float = 1.0, intercept: float = 0.0,
+                      out: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    slope · scale · sqrt(a1² + a2² + a3²) + intercept para cada fila de un array (3, n_sims, n_t), en un array
+    (n_sims, n_t). scale es el cambio de unidades (p. ej. 1/1000 de mm/s² a m/s²) y slope/intercept la corrección
+    lineal, ya en las unidades del resultado. Todo se calcula sobre 'out', sin temporales.
+    """
+    out = np.einsum('kij,kij->ij', stack, stack, out=out)
+    np.sqrt(out, out=out)
+    factor = abs(scale) * slope # sqrt((s·a)²) = |s|·sqrt(a²)
+    if factor != 1.0: np.multiply(out, factor, out=out)
+    if intercept != 0.0: np.add(out, intercept, out=out)
+    return out
+
+
+def magnitude(a1: np.ndarray, a2: np.ndarray, a3: np.ndarray, scale: float = 1.0) -> np.ndarray:
+    """
+    Módulo de una sola simulación sin apilar las componentes: los cuadrados se acumulan sobre el resultado con un
+    único array auxiliar, en el mismo orden que batched_magnitude (da exactamente los mismos valores).
+    """
+    out = np.multiply(a1, a1, dtype=np.float64)
+    squared = np.multiply(a2, a2, dtype=np.float64)
+    np.add(out, squared, out=out)
+    np.multiply(a3, a3, out=squared)
+    np.add(out, squared, out=out)
+    np.sqrt(out, out=out)
+    if abs(scale) != 1.0: np.multiply(out, abs(scale), out=out)
+    return out
+
+
+def group_by_length(items: Iterable[T], length_of) -> Dict[Hashable, List[T]]:
+    """Agrupa los elementos por nº de instantes (length_of(item)), que es lo que tienen que compartir para apilarse."""
+    groups: Dict[Hashable, List[T]] = {}
+    for item in items:
+        groups.setdefault(length_of(item), []).append(item)
+    return groups
+
+
+def batches(items: Sequence[T], batch_size: int = DEFAULT_BATCH_SIMS) -> Iterable[Sequence[T]]:
+    """Trozos consecutivos de como máximo batch_size elementos."""
+    batch_size = max(1, int(batch_size))
+    for start in range(0, len(items), batch_size):
+        yield items[start:start + batch_size]
+
+
+def aligned_components(series: Sequence[Optional[Tuple[np.ndarray, np.ndarray]]],
+                       atol: float = 1e-3) -> Optional[Tuple[np.ndarray, Tuple[np.ndarray, np.ndarray, np.ndarray]]]:
+    """(tiempo, (a1, a2, a3)) si las tres series existen y comparten los instantes; si no, None (se calculan aparte)."""
+    if len(series) != 3 or any(s is None for s in series): return None
+    time = series[0][0]
+    if any(len(s[0]) != len(time) or not np.allclose(s[0], time, atol=atol) for s in series[1:]): return None
+    return time, (series[0][1], series[1][1], series[2][1])
@@ -0,0 +1,272 @@
+import os
+import json
+import time
+import base64
+import numpy as np
+from typing import List, Dict, Optional, Any
+
+try:
+    import plot_decimation
+except ImportError:
+    plot_decimation = None
+
+# --- Configuración del Panel de Campaña ---
+# Un único .html autocontenido (sin dependencias externas) con las series de todas las simulaciones, reducidas y
+# codificadas como Float32 en base64. Los filtros y la superposición de curvas se hacen en el navegador.
+DASHBOARD_BUCKETS = 300 # Tramos mín./máx. por serie (hasta 2 puntos por tramo): suficiente para un gráfico de ~1000 px
+DASHBOARD_FORMAT_VERSION = 1
+# (clave, clave de tiempo, clave de valores, nombre, unidad) de cada serie del registro de la simulación
+DASHBOARD_SERIES = [
+    ('acc', 'time_acc_ms', 'acc_mag_m_s2', 'Aceleración Mag.', 'm/s²'),
+    ('coup', 'time_p_coup_ms', 'pressure_coup_mpa', 'Presión Coup (Front)', 'MPa'),
+    ('contrecoup', 'time_p_contrecoup_ms', 'pressure_contrecoup_mpa', 'Presión Contrecoup (Back)', 'MPa'),
+]
+DASHBOARD_PALETTE = ['#4c72b0', '#dd8452', '#55a868', '#c44e52', '#8172b3',
+                     '#937860', '#da8bc3', '#8c8c8c', '#ccb974', '#64b5cd'] # seaborn 'deep'
+
+
+# --- Datos de cada simulación ---
+def encode_float32(values: np.ndarray) -> str:
+    """Array como Float32 little-endian en base64 (se decodifica en el navegador con Float32Array)."""
+    return base64.b64encode(np.ascontiguousarray(values, dtype='<f4').tobytes()).decode('ascii')
+
+
+def simulation_facets(helmet_status: Optional[str]) -> Dict[str, str]:
+    """Casco y tipo de impacto a partir del estado de extract_title_info ('Nahum (Frontal)', 'Con Casco', ...)."""
+    status = (helmet_status or '').replace(' [Corregido]', '')
+    impact_type = 'Nahum (Frontal)' if status.startswith('Nahum') else 'Impacto'
+    if status.startswith('Con Casco'): helmet = 'Con Casco'
+    elif status.startswith(('Sin Casco', 'Nahum')): helmet = 'Sin Casco'
+    else: helmet = 'Desconocido'
+    return {'casco': helmet, 'tipo': impact_type}
+
+
+def simulation_entry(sim_data, buckets: int = DASHBOARD_BUCKETS) -> Dict[str, Any]:
+    """
+    Entrada del panel para un registro de simulación (SimulationRecord o diccionario con las mismas claves).
+    Cada serie se reduce al mínimo y máximo de 'buckets' tramos; el pico se calcula sobre la serie completa.
+    """
+    entry = {'name': sim_data['name'], 'short_id': sim_data.get('short_id') or sim_data['name'],
+             'status': sim_data.get('helmet_status'), 'velocity_m_s': sim_data.get('velocity_m_s'), 'series': {}}
+    entry.update(simulation_facets(entry['status']))
+    for key, time_key, value_key, _, _ in DASHBOARD_SERIES:
+        t, y = sim_data.get(time_key), sim_data.get(value_key)
+        if t is None or y is None or len(y) == 0: continue
+        t, y = np.asarray(t, dtype=float), np.asarray(y, dtype=float)
+        peak_idx = int(np.nanargmax(np.abs(y)))
+        peak, t_peak = float(y[peak_idx]), float(t[peak_idx])
+        if plot_decimation is not None: t, y = plot_decimation.minmax_decimate(t, y, buckets)
+        entry['series'][key] = {'t': encode_float32(t), 'y': encode_float32(y), 'peak': peak, 't_peak': t_peak}
+    return entry
+
+
+# --- Escritura del HTML ---
+def write_dashboard(entries: List[Dict[str, Any]], output_path: str, title: str = 'Panel de la campaña') -> str:
+    """Escribe el panel con las entradas de simulation_entry() y devuelve la ruta."""
+    payload = {
+        'version': DASHBOARD_FORMAT_VERSION, 'title': title, 'created': time.strftime('%Y-%m-%d %H:%M:%S'),
+        'series': [{'key': k, 'label': label, 'unit': unit} for k, _, _, label, unit in DASHBOARD_SERIES],
+        'palette': DASHBOARD_PALETTE,
+        'simulations': sorted(entries, key=lambda e: (e['tipo'], e['casco'], e['velocity_m_s'] if e['velocity_m_s'] is not None else float('inf'), e['name'])),
+    }
+    data_json = json.dumps(payload, ensure_ascii=False, separators=(',', ':')).replace('</', '<\\/')
+    html = _HTML_TEMPLATE.replace('__TITLE__', _escape_html(title)).replace('__DATA__', data_json)
+    output_dir = os.path.dirname(os.path.abspath(output_path))
+    os.makedirs(output_dir, exist_ok=True)
+    with open(output_path, 'w', encoding='utf-8') as f:
+        f.write(html)
+    return output_path
+
+
+def _escape_html(text: str) -> str:
+    return text.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
+
+
+_HTML_TEMPLATE = r"""<!DOCTYPE html>
+<html lang="es">
+<head>
+<meta charset="utf-8">
+<title>__TITLE__</title>
+<style>
+  body { font-family: sans-serif; margin: 0; display: flex; height: 100vh; color: #222; }
+  #side { width: 460px; min-width: 340px; display: flex; flex-direction: column; border-right: 1px solid #ccc; }
+  #filters { padding: 8px 10px; border-bottom: 1px solid #ccc; font-size: 13px; }
+  #filters label { display: inline-block; margin: 2px 8px 2px 0; }
+  #filters input[type=number] { width: 60px; }
+  #list { overflow-y: auto; flex: 1; font-size: 12px; }
+  table { border-collapse: collapse; width: 100%; }
+  th, td { padding: 2px 6px; text-align: left; white-space: nowrap; }
+  th { position: sticky; top: 0; background: #f2f2f2; cursor: pointer; }
+  tr:nth-child(even) td { background: #fafafa; }
+  td.num { text-align: right; }
+  #main { flex: 1; display: flex; flex-direction: column; min-width: 0; }
+  #toolbar { padding: 8px 10px; border-bottom: 1px solid #ccc; font-size: 13px; }
+  #plot { flex: 1; position: relative; }
+  canvas { position: absolute; left: 0; top: 0; width: 100%; height: 100%; }
+  #readout { position: absolute; right: 12px; top: 8px; font-size: 12px; background: rgba(255,255,255,0.85); padding: 2px 6px; }
+  .swatch { display: inline-block; width: 10px; height: 10px; margin-right: 4px; }
+</style>
+</head>
+<body>
+<div id="side">
+  <div id="filters">
+    <b>__TITLE__</b> <span id="info"></span><br>
+    <label>Casco <select id="f-casco"></select></label>
+    <label>Tipo <select id="f-tipo"></select></label><br>
+    <label>Velocidad (m/s) <input id="f-vmin" type="number" step="0.1"> a <input id="f-vmax" type="number" step="0.1"></label>
+    <label>Nombre <input id="f-text" type="text" size="12"></label><br>
+    <button id="b-all">Marcar visibles</button> <button id="b-none">Desmarcar todo</button> <span id="count"></span>
+  </div>
+  <div id="list"><table><thead><tr><th></th><th data-k="short_id">Simulación</th><th data-k="casco">Casco</th><th data-k="tipo">Tipo</th>
+    <th data-k="velocity_m_s">v (m/s)</th><th data-k="peak">Pico</th></tr></thead><tbody id="rows"></tbody></table></div>
+</div>
+<div id="main">
+  <div id="toolbar">Serie: <span id="series-choice"></span></div>
+  <div id="plot"><canvas id="canvas"></canvas><div id="readout"></div></div>
+</div>
+<script>
+"use strict";
+const DATA = __DATA__;
+const sims = DATA.simulations;
+const selected = new Set();
+const decoded = new Map();
+let seriesKey = DATA.series[0].key, sortKey = null, sortDir = 1, view = null;
+
+function decode(b64) {
+  const bin = atob(b64), bytes = new Uint8Array(bin.length);
+  for (let i = 0; i < bin.length; i++) bytes[i] = bin.charCodeAt(i);
+  return new Float32Array(bytes.buffer);
+}
+function series(sim, key) {
+  const s = sim.series[key];
+  if (!s) return null;
+  const id = sim.name + '|' + key;
+  if (!decoded.has(id)) decoded.set(id, {t: decode(s.t), y: decode(s.y)});
+  return decoded.get(id);
+}
+function fmt(v) { return v === null || v === undefined ? '' : (Math.abs(v) >= 1e4 || (v !== 0 && Math.abs(v) < 1e-3) ? v.toExponential(3) : v.toPrecision(4)); }
+function el(id) { return document.getElementById(id); }
+
+function fillSelect(id, values) {
+  const sel = el(id);
+  sel.innerHTML = '<option value="">Todos</option>' + values.map(v => '<option>' + v + '</option>').join('');
+  sel.onchange = render;
+}
+function visibleSims() {
+  const casco = el('f-casco').value, tipo = el('f-tipo').value, text = el('f-text').value.toLowerCase();
+  const vmin = parseFloat(el('f-vmin').value), vmax = parseFloat(el('f-vmax').value);
+  let list = sims.filter(s => (!casco || s.casco === casco) && (!tipo || s.tipo === tipo) &&
+    (!text || s.name.toLowerCase().includes(text)) &&
+    (isNaN(vmin) || (s.velocity_m_s !== null && s.velocity_m_s >= vmin)) &&
+    (isNaN(vmax) || (s.velocity_m_s !== null && s.velocity_m_s <= vmax)));
+  if (sortKey) {
+    const value = s => sortKey === 'peak' ? (s.series[seriesKey] ? s.series[seriesKey].peak : null) : s[sortKey];
+    list = list.slice().sort((a, b) => {
+      const va = value(a), vb = value(b);
+      if (va === vb) return 0; if (va === null) return 1; if (vb === null) return -1;
+      return (va < vb ? -1 : 1) * sortDir;
+    });
+  }
+  return list;
+}
+function colorOf(sim) { return DATA.palette[sims.indexOf(sim) % DATA.palette.length]; }
+
+function renderList() {
+  const list = visibleSims();
+  el('rows').innerHTML = list.map(s => {
+    const i = sims.indexOf(s), p = s.series[seriesKey];
+    return '<tr><td><input type="checkbox" data-i="' + i + '"' + (selected.has(i) ? ' checked' : '') + '></td>' +
+      '<td title="' + s.name + '"><span class="swatch" style="background:' + colorOf(s) + '"></span>' + s.short_id + '</td>' +
+      '<td>' + s.casco + '</td><td>' + s.tipo + '</td><td class="num">' + (s.velocity_m_s === null ? '' : s.velocity_m_s.toFixed(3)) + '</td>' +
+      '<td class="num">' + (p ? fmt(p.peak) : '') + '</td></tr>';
+  }).join('');
+  el('count').textContent = list.length + ' visibles, ' + selected.size + ' superpuestas';
+  el('rows').querySelectorAll('input').forEach(cb => cb.onchange = () => {
+    const i = +cb.dataset.i; cb.checked ? selected.add(i) : selected.delete(i); render();
+  });
+}
+
+function niceTicks(lo, hi, n) {
+  const span = hi - lo, step0 = span / Math.max(n, 1), mag = Math.pow(10, Math.floor(Math.log10(step0)));
+  const step = [1, 2, 5, 10].map(m => m * mag).find(s => span / s <= n) || 10 * mag;
+  const ticks = [];
+  for (let v = Math.ceil(lo / step) * step; v <= hi + step * 1e-9; v += step) ticks.push(Math.abs(v) < step * 1e-9 ? 0 : v);
+  return ticks;
+}
+function renderPlot() {
+  const canvas = el('canvas'), box = el('plot').getBoundingClientRect(), dpr = window.devicePixelRatio || 1;
+  canvas.width = Math.max(1, box.width * dpr); canvas.height = Math.max(1, box.height * dpr);
+  const ctx = canvas.getContext('2d'); ctx.setTransform(dpr, 0, 0, dpr, 0, 0);
+  const W = box.width, H = box.height, m = {l: 80, r: 20, t: 20, b: 50};
+  ctx.clearRect(0, 0, W, H); ctx.font = '12px sans-serif'; ctx.fillStyle = '#222';
+  const info = DATA.series.find(s => s.key === seriesKey);
+  const curves = [...selected].map(i => ({sim: sims[i], data: series(sims[i], seriesKey)})).filter(c => c.data);
+  view = null;
+  if (!curves.length) { ctx.fillText('Marca simulaciones en la lista para superponer sus curvas.', m.l, H / 2); return; }
+  let x0 = Infinity, x1 = -Infinity, y0 = Infinity, y1 = -Infinity;
+  for (const c of curves) for (let k = 0; k < c.data.t.length; k++) {
+    const x = c.data.t[k], y = c.data.y[k];
+    if (!isFinite(x) || !isFinite(y)) continue;
+    if (x < x0) x0 = x; if (x > x1) x1 = x; if (y < y0) y0 = y; if (y > y1) y1 = y;
+  }
+  if (x0 === x1) { x0 -= 1; x1 += 1; }
+  if (y0 === y1) { y0 -= 1; y1 += 1; }
+  const pad = (y1 - y0) * 0.05; y0 -= pad; y1 += pad;
+  const sx = x => m.l + (x - x0) / (x1 - x0) * (W - m.l - m.r), sy = y => H - m.b - (y - y0) / (y1 - y0) * (H - m.t - m.b);
+  view = {x0, x1, y0, y1, m, W, H};
+  ctx.strokeStyle = '#ddd'; ctx.lineWidth = 1; ctx.textAlign = 'center';
+  for (const v of niceTicks(x0, x1, 10)) { ctx.beginPath(); ctx.moveTo(sx(v), m.t); ctx.lineTo(sx(v), H - m.b); ctx.stroke(); ctx.fillText(fmt(v), sx(v), H - m.b + 16); }
+  ctx.textAlign = 'right';
+  for (const v of niceTicks(y0, y1, 8)) { ctx.beginPath(); ctx.moveTo(m.l, sy(v)); ctx.lineTo(W - m.r, sy(v)); ctx.stroke(); ctx.fillText(fmt(v), m.l - 6, sy(v) + 4); }
+  ctx.strokeStyle = '#444'; ctx.strokeRect(m.l, m.t, W - m.l - m.r, H - m.t - m.b);
+  ctx.textAlign = 'center'; ctx.fillText('Tiempo (ms)', m.l + (W - m.l - m.r) / 2, H - 12);
+  ctx.save(); ctx.translate(16, m.t + (H - m.t - m.b) / 2); ctx.rotate(-Math.PI / 2); ctx.fillText(info.label + ' (' + info.unit + ')', 0, 0); ctx.restore();
+  ctx.save(); ctx.beginPath(); ctx.rect(m.l, m.t, W - m.l - m.r, H - m.t - m.b); ctx.clip();
+  ctx.lineWidth = 1.5;
+  for (const c of curves) {
+    ctx.strokeStyle = colorOf(c.sim); ctx.beginPath();
+    let pen = false;
+    for (let k = 0; k < c.data.t.length; k++) {
+      const x = c.data.t[k], y = c.data.y[k];
+      if (!isFinite(x) || !isFinite(y)) { pen = false; continue; }
+      pen ? ctx.lineTo(sx(x), sy(y)) : ctx.moveTo(sx(x), sy(y)); pen = true;
+    }
+    ctx.stroke();
+  }
+  ctx.restore();
+  ctx.textAlign = 'left';
+  curves.slice(0, 20).forEach((c, k) => {
+    const y = m.t + 14 + k * 15;
+    ctx.fillStyle = colorOf(c.sim); ctx.fillRect(W - m.r - 190, y - 8, 10, 10);
+    ctx.fillStyle = '#222'; ctx.fillText(c.sim.short_id, W - m.r - 175, y + 1);
+  });
+  if (curves.length > 20) ctx.fillText('... y ' + (curves.length - 20) + ' más', W - m.r - 175, m.t + 14 + 20 * 15);
+}
+function render() { renderList(); renderPlot(); }
+
+el('info').textContent = '(' + sims.length + ' simulaciones, ' + DATA.created + ')';
+fillSelect('f-casco', [...new Set(sims.map(s => s.casco))].sort());
+fillSelect('f-tipo', [...new Set(sims.map(s => s.tipo))].sort());
+['f-vmin', 'f-vmax', 'f-text'].forEach(id => el(id).oninput = render);
+el('series-choice').innerHTML = DATA.series.map(s => '<label><input type="radio" name="serie" value="' + s.key + '"' +
+  (s.key === seriesKey ? ' checked' : '') + '> ' + s.label + ' (' + s.unit + ')</label> ').join('');
+document.querySelectorAll('input[name=serie]').forEach(r => r.onchange = () => { seriesKey = r.value; render(); });
+el('b-all').onclick = () => { visibleSims().forEach(s => selected.add(sims.indexOf(s))); render(); };
+el('b-none').onclick = () => { selected.clear(); render(); };
+document.querySelectorAll('th[data-k]').forEach(th => th.onclick = () => {
+  sortDir = sortKey === th.dataset.k ? -sortDir : 1; sortKey = th.dataset.k; renderList();
+});
+el('canvas').onmousemove = ev => {
+  if (!view) return;
+  const r = el('canvas').getBoundingClientRect(), px = ev.clientX - r.left, py = ev.clientY - r.top, m = view.m;
+  if (px < m.l || px > view.W - m.r || py < m.t || py > view.H - m.b) { el('readout').textContent = ''; return; }
+  const x = view.x0 + (px - m.l) / (view.W - m.l - m.r) * (view.x1 - view.x0);
+  const y = view.y0 + (view.H - m.b - py) / (view.H - m.t - m.b) * (view.y1 - view.y0);
+  el('readout').textContent = 't = ' + fmt(x) + ' ms, ' + fmt(y);
+};
+window.onresize = renderPlot;
+render();
+</script>
+</body>
+</html>
+"""
@@ -0,0 +1,229 @@
+import os
+import re
+import io
+import sys
+import json
+import time
+import zipfile
+import argparse
+import traceback
+import numpy as np
+from typing import List, Dict, Tuple, Optional, Any
+
+# --- Configuración del Archivo de Campaña ---
+# Un archivo de campaña es un .npz (zip) con un miembro por serie, clave "<simulación>/<archivo .rpt>",
+# más un índice JSON. Cada miembro se comprime y se lee por separado, sin cargar el resto del archivo.
+CAMPAIGN_STORE_VERSION = 1
+INDEX_MEMBER_NAME = '__index__'
+RPT_EXTENSION = '.rpt'
+RPT_IGNORE_LINE_PATTERNS = [r'^\s*\*+', r'^\s*END STEP', r'^\s*THE ANALYSIS', r'^\s*FIELD OUTPUT']
+_IGNORE_LINE_RE = re.compile('|'.join(RPT_IGNORE_LINE_PATTERNS), re.IGNORECASE)
+
+
+# --- Lectura tolerante de .rpt (todas las columnas) ---
+def parse_rpt_columns(file_path: str) -> Optional[np.ndarray]:
+    """
+    Lee todas las columnas numéricas de un .rpt de writeXYReport.
+    Devuelve un array (n_filas, n_columnas) con el tiempo en segundos en la columna 0,
+    o None si no hay datos. Las filas con distinto número de columnas que la primera se descartan.
+    """
+    rows: List[List[float]] = []
+    n_cols = None
+    try:
+        with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
+            for line_content in f:
+                line = line_content.strip()
+                if not line or _IGNORE_LINE_RE.search(line): continue
+                try:
+                    values = [float(p) for p in line.split()]
+                except ValueError:
+                    continue
+                if n_cols is None: n_cols = len(values)
+                if len(values) == n_cols and n_cols >= 2:
+                    rows.append(values)
+    except (IOError, OSError) as e:
+        print(f"      ERROR (parse_rpt_columns): No se pudo leer {file_path}: {e}")
+        return None
+    return np.array(rows, dtype=np.float64) if rows else None
+
+
+def _member_key(sim_name: str, rpt_name: str) -> str:
+    return f"{sim_name}/{rpt_name}"
+
+
+# --- Exportación: árbol de Reports -> archivo de campaña ---
+def export_reports_tree(reports_root: str, archive_path: str, compress: bool = True) -> Optional[Dict[str, Any]]:
+    """
+    Empaqueta todos los .rpt de las subcarpetas de reports_root en un único archivo de campaña.
+    Las series se escriben una a una en el zip, así que la memoria usada es la de la serie más grande.
+    El archivo se escribe primero como temporal y se renombra al terminar.
+    """
+    if not os.path.isdir(reports_root):
+        print(f"ERROR: El directorio de reportes '{reports_root}' no existe.")
+        return None
+
+    sim_dirs = sorted(d for d in os.listdir(reports_root) if os.path.isdir(os.path.join(reports_root, d)))
+    if not sim_dirs:
+        print(f"No se encontraron directorios de simulación en '{reports_root}'.")
+        return None
+
+    index: Dict[str, Any] = {
+        'version': CAMPAIGN_STORE_VERSION,
+        'source_root': os.path.abspath(reports_root),
+        'created': time.strftime('%Y-%m-%d %H:%M:%S'),
+        'simulations': {},
+    }
+    compression = zipfile.ZIP_DEFLATED if compress else zipfile.ZIP_STORED
+    tmp_path = archive_path + '.tmp'
+    n_series = 0
+    print(f"INFO: Empaquetando {len(sim_dirs)} simulaciones de '{reports_root}' en '{archive_path}'")
+    try:
+        with zipfile.ZipFile(tmp_path, 'w', compression=compression, allowZip64=True) as zf:
+            for sim_name in sim_dirs:
+                sim_dir = os.path.join(reports_root, sim_name)
+                sim_entry: Dict[str, Any] = {}
+                for rpt_name in sorted(os.listdir(sim_dir)):
+                    if not rpt_name.lower().endswith(RPT_EXTENSION): continue
+                    data = parse_rpt_columns(os.path.join(sim_dir, rpt_name))
+                    if data is None:
+                        print(f"  AVISO: '{sim_name}/{rpt_name}' sin datos numéricos. Omitido.")
+                        continue
+                    with zf.open(_member_key(sim_name, rpt_name) + '.npy', 'w', force_zip64=True) as member:
+                        np.lib.format.write_array(member, np.ascontiguousarray(data), allow_pickle=False)
+                    sim_entry[rpt_name] = {'shape': list(data.shape)}
+                    n_series += 1
+                if sim_entry:
+                    index['simulations'][sim_name] = sim_entry
+            zf.writestr(INDEX_MEMBER_NAME + '.json', json.dumps(index, indent=1))
+        os.replace(tmp_path, archive_path)
+    except Exception as e:
+        print(f"ERROR: Fallo al crear el archivo de campaña '{archive_path}': {e}")
+        traceback.print_exc()
+        if os.path.exists(tmp_path): os.remove(tmp_path)
+        return None
+
+    print(f"INFO: Archivo de campaña creado ({len(index['simulations'])} simulaciones, {n_series} series, "
+          f"{os.path.getsize(archive_path) / 1e6:.1f} MB).")
+    return index
+
+
+# --- Lectura directa del archivo de campaña ---
+class CampaignStore:
+    """
+    Acceso de solo lectura a un archivo de campaña. Cada serie se descomprime al pedirla.
+    Las rutas de tipo '<raiz>/<simulación>/<archivo>.rpt' se resuelven por sus dos últimos componentes,
+    de modo que el código que trabaja con rutas del árbol de Reports puede usar el archivo sin cambios.
+    """
+
+    def __init__(self, archive_path: str):
+        self.archive_path = archive_path
+        self._zip = zipfile.ZipFile(archive_path, 'r')
+        with self._zip.open(INDEX_MEMBER_NAME + '.json') as f:
+            self.index: Dict[str, Any] = json.load(io.TextIOWrapper(f, encoding='utf-8'))
+        if self.index.get('version') != CAMPAIGN_STORE_VERSION:
+            print(f"AVISO: Versión de archivo de campaña {self.index.get('version')} (esperada {CAMPAIGN_STORE_VERSION}).")
+
+    def __enter__(self): return self
+    def __exit__(self, *exc): self.close()
+
+    def close(self):
+        if self._zip is not None:
+            self._zip.close()
+            self._zip = None
+
+    def simulations(self) -> List[str]:
+        return sorted(self.index['simulations'].keys())
+
+    def files(self, sim_name: str) -> List[str]:
+        return sorted(self.index['simulations'].get(sim_name, {}).keys())
+
+    def has(self, sim_name: str, rpt_name: str) -> bool:
+        return rpt_name in self.index['simulations'].get(sim_name, {})
+
+    def read(self, sim_name: str, rpt_name: str) -> Optional[np.ndarray]:
+        """Devuelve el array (n_filas, n_columnas) de la serie, o None si no existe."""
+        if not self.has(sim_name, rpt_name): return None
+        with self._zip.open(_member_key(sim_name, rpt_name) + '.npy') as member:
+            return np.lib.format.read_array(member, allow_pickle=False)
+
+    # Equivalentes de os.path.exists / os.listdir / lectura sobre rutas del árbol de Reports
+    @staticmethod
+    def _split_path(path: str) -> Tuple[str, str]:
+        return os.path.basename(os.path.dirname(path)), os.path.basename(path)
+
+    def exists(self, path: str) -> bool:
+        return bool(path) and self.has(*self._split_path(path))
+
+    def listdir(self, dir_path: str) -> List[str]:
+        return self.files(os.path.basename(os.path.normpath(dir_path)))
+
+    def read_path(self, path: str) -> Optional[np.ndarray]:
+        return self.read(*self._split_path(path)) if path else None
+
+
+def open_campaign_store(archive_path: Optional[str]) -> Optional[CampaignStore]:
+    """Abre el archivo de campaña si está configurado y existe; None en caso contrario."""
+    if not archive_path: return None
+    if not os.path.exists(archive_path):
+        print(f"ERROR: El archivo de campaña '{archive_path}' no existe.")
+        return None
+    try:
+        return CampaignStore(archive_path)
+    except (zipfile.BadZipFile, KeyError, ValueError) as e:
+        print(f"ERROR: '{archive_path}' no es un archivo de campaña válido: {e}")
+        return None
+
+
+# --- Importación: archivo de campaña -> árbol de Reports ---
+def import_campaign_store(archive_path: str, reports_root: str, overwrite: bool = False) -> int:
+    """Reconstruye el árbol de .rpt a partir de un archivo de campaña. Devuelve el nº de archivos escritos."""
+    store = open_campaign_store(archive_path)
+    if store is None: return 0
+    n_written = 0
+    with store:
+        for sim_name in store.simulations():
+            sim_dir = os.path.join(reports_root, sim_name)
+            os.makedirs(sim_dir, exist_ok=True)
+            for rpt_name in store.files(sim_name):
+                out_path = os.path.join(sim_dir, rpt_name)
+                if os.path.exists(out_path) and not overwrite: continue
+                data = store.read(sim_name, rpt_name)
+                header_names = ['X'] + [os.path.splitext(rpt_name)[0]] * (data.shape[1] - 1)
+                with open(out_path, 'w') as f:
+                    f.write('\n' + ''.join(f'{h:>20}' for h in header_names) + '\n\n')
+                    np.savetxt(f, data, fmt='%20.6E', delimiter='')
+                n_written += 1
+    print(f"INFO: {n_written} archivos .rpt escritos en '{reports_root}'.")
+    return n_written
+
+
+# --- Punto de entrada ---
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Empaqueta/desempaqueta un árbol de Reports en un archivo de campaña (.npz).")
+    sub = parser.add_subparsers(dest='command', required=True)
+    p_exp = sub.add_parser('export', help="Reports/ -> archivo de campaña")
+    p_exp.add_argument('reports_root'); p_exp.add_argument('archive')
+    p_exp.add_argument('--no-compress', action='store_true', help="Guardar sin comprimir (más rápido, más grande)")
+    p_imp = sub.add_parser('import', help="archivo de campaña -> Reports/")
+    p_imp.add_argument('archive'); p_imp.add_argument('reports_root')
+    p_imp.add_argument('--overwrite', action='store_true')
+    p_ls = sub.add_parser('list', help="Lista simulaciones y series del archivo")
+    p_ls.add_argument('archive')
+    args = parser.parse_args(argv)
+
+    if args.command == 'export':
+        return 0 if export_reports_tree(args.reports_root, args.archive, compress=not args.no_compress) else 1
+    if args.command == 'import':
+        import_campaign_store(args.archive, args.reports_root, overwrite=args.overwrite)
+        return 0
+    store = open_campaign_store(args.archive)
+    if store is None: return 1
+    with store:
+        for sim_name in store.simulations():
+            print(sim_name)
+            for rpt_name in store.files(sim_name):
+                print(f"  {rpt_name}  {tuple(store.index['simulations'][sim_name][rpt_name]['shape'])}")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
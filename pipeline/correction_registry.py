@@ -0,0 +1,186 @@
+import os
+import re
+import sys
+import json
+import time
+import hashlib
+import argparse
+from typing import List, Dict, Optional, Any, Iterable
+
+# --- Configuración del Registro de Modelos de Corrección ---
+# Cada versión es un JSON con el mismo esquema que 'parametros_correccion.json' ('metrics' y, opcionalmente,
+# 'transfer_functions'), más el nº de versión y las huellas (sha256) de los datos de los que se obtuvo.
+REGISTRY_FORMAT_VERSION = 1
+MODEL_FILE_PREFIX = 'modelo_correccion_v'
+MODEL_FILE_PATTERN = re.compile(r'^' + MODEL_FILE_PREFIX + r'(\d+)\.json$')
+PARAMS_FILE_DEFAULT_NAME = 'parametros_correccion.json'
+HASH_CHUNK_BYTES = 1 << 20
+
+
+# --- Huellas de los datos de origen ---
+def file_sha256(file_path: str) -> str:
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(HASH_CHUNK_BYTES), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def fingerprint_sources(source_files: Iterable[str]) -> Dict[str, Any]:
+    """
+    Calcula la huella de cada archivo de origen existente y una huella global del conjunto,
+    independiente del orden y de la ruta (solo cuentan nombre y contenido).
+    """
+    sources: Dict[str, Dict[str, Any]] = {}
+    for path in source_files:
+        if not path or not os.path.isfile(path): continue
+        sources[os.path.basename(path)] = {'path': os.path.abspath(path), 'sha256': file_sha256(path),
+                                           'size': os.path.getsize(path)}
+    combined = hashlib.sha256()
+    for name in sorted(sources):
+        combined.update(f"{name}:{sources[name]['sha256']}\n".encode('utf-8'))
+    return {'files': sources, 'fingerprint': combined.hexdigest()}
+
+
+def _write_json_atomic(file_path: str, content: Dict[str, Any]):
+    os.makedirs(os.path.dirname(file_path) or '.', exist_ok=True)
+    tmp_path = file_path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(content, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_path, file_path)
+
+
+# --- Registro versionado ---
+class CorrectionRegistry:
+    """Carpeta con versiones numeradas e inmutables de los parámetros de corrección."""
+
+    def __init__(self, registry_dir: str):
+        self.registry_dir = registry_dir
+
+    def versions(self) -> List[int]:
+        if not os.path.isdir(self.registry_dir): return []
+        found = (MODEL_FILE_PATTERN.match(name) for name in os.listdir(self.registry_dir))
+        return sorted(int(m.group(1)) for m in found if m)
+
+    def path_for(self, version: int) -> str:
+        return os.path.join(self.registry_dir, f"{MODEL_FILE_PREFIX}{version:04d}.json")
+
+    def resolve_version(self, version: Any = None) -> Optional[int]:
+        """None o 'latest' -> última versión; un entero (o texto numérico) -> esa versión si existe."""
+        available = self.versions()
+        if not available: return None
+        if version is None or str(version).lower() == 'latest': return available[-1]
+        try:
+            version = int(version)
+        except (TypeError, ValueError):
+            return None
+        return version if version in available else None
+
+    def load(self, version: Any = None) -> Optional[Dict[str, Any]]:
+        resolved = self.resolve_version(version)
+        if resolved is None:
+            print(f"ERROR: No existe la versión '{version if version is not None else 'latest'}' en el registro '{self.registry_dir}'.")
+            return None
+        try:
+            with open(self.path_for(resolved), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (IOError, OSError, ValueError) as e:
+            print(f"ERROR: No se pudo leer la versión {resolved} del registro: {e}")
+            return None
+
+    def find(self, fingerprint: str) -> Optional[Dict[str, Any]]:
+        """Última versión obtenida de unos datos con la huella indicada."""
+        for version in reversed(self.versions()):
+            model = self.load(version)
+            if model and model.get('sources', {}).get('fingerprint') == fingerprint:
+                return model
+        return None
+
+    def register(self, metrics: Dict[str, Dict[str, Any]], transfer_functions: Optional[Dict[str, Dict[str, Any]]] = None,
+                 source_files: Iterable[str] = (), description: str = '') -> Optional[Dict[str, Any]]:
+        """
+        Guarda una nueva versión con los parámetros y las huellas de los datos de origen.
+        Si la última versión tiene exactamente los mismos datos y parámetros, se reutiliza en lugar de duplicarla.
+        """
+        if not metrics:
+            print("ADVERTENCIA: No hay parámetros de corrección que registrar.")
+            return None
+        sources = fingerprint_sources(source_files)
+        latest = self.load() if self.versions() else None
+        if (latest and latest.get('sources', {}).get('fingerprint') == sources['fingerprint']
+                and latest.get('metrics') == metrics and latest.get('transfer_functions') == (transfer_functions or None)):
+            print(f"Modelo de corrección sin cambios: se reutiliza la versión {latest['version']} del registro.")
+            return latest
+
+        version = (self.versions() or [0])[-1] + 1
+        model = {
+            'format': REGISTRY_FORMAT_VERSION, 'version': version,
+            'created': time.strftime('%Y-%m-%d %H:%M:%S'), 'description': description,
+            'sources': sources, 'metrics': metrics, 'transfer_functions': transfer_functions or None,
+        }
+        _write_json_atomic(self.path_for(version), model)
+        print(f"Modelo de corrección registrado como versión {version} en: {self.path_for(version)}")
+        return model
+
+    def verify(self, model: Dict[str, Any]) -> List[str]:
+        """Archivos de origen que ya no existen o cuyo contenido ha cambiado desde que se registró el modelo."""
+        changed = []
+        for name, info in model.get('sources', {}).get('files', {}).items():
+            if not os.path.isfile(info['path']) or file_sha256(info['path']) != info['sha256']:
+                changed.append(name)
+        return changed
+
+
+def export_params_file(model: Dict[str, Any], target_path: str) -> str:
+    """
+    Escribe el modelo con el formato de 'parametros_correccion.json', que es el que leen los procesadores
+    al cargar las series originales. Si target_path es una carpeta, se usa el nombre por defecto.
+    """
+    if os.path.isdir(target_path):
+        target_path = os.path.join(target_path, PARAMS_FILE_DEFAULT_NAME)
+    content = {'created': time.strftime('%Y-%m-%d %H:%M:%S'), 'metrics': model.get('metrics', {}),
+               'model_version': model.get('version'), 'source_fingerprint': model.get('sources', {}).get('fingerprint')}
+    if model.get('transfer_functions'):
+        content['transfer_functions'] = model['transfer_functions']
+    _write_json_atomic(target_path, content)
+    return target_path
+
+
+# --- Punto de entrada ---
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Registro versionado de modelos de corrección.")
+    parser.add_argument('registry_dir', help="Carpeta del registro")
+    sub = parser.add_subparsers(dest='command', required=True)
+    sub.add_parser('list', help="Lista las versiones registradas")
+    p_show = sub.add_parser('show', help="Muestra una versión")
+    p_show.add_argument('--version', default='latest')
+    p_apply = sub.add_parser('apply', help="Deja una versión como parámetros de corrección de un árbol de Reports")
+    p_apply.add_argument('reports_root')
+    p_apply.add_argument('--version', default='latest')
+    args = parser.parse_args(argv)
+
+    registry = CorrectionRegistry(args.registry_dir)
+    if args.command == 'list':
+        for version in registry.versions():
+            model = registry.load(version)
+            if not model: continue
+            changed = registry.verify(model)
+            status = f"origen modificado: {', '.join(changed)}" if changed else "origen sin cambios"
+            print(f"v{version:04d}  {model.get('created', '')}  {', '.join(sorted(model.get('metrics', {})))}  "
+                  f"[{model.get('sources', {}).get('fingerprint', '')[:12]}] {status}  {model.get('description', '')}")
+        return 0
+
+    model = registry.load(args.version)
+    if model is None: return 1
+    if args.command == 'show':
+        print(json.dumps(model, indent=2, ensure_ascii=False))
+        return 0
+    if not os.path.isdir(args.reports_root):
+        print(f"ERROR: El directorio de reportes '{args.reports_root}' no existe.")
+        return 1
+    target = export_params_file(model, args.reports_root)
+    print(f"Versión {model['version']} aplicada: parámetros escritos en '{target}'.")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
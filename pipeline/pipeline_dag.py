@@ -0,0 +1,380 @@
+import os
+import glob
+import json
+import time
+import traceback
+from typing import List, Dict, Optional, Any, Callable, Iterable, Tuple
+
+import stage_timing
+from stage_cache import StageCache, files_signature, tree_files
+
+# --- Configuración del Planificador del Pipeline ---
+# Cada simulación se descompone en tareas (status -> extract -> plot/metrics) con entradas y salidas en disco.
+# Una tarea se vuelve a ejecutar solo si cambia la firma de sus entradas o falta alguna de sus salidas, así que
+# al llegar un ODB nuevo solo se ejecutan sus tareas y las de agregación (gráficas de grupo, tabla de métricas).
+DAG_STATE_NAME = 'dag' # Estado en <cache_dir>/cache_dag.json
+# Cada tarea plot:<sim> deja en <resultados>/PLOT_STAMP_DIR_NAME/<sim>.json la lista de figuras que guardó, que son
+# sus salidas: si se borra alguna, la tarea se vuelve a ejecutar.
+PLOT_STAMP_DIR_NAME = '.figuras_dag'
+
+TASK_DONE = 'ejecutada'
+TASK_UP_TO_DATE = 'sin cambios'
+TASK_NOT_RUN = 'no ejecutada'
+TASK_FAILED = 'fallida'
+TIMING_REPORT_NAME = 'informe_tiempos_run.json' # En <cache_dir>, con la duración de cada tipo de tarea
+
+
+class Task:
+    """
+    Tarea del grafo. 'action(*args)' devuelve (ok, resultado); el resultado se guarda en el estado y lo reciben
+    las tareas con uses_dep_results. 'inputs', 'settings' y 'outputs' se evalúan cuando terminan las dependencias,
+    porque las entradas de una tarea suelen ser las salidas de la anterior.
+    'condition(resultados_dependencias)' puede impedir la ejecución (p. ej. no extraer un análisis fallido).
+    Con soft_deps la tarea espera a sus dependencias pero se ejecuta aunque alguna no se haya ejecutado o haya fallado.
+    """
+    __slots__ = ('name', 'action', 'args', 'deps', 'inputs', 'settings', 'outputs', 'condition',
+                 'soft_deps', 'uses_dep_results')
+
+    def __init__(self, name: str, action: Callable[..., Tuple[bool, Any]], args: Tuple = (), deps: Iterable[str] = (),
+                 inputs: Optional[Callable[[], List[str]]] = None, settings: Optional[Callable[[], Dict[str, Any]]] = None,
+                 outputs: Optional[Callable[[], List[str]]] = None,
+                 condition: Optional[Callable[[Dict[str, Any]], bool]] = None,
+                 soft_deps: bool = False, uses_dep_results: bool = False):
+        self.name = name
+        self.action = action
+        self.args = tuple(args)
+        self.deps = list(deps)
+        self.inputs = inputs
+        self.settings = settings
+        self.outputs = outputs
+        self.condition = condition
+        self.soft_deps = soft_deps
+        self.uses_dep_results = uses_dep_results
+
+    def signature(self, dep_results: Dict[str, Any]) -> str:
+        extra = dict(self.settings() if self.settings else {})
+        if self.uses_dep_results:
+            extra['__deps__'] = dep_results
+        return files_signature(self.inputs() if self.inputs else [], extra)
+
+    def outputs_exist(self) -> bool:
+        return all(os.path.exists(path) for path in (self.outputs() if self.outputs else []))
+
+
+def task_stage(name: str) -> str:
+    """Tipo de tarea para el informe de tiempos: 'plot:Sim_A' -> 'plot'."""
+    return name.split(':', 1)[0]
+
+
+def _run_task_action(action: Callable[..., Tuple[bool, Any]], args: Tuple,
+                     stage: str) -> Tuple[bool, Any, Optional[str], Dict[str, Any]]:
+    """Ejecuta la acción y devuelve también lo medido por stage_timing durante ella (también en procesos auxiliares)."""
+    with stage_timing.isolated() as block:
+        with stage_timing.timed(f"task.{stage}"):
+            try:
+                ok, result = action(*args)
+                error = None
+            except Exception:
+                ok, result, error = False, None, traceback.format_exc()
+    return ok, result, error, block.snapshot
+
+
+class DagRunner:
+    """Ejecuta un grafo de tareas en orden de dependencias, con hasta 'workers' tareas a la vez en procesos separados."""
+
+    def __init__(self, tasks: List[Task], cache_dir: Optional[str], workers: int = 1, force: bool = False,
+                 timing_report: Optional[str] = None):
+        self.tasks = {task.name: task for task in tasks}
+        missing = {dep for task in tasks for dep in task.deps if dep not in self.tasks}
+        if missing: raise ValueError(f"Dependencias inexistentes en el grafo: {', '.join(sorted(missing))}")
+        self.state = StageCache(cache_dir, DAG_STATE_NAME)
+        self.workers = max(1, workers)
+        self.force = force # Ignora el estado guardado y ejecuta todas las tareas
+        self.status: Dict[str, str] = {}
+        self.results: Dict[str, Any] = {}
+        self.timing_report = timing_report # JSON de stage_timing con los tiempos de todas las tareas, o None
+
+    def _ready(self, name: str) -> bool:
+        return name not in self.status and all(dep in self.status for dep in self.tasks[name].deps)
+
+    def _prepare(self, task: Task) -> Optional[Tuple[str, Dict[str, Any]]]:
+        """Decide si la tarea se ejecuta. Devuelve (firma, resultados de dependencias) o None si ya tiene estado final."""
+        dep_status = [self.status[dep] for dep in task.deps]
+        if not task.soft_deps and any(s in (TASK_FAILED, TASK_NOT_RUN) for s in dep_status):
+            self.status[task.name] = TASK_NOT_RUN
+            return None
+        dep_results = {dep: self.results.get(dep) for dep in task.deps}
+        if task.condition is not None and not task.condition(dep_results):
+            self.status[task.name] = TASK_NOT_RUN
+            return None
+        signature = task.signature(dep_results)
+        if not self.force and self.state.is_current(task.name, signature) and task.outputs_exist():
+            self.status[task.name] = TASK_UP_TO_DATE
+            self.results[task.name] = self.state.result(task.name)
+            return None
+        return signature, dep_results
+
+    def _finish(self, task: Task, signature: str, ok: bool, result: Any, error: Optional[str], timing: Dict[str, Any]):
+        stage_timing.merge(timing)
+        if ok:
+            self.status[task.name] = TASK_DONE
+            self.results[task.name] = result
+            self.state.update(task.name, signature, result)
+        else:
+            self.status[task.name] = TASK_FAILED
+            self.state.forget(task.name)
+            print(f"ERROR: Falló la tarea '{task.name}'." + (f"\n{error}" if error else ""))
+        self.state.save() # Tras cada tarea, para no repetir trabajo si se interrumpe la ejecución
+
+    def _task_args(self, task: Task, dep_results: Dict[str, Any]) -> Tuple:
+        return task.args + ((dep_results,) if task.uses_dep_results else ())
+
+    def run(self) -> Dict[str, str]:
+        start = time.time()
+        stage_timing.start_run()
+        if self.workers == 1:
+            while len(self.status) < len(self.tasks):
+                ready = [name for name in self.tasks if self._ready(name)]
+                if not ready: raise ValueError("El grafo de tareas tiene un ciclo.")
+                for name in ready:
+                    task = self.tasks[name]
+                    prepared = self._prepare(task)
+                    if prepared is None: continue
+                    print(f"\n>>> Tarea: {name}")
+                    self._finish(task, prepared[0], *_run_task_action(task.action, self._task_args(task, prepared[1]),
+                                                                      task_stage(name)))
+        else:
+            from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+            running, pending_signatures = {}, {}
+            with ProcessPoolExecutor(max_workers=self.workers) as pool:
+                while len(self.status) < len(self.tasks):
+                    for name in [n for n in self.tasks if self._ready(n) and n not in running.values()]:
+                        task = self.tasks[name]
+                        prepared = self._prepare(task)
+                        if prepared is None: continue
+                        print(f">>> Tarea: {name}")
+                        future = pool.submit(_run_task_action, task.action, self._task_args(task, prepared[1]), task_stage(name))
+                        running[future] = name
+                        pending_signatures[name] = prepared[0]
+                    if not running:
+                        if len(self.status) == len(self.tasks) or any(self._ready(n) for n in self.tasks): continue
+                        raise ValueError("El grafo de tareas tiene un ciclo.")
+                    done, _ = wait(list(running), return_when=FIRST_COMPLETED)
+                    for future in done:
+                        name = running.pop(future)
+                        self._finish(self.tasks[name], pending_signatures.pop(name), *future.result())
+
+        counts: Dict[str, int] = {}
+        for status in self.status.values(): counts[status] = counts.get(status, 0) + 1
+        print(f"\n--- Grafo completado en {time.time() - start:.1f} s: "
+              + ", ".join(f"{count} {status}" for status, count in sorted(counts.items())) + " ---")
+        if self.timing_report:
+            stage_timing.write_run_report(self.timing_report, 'run', {'workers': self.workers, 'tasks': counts})
+        return self.status
+
+
+# --- Tareas del pipeline (se ejecutan en procesos separados: reciben la ruta de la configuración) ---
+def _load_cli_config(config_path: Optional[str]):
+    import tfg_cli
+    return tfg_cli, tfg_cli.read_config(config_path)
+
+
+def _status_action(sta_path: str) -> Tuple[bool, Any]:
+    import tfg_cli
+    status_manager = tfg_cli.load_tool('status_manager')
+    status = status_manager.read_sta_status(sta_path)
+    print(f"  {os.path.basename(sta_path)}: {status}")
+    return True, status
+
+
+def _status_report_action(sta_dir: str) -> Tuple[bool, Any]:
+    import tfg_cli
+    tfg_cli.load_tool('status_manager').check_analysis_status(sta_dir)
+    return True, None
+
+
+def _extract_action(abaqus_command: List[str], rpt_manager_script: str, odb_dir: str, odb_file: str) -> Tuple[bool, Any]:
+    import tfg_cli
+    _, return_code = tfg_cli._run_abaqus_extraction(abaqus_command, rpt_manager_script, odb_dir, odb_file)
+    return return_code == 0, None
+
+
+def _correct_action(config_path: Optional[str], workers: int) -> Tuple[bool, Any]:
+    tfg_cli, config = _load_cli_config(config_path)
+    return tfg_cli.configure_correction(config['correct'], workers).main(), None
+
+
+def _individual_processor(config_path: Optional[str], section_name: str):
+    tfg_cli, config = _load_cli_config(config_path)
+    processor = tfg_cli.configure_individual_processor(config[section_name])
+    correction_params = None
+    if processor.USE_FIXED_RPT_FILES and processor.APPLY_CORRECTION_ON_LOAD:
+        correction_params = processor.load_correction_params(processor.resolve_correction_params_file())
+    return processor, correction_params
+
+
+def _plot_action(config_path: Optional[str], sim_name: str) -> Tuple[bool, Any]:
+    processor, correction_params = _individual_processor(config_path, 'plot')
+    results_dir = processor.results_directory()
+    os.makedirs(results_dir, exist_ok=True)
+    sim_data = processor.get_simulation_data(os.path.join(processor.REPORTS_ROOT_DIR, sim_name),
+                                             processor.USE_FIXED_RPT_FILES, correction_params)
+    plotted = sim_data is not None and processor.plot_individual_figures(sim_data, results_dir, processor.USE_FIXED_RPT_FILES)
+    print(f"  {sim_name}: {'gráficas generadas' if plotted else 'sin datos suficientes'}")
+    stamp_path = _plot_stamp_path(results_dir, sim_name)
+    os.makedirs(os.path.dirname(stamp_path), exist_ok=True)
+    with open(stamp_path, 'w', encoding='utf-8') as f:
+        json.dump({'figures': processor.individual_figure_files(sim_data, results_dir) if plotted else []}, f, indent=1)
+    return True, plotted
+
+
+def _plot_stamp_path(results_dir: str, sim_name: str) -> str:
+    return os.path.join(results_dir, PLOT_STAMP_DIR_NAME, f"{sim_name}.json")
+
+
+def _plot_outputs(processor, sim_name: str) -> List[str]:
+    """Salidas de plot:<sim>: su archivo de estado y las figuras que lista (solo el archivo si aún no existe)."""
+    stamp_path = _plot_stamp_path(processor.results_directory(), sim_name)
+    try:
+        with open(stamp_path, encoding='utf-8') as f:
+            return [stamp_path] + json.load(f)['figures']
+    except (OSError, ValueError, KeyError):
+        return [stamp_path]
+
+
+def _nahum_groups_action(config_path: Optional[str], sim_names: List[str]) -> Tuple[bool, Any]:
+    processor, correction_params = _individual_processor(config_path, 'plot')
+    results_dir = processor.results_directory()
+    os.makedirs(results_dir, exist_ok=True)
+    records = [processor.get_simulation_data(os.path.join(processor.REPORTS_ROOT_DIR, name),
+                                             processor.USE_FIXED_RPT_FILES, correction_params) for name in sim_names]
+    nahum_sims = processor.select_nahum_sims(processor.records_with_data(records))
+    if nahum_sims:
+        processor.plot_nahum_group_figures(nahum_sims, results_dir, processor.USE_FIXED_RPT_FILES)
+    return True, len(nahum_sims)
+
+
+def _metrics_action(config_path: Optional[str], sim_name: str) -> Tuple[bool, Any]:
+    import tfg_cli
+    processor, correction_params = _individual_processor(config_path, 'metrics')
+    return True, tfg_cli._simulation_metrics_worker(([os.path.join(processor.REPORTS_ROOT_DIR, sim_name)],
+                                                     processor.USE_FIXED_RPT_FILES, correction_params))[0]
+
+
+def _metrics_table_action(output_file: str, sim_names: List[str], dep_results: Dict[str, Any]) -> Tuple[bool, Any]:
+    import tfg_cli
+    tfg_cli.write_metrics_table([dep_results.get(f"metrics:{name}") for name in sim_names], output_file)
+    return True, None
+
+
+def _correction_params_content(params_file: Optional[str]) -> Any:
+    """Contenido del archivo de parámetros sin la fecha: volver a escribir los mismos parámetros no invalida las gráficas."""
+    if not params_file or not os.path.exists(params_file): return None
+    try:
+        with open(params_file, 'r', encoding='utf-8') as f:
+            content = json.load(f)
+    except (IOError, OSError, ValueError):
+        return None
+    content.pop('created', None)
+    return content
+
+
+def build_pipeline_tasks(config_path: Optional[str], workers: int) -> List[Task]:
+    """
+    Grafo de la campaña descrita en la configuración de tfg_cli.py:
+      status:<sim> -> extract:<sim> -> plot:<sim> / metrics:<sim>
+      extract:* -> correct -> plot:* / metrics:*      (si correct lee los .rpt / si se usan datos corregidos)
+      plot:<sims Nahum> -> nahum_groups;  metrics:* -> metrics_table;  status_report
+    Las secciones que no estén configuradas no generan tareas.
+    """
+    import shlex
+    tfg_cli, config = _load_cli_config(config_path)
+    tasks: List[Task] = []
+    status_section, extract_section = config['status'], config['extract']
+    plot_section, metrics_section = config['plot'], config['metrics']
+
+    sta_dir = tfg_cli.setting(status_section, 'sta_dir')
+    odb_dir = tfg_cli.setting(extract_section, 'odb_dir')
+    reports_dir = tfg_cli.require(plot_section, 'reports_dir')
+    if tfg_cli.setting(plot_section, 'campaign_store'):
+        raise ValueError("El grafo trabaja sobre la carpeta de reportes; quita 'campaign_store' de [plot].")
+    if odb_dir and os.path.abspath(os.path.join(odb_dir, tfg_cli.EXTRACT_REPORT_DIR_NAME)) != os.path.abspath(reports_dir):
+        print(f"AVISO: Los .rpt extraídos van a '{os.path.join(odb_dir, tfg_cli.EXTRACT_REPORT_DIR_NAME)}', "
+              f"pero [plot] lee de '{reports_dir}'.")
+
+    odb_names = {os.path.splitext(f)[0] for f in os.listdir(odb_dir) if f.lower().endswith('.odb')} if odb_dir and os.path.isdir(odb_dir) else set()
+    sta_names = {os.path.splitext(os.path.basename(f))[0] for f in glob.glob(os.path.join(sta_dir, '*.sta'))} if sta_dir else set()
+    report_names = {d for d in os.listdir(reports_dir) if os.path.isdir(os.path.join(reports_dir, d))} if os.path.isdir(reports_dir) else set()
+    sim_names = sorted(odb_names | report_names)
+    print(f"INFO: {len(sim_names)} simulaciones ({len(odb_names)} ODB, {len(report_names)} con reportes).")
+
+    status_manager = tfg_cli.load_tool('status_manager') if sta_names else None
+    if sta_names:
+        tasks.append(Task('status_report', _status_report_action, (sta_dir,),
+                          inputs=lambda: glob.glob(os.path.join(sta_dir, '*.sta')),
+                          outputs=lambda: [os.path.join(sta_dir, status_manager.STATUS_DIR_NAME, status_manager.STATUS_FILE_NAME)]))
+
+    abaqus_command = shlex.split(tfg_cli.setting(extract_section, 'abaqus_command', tfg_cli.DEFAULT_ABAQUS_COMMAND))
+    rpt_manager_script = os.path.join(tfg_cli.TOOL_DIRS['rpt_manager'], 'rpt_manager.py')
+    if odb_names: os.makedirs(os.path.join(odb_dir, tfg_cli.EXTRACT_REPORT_DIR_NAME), exist_ok=True)
+    extract_tasks = []
+    for name in sim_names:
+        if name in sta_names:
+            sta_path = os.path.join(sta_dir, f"{name}.sta")
+            tasks.append(Task(f"status:{name}", _status_action, (sta_path,), inputs=lambda p=sta_path: [p]))
+        if name in odb_names:
+            status_dep = [f"status:{name}"] if name in sta_names else []
+            odb_path = os.path.join(odb_dir, f"{name}.odb")
+            tasks.append(Task(f"extract:{name}", _extract_action, (abaqus_command, rpt_manager_script, odb_dir, f"{name}.odb"),
+                              deps=status_dep, inputs=lambda p=odb_path: [p],
+                              outputs=lambda n=name: [os.path.join(odb_dir, tfg_cli.EXTRACT_REPORT_DIR_NAME, n)],
+                              condition=lambda results, deps=status_dep: all(results[d] == status_manager.STATUS_OK for d in deps)))
+            extract_tasks.append(f"extract:{name}")
+
+    correct_section = config['correct']
+    correct_task = []
+    if tfg_cli.setting(correct_section, 'acceleration_data_file'):
+        correction = tfg_cli.configure_correction(correct_section, workers)
+        params_file = correction.CORRECTION_PARAMS_FILE
+        # La corrección se ejecuta en un solo proceso: el grafo ya reparte el resto de tareas entre los workers
+        tasks.append(Task('correct', _correct_action, (config_path, 1),
+                          deps=extract_tasks if tfg_cli.correction_reads_reports(correction) else [], soft_deps=True,
+                          inputs=lambda: tfg_cli.correction_inputs(correction),
+                          settings=lambda: tfg_cli.result_settings(correct_section),
+                          outputs=lambda: [params_file]))
+        correct_task = ['correct']
+
+    def stage_tasks(stage: str, section, action) -> Tuple[List[str], Callable[[], Dict[str, Any]]]:
+        if not tfg_cli.setting(section, 'results_dir_base' if stage == 'plot' else 'output_file'): return [], dict
+        processor = tfg_cli.configure_individual_processor(section)
+        uses_correction = processor.USE_FIXED_RPT_FILES and processor.APPLY_CORRECTION_ON_LOAD
+        settings = lambda: dict(tfg_cli.result_settings(section), correction=_correction_params_content(
+            processor.resolve_correction_params_file()) if uses_correction else None)
+        names = []
+        for name in sim_names:
+            deps = ([f"extract:{name}"] if name in odb_names else []) + (correct_task if uses_correction else [])
+            tasks.append(Task(f"{stage}:{name}", action, (config_path, name), deps=deps,
+                              inputs=lambda n=name: list(tree_files(os.path.join(reports_dir, n), ('.rpt',))),
+                              settings=settings,
+                              outputs=(lambda n=name: _plot_outputs(processor, n)) if stage == 'plot' else None))
+            names.append(name)
+        return names, settings
+
+    plotted, plot_settings = stage_tasks('plot', plot_section, _plot_action)
+    if plotted:
+        processor = tfg_cli.configure_individual_processor(plot_section)
+        nahum_names = [s['name'] for s in processor.select_nahum_sims(
+            [{'name': n, 'helmet_status': processor.extract_title_info(n)[0]} for n in plotted])]
+        if nahum_names:
+            tasks.append(Task('nahum_groups', _nahum_groups_action, (config_path, nahum_names),
+                              deps=[f"plot:{n}" for n in nahum_names], soft_deps=True,
+                              inputs=lambda: [f for n in nahum_names for f in tree_files(os.path.join(reports_dir, n), ('.rpt',))],
+                              settings=plot_settings))
+
+    measured, _ = stage_tasks('metrics', metrics_section, _metrics_action)
+    if measured:
+        output_file = tfg_cli.setting(metrics_section, 'output_file')
+        tasks.append(Task('metrics_table', _metrics_table_action, (output_file, measured),
+                          deps=[f"metrics:{n}" for n in measured], soft_deps=True, uses_dep_results=True,
+                          outputs=lambda: [output_file]))
+    return tasks
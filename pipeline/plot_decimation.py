@@ -0,0 +1,44 @@
+import numpy as np
+from typing import Tuple
+
+# --- Configuración de la Reducción de Series para Graficar ---
+# Una columna de píxeles no puede mostrar más que el mínimo y el máximo de los puntos que caen en ella: con dos puntos
+# por columna (en orden temporal) la línea dibujada es la misma, con los picos exactos, y el PNG/EPS pesa mucho menos.
+DEFAULT_DPI = 300
+POINTS_PER_PIXEL_COLUMN = 2 # Mínimo y máximo de cada columna
+
+
+def minmax_decimate(x: np.ndarray, y: np.ndarray, n_buckets: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Reduce la serie (x, y) a unos 2·n_buckets puntos conservando su forma: el primer y el último punto, y el mínimo
+    y el máximo de cada tramo de índices consecutivos, en su orden original. Los picos se conservan exactos.
+    Los tramos son de igual número de muestras (las series de Abaqus tienen paso de tiempo constante).
+    Si la serie no tiene más puntos que los que se conservarían, se devuelve sin cambios.
+    """
+    x, y = np.asarray(x), np.asarray(y)
+    n = y.shape[0]
+    if n_buckets < 1 or n <= POINTS_PER_PIXEL_COLUMN * n_buckets + 2: return x, y
+
+    interior = n - 2 # El primer y el último punto se conservan siempre
+    bucket = -(-interior // n_buckets)
+    n_full = interior // bucket
+    body = y[1:1 + n_full * bucket].reshape(n_full, bucket)
+    offsets = 1 + np.arange(n_full) * bucket
+    kept = [np.array([0, n - 1]), body.argmin(axis=1) + offsets, body.argmax(axis=1) + offsets]
+    tail_start = 1 + n_full * bucket
+    if tail_start < n - 1: # Tramo final incompleto
+        tail = y[tail_start:n - 1]
+        kept.append(np.array([tail_start + tail.argmin(), tail_start + tail.argmax()]))
+    idx = np.unique(np.concatenate(kept)) # Ordena por índice y quita los repetidos (mínimo == máximo)
+    return x[idx], y[idx]
+
+
+def pixel_columns(fig_width_in: float, dpi: float = DEFAULT_DPI) -> int:
+    """Columnas de píxeles del ancho completo de la figura al guardarla con 'dpi' (cota superior del ancho de cada eje)."""
+    return max(1, int(round(fig_width_in * dpi)))
+
+
+def decimate_for_figure(x: np.ndarray, y: np.ndarray, fig_width_in: float,
+                        dpi: float = DEFAULT_DPI) -> Tuple[np.ndarray, np.ndarray]:
+    """Serie reducida a la resolución horizontal de una figura de 'fig_width_in' pulgadas guardada a 'dpi'."""
+    return minmax_decimate(x, y, pixel_columns(fig_width_in, dpi))
@@ -0,0 +1,56 @@
+import numpy as np
+from typing import Dict, Optional, Sequence
+
+import accel_batch
+
+# --- Configuración de las Métricas de Rotación ---
+# BrIC (Takhounts et al., 2013): sqrt(Σ (ω_i / ω_iC)²), con ω_i el máximo de |ω| en torno a cada eje anatómico
+# (x antero-posterior, y lateral, z vertical) y ω_iC su velocidad angular crítica. El orden es el de las componentes
+# VR1/VR2/VR3 del NodeSet de rotación: si los ejes del modelo no coinciden con los anatómicos, reordenar la tupla.
+BRIC_CRITICAL_OMEGA_RAD_S = (66.25, 56.45, 42.87)
+# Las métricas se calculan sobre arrays (3, n_sims, n_t), como el módulo de la aceleración (accel_batch.py): las
+# simulaciones con el mismo nº de instantes se apilan y cada métrica sale de una sola operación para todo el lote.
+
+
+def angular_acceleration_from_velocity(time_s: np.ndarray, omega: np.ndarray) -> np.ndarray:
+    """α = dω/dt (rad/s²) por diferencias centradas a lo largo del último eje, para cuando no se extrajo AR."""
+    return np.gradient(omega, time_s, axis=-1)
+
+
+def angular_velocity_from_acceleration(time_s: np.ndarray, alpha: np.ndarray) -> np.ndarray:
+    """ω(t) = ∫ α dt (rad/s) por trapecios desde ω(0) = 0, para cuando no se extrajo VR."""
+    omega = np.zeros_like(alpha, dtype=np.float64)
+    steps = 0.5 * (alpha[..., 1:] + alpha[..., :-1]) * np.diff(time_s)
+    np.cumsum(steps, axis=-1, out=omega[..., 1:])
+    return omega
+
+
+def bric(omega: np.ndarray, critical: Sequence[float] = BRIC_CRITICAL_OMEGA_RAD_S) -> np.ndarray:
+    """BrIC de cada simulación de un array (3, n_sims, n_t) de velocidades angulares en rad/s."""
+    ratios = np.abs(omega).max(axis=-1) / np.asarray(critical, dtype=np.float64)[:, None] # (3, n_sims)
+    return np.sqrt(np.einsum('kn,kn->n', ratios, ratios))
+
+
+def peak_magnitude(stack: np.ndarray, time_s: np.ndarray) -> Dict[str, np.ndarray]:
+    """Pico del módulo de un array (3, n_sims, n_t) y su instante, por simulación."""
+    magnitude = accel_batch.batched_magnitude(stack)
+    idx = np.argmax(magnitude, axis=-1)
+    return {'peak': magnitude[np.arange(len(idx)), idx], 't_peak': time_s[idx]}
+
+
+def batch_rotational_metrics(time_s: np.ndarray, omega: Optional[np.ndarray] = None, alpha: Optional[np.ndarray] = None,
+                             critical: Sequence[float] = BRIC_CRITICAL_OMEGA_RAD_S) -> Optional[Dict[str, np.ndarray]]:
+    """
+    BrIC, pico de |ω| (rad/s) y pico de |α| (rad/s²), con sus instantes en s, de un lote de simulaciones que comparten
+    los instantes 'time_s'. omega y alpha son arrays (3, n_sims, n_t); si falta uno se obtiene del otro. Devuelve
+    arrays de n_sims elementos, o None si no hay ninguno de los dos.
+    """
+    if omega is None and alpha is None: return None
+    if omega is None: omega = angular_velocity_from_acceleration(time_s, alpha)
+    if alpha is None: alpha = angular_acceleration_from_velocity(time_s, omega)
+    omega_peak, alpha_peak = peak_magnitude(omega, time_s), peak_magnitude(alpha, time_s)
+    return {
+        'bric': bric(omega, critical),
+        'omega_peak': omega_peak['peak'], 't_omega_peak': omega_peak['t_peak'],
+        'alpha_peak': alpha_peak['peak'], 't_alpha_peak': alpha_peak['t_peak'],
+    }
@@ -0,0 +1,81 @@
+import os
+import re
+import mmap
+import numpy as np
+from typing import List, Optional, Sequence, Tuple
+
+# --- Configuración del Lector de Ancho Fijo ---
+# session.writeXYReport escribe cada fila con la misma longitud y cada número alineado a la derecha en su columna.
+# Con esa estructura el bloque numérico es una matriz de bytes (filas × caracteres): se proyecta en memoria y de cada
+# columna pedida solo se copian sus caracteres, que NumPy convierte a float de una vez. Las demás columnas de los
+# A?_Acc.rpt anchos (una por nodo) no se convierten ni se copian.
+HEADER_SCAN_MAX_BYTES = 64 * 1024 # Las cabeceras de writeXYReport ocupan unas pocas líneas
+_DATA_LINE_RE = re.compile(rb'^\s*[-+]?(?:\d|\.\d)')
+_FIELD_RE = re.compile(rb'\S+')
+_BLANK_BYTES = b' \t\r\n'
+
+
+def _find_data_start(mm: mmap.mmap) -> Optional[Tuple[int, bytes]]:
+    """Posición y contenido de la primera línea de datos (la que empieza por un número)."""
+    position = 0
+    limit = min(len(mm), HEADER_SCAN_MAX_BYTES)
+    while position < limit:
+        end = mm.find(b'\n', position)
+        if end < 0: return None
+        line = mm[position:end + 1]
+        if _DATA_LINE_RE.match(line): return position, line
+        position = end + 1
+    return None
+
+
+def _field_bounds(line: bytes) -> List[Tuple[int, int]]:
+    """[inicio, fin) de cada columna: los números están alineados a la derecha, así que cada una acaba donde su número."""
+    ends = [m.end() for m in _FIELD_RE.finditer(line)]
+    return list(zip([0] + ends[:-1], ends))
+
+
+def read_fixed_width_columns(file_path: str, columns: Sequence[int]) -> Optional[np.ndarray]:
+    """
+    Columnas 'columns' del bloque numérico de un .rpt de ancho fijo, como array float64 (n_filas, len(columns)).
+    Devuelve None si el archivo no tiene esa estructura (filas de distinta longitud, texto tras los datos, columnas
+    desalineadas o valores no numéricos): el llamador debe usar entonces su lector tolerante.
+    """
+    try:
+        if os.path.getsize(file_path) == 0: return None
+        with open(file_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            return _decode_columns(mm, columns)
+    except (OSError, ValueError):
+        return None
+
+
+def _decode_columns(mm: mmap.mmap, columns: Sequence[int]) -> Optional[np.ndarray]:
+    found = _find_data_start(mm)
+    if found is None: return None
+    start, first_line = found
+    row_len = len(first_line)
+    bounds = _field_bounds(first_line)
+    if not columns or max(columns) >= len(bounds): return None
+
+    end = len(mm) # Fin de la última fila con datos, sin las líneas en blanco finales
+    while end > start and mm[end - 1] in _BLANK_BYTES: end -= 1
+    end = mm.find(b'\n', end)
+    if end < 0: return None # La última fila no termina en salto de línea
+    n_rows, remainder = divmod(end + 1 - start, row_len)
+    if remainder: return None # Filas de distinta longitud o texto tras los datos
+
+    rows = np.frombuffer(mm, dtype=np.uint8, count=n_rows * row_len, offset=start).reshape(n_rows, row_len)
+    try:
+        if not np.all(rows[:, row_len - 1] == ord('\n')): return None # Todas las filas deben medir lo mismo
+        result = np.empty((n_rows, len(columns)), dtype=np.float64)
+        for out_idx, col in enumerate(columns):
+            field_start, field_end = bounds[col]
+            # Cada número acaba en el último carácter de su columna y va precedido de un separador
+            if np.any(rows[:, field_end - 1] == ord(' ')): return None
+            if field_start > 0 and np.any(rows[:, field_start] != ord(' ')): return None
+            field = rows[:, field_start:field_end].copy() # Copia: no queda ninguna vista del mmap
+            result[:, out_idx] = field.view(f'S{field_end - field_start}').ravel().astype(np.float64)
+        return result
+    except ValueError: # Algún valor no numérico
+        return None
+    finally:
+        del rows # Libera la vista antes de cerrar el mmap
@@ -0,0 +1,264 @@
+import os
+import re
+import sys
+import argparse
+import numpy as np
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+# --- Configuración de la Lectura por Bloques ---
+# Los .rpt se leen en bloques de RPT_CHUNK_ROWS filas: la memoria usada no depende del tamaño del archivo
+# (un bloque de 65 536 filas son unos 4 MB de texto y 1 MB por columna en float64).
+RPT_CHUNK_ROWS = 65536
+_DATA_LINE_RE = re.compile(r'^\s*[-+]?(?:\d|\.\d)') # Las filas de datos empiezan por un número; cabeceras y avisos no
+
+STANDARD_GRAVITY_M_S2 = 9.80665
+HIC_WINDOW_S = 0.015 # HIC15
+HIC_BLOCK_ROWS = 8192 # Filas de t2 que se evalúan a la vez al buscar el máximo del HIC
+HIC_MAX_WINDOW_SAMPLES = 2000 # Candidatos a t1 por ventana; con más muestras se busca en una rejilla (ver StreamingHIC)
+
+
+# --- Lectura por bloques ---
+def _parse_chunk(lines: List[str], columns: Sequence[int]) -> np.ndarray:
+    """Convierte las líneas de datos de un bloque; si alguna no es numérica, se descartan solo esas líneas."""
+    try:
+        return np.loadtxt(lines, usecols=columns, ndmin=2, dtype=np.float64)
+    except (ValueError, IndexError):
+        rows = []
+        for line in lines:
+            parts = line.split()
+            try:
+                rows.append([float(parts[c]) for c in columns])
+            except (ValueError, IndexError):
+                continue
+        return np.array(rows, dtype=np.float64).reshape(-1, len(columns))
+
+
+def iter_rpt_chunks(file_path: str, columns: Sequence[int] = (0, 1), chunk_rows: int = RPT_CHUNK_ROWS) -> Iterator[np.ndarray]:
+    """
+    Lee un .rpt de writeXYReport (o un *_fixed.rpt) por bloques y devuelve arrays (n, len(columns)) con las
+    columnas pedidas, en las unidades del archivo. Las líneas que no son de datos se ignoran.
+    """
+    columns = tuple(columns)
+    buffer: List[str] = []
+    with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
+        for line in f:
+            if not _DATA_LINE_RE.match(line): continue
+            buffer.append(line)
+            if len(buffer) >= chunk_rows:
+                chunk = _parse_chunk(buffer, columns)
+                buffer = []
+                if len(chunk): yield chunk
+    if buffer:
+        chunk = _parse_chunk(buffer, columns)
+        if len(chunk): yield chunk
+
+
+def iter_series_chunks(file_path: str, chunk_rows: int = RPT_CHUNK_ROWS) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+    """Bloques (tiempo, valor) de las dos primeras columnas de un .rpt."""
+    for chunk in iter_rpt_chunks(file_path, (0, 1), chunk_rows):
+        yield np.ascontiguousarray(chunk[:, 0]), np.ascontiguousarray(chunk[:, 1])
+
+
+def iter_magnitude_chunks(component_paths: Sequence[str], chunk_rows: int = RPT_CHUNK_ROWS,
+                          time_atol: float = 1e-6) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+    """
+    Bloques (tiempo, sqrt(a1² + a2² + a3²)) leyendo a la vez los .rpt de las componentes, que deben compartir tiempos
+    (time_atol en las unidades del archivo: 1e-6 s, la misma tolerancia que calculate_acceleration_magnitude).
+    """
+    iterators = [iter_series_chunks(path, chunk_rows) for path in component_paths]
+    while True:
+        chunks = [next(it, None) for it in iterators]
+        if all(c is None for c in chunks): return
+        if any(c is None for c in chunks) or len({len(c[0]) for c in chunks}) != 1:
+            raise ValueError("Las componentes de aceleración no tienen el mismo número de filas.")
+        time_chunk = chunks[0][0]
+        if not all(np.allclose(time_chunk, c[0], rtol=0, atol=time_atol) for c in chunks[1:]):
+            raise ValueError("Los tiempos de las componentes de aceleración no coinciden.")
+        magnitude = np.square(chunks[0][1])
+        for c in chunks[1:]: magnitude += np.square(c[1])
+        yield time_chunk, np.sqrt(magnitude, out=magnitude)
+
+
+# --- Reductores ---
+# Cada reductor recibe los bloques (tiempo, valor) en orden con update() y devuelve su resultado con result().
+class RunningPeak:
+    """Máximo, mínimo y pico con signo (mayor valor absoluto) con sus instantes."""
+    def __init__(self):
+        self.max = self.min = self.t_max = self.t_min = None
+        self.count = 0
+
+    def update(self, time: np.ndarray, values: np.ndarray):
+        if len(values) == 0: return
+        i_max, i_min = int(np.nanargmax(values)), int(np.nanargmin(values))
+        if self.max is None or values[i_max] > self.max: self.max, self.t_max = float(values[i_max]), float(time[i_max])
+        if self.min is None or values[i_min] < self.min: self.min, self.t_min = float(values[i_min]), float(time[i_min])
+        self.count += len(values)
+
+    def result(self) -> Dict[str, Optional[float]]:
+        if self.max is None: return {'max': None, 't_max': None, 'min': None, 't_min': None, 'peak': None, 't_peak': None}
+        # Igual que np.nanargmax(np.abs(serie)): ante empate gana el primero en el tiempo
+        if abs(self.min) > abs(self.max) or (abs(self.min) == abs(self.max) and self.t_min < self.t_max):
+            peak, t_peak = self.min, self.t_min
+        else:
+            peak, t_peak = self.max, self.t_max
+        return {'max': self.max, 't_max': self.t_max, 'min': self.min, 't_min': self.t_min, 'peak': peak, 't_peak': t_peak}
+
+
+class RunningIntegral:
+    """Integral acumulada por trapecios (en unidades de valor × tiempo), continuando entre bloques."""
+    def __init__(self):
+        self.value = 0.0
+        self._last: Optional[Tuple[float, float]] = None
+
+    def update(self, time: np.ndarray, values: np.ndarray):
+        if len(values) == 0: return
+        if self._last is not None:
+            time, values = np.concatenate(([self._last[0]], time)), np.concatenate(([self._last[1]], values))
+        if len(values) > 1:
+            self.value += float(np.sum(np.diff(time) * (values[1:] + values[:-1]) * 0.5))
+        self._last = (float(time[-1]), float(values[-1]))
+
+    def result(self) -> float:
+        return self.value
+
+
+class StreamingHIC:
+    """
+    HIC = max (t2 - t1) · [∫ a dt / (t2 - t1)]^2.5 con t2 - t1 <= window_s, a en g y t en s.
+    Solo guarda la integral acumulada de la última ventana, así que la memoria no depende de la longitud de la serie.
+    La integral usa todos los puntos; si la ventana tiene más de HIC_MAX_WINDOW_SAMPLES muestras, t1 y t2 se buscan
+    cada 'stride' muestras (resolución window_s / HIC_MAX_WINDOW_SAMPLES), para que el coste no crezca con el
+    cuadrado de la frecuencia de muestreo.
+    time_to_s y value_to_g convierten las unidades de los bloques (por defecto ms y m/s²).
+    """
+    def __init__(self, window_s: float = HIC_WINDOW_S, time_to_s: float = 1e-3, value_to_g: float = 1.0 / STANDARD_GRAVITY_M_S2):
+        self.window_s = window_s
+        self.time_to_s, self.value_to_g = time_to_s, value_to_g
+        self.hic, self.t1, self.t2 = 0.0, None, None
+        self.stride: Optional[int] = None # Se fija con el paso de tiempo del primer bloque
+        self._tail_t = np.empty(0); self._tail_i = np.empty(0) # Candidatos a t1 (s) de la ventana anterior y su integral
+        self._last: Optional[Tuple[float, float, float]] = None # Último punto leído: (t, a, integral)
+        self._rows = 0
+
+    def update(self, time: np.ndarray, values: np.ndarray):
+        if len(values) == 0: return
+        t = np.asarray(time, dtype=float) * self.time_to_s
+        a = np.asarray(values, dtype=float) * self.value_to_g
+        if self._last is None: # Primer bloque: la integral empieza en 0 en el primer instante
+            cumulative = np.concatenate(([0.0], np.cumsum(np.diff(t) * (a[1:] + a[:-1]) * 0.5)))
+            step = float(np.median(np.diff(t))) if len(t) > 1 else 0.0
+            self.stride = max(1, int(np.ceil(self.window_s / step / HIC_MAX_WINDOW_SAMPLES))) if step > 0 else 1
+        else:
+            t_prev, a_prev, i_prev = self._last
+            steps = np.diff(np.concatenate(([t_prev], t))) * (np.concatenate(([a_prev], a[:-1])) + a) * 0.5
+            cumulative = i_prev + np.cumsum(steps)
+        self._last = (float(t[-1]), float(a[-1]), float(cumulative[-1]))
+        first_row = (-self._rows) % self.stride # Primera fila del bloque que cae en la rejilla de candidatos
+        self._rows += len(t)
+        t, cumulative = t[first_row::self.stride], cumulative[first_row::self.stride]
+        if len(t) == 0: return
+
+        all_t, all_i = np.concatenate((self._tail_t, t)), np.concatenate((self._tail_i, cumulative))
+        first_new = len(self._tail_t)
+        lower = np.searchsorted(all_t, all_t - self.window_s * (1 + 1e-12), side='left')
+        for start in range(first_new, len(all_t), HIC_BLOCK_ROWS):
+            j = np.arange(start, min(start + HIC_BLOCK_ROWS, len(all_t)))
+            max_offset = int(np.max(j - lower[j]))
+            for k in range(1, max_offset + 1):
+                i = j - k
+                valid = i >= lower[j]
+                if not valid.any(): break
+                jj, ii = j[valid], i[valid]
+                dt = all_t[jj] - all_t[ii]
+                mean_a = np.where(dt > 0, (all_i[jj] - all_i[ii]) / np.where(dt > 0, dt, 1.0), 0.0)
+                hic = dt * np.power(np.clip(mean_a, 0.0, None), 2.5)
+                best = int(np.argmax(hic))
+                if hic[best] > self.hic:
+                    self.hic, self.t1, self.t2 = float(hic[best]), float(all_t[ii[best]]), float(all_t[jj[best]])
+        keep = all_t >= all_t[-1] - self.window_s * (1 + 1e-12)
+        self._tail_t, self._tail_i = all_t[keep], all_i[keep]
+
+    def result(self) -> Dict[str, Optional[float]]:
+        """HIC y los instantes t1, t2 (en las unidades de tiempo de los bloques)."""
+        if self.t1 is None: return {'hic': None, 't1': None, 't2': None}
+        return {'hic': self.hic, 't1': self.t1 / self.time_to_s, 't2': self.t2 / self.time_to_s}
+
+
+class RptChunkWriter:
+    """
+    Escribe los bloques en un .rpt de dos columnas '%.6e %.6e' (el formato de los *_fixed.rpt de correction.py)
+    a través de un temporal, que solo se renombra al cerrar sin errores.
+    """
+    def __init__(self, output_path: str):
+        self.output_path = output_path
+        self._tmp_path = output_path + '.tmp'
+        self._f = open(self._tmp_path, 'w')
+        self.rows = 0
+
+    def update(self, time: np.ndarray, values: np.ndarray):
+        block = np.empty((len(time), 2)); block[:, 0] = time; block[:, 1] = values
+        self._f.write(('%.6e %.6e\n' * len(time)) % tuple(block.ravel().tolist()))
+        self.rows += len(time)
+
+    def result(self) -> int:
+        return self.rows
+
+    def close(self, ok: bool = True):
+        if self._f.closed: return
+        self._f.close()
+        if ok and self.rows: os.replace(self._tmp_path, self.output_path)
+        elif os.path.exists(self._tmp_path): os.remove(self._tmp_path)
+
+    def __enter__(self): return self
+    def __exit__(self, exc_type, exc, tb): self.close(ok=exc_type is None)
+
+
+def reduce_series(chunks: Iterable[Tuple[np.ndarray, np.ndarray]], reducers: Iterable,
+                  time_scale: float = 1.0, value_scale: float = 1.0,
+                  transform: Optional[Callable[[np.ndarray, np.ndarray], np.ndarray]] = None) -> List:
+    """
+    Pasa cada bloque (tiempo · time_scale, transform(tiempo, valor · value_scale)) por todos los reductores, en
+    una sola lectura. transform es, por ejemplo, una corrección lineal; debe operar punto a punto.
+    """
+    reducers = list(reducers)
+    for time_chunk, value_chunk in chunks:
+        if time_scale != 1.0: time_chunk = time_chunk * time_scale
+        if value_scale != 1.0: value_chunk = value_chunk * value_scale
+        if transform is not None: value_chunk = transform(time_chunk, value_chunk)
+        for reducer in reducers:
+            reducer.update(time_chunk, value_chunk)
+    return reducers
+
+
+# --- Línea de comandos ---
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Picos, integral y HIC de .rpt grandes leyendo por bloques (memoria acotada).")
+    parser.add_argument('rpt_files', nargs='+', help="Un .rpt, o los tres de las componentes con --magnitud")
+    parser.add_argument('--magnitud', action='store_true', help="Los tres archivos son A1/A2/A3: se usa el módulo")
+    parser.add_argument('--hic', action='store_true', help="Calcular el HIC (valores en mm/s², como los .rpt de aceleración)")
+    parser.add_argument('--ventana-ms', type=float, default=HIC_WINDOW_S * 1000, help="Duración máxima de la ventana del HIC")
+    parser.add_argument('--filas', type=int, default=RPT_CHUNK_ROWS, help="Filas por bloque")
+    args = parser.parse_args(argv)
+
+    if args.magnitud:
+        if len(args.rpt_files) != 3: parser.error("--magnitud necesita los tres archivos A1, A2 y A3.")
+        sources = [('Magnitud', lambda: iter_magnitude_chunks(args.rpt_files, args.filas))]
+    else:
+        sources = [(os.path.basename(p), lambda p=p: iter_series_chunks(p, args.filas)) for p in args.rpt_files]
+    for label, chunks in sources:
+        reducers = [RunningPeak(), RunningIntegral()]
+        if args.hic: reducers.append(StreamingHIC(args.ventana_ms / 1000.0, time_to_s=1.0, value_to_g=1e-3 / STANDARD_GRAVITY_M_S2))
+        try:
+            reduce_series(chunks(), reducers)
+        except (OSError, ValueError) as e:
+            print(f"ERROR: {label}: {e}"); return 1
+        peak = reducers[0].result()
+        print(f"{label}: {reducers[0].count} filas | pico {peak['peak']} en t = {peak['t_peak']} "
+              f"(máx. {peak['max']}, mín. {peak['min']}) | integral {reducers[1].result():.6g}")
+        if args.hic:
+            hic = reducers[2].result()
+            print(f"  HIC{args.ventana_ms:g}: {hic['hic']} (t1 = {hic['t1']}, t2 = {hic['t2']} s)")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,77 @@
+import os
+import json
+import hashlib
+from typing import Dict, Any, Iterable, Optional, Tuple
+
+# --- Configuración de la Caché de Etapas ---
+# Cada etapa guarda en <cache_dir>/cache_<etapa>.json la firma de las entradas de cada unidad (simulación, ODB, ...)
+# con la que se procesó por última vez. La firma usa tamaño y fecha de modificación de los archivos, no su contenido,
+# para que comprobar un árbol de Reports completo cueste solo un os.stat por archivo.
+STAGE_CACHE_FILE_TEMPLATE = 'cache_{stage}.json'
+STAGE_CACHE_FORMAT_VERSION = 1
+
+
+def _file_entries(paths: Iterable[str]) -> Iterable[Tuple[str, int, int]]:
+    for path in paths:
+        try:
+            st = os.stat(path)
+        except OSError:
+            yield (os.path.abspath(path), -1, -1) # Archivo ausente: también forma parte de la firma
+            continue
+        yield (os.path.abspath(path), st.st_size, st.st_mtime_ns)
+
+
+def files_signature(paths: Iterable[str], settings: Optional[Dict[str, Any]] = None) -> str:
+    """Firma de un conjunto de archivos (ruta, tamaño, fecha) y de la configuración que afecta al resultado."""
+    digest = hashlib.sha256()
+    for path, size, mtime in sorted(_file_entries(paths)):
+        digest.update(f"{path}|{size}|{mtime}\n".encode('utf-8'))
+    if settings:
+        digest.update(json.dumps(settings, sort_keys=True, default=str).encode('utf-8'))
+    return digest.hexdigest()
+
+
+def tree_files(root: str, suffixes: Tuple[str, ...] = ('.rpt',), exclude_suffixes: Tuple[str, ...] = ()) -> Iterable[str]:
+    """Archivos de un árbol con alguna de las extensiones indicadas (sin distinguir mayúsculas)."""
+    for dir_path, _, file_names in os.walk(root):
+        for name in file_names:
+            lower = name.lower()
+            if lower.endswith(suffixes) and not (exclude_suffixes and lower.endswith(exclude_suffixes)):
+                yield os.path.join(dir_path, name)
+
+
+class StageCache:
+    """Firmas por unidad de una etapa del pipeline, con un resultado opcional reutilizable (p. ej. métricas)."""
+
+    def __init__(self, cache_dir: Optional[str], stage: str):
+        self.path = os.path.join(cache_dir, STAGE_CACHE_FILE_TEMPLATE.format(stage=stage)) if cache_dir else None
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        if self.path and os.path.exists(self.path):
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    content = json.load(f)
+                if content.get('format') == STAGE_CACHE_FORMAT_VERSION:
+                    self.entries = content.get('entries', {})
+            except (IOError, OSError, ValueError) as e:
+                print(f"AVISO: No se pudo leer la caché '{self.path}' ({e}). Se procesará todo de nuevo.")
+
+    def is_current(self, unit: str, signature: str) -> bool:
+        entry = self.entries.get(unit)
+        return entry is not None and entry.get('signature') == signature
+
+    def result(self, unit: str) -> Any:
+        return self.entries.get(unit, {}).get('result')
+
+    def update(self, unit: str, signature: str, result: Any = None):
+        self.entries[unit] = {'signature': signature, 'result': result}
+
+    def forget(self, unit: str):
+        self.entries.pop(unit, None)
+
+    def save(self):
+        if not self.path: return
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'format': STAGE_CACHE_FORMAT_VERSION, 'entries': self.entries}, f, indent=1)
+        os.replace(tmp_path, self.path)
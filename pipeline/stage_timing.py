@@ -0,0 +1,246 @@
+# -*- coding: utf-8 -*-
+# Instrumentacion ligera de las etapas del pipeline (compatible con el Python 2 de Abaqus y con Python 3)
+from __future__ import print_function, division
+import os
+import sys
+import json
+import time
+
+# --- Configuracion de la Instrumentacion ---
+# TFG_TIMING=0 desactiva la medicion. TFG_PROFILE=cprofile o TFG_PROFILE=tracemalloc activa ademas el perfilado
+# de la ejecucion completa (entre start_run() y write_run_report()).
+TIMING_ENABLED = os.environ.get('TFG_TIMING', '1') != '0'
+PROFILE_MODE = os.environ.get('TFG_PROFILE', '').strip().lower() or None
+PROFILE_TOP_ENTRIES = 30 # Funciones / lineas de asignacion que se listan en el resumen del perfil
+REPORT_FORMAT_VERSION = 1
+
+_clock = getattr(time, 'perf_counter', time.time)
+
+_STAGES = {}   # etapa -> [n, total_s, min_s, max_s]
+_COUNTERS = {} # contador -> valor
+_RUN = {'start': _clock(), 'started': time.strftime('%Y-%m-%d %H:%M:%S'), 'profiler': None, 'owns_profiler': False}
+
+
+# --- Registro de tiempos y contadores ---
+def record(stage, seconds):
+    if not TIMING_ENABLED: return
+    entry = _STAGES.get(stage)
+    if entry is None:
+        _STAGES[stage] = [1, seconds, seconds, seconds]
+    else:
+        entry[0] += 1; entry[1] += seconds
+        if seconds < entry[2]: entry[2] = seconds
+        if seconds > entry[3]: entry[3] = seconds
+
+
+class timed(object):
+    """Contexto que suma la duracion del bloque a la etapa indicada: with timed('rpt.parse'): ..."""
+    __slots__ = ('stage', '_t0')
+
+    def __init__(self, stage):
+        self.stage = stage
+        self._t0 = None
+
+    def __enter__(self):
+        self._t0 = _clock()
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        record(self.stage, _clock() - self._t0)
+        return False
+
+
+def add(counter, amount=1):
+    if TIMING_ENABLED:
+        _COUNTERS[counter] = _COUNTERS.get(counter, 0) + amount
+
+
+def add_file_read(path):
+    try:
+        size = os.path.getsize(path)
+    except OSError:
+        return
+    add('files_read'); add('bytes_read', size)
+
+
+def add_file_written(path):
+    try:
+        size = os.path.getsize(path)
+    except OSError:
+        return
+    add('files_written'); add('bytes_written', size)
+
+
+# --- Instantaneas (para sumar lo medido en procesos auxiliares) ---
+def snapshot():
+    return {'stages': dict((k, list(v)) for k, v in _STAGES.items()), 'counters': dict(_COUNTERS)}
+
+
+def reset():
+    _STAGES.clear(); _COUNTERS.clear()
+
+
+def drain():
+    snap = snapshot(); reset()
+    return snap
+
+
+def merge(snap):
+    if not snap: return
+    for stage, (n, total, t_min, t_max) in snap.get('stages', {}).items():
+        entry = _STAGES.get(stage)
+        if entry is None:
+            _STAGES[stage] = [n, total, t_min, t_max]
+        else:
+            entry[0] += n; entry[1] += total
+            entry[2] = min(entry[2], t_min); entry[3] = max(entry[3], t_max)
+    for counter, value in snap.get('counters', {}).items():
+        _COUNTERS[counter] = _COUNTERS.get(counter, 0) + value
+
+
+class isolated(object):
+    """
+    Contexto que mide un bloque por separado: al salir restaura lo acumulado antes (tambien si el bloque llama a
+    start_run(), p. ej. el main() de otro script) y deja lo medido en el bloque en .snapshot para sumarlo con merge().
+    """
+    def __init__(self):
+        self.snapshot = None
+        self._saved = None
+
+    def __enter__(self):
+        self._saved = (drain(), dict(_RUN))
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        self.snapshot = drain()
+        saved, run = self._saved
+        merge(saved); _RUN.update(run)
+        return False
+
+
+def timed_call(job):
+    """
+    Para pool.map en procesos auxiliares: job = (funcion, argumento). Devuelve (resultado, instantanea) solo con lo
+    medido durante esa llamada (el proceso puede haber heredado por fork los tiempos del proceso principal).
+    """
+    func, arg = job
+    with isolated() as block:
+        result = func(arg)
+    return result, block.snapshot
+
+
+def merge_results(outcomes):
+    """Suma las instantaneas de timed_call y devuelve la lista de resultados."""
+    results = []
+    for result, snap in outcomes:
+        merge(snap); results.append(result)
+    return results
+
+
+# --- Perfilado opcional ---
+def start_run(profile_mode=None):
+    """Marca el inicio de una ejecucion: reinicia tiempos y contadores y arranca el perfilador si se pide."""
+    reset()
+    _RUN['start'] = _clock()
+    _RUN['started'] = time.strftime('%Y-%m-%d %H:%M:%S')
+    mode = (profile_mode or PROFILE_MODE or '').lower()
+    _RUN['owns_profiler'] = _RUN['profiler'] is None and mode in ('cprofile', 'tracemalloc')
+    if not _RUN['owns_profiler']: return # Sin perfilado, o ya lo hace la ejecucion que contiene a esta
+    if mode == 'cprofile':
+        import cProfile
+        profiler = cProfile.Profile()
+        profiler.enable()
+        _RUN['profiler'] = ('cprofile', profiler)
+    elif mode == 'tracemalloc':
+        try:
+            import tracemalloc
+        except ImportError:
+            print('AVISO: tracemalloc no esta disponible en esta version de Python.')
+            _RUN['owns_profiler'] = False
+            return
+        tracemalloc.start()
+        _RUN['profiler'] = ('tracemalloc', tracemalloc)
+
+
+def _stop_profiler(report_base):
+    """Detiene el perfilador y guarda sus resultados junto al informe. Devuelve las rutas escritas."""
+    if _RUN['profiler'] is None or not _RUN['owns_profiler']: return []
+    mode, profiler = _RUN['profiler']
+    _RUN['profiler'] = None; _RUN['owns_profiler'] = False
+    written = []
+    if mode == 'cprofile':
+        import pstats
+        profiler.disable()
+        prof_path = report_base + '.prof'
+        profiler.dump_stats(prof_path)
+        txt_path = report_base + '_perfil.txt'
+        with open(txt_path, 'w') as f:
+            stats = pstats.Stats(prof_path, stream=f)
+            stats.sort_stats('cumulative').print_stats(PROFILE_TOP_ENTRIES)
+        written += [prof_path, txt_path]
+    else:
+        current, peak = profiler.get_traced_memory()
+        top = profiler.take_snapshot().statistics('lineno')[:PROFILE_TOP_ENTRIES]
+        profiler.stop()
+        add('memory_current_bytes', current); add('memory_peak_bytes', peak)
+        txt_path = report_base + '_memoria.txt'
+        with open(txt_path, 'w') as f:
+            f.write('Memoria actual: %.1f MiB, pico: %.1f MiB\n\n' % (current / 2.0 ** 20, peak / 2.0 ** 20))
+            for stat in top:
+                f.write('%s\n' % stat)
+        written.append(txt_path)
+    return written
+
+
+# --- Informe de la ejecucion ---
+def stage_rows():
+    total_run = max(_clock() - _RUN['start'], 1e-12)
+    rows = []
+    for stage, (n, total, t_min, t_max) in _STAGES.items():
+        rows.append({'stage': stage, 'count': n, 'total_s': total, 'mean_s': total / n,
+                     'min_s': t_min, 'max_s': t_max, 'share': total / total_run})
+    rows.sort(key=lambda r: r['total_s'], reverse=True)
+    return rows
+
+
+def summary_table(rows=None):
+    rows = stage_rows() if rows is None else rows
+    lines = ['%-34s %8s %11s %11s %11s %7s' % ('Etapa', 'N', 'Total (s)', 'Media (ms)', 'Max (ms)', '% run')]
+    lines.append('-' * len(lines[0]))
+    for r in rows:
+        lines.append('%-34s %8d %11.3f %11.3f %11.3f %6.1f%%' % (
+            r['stage'][:34], r['count'], r['total_s'], r['mean_s'] * 1000.0, r['max_s'] * 1000.0, r['share'] * 100.0))
+    for counter in sorted(_COUNTERS):
+        lines.append('%-34s %s' % (counter, _COUNTERS[counter]))
+    return '\n'.join(lines)
+
+
+def write_run_report(report_path, run_name, extra=None):
+    """
+    Escribe el informe JSON de la ejecucion (etapas, contadores, perfil) y la tabla resumen en un .txt con
+    el mismo nombre. Los tiempos de etapas anidadas o en paralelo se suman, asi que '% run' puede superar el 100 %.
+    """
+    if not TIMING_ENABLED: return None
+    report_base = os.path.splitext(report_path)[0]
+    try:
+        if os.path.dirname(report_path) and not os.path.isdir(os.path.dirname(report_path)):
+            os.makedirs(os.path.dirname(report_path))
+        profile_files = _stop_profiler(report_base)
+        rows = stage_rows()
+        report = {
+            'format': REPORT_FORMAT_VERSION, 'run': run_name, 'started': _RUN['started'],
+            'duration_s': _clock() - _RUN['start'], 'python': sys.version.split()[0], 'pid': os.getpid(),
+            'stages': rows, 'counters': dict(_COUNTERS), 'profile_files': profile_files,
+        }
+        if extra: report.update(extra)
+        with open(report_path, 'w') as f:
+            json.dump(report, f, indent=1, sort_keys=True)
+        table = summary_table(rows)
+        with open(report_base + '.txt', 'w') as f:
+            f.write('Informe de tiempos: %s (%s, %.2f s)\n\n%s\n' % (run_name, _RUN['started'], report['duration_s'], table))
+    except (IOError, OSError) as e:
+        print('AVISO: No se pudo escribir el informe de tiempos "%s": %s' % (report_path, e))
+        return None
+    print('\n--- Tiempos por etapa (%s, %.2f s) ---\n%s' % (run_name, report['duration_s'], table))
+    print('Informe de tiempos guardado en: %s' % report_path)
+    return report_path
@@ -0,0 +1,607 @@
+import os
+import sys
+import csv
+import glob
+import shlex
+import types
+import argparse
+import importlib
+import subprocess
+import configparser
+import numpy as np
+from typing import List, Dict, Optional, Any, Tuple
+
+import rpt_stream
+import stage_timing
+from stage_cache import StageCache, files_signature, tree_files
+
+# --- Configuración de la Línea de Comandos del Pipeline ---
+# Cada etapa sigue siendo un script independiente; este punto de entrada solo rellena sus constantes de
+# configuración a partir de un archivo INI común y llama a su función principal.
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TOOL_DIRS = {
+    'status_manager': os.path.join(REPO_ROOT, 'status manager'),
+    'rpt_manager': os.path.join(REPO_ROOT, 'rpt manager'),
+    'rpt_processor_individual': os.path.join(REPO_ROOT, 'rpt processsor'),
+    'rpt_processor_comparison': os.path.join(REPO_ROOT, 'rpt processsor'),
+    'correction': os.path.join(REPO_ROOT, 'Correction Tool'),
+}
+DEFAULT_CONFIG_FILE = 'tfg_pipeline.ini'
+EXTRACT_REPORT_DIR_NAME = 'Reports' # Debe coincidir con REPORT_DIR_NAME de rpt_manager.py
+DEFAULT_ABAQUS_COMMAND = 'abaqus'
+METRICS_OUTPUT_DEFAULT_NAME = 'metricas_simulaciones.csv'
+DASHBOARD_OUTPUT_DEFAULT_NAME = 'panel_campaña.html'
+TIMING_REPORT_NAME_TEMPLATE = 'informe_tiempos_{command}.json' # Informe de stage_timing de extract y metrics
+METRICS_COLUMNS = ['Simulacion', 'Estado', 'Velocidad_m_s',
+                   'Acc_Pico_m_s2', 'T_Acc_Pico_ms',
+                   'PCoup_Pico_mmHg', 'T_PCoup_Pico_ms',
+                   'PContrecoup_Pico_mmHg', 'T_PContrecoup_Pico_ms', 'HIC15',
+                   'BrIC', 'Omega_Pico_rad_s', 'T_Omega_Pico_ms', 'Alfa_Pico_rad_s2', 'T_Alfa_Pico_ms']
+# Series cuyos .rpt suman más de estos bytes se reducen leyendo por bloques (rpt_stream.py) en lugar de cargarlas enteras
+METRICS_STREAM_MIN_BYTES = 64 * 1024 * 1024
+
+
+# --- Utilidades ---
+def load_tool(module_name: str):
+    """Importa uno de los scripts del repositorio como módulo (sus carpetas tienen espacios en el nombre)."""
+    tool_dir = TOOL_DIRS[module_name]
+    if tool_dir not in sys.path: sys.path.insert(0, tool_dir)
+    try:
+        return importlib.import_module(module_name)
+    except SyntaxError as e:
+        if 'mbcs' not in str(e): raise
+    # Los scripts de Abaqus declaran '# -*- coding: mbcs -*-', que solo existe en Windows: se compilan desde texto
+    module_path = os.path.join(tool_dir, f"{module_name}.py")
+    with open(module_path, 'r', encoding='latin-1') as f:
+        source = f.read()
+    module = types.ModuleType(module_name)
+    module.__file__ = module_path
+    sys.modules[module_name] = module
+    exec(compile(source, module_path, 'exec'), module.__dict__)
+    return module
+
+
+def read_config(config_path: Optional[str]) -> configparser.ConfigParser:
+    """Las claves de [DEFAULT] (reports_dir, workers, cache_dir, incremental, ...) las heredan todas las secciones."""
+    config = configparser.ConfigParser(interpolation=configparser.ExtendedInterpolation())
+    for section in ('status', 'extract', 'correct', 'plot', 'export', 'dashboard', 'compare', 'metrics'):
+        config.add_section(section)
+    if config_path:
+        if not os.path.exists(config_path):
+            raise FileNotFoundError(f"No existe el archivo de configuración '{config_path}'.")
+        with open(config_path, 'r', encoding='utf-8') as f:
+            config.read_file(f)
+    return config
+
+
+def setting(section: configparser.SectionProxy, key: str, fallback: Optional[str] = None) -> Optional[str]:
+    value = section.get(key, fallback=None)
+    return value.strip() if value and value.strip() else fallback
+
+
+def setting_bool(section: configparser.SectionProxy, key: str, fallback: bool = False) -> bool:
+    return section.getboolean(key, fallback=fallback) if setting(section, key) else fallback
+
+
+def stage_options(args: argparse.Namespace, section: configparser.SectionProxy) -> Tuple[int, Optional[str], bool]:
+    """--workers, --cache-dir e --incremental de la línea de comandos, o los valores del archivo de configuración."""
+    workers = args.workers if args.workers is not None else int(setting(section, 'workers', '1'))
+    cache_dir = args.cache_dir or setting(section, 'cache_dir')
+    incremental = args.incremental or setting_bool(section, 'incremental')
+    if incremental and not cache_dir:
+        print("AVISO: --incremental necesita --cache-dir (o 'cache_dir' en la configuración). Se procesará todo.")
+        incremental = False
+    return max(1, workers), cache_dir, incremental
+
+
+def result_settings(section: configparser.SectionProxy) -> Dict[str, Optional[str]]:
+    """Configuración que afecta al resultado de una etapa (no cuentan los workers ni la caché)."""
+    return {key: section.get(key) for key in section if key not in ('workers', 'incremental', 'cache_dir')}
+
+
+def require(section: configparser.SectionProxy, key: str) -> str:
+    value = setting(section, key)
+    if not value:
+        raise ValueError(f"Falta '{key}' en la sección [{section.name}] de la configuración.")
+    return value
+
+
+# --- status ---
+def run_status(args: argparse.Namespace, config: configparser.ConfigParser) -> int:
+    section = config['status']
+    _, cache_dir, incremental = stage_options(args, section)
+    sta_dir = require(section, 'sta_dir')
+    status_manager = load_tool('status_manager')
+    report_path = os.path.join(sta_dir, status_manager.STATUS_DIR_NAME, status_manager.STATUS_FILE_NAME)
+
+    cache = StageCache(cache_dir, 'status')
+    signature = files_signature(glob.glob(os.path.join(sta_dir, '*.sta')))
+    if incremental and os.path.exists(report_path) and cache.is_current(sta_dir, signature):
+        print(f"INFO: Ningún .sta ha cambiado desde el último reporte: {report_path}")
+        return 0
+    status_manager.check_analysis_status(sta_dir)
+    if os.path.exists(report_path):
+        cache.update(sta_dir, signature); cache.save()
+    return 0
+
+
+# --- extract ---
+def _run_abaqus_extraction(abaqus_command: List[str], rpt_manager_script: str, odb_dir: str, odb_file: str) -> Tuple[str, int]:
+    command = abaqus_command + ['cae', f'noGUI={rpt_manager_script}', '--', odb_file]
+    print(f"INFO: Extrayendo '{odb_file}': {' '.join(command)}")
+    try:
+        with stage_timing.timed('extract.abaqus_odb'):
+            return odb_file, subprocess.run(command, cwd=odb_dir).returncode
+    except OSError as e:
+        print(f"ERROR: No se pudo ejecutar Abaqus para '{odb_file}': {e}")
+        return odb_file, -1
+
+
+def run_extract(args: argparse.Namespace, config: configparser.ConfigParser) -> int:
+    section = config['extract']
+    workers, cache_dir, incremental = stage_options(args, section)
+    odb_dir = require(section, 'odb_dir')
+    abaqus_command = shlex.split(setting(section, 'abaqus_command', DEFAULT_ABAQUS_COMMAND))
+    rpt_manager_script = os.path.join(TOOL_DIRS['rpt_manager'], 'rpt_manager.py')
+    if not os.path.isdir(odb_dir):
+        print(f"ERROR: El directorio de ODB '{odb_dir}' no existe."); return 1
+
+    reports_dir = os.path.join(odb_dir, EXTRACT_REPORT_DIR_NAME)
+    os.makedirs(reports_dir, exist_ok=True) # Antes de lanzar varios Abaqus a la vez
+    cache = StageCache(cache_dir, 'extract')
+    odb_files = sorted(f for f in os.listdir(odb_dir) if f.lower().endswith('.odb'))
+    signatures = {f: files_signature([os.path.join(odb_dir, f)]) for f in odb_files}
+    pending = [f for f in odb_files if not (incremental and cache.is_current(f, signatures[f])
+                                            and os.path.isdir(os.path.join(reports_dir, os.path.splitext(f)[0])))]
+    print(f"INFO: {len(odb_files)} ODB encontrados, {len(pending)} por extraer ({len(odb_files) - len(pending)} sin cambios).")
+    if not pending: return 0
+
+    # Cada ODB se extrae en su propio proceso de Abaqus; el nº de procesos lo limitan también las licencias
+    from concurrent.futures import ThreadPoolExecutor
+    stage_timing.start_run()
+    failed = []
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for odb_file, return_code in pool.map(lambda f: _run_abaqus_extraction(abaqus_command, rpt_manager_script, odb_dir, f), pending):
+            if return_code == 0:
+                cache.update(odb_file, signatures[odb_file])
+            else:
+                failed.append(odb_file); cache.forget(odb_file)
+    cache.save()
+    stage_timing.write_run_report(os.path.join(reports_dir, TIMING_REPORT_NAME_TEMPLATE.format(command='extract')), 'extract',
+                                  {'workers': workers, 'odb_files': pending})
+    if failed: print(f"ERROR: Falló la extracción de: {', '.join(failed)}")
+    return 1 if failed else 0
+
+
+# --- correct ---
+def configure_correction(section: configparser.SectionProxy, workers: int):
+    correction = load_tool('correction')
+    correction.ACCELERATION_DATA_FILE = require(section, 'acceleration_data_file')
+    correction.PRESSURE_DATA_FILE = require(section, 'pressure_data_file')
+    correction.RESULTS_FOLDER = require(section, 'results_dir')
+    correction.REPORTS_ROOT_DIR_FOR_CORRECTION = require(section, 'reports_dir')
+    correction.CAMPAIGN_STORE_FILE_FOR_CORRECTION = setting(section, 'campaign_store')
+    correction.CORRECTION_PARAMS_FILE = setting(section, 'correction_params_file',
+                                                os.path.join(correction.REPORTS_ROOT_DIR_FOR_CORRECTION, 'parametros_correccion.json'))
+    correction.SIM_COLUMNS_OUTPUT_FILE = os.path.join(correction.RESULTS_FOLDER, os.path.basename(correction.SIM_COLUMNS_OUTPUT_FILE))
+    correction.CORRECTION_REGISTRY_DIR = setting(section, 'registry_dir')
+    correction.NAHUM_TRACES_DIR = setting(section, 'nahum_traces_dir')
+    correction.AUTO_SIM_COLUMNS_FROM_REPORTS = setting_bool(section, 'auto_sim_columns', correction.AUTO_SIM_COLUMNS_FROM_REPORTS)
+    correction.WRITE_FIXED_RPT_FILES = setting_bool(section, 'write_fixed_rpt_files', correction.WRITE_FIXED_RPT_FILES)
+    correction.APPLY_REGISTERED_MODEL = setting(section, 'apply_registered_model')
+    correction.CORRECTION_WORKERS = workers
+    return correction
+
+
+def correction_reads_reports(correction) -> bool:
+    return bool(correction.AUTO_SIM_COLUMNS_FROM_REPORTS or correction.NAHUM_TRACES_DIR or correction.WRITE_FIXED_RPT_FILES)
+
+
+def correction_inputs(correction) -> List[str]:
+    """Archivos de los que depende el resultado de correction.py con la configuración actual del módulo."""
+    inputs = [correction.ACCELERATION_DATA_FILE, correction.PRESSURE_DATA_FILE]
+    if correction.NAHUM_TRACES_DIR and os.path.isdir(correction.NAHUM_TRACES_DIR):
+        inputs += list(tree_files(correction.NAHUM_TRACES_DIR, ('.csv',)))
+    if correction_reads_reports(correction):
+        if correction.CAMPAIGN_STORE_FILE_FOR_CORRECTION:
+            inputs.append(correction.CAMPAIGN_STORE_FILE_FOR_CORRECTION)
+        elif os.path.isdir(correction.REPORTS_ROOT_DIR_FOR_CORRECTION):
+            inputs += list(tree_files(correction.REPORTS_ROOT_DIR_FOR_CORRECTION, ('.rpt',), ('_fixed.rpt',)))
+    return inputs
+
+
+def run_correct(args: argparse.Namespace, config: configparser.ConfigParser) -> int:
+    section = config['correct']
+    workers, cache_dir, incremental = stage_options(args, section)
+    correction = configure_correction(section, workers)
+    signature = files_signature(correction_inputs(correction), result_settings(section))
+
+    cache = StageCache(cache_dir, 'correct')
+    if incremental and os.path.exists(correction.CORRECTION_PARAMS_FILE) and cache.is_current('correction', signature):
+        print(f"INFO: Datos de entrada sin cambios. Se conservan los parámetros de: {correction.CORRECTION_PARAMS_FILE}")
+        return 0
+    if not correction.main(): return 1
+    cache.update('correction', signature); cache.save()
+    return 0
+
+
+# --- plot ---
+def configure_individual_processor(section: configparser.SectionProxy):
+    processor = load_tool('rpt_processor_individual')
+    processor.REPORTS_ROOT_DIR = require(section, 'reports_dir')
+    processor.RESULTS_COMPARISON_DIR_BASE = setting(section, 'results_dir_base', processor.RESULTS_COMPARISON_DIR_BASE)
+    processor.CAMPAIGN_STORE_FILE = setting(section, 'campaign_store')
+    processor.USE_FIXED_RPT_FILES = setting_bool(section, 'use_fixed_rpt_files', processor.USE_FIXED_RPT_FILES)
+    processor.CORRECTION_PARAMS_FILE = setting(section, 'correction_params_file')
+    processor.CORRECTION_MODEL = setting(section, 'correction_model', processor.CORRECTION_MODEL)
+    processor.CORRECTION_REGISTRY_DIR = setting(section, 'registry_dir')
+    processor.CORRECTION_MODEL_VERSION = setting(section, 'correction_model_version', processor.CORRECTION_MODEL_VERSION)
+    processor.DEFER_VECTOR_EXPORT = setting_bool(section, 'defer_vector_export', processor.DEFER_VECTOR_EXPORT)
+    processor.REPORT_PDF = setting_bool(section, 'report_pdf', processor.REPORT_PDF)
+    return processor
+
+
+def simulation_signatures(processor, section: configparser.SectionProxy) -> Dict[str, str]:
+    """
+    Firma de cada simulación: sus .rpt, el archivo de parámetros de corrección en uso y la configuración.
+    Con archivo de campaña, todas las simulaciones comparten la firma del archivo.
+    """
+    settings = result_settings(section)
+    params_file = processor.resolve_correction_params_file() if processor.USE_FIXED_RPT_FILES else None
+    extra_files = [params_file] if params_file else []
+    if processor.CAMPAIGN_STORE_FILE:
+        if processor.campaign_store is None: return {}
+        store = processor.campaign_store.open_campaign_store(processor.CAMPAIGN_STORE_FILE)
+        if store is None: return {}
+        signature = files_signature([processor.CAMPAIGN_STORE_FILE] + extra_files, settings)
+        sims = {name: signature for name in store.simulations()}
+        store.close()
+        return sims
+    root = processor.REPORTS_ROOT_DIR
+    if not os.path.isdir(root): return {}
+    return {d: files_signature(list(tree_files(os.path.join(root, d), ('.rpt',))) + extra_files, settings)
+            for d in sorted(os.listdir(root)) if os.path.isdir(os.path.join(root, d))}
+
+
+def run_plot(args: argparse.Namespace, config: configparser.ConfigParser) -> int:
+    section = config['plot']
+    workers, cache_dir, incremental = stage_options(args, section)
+    require(section, 'results_dir_base')
+    processor = configure_individual_processor(section)
+    cache = StageCache(cache_dir, 'plot')
+    signatures = simulation_signatures(processor, section)
+
+    only_sims = None
+    if incremental:
+        only_sims = [name for name, sig in signatures.items() if not cache.is_current(name, sig)]
+        print(f"INFO: {len(signatures)} simulaciones, {len(only_sims)} con cambios desde la última ejecución.")
+        if not only_sims: return 0
+    results_dir = processor.main(workers=workers, only_sims=only_sims)
+    if results_dir is None: return 1
+    for name in (only_sims if only_sims is not None else signatures):
+        cache.update(name, signatures[name])
+    cache.save()
+    return 0
+
+
+# --- export ---
+def _list_option(value: Optional[str]) -> Optional[List[str]]:
+    return [v.strip() for v in value.split(',') if v.strip()] if value else None
+
+
+def run_export(args: argparse.Namespace, config: configparser.ConfigParser) -> int:
+    """Formatos de publicación (EPS/PDF/SVG) de las figuras seleccionadas, con la configuración de [plot]."""
+    section = config['export']
+    workers, _, _ = stage_options(args, section)
+    require(config['plot'], 'results_dir_base')
+    processor = configure_individual_processor(config['plot'])
+    results_dir = processor.export_figures(only_sims=_list_option(args.sims or setting(section, 'sims')),
+                                           families=_list_option(args.families or setting(section, 'families')),
+                                           formats=_list_option(args.formats or setting(section, 'formats')),
+                                           workers=workers)
+    return 0 if results_dir is not None else 1
+
+
+# --- dashboard ---
+def _load_simulation_batch(processor, dir_paths: List[str], use_fixed_files: bool,
+                           correction_params: Optional[Dict[str, Dict[str, float]]], preload=lambda record: True) -> List:
+    """
+    Registros de un lote de simulaciones, con el módulo de la aceleración de las que cumplen 'preload' calculado de una
+    vez. Las que no tienen ninguna serie legible quedan como None, en su posición.
+    """
+    records = [processor.get_simulation_data(p, use_fixed_files, correction_params) for p in dir_paths]
+    processor.preload_acceleration_batch([r for r in records if r is not None and preload(r)])
+    return [r if r is not None and r.has_data() else None for r in records]
+
+
+def _dashboard_entries_worker(task: Tuple[List[str], bool, Optional[Dict[str, Dict[str, float]]], int]) -> List[Optional[Dict[str, Any]]]:
+    import campaign_dashboard
+    dir_paths, use_fixed_files, correction_params, buckets = task
+    processor = load_tool('rpt_processor_individual')
+    entries = []
+    try:
+        for sim_data in _load_simulation_batch(processor, dir_paths, use_fixed_files, correction_params):
+            with stage_timing.timed('dashboard.simulation'):
+                entries.append(campaign_dashboard.simulation_entry(sim_data, buckets) if sim_data is not None else None)
+    finally:
+        processor._ACCEL_BATCH.clear()
+    return entries
+
+
+def run_dashboard(args: argparse.Namespace, config: configparser.ConfigParser) -> int:
+    """Panel HTML autocontenido con las series de todas las simulaciones, leídas con la configuración de [plot]."""
+    import campaign_dashboard
+    section = config['dashboard']
+    workers, _, _ = stage_options(args, section)
+    processor = configure_individual_processor(config['plot'])
+    output_file = setting(section, 'output_file', os.path.join(processor.results_directory(), DASHBOARD_OUTPUT_DEFAULT_NAME))
+    buckets = int(setting(section, 'points', str(campaign_dashboard.DASHBOARD_BUCKETS)))
+    sim_names = sorted(simulation_signatures(processor, config['plot']))
+    if not sim_names:
+        print("ERROR: No se encontraron simulaciones."); return 1
+
+    correction_params = None
+    if processor.USE_FIXED_RPT_FILES and processor.APPLY_CORRECTION_ON_LOAD:
+        correction_params = processor.load_correction_params(processor.resolve_correction_params_file())
+    stage_timing.start_run()
+    if processor.CAMPAIGN_STORE_FILE:
+        processor._ACTIVE_CAMPAIGN_STORE = processor.campaign_store.open_campaign_store(processor.CAMPAIGN_STORE_FILE)
+    parallel = workers > 1 and processor._ACTIVE_CAMPAIGN_STORE is None and len(sim_names) > 1
+    tasks = [([os.path.join(processor.REPORTS_ROOT_DIR, name) for name in batch], processor.USE_FIXED_RPT_FILES, correction_params, buckets)
+             for batch in processor.simulation_batches(sim_names, workers if parallel else 1)]
+    if parallel:
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            batches = stage_timing.merge_results(pool.map(stage_timing.timed_call, [(_dashboard_entries_worker, t) for t in tasks]))
+    else:
+        batches = [_dashboard_entries_worker(task) for task in tasks]
+    entries = [entry for batch in batches for entry in batch]
+    if processor._ACTIVE_CAMPAIGN_STORE is not None:
+        processor._ACTIVE_CAMPAIGN_STORE.close(); processor._ACTIVE_CAMPAIGN_STORE = None
+
+    entries = [e for e in entries if e is not None]
+    title = setting(section, 'title', f"Campaña {os.path.basename(os.path.normpath(processor.CAMPAIGN_STORE_FILE or processor.REPORTS_ROOT_DIR))}")
+    with stage_timing.timed('dashboard.write'):
+        campaign_dashboard.write_dashboard(entries, output_file, title)
+    print(f"Panel con {len(entries)} simulaciones guardado en: {output_file} ({os.path.getsize(output_file) / 1e6:.1f} MB)")
+    stage_timing.write_run_report(os.path.join(os.path.dirname(os.path.abspath(output_file)),
+                                               TIMING_REPORT_NAME_TEMPLATE.format(command='dashboard')),
+                                  'dashboard', {'workers': workers, 'simulations': len(entries)})
+    return 0
+
+
+# --- compare ---
+def run_compare(args: argparse.Namespace, config: configparser.ConfigParser) -> int:
+    section = config['compare']
+    workers, cache_dir, incremental = stage_options(args, section)
+    processor = load_tool('rpt_processor_comparison')
+    processor.REPORTS_ROOT_DIR = require(section, 'reports_dir')
+    processor.RESULTS_COMPARISON_DIR = require(section, 'results_dir')
+    processor.CAMPAIGN_STORE_FILE = setting(section, 'campaign_store')
+    pairs = args.pairs or setting(section, 'pairs')
+
+    # La selección se identifica por posición en la lista de simulaciones, así que la firma cubre todo el árbol
+    cache = StageCache(cache_dir, 'compare')
+    if processor.CAMPAIGN_STORE_FILE:
+        inputs = [processor.CAMPAIGN_STORE_FILE]
+    else:
+        inputs = list(tree_files(processor.REPORTS_ROOT_DIR, ('.rpt',))) if os.path.isdir(processor.REPORTS_ROOT_DIR) else []
+    signature = files_signature(inputs, {'pairs': pairs, 'results_dir': processor.RESULTS_COMPARISON_DIR})
+    if incremental and pairs and cache.is_current(pairs, signature):
+        print(f"INFO: Pares '{pairs}' sin cambios desde la última ejecución.")
+        return 0
+    processed = processor.main(pairs=pairs, workers=workers)
+    if not processed: return 1
+    if pairs:
+        cache.update(pairs, signature); cache.save()
+    return 0
+
+
+# --- metrics ---
+def _series_reducers(group: str) -> List:
+    """Pico con signo de cada serie y, en la aceleración, HIC15."""
+    return [rpt_stream.RunningPeak()] + ([rpt_stream.StreamingHIC()] if group == 'acc' else [])
+
+
+def _stream_sources(processor, sim_data, group: str) -> Optional[Tuple[List[str], bool]]:
+    """Archivos .rpt de la serie y si son las tres componentes de la aceleración, o None si no hay archivos que leer."""
+    if group != 'acc': return ([sim_data.pressure_files[group]], False) if sim_data.has_series(group) else None
+    if not sim_data.has_series('acc'): return None
+    if sim_data.use_fixed_files:
+        return [os.path.join(sim_data.dir_path, f"{processor.MAGNITUDE_ACCEL_RPT_BASENAME}_fixed.rpt")], False
+    return [os.path.join(sim_data.dir_path, name) for name in processor.ACCEL_COMPONENTS_RPT_NAMES_ORIGINAL.values()], True
+
+
+def _streamable(processor, sim_data, group: str, paths: List[str]) -> bool:
+    """Solo se lee por bloques si la serie es grande, no viene del almacén de campaña y la corrección es punto a punto."""
+    if processor._ACTIVE_CAMPAIGN_STORE is not None: return False
+    params = (sim_data.correction or {}).get(processor.CORRECTION_METRIC_BY_GROUP[group]) or {}
+    if params.get('model') == 'transfer': return False # Necesita la serie completa (interpolación en el tiempo)
+    try:
+        return sum(os.path.getsize(p) for p in paths) >= METRICS_STREAM_MIN_BYTES
+    except OSError:
+        return False
+
+
+def _reduce_series(processor, sim_data, group: str, time_key: str, value_key: str) -> List:
+    """Reductores aplicados a una serie: por bloques desde los .rpt si es grande, o sobre la serie en memoria."""
+    reducers = _series_reducers(group)
+    sources = _stream_sources(processor, sim_data, group)
+    if sources is not None and _streamable(processor, sim_data, group, sources[0]):
+        paths, is_components = sources
+        chunks = rpt_stream.iter_magnitude_chunks(paths) if is_components else rpt_stream.iter_series_chunks(paths[0])
+        transform = None
+        if sim_data.correction is not None:
+            transform = lambda time_ms, values: processor.apply_stored_correction(group, values, sim_data.correction, time_ms)
+        value_scale = 1.0 / 1000.0 if group == 'acc' else 1.0 # mm/s² -> m/s²
+        try:
+            with stage_timing.timed('metrics.stream'):
+                return rpt_stream.reduce_series(chunks, reducers, time_scale=1000.0, value_scale=value_scale, transform=transform)
+        except (OSError, ValueError) as e: # Componentes desalineadas, etc.: se lee la serie entera como siempre
+            print(f"AVISO: {sim_data['name']}: no se pudo leer por bloques ({e}); se carga la serie completa.")
+            reducers = _series_reducers(group)
+    time_ms, values = sim_data.get(time_key), sim_data.get(value_key)
+    if time_ms is not None and values is not None:
+        rpt_stream.reduce_series([(time_ms, values)], reducers)
+    return reducers
+
+
+def simulation_metrics(sim_data) -> Dict[str, Any]:
+    processor = load_tool('rpt_processor_individual')
+    acc_peak, acc_hic = (r.result() for r in _reduce_series(processor, sim_data, 'acc', 'time_acc_ms', 'acc_mag_m_s2'))
+    coup_peak = _reduce_series(processor, sim_data, 'coup', 'time_p_coup_ms', 'pressure_coup_mpa')[0].result()
+    contrecoup_peak = _reduce_series(processor, sim_data, 'contrecoup', 'time_p_contrecoup_ms', 'pressure_contrecoup_mpa')[0].result()
+    rotation = processor.rotation_metrics(sim_data) or {} # Sin VR/AR extraídas, columnas vacías
+    return {
+        'Simulacion': sim_data['name'], 'Estado': sim_data.get('helmet_status'), 'Velocidad_m_s': sim_data.get('velocity_m_s'),
+        'Acc_Pico_m_s2': acc_peak['peak'], 'T_Acc_Pico_ms': acc_peak['t_peak'],
+        'PCoup_Pico_mmHg': coup_peak['peak'] * processor.MPA_TO_MMHG if coup_peak['peak'] is not None else None,
+        'T_PCoup_Pico_ms': coup_peak['t_peak'],
+        'PContrecoup_Pico_mmHg': contrecoup_peak['peak'] * processor.MPA_TO_MMHG if contrecoup_peak['peak'] is not None else None,
+        'T_PContrecoup_Pico_ms': contrecoup_peak['t_peak'],
+        'HIC15': acc_hic['hic'],
+        'BrIC': rotation.get('bric'),
+        'Omega_Pico_rad_s': rotation.get('omega_peak_rad_s'), 'T_Omega_Pico_ms': rotation.get('t_omega_peak_ms'),
+        'Alfa_Pico_rad_s2': rotation.get('alpha_peak_rad_s2'), 'T_Alfa_Pico_ms': rotation.get('t_alpha_peak_ms'),
+    }
+
+
+def _simulation_metrics_worker(task: Tuple[List[str], bool, Optional[Dict[str, Dict[str, float]]]]) -> List[Optional[Dict[str, Any]]]:
+    dir_paths, use_fixed_files, correction_params = task
+    processor = load_tool('rpt_processor_individual')
+    # Las series grandes se leen por bloques en simulation_metrics: no se cargan en el lote
+    in_memory = lambda record: not _streamable(processor, record, 'acc', (_stream_sources(processor, record, 'acc') or ([],))[0])
+    rows = []
+    try:
+        with stage_timing.timed('metrics.batch'):
+            records = _load_simulation_batch(processor, dir_paths, use_fixed_files, correction_params, in_memory)
+            processor.preload_rotational_batch([r for r in records if r is not None])
+        for sim_data in records:
+            with stage_timing.timed('metrics.simulation'):
+                rows.append(simulation_metrics(sim_data) if sim_data is not None else None)
+    finally:
+        processor._ACCEL_BATCH.clear()
+        processor._ROTATION_BATCH.clear()
+    return rows
+
+
+def _format_metric(value: Any) -> str:
+    if value is None: return ''
+    if isinstance(value, float): return f"{value:.6g}".replace('.', ',') # Mismo formato que los CSV del repositorio
+    return str(value)
+
+
+def run_metrics(args: argparse.Namespace, config: configparser.ConfigParser) -> int:
+    section = config['metrics']
+    workers, cache_dir, incremental = stage_options(args, section)
+    processor = configure_individual_processor(section)
+    output_file = setting(section, 'output_file', os.path.join(processor.REPORTS_ROOT_DIR, METRICS_OUTPUT_DEFAULT_NAME))
+    cache = StageCache(cache_dir, 'metrics')
+    signatures = simulation_signatures(processor, section)
+    if not signatures:
+        print("ERROR: No se encontraron simulaciones."); return 1
+
+    correction_params = None
+    if processor.USE_FIXED_RPT_FILES and processor.APPLY_CORRECTION_ON_LOAD:
+        correction_params = processor.load_correction_params(processor.resolve_correction_params_file())
+    pending = [name for name, sig in signatures.items() if not (incremental and cache.is_current(name, sig))]
+    print(f"INFO: {len(signatures)} simulaciones, {len(pending)} por calcular.")
+
+    stage_timing.start_run()
+    if processor.CAMPAIGN_STORE_FILE:
+        processor._ACTIVE_CAMPAIGN_STORE = processor.campaign_store.open_campaign_store(processor.CAMPAIGN_STORE_FILE)
+    parallel = workers > 1 and processor._ACTIVE_CAMPAIGN_STORE is None and len(pending) > 1
+    tasks = [([os.path.join(processor.REPORTS_ROOT_DIR, name) for name in batch], processor.USE_FIXED_RPT_FILES, correction_params)
+             for batch in processor.simulation_batches(pending, workers if parallel else 1)]
+    if parallel:
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            batches = stage_timing.merge_results(pool.map(stage_timing.timed_call, [(_simulation_metrics_worker, t) for t in tasks]))
+    else:
+        batches = [_simulation_metrics_worker(task) for task in tasks]
+    results = [row for batch in batches for row in batch]
+    if processor._ACTIVE_CAMPAIGN_STORE is not None:
+        processor._ACTIVE_CAMPAIGN_STORE.close(); processor._ACTIVE_CAMPAIGN_STORE = None
+
+    for name, row in zip(pending, results):
+        cache.update(name, signatures[name], row)
+    cache.save()
+
+    write_metrics_table([cache.result(name) for name in signatures], output_file)
+    stage_timing.write_run_report(os.path.join(os.path.dirname(os.path.abspath(output_file)),
+                                               TIMING_REPORT_NAME_TEMPLATE.format(command='metrics')),
+                                  'metrics', {'workers': workers, 'simulations': len(pending)})
+    return 0
+
+
+def write_metrics_table(rows: List[Optional[Dict[str, Any]]], output_file: str):
+    rows = [row for row in rows if row]
+    os.makedirs(os.path.dirname(os.path.abspath(output_file)), exist_ok=True)
+    with open(output_file, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f, delimiter=';')
+        writer.writerow(METRICS_COLUMNS)
+        for row in rows:
+            writer.writerow([_format_metric(row.get(col)) for col in METRICS_COLUMNS])
+    print(f"Métricas de {len(rows)} simulaciones guardadas en: {output_file}")
+
+
+# --- run (grafo completo) ---
+def run_pipeline(args: argparse.Namespace, config: configparser.ConfigParser) -> int:
+    import pipeline_dag
+    if not args.config:
+        raise ValueError(f"'run' necesita un archivo de configuración (--config o '{DEFAULT_CONFIG_FILE}').")
+    workers, cache_dir, incremental = stage_options(args, config['DEFAULT'])
+    config_path = os.path.abspath(args.config) # Las tareas la vuelven a leer en sus procesos
+    tasks = pipeline_dag.build_pipeline_tasks(config_path, workers)
+    timing_report = setting(config['DEFAULT'], 'timing_report',
+                            os.path.join(cache_dir, pipeline_dag.TIMING_REPORT_NAME) if cache_dir else None)
+    status = pipeline_dag.DagRunner(tasks, cache_dir, workers, force=not incremental, timing_report=timing_report).run()
+    return 1 if pipeline_dag.TASK_FAILED in status.values() else 0
+
+
+# --- Punto de entrada ---
+COMMANDS = {
+    'status': (run_status, "Estado de los análisis a partir de los .sta"),
+    'extract': (run_extract, "Extracción de .rpt de los .odb con Abaqus (rpt_manager.py)"),
+    'correct': (run_correct, "Obtención y aplicación del modelo de corrección (correction.py)"),
+    'plot': (run_plot, "Gráficas individuales y comparativas de Nahum (rpt_processor_individual.py)"),
+    'export': (run_export, "Formatos de publicación (EPS/PDF/SVG) de las gráficas seleccionadas de 'plot'"),
+    'dashboard': (run_dashboard, "Panel HTML autocontenido para filtrar y superponer las series de la campaña"),
+    'compare': (run_compare, "Comparación con/sin casco de los pares indicados (rpt_processor_comparison.py)"),
+    'metrics': (run_metrics, "Tabla de picos de aceleración y presión de cada simulación"),
+    'run': (run_pipeline, "Grafo completo status -> extract -> correct -> plot/metrics, solo con lo que ha cambiado si --incremental"),
+}
+
+
+def build_parser() -> argparse.ArgumentParser:
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument('--config', default=DEFAULT_CONFIG_FILE if os.path.exists(DEFAULT_CONFIG_FILE) else None,
+                        help=f"Archivo INI con la configuración (por defecto '{DEFAULT_CONFIG_FILE}' si existe)")
+    common.add_argument('--workers', type=int, default=None, help="Nº de procesos en paralelo (por defecto 'workers' de la configuración, o 1)")
+    common.add_argument('--cache-dir', default=None, help="Carpeta con las firmas de entrada de cada etapa")
+    common.add_argument('--incremental', action='store_true', help="Procesa solo lo que ha cambiado desde la última ejecución")
+
+    parser = argparse.ArgumentParser(description="Pipeline de simulaciones de impacto: estado, extracción, corrección y gráficas.")
+    sub = parser.add_subparsers(dest='command', required=True)
+    for name, (_, help_text) in COMMANDS.items():
+        command_parser = sub.add_parser(name, parents=[common], help=help_text)
+        if name == 'compare':
+            command_parser.add_argument('--pairs', default=None, help="Pares a comparar, p. ej. \"1a, 3b\" (sin él se piden por consola)")
+        if name == 'export':
+            command_parser.add_argument('--sims', default=None, help="Simulaciones a exportar, nombres o patrones separados por comas (por defecto todas)")
+            command_parser.add_argument('--families', default=None, help="Familias de gráficas: individual, nahum (por defecto todas)")
+            command_parser.add_argument('--formats', default=None, help="Formatos, p. ej. \"eps, pdf\" (por defecto los de publicación de OUTPUT_FORMATS)")
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    try:
+        config = read_config(args.config)
+        return COMMANDS[args.command][0](args, config)
+    except (ValueError, FileNotFoundError, configparser.Error) as e:
+        print(f"ERROR: {e}")
+        return 2
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*-
+# Utilidades comunes de los scripts del repositorio (status_manager, rpt_manager, procesadores de .rpt y correction).
+# Compatible con el Python 2 de Abaqus y con Python 3; sin dependencias externas al importarse.
+# Es el único módulo de pipeline/ que los scripts necesitan: los demás (stage_timing, campaign_store, ...) son
+# opcionales y se cargan con optional_module. Un script copiado fuera del repositorio solo necesita este archivo a su
+# lado; sin los demás módulos se ejecuta igual, sin medir tiempos, sin archivo de campaña, etc.
+from __future__ import print_function
+import os
+import sys
+
+
+def optional_module(module_name):
+    """El módulo de pipeline/ indicado, o None si no está disponible (script copiado sin la carpeta pipeline/)."""
+    try:
+        __import__(module_name)
+    except ImportError:
+        return None
+    return sys.modules[module_name]
+
+
+stage_timing = optional_module('stage_timing')
+if sys.version_info[0] >= 3: # Solo los usan los scripts de Python 3 (no son compatibles con el Python 2 de Abaqus)
+    plot_decimation = optional_module('plot_decimation')
+    rpt_fixed_width = optional_module('rpt_fixed_width')
+else:
+    plot_decimation = rpt_fixed_width = None
+
+
+# --- Importación diferida ---
+class LazyModule(object):
+    """Importa el módulo la primera vez que se usa uno de sus atributos, para que importar el script sea rápido."""
+    def __init__(self, module_name, on_load=None):
+        self._module_name = module_name
+        self._on_load = on_load
+        self._module = None
+
+    def __getattr__(self, attr):
+        if self._module is None:
+            __import__(self._module_name)
+            self._module = sys.modules[self._module_name]
+            if self._on_load is not None: self._on_load()
+        return getattr(self._module, attr)
+
+
+class LazyPalette(object):
+    """Paleta de seaborn que se genera al usarse por primera vez."""
+    def __init__(self, palette_name, n_colors):
+        self._palette_name = palette_name
+        self._n_colors = n_colors
+        self._colors = None
+
+    def _get(self):
+        if self._colors is None:
+            import seaborn
+            self._colors = seaborn.color_palette(self._palette_name, n_colors=self._n_colors)
+        return self._colors
+
+    def __getitem__(self, index): return self._get()[index]
+    def __len__(self): return len(self._get())
+
+
+# --- Medición de tiempos (pipeline/stage_timing.py) ---
+class _NoTiming(object):
+    """Contexto vacío: sin stage_timing los scripts se ejecutan sin medir tiempos."""
+    def __enter__(self): return self
+    def __exit__(self, *exc_info): return False
+
+
+def timed(stage):
+    """Cronómetro de stage_timing para la etapa indicada, o un contexto vacío si el módulo no está disponible."""
+    return stage_timing.timed(stage) if stage_timing is not None else _NoTiming()
+
+
+def add_file_read(path):
+    if stage_timing is not None: stage_timing.add_file_read(path)
+
+
+def add_file_written(path):
+    if stage_timing is not None: stage_timing.add_file_written(path)
+
+
+def pool_map(pool, func, items):
+    """pool.map que además suma al informe de tiempos lo medido en los procesos auxiliares."""
+    if stage_timing is None: return list(pool.map(func, items))
+    return stage_timing.merge_results(pool.map(stage_timing.timed_call, [(func, item) for item in items]))
+
+
+# --- Figuras ---
+def save_figure(path, **savefig_kwargs):
+    """plt.savefig cronometrado y contabilizado en el informe de tiempos."""
+    import matplotlib.pyplot as plt
+    with timed('plot.savefig'):
+        plt.savefig(path, **savefig_kwargs)
+    add_file_written(path)
+
+
+def plot_series(fig, x, y, decimate=True, dpi=300):
+    """Serie (x, y) lista para ax.plot / set_data: reducida a la resolución de 'fig' (a dpi) si decimate."""
+    if not decimate or plot_decimation is None: return x, y
+    return plot_decimation.decimate_for_figure(x, y, fig.get_figwidth(), dpi)
+
+
+# --- Archivos .rpt (en disco o en el archivo de campaña abierto) ---
+def rpt_exists(file_path, store=None):
+    """os.path.exists que también consulta el archivo de campaña 'store' (pipeline/campaign_store.py)."""
+    if not file_path: return False
+    if store is not None and store.exists(file_path): return True
+    return os.path.exists(file_path)
+
+
+def list_sim_files(directory, store=None):
+    if store is not None: return store.listdir(directory)
+    return os.listdir(directory)
+
+
+def read_fixed_width_columns(file_path, columns):
+    """
+    Columnas 'columns' de un .rpt de ancho fijo (pipeline/rpt_fixed_width.py), cronometrado y contabilizado, o None
+    si el módulo no está disponible o el archivo no tiene ese formato (el llamador usa entonces su lector tolerante).
+    """
+    if rpt_fixed_width is None: return None
+    with timed('rpt.parse'):
+        data = rpt_fixed_width.read_fixed_width_columns(file_path, columns)
+    if data is not None: add_file_read(file_path)
+    return data
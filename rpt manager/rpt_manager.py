@@ -5,6 +5,7 @@
 import os
 import sys
 import math
+import time
 import traceback # Para imprimir detalles del error
 
 # Importaciones de Abaqus (Estilo clasico para v6.12)
@@ -16,13 +17,117 @@ import xyPlot
 import displayGroupOdbToolset as dgo
 from odbAccess import OdbError
 
+# --- Medicion de tiempos opcional (pipeline/tool_support.py, en la carpeta 'pipeline' del repositorio o copiado junto al script) ---
+# Dentro de Abaqus __file__ puede no estar definido: en ese caso se busca en el directorio de trabajo y en pipeline/ junto a el.
+_SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__)) if '__file__' in globals() else os.getcwd()
+_PIPELINE_DIR = os.path.join(os.path.dirname(_SCRIPT_DIR), 'pipeline')
+for _path in (_SCRIPT_DIR, _PIPELINE_DIR):
+    if os.path.isdir(_path) and _path not in sys.path: sys.path.append(_path)
+try:
+    import tool_support
+    stage_timing = tool_support.stage_timing # None si pipeline/stage_timing.py no esta disponible
+    _timed = tool_support.timed
+except ImportError: # Script copiado solo junto a los .odb: se ejecuta sin medir tiempos
+    stage_timing = None
+
+    class _NoTiming(object):
+        def __enter__(self): return self
+        def __exit__(self, *exc_info): return False
+
+    def _timed(stage):
+        return _NoTiming()
+
+TIMING_REPORT_NAME = 'informe_tiempos_extraccion.json' # Se guarda en la carpeta de reportes
+
+def _write_xy_report(report_filename, xy_data):
+    """session.writeXYReport cronometrado y contabilizado en el informe de tiempos."""
+    with _timed('odb.write_report'):
+        session.writeXYReport(fileName=report_filename, xyData=xy_data, appendMode=OFF)
+    if stage_timing is not None: stage_timing.add_file_written(report_filename)
+
+def _node_set_labels(odb, node_set_name, instance_name, missing_msg):
+    """
+    Etiquetas de los nodos de un NodeSet del ensamblaje o de la instancia ([] si no existe o no tiene nodos validos).
+    Si el set no existe se imprime missing_msg.
+    """
+    node_set_exists = False
+    node_labels = []
+    node_set_object = None
+
+    # Comprobar existencia del set de nodos
+    node_set_location_msg = ""
+    if node_set_name in odb.rootAssembly.nodeSets.keys():
+        node_set_object = odb.rootAssembly.nodeSets[node_set_name]
+        node_set_location_msg = "Assembly"
+    elif instance_name in odb.rootAssembly.instances and node_set_name in odb.rootAssembly.instances[instance_name].nodeSets.keys():
+         node_set_object = odb.rootAssembly.instances[instance_name].nodeSets[node_set_name]
+         node_set_location_msg = "Instancia '%s'" % instance_name
+    else:
+        print missing_msg
+
+    # --- CORRECCION v9: Manejar OdbMeshNodeArray anidado ---
+    if node_set_object is not None:
+        print '  INFO: NodeSet "%s" encontrado en %s.' % (node_set_name, node_set_location_msg)
+        node_labels = []
+        nodes_sequence = None
+        if hasattr(node_set_object, 'nodes'):
+            nodes_sequence = node_set_object.nodes
+            num_elements_in_sequence = len(nodes_sequence)
+            print '  INFO: La secuencia "nodes" del NodeSet contiene %d elementos.' % num_elements_in_sequence
+
+            nodes_to_iterate_over = [] # La secuencia final de nodos reales
+
+            if num_elements_in_sequence == 1 and type(nodes_sequence[0]).__name__ == 'OdbMeshNodeArray':
+                # Caso detectado: la secuencia contiene UN OdbMeshNodeArray
+                print '  INFO: Detectado OdbMeshNodeArray anidado. Usando la secuencia interna.'
+                nodes_to_iterate_over = nodes_sequence[0] # Usar el array interno
+                num_nodes_final = len(nodes_to_iterate_over)
+                print '  INFO: La secuencia interna contiene %d nodos.' % num_nodes_final
+            elif num_elements_in_sequence > 0:
+                # Caso "normal": la secuencia contiene los nodos directamente
+                print '  INFO: Asumiendo que la secuencia "nodes" contiene nodos directamente.'
+                nodes_to_iterate_over = nodes_sequence
+                num_nodes_final = len(nodes_to_iterate_over)
+            else:
+                # Caso: la secuencia 'nodes' esta vacia
+                num_nodes_final = 0
+                print '  WARNING: La secuencia "nodes" esta vacia.'
+
+            # Intentar obtener labels de la secuencia final de nodos
+            if num_nodes_final > 0:
+                try:
+                    for node in nodes_to_iterate_over:
+                        if hasattr(node, 'label'):
+                            node_labels.append(node.label)
+                        else:
+                            print '      WARNING: Objeto encontrado en la secuencia final sin atributo "label". Tipo: %s' % type(node)
+
+                    if node_labels:
+                        node_set_exists = True # Marcar como valido para extraer sus historias
+                    else:
+                        print '  WARNING: No se pudieron extraer etiquetas validas de la secuencia final de nodos.'
+                except Exception as e_label:
+                     print '  ERROR: Ocurrio un error al obtener etiquetas de nodo de la secuencia final:'
+                     print '    %s' % e_label
+                     print traceback.format_exc()
+            # else: (No es necesario, si num_nodes_final es 0, node_set_exists sigue False)
+
+        else:
+            print '  WARNING: El objeto NodeSet "%s" no tiene el atributo "nodes".' % node_set_name
+    # --- Fin correccion v9 ---
+    return node_labels if node_set_exists else []
+
 # --- Funcion Principal ---
-def process_odb_files():
+def process_odb_files(odb_names=None):
     """
     Funcion principal para encontrar y procesar archivos ODB.
+    Si se indica odb_names (p. ej. desde la linea de comandos), solo se procesan esos ODB.
     """
     # --- Configuracion (AJUSTAR SEGUN SEA NECESARIO) ---
     NODE_SET_ACC = 'SET-ACC-NODAL' # NodeSet para aceleracion
+    # NodeSet para la cinematica de rotacion (VR/AR): nodos con grados de libertad de rotacion, p. ej. el punto de
+    # referencia del craneo si es un solido rigido. None para no extraerla
+    NODE_SET_ROT = 'SET-ROT-NODAL'
     ELEMENT_SETS_PRESSURE = [      # ElementSets para presion
         'BACKREF', 'BOTTOMREF', 'CENTREOFMASSREF',
         'FRONTREF', 'LEFTREF', 'RIGHTREF', 'TOPREF'
@@ -35,9 +140,12 @@ def process_odb_files():
     # Variables de Output
     PRESSURE_VAR = (('S', INTEGRATION_POINT, ((INVARIANT, 'Pressure'), )), )
     ACCEL_VAR_PREFIX = 'Spatial acceleration'
+    ROT_VELOCITY_VAR_PREFIX = 'Angular velocity'          # VR1-VR3 (rad/s)
+    ROT_ACCEL_VAR_PREFIX = 'Angular acceleration'         # AR1-AR3 (rad/s2)
 
     # --- Inicio del Script ---
     script_dir = os.getcwd()
+    if stage_timing is not None: stage_timing.start_run()
     print 'INFO: Buscando archivos .odb en: %s' % script_dir
 
     reports_base_dir = os.path.join(script_dir, REPORT_DIR_NAME)
@@ -51,6 +159,9 @@ def process_odb_files():
             return
 
     odb_files = [f for f in os.listdir(script_dir) if f.lower().endswith('.odb')]
+    if odb_names:
+        wanted = set(os.path.basename(n) for n in odb_names)
+        odb_files = [f for f in odb_files if f in wanted]
 
     if not odb_files:
         print 'WARNING: No se encontraron archivos .odb en el directorio: %s' % script_dir
@@ -76,10 +187,13 @@ def process_odb_files():
         print 'INFO: Guardando reportes en: %s' % odb_report_dir
 
         odb = None
+        odb_start = time.time()
         try:
             # --- Abrir ODB y verificar componentes ---
             print 'INFO: Abriendo ODB: %s' % odb_file
-            odb = session.openOdb(name=odb_path, readOnly=True)
+            with _timed('odb.open'):
+                odb = session.openOdb(name=odb_path, readOnly=True)
+            if stage_timing is not None: stage_timing.add_file_read(odb_path)
 
             current_instance_name = INSTANCE_NAME
             current_step_name = STEP_NAME
@@ -142,12 +256,13 @@ def process_odb_files():
 
                 xyList_pressure = []
                 try:
-                    xyList_pressure = xyPlot.xyDataListFromField(
-                        odb=odb,
-                        outputPosition=INTEGRATION_POINT,
-                        variable=PRESSURE_VAR,
-                        elementSets=(set_ref_for_field,)
-                    )
+                    with _timed('odb.pressure_set_extract'):
+                        xyList_pressure = xyPlot.xyDataListFromField(
+                            odb=odb,
+                            outputPosition=INTEGRATION_POINT,
+                            variable=PRESSURE_VAR,
+                            elementSets=(set_ref_for_field,)
+                        )
 
                     if not xyList_pressure:
                         print '  WARNING: No se generaron datos XY para el set "%s".' % elem_set_name
@@ -162,7 +277,8 @@ def process_odb_files():
                                  except KeyError: pass
                          continue
 
-                    xy_avg_pressure = avg(tuple(valid_xy_data))
+                    with _timed('odb.average'):
+                        xy_avg_pressure = avg(tuple(valid_xy_data))
                     avg_name_temp = xy_avg_pressure.name
                     avg_name_final = 'Pressure_%s_mean' % elem_set_name
 
@@ -185,11 +301,7 @@ def process_odb_files():
                              continue
 
                     report_filename = os.path.join(odb_report_dir, '%s.rpt' % avg_name_final)
-                    session.writeXYReport(
-                        fileName=report_filename,
-                        xyData=(xy_avg_pressure,),
-                        appendMode=OFF
-                    )
+                    _write_xy_report(report_filename, (xy_avg_pressure,))
                     print '  Reporte guardado: %s' % report_filename
 
                     if avg_name_final in session.xyDataObjects.keys():
@@ -217,89 +329,43 @@ def process_odb_files():
                     print traceback.format_exc()
 
 
-            # --- Procesamiento de Aceleracion ---
+            # --- Procesamiento de Aceleracion y Rotacion (historias nodales) ---
+            # Las componentes de traslacion (A1-A3) y las de rotacion (VR1-VR3, AR1-AR3) se extraen en el mismo bucle:
+            # cada NodeSet se resuelve una sola vez y cada componente se extrae, se promedia y se guarda igual.
             print 'INFO: Procesando Aceleracion...'
-            node_set_exists = False
-            node_labels = []
-            node_set_object = None
-
-            # Comprobar existencia del set de nodos
-            node_set_location_msg = ""
-            if NODE_SET_ACC in odb.rootAssembly.nodeSets.keys():
-                node_set_object = odb.rootAssembly.nodeSets[NODE_SET_ACC]
-                node_set_location_msg = "Assembly"
-            elif current_instance_name in odb.rootAssembly.instances and NODE_SET_ACC in odb.rootAssembly.instances[current_instance_name].nodeSets.keys():
-                 node_set_object = odb.rootAssembly.instances[current_instance_name].nodeSets[NODE_SET_ACC]
-                 node_set_location_msg = "Instancia '%s'" % current_instance_name
-            else:
-                print '  ERROR: NodeSet "%s" no encontrado. No se procesara Aceleracion.' % NODE_SET_ACC
-
-            # --- CORRECCION v9: Manejar OdbMeshNodeArray anidado ---
-            if node_set_object is not None:
-                print '  INFO: NodeSet "%s" encontrado en %s.' % (NODE_SET_ACC, node_set_location_msg)
-                node_labels = []
-                nodes_sequence = None
-                if hasattr(node_set_object, 'nodes'):
-                    nodes_sequence = node_set_object.nodes
-                    num_elements_in_sequence = len(nodes_sequence)
-                    print '  INFO: La secuencia "nodes" del NodeSet contiene %d elementos.' % num_elements_in_sequence
-
-                    nodes_to_iterate_over = [] # La secuencia final de nodos reales
-
-                    if num_elements_in_sequence == 1 and type(nodes_sequence[0]).__name__ == 'OdbMeshNodeArray':
-                        # Caso detectado: la secuencia contiene UN OdbMeshNodeArray
-                        print '  INFO: Detectado OdbMeshNodeArray anidado. Usando la secuencia interna.'
-                        nodes_to_iterate_over = nodes_sequence[0] # Usar el array interno
-                        num_nodes_final = len(nodes_to_iterate_over)
-                        print '  INFO: La secuencia interna contiene %d nodos.' % num_nodes_final
-                    elif num_elements_in_sequence > 0:
-                        # Caso "normal": la secuencia contiene los nodos directamente
-                        print '  INFO: Asumiendo que la secuencia "nodes" contiene nodos directamente.'
-                        nodes_to_iterate_over = nodes_sequence
-                        num_nodes_final = len(nodes_to_iterate_over)
-                    else:
-                        # Caso: la secuencia 'nodes' esta vacia
-                        num_nodes_final = 0
-                        print '  WARNING: La secuencia "nodes" esta vacia.'
-
-                    # Intentar obtener labels de la secuencia final de nodos
-                    if num_nodes_final > 0:
-                        try:
-                            for node in nodes_to_iterate_over:
-                                if hasattr(node, 'label'):
-                                    node_labels.append(node.label)
-                                else:
-                                    print '      WARNING: Objeto encontrado en la secuencia final sin atributo "label". Tipo: %s' % type(node)
-
-                            if node_labels:
-                                node_set_exists = True # Marcar como valido para procesar aceleracion
-                            else:
-                                print '  WARNING: No se pudieron extraer etiquetas validas de la secuencia final de nodos.'
-                        except Exception as e_label:
-                             print '  ERROR: Ocurrio un error al obtener etiquetas de nodo de la secuencia final:'
-                             print '    %s' % e_label
-                             print traceback.format_exc()
-                    # else: (No es necesario, si num_nodes_final es 0, node_set_exists sigue False)
-
-                else:
-                    print '  WARNING: El objeto NodeSet "%s" no tiene el atributo "nodes".' % NODE_SET_ACC
-            # --- Fin correccion v9 ---
-
-
-            if node_set_exists:
+            history_passes = [] # (NodeSet, labels, prefijo de la variable, componentes, sufijo del reporte, reporte por nodo, etapa)
+            node_labels = _node_set_labels(odb, NODE_SET_ACC, current_instance_name,
+                                           '  ERROR: NodeSet "%s" no encontrado. No se procesara Aceleracion.' % NODE_SET_ACC)
+            if node_labels:
                 print '  Extraidos %d labels de nodos del NodeSet "%s".' % (len(node_labels), NODE_SET_ACC)
+                history_passes.append((NODE_SET_ACC, node_labels, ACCEL_VAR_PREFIX, ['A1', 'A2', 'A3'], 'Acc', True, 'accel'))
+            else:
+                print 'INFO: Saltando procesamiento de aceleracion porque el NodeSet no fue validado.'
 
-                # --- Bucle de Componentes A1, A2, A3 (sin cambios internos aqui) ---
-                for i, component in enumerate(['A1', 'A2', 'A3']):
+            if NODE_SET_ROT:
+                print 'INFO: Procesando Rotacion...'
+                rot_labels = node_labels if NODE_SET_ROT == NODE_SET_ACC else _node_set_labels(
+                    odb, NODE_SET_ROT, current_instance_name,
+                    '  INFO: NodeSet "%s" no encontrado. No se extraera la cinematica de rotacion.' % NODE_SET_ROT)
+                if rot_labels:
+                    print '  Extraidos %d labels de nodos del NodeSet "%s".' % (len(rot_labels), NODE_SET_ROT)
+                    history_passes.append((NODE_SET_ROT, rot_labels, ROT_VELOCITY_VAR_PREFIX, ['VR1', 'VR2', 'VR3'], 'Rot', False, 'rot'))
+                    history_passes.append((NODE_SET_ROT, rot_labels, ROT_ACCEL_VAR_PREFIX, ['AR1', 'AR2', 'AR3'], 'Rot', False, 'rot'))
+
+            for node_set_name, node_labels, var_prefix, components, report_tag, write_per_node, stage in history_passes:
+                print '  Extrayendo "%s" del NodeSet "%s"...' % (var_prefix, node_set_name)
+                # --- Bucle de Componentes (A1-A3, VR1-VR3, AR1-AR3) ---
+                for i, component in enumerate(components):
                     print '    Procesando Componente: %s' % component
                     xyList_accel_comp = []
                     xyNames_accel_comp_temp = []
 
+                    component_start = time.time()
                     try:
                         # Bucle sobre labels obtenidos
                         for node_label in node_labels:
                             hist_var_name = '%s: %s PI: %s Node %d in NSET %s' % (
-                                ACCEL_VAR_PREFIX, component, current_instance_name, node_label, NODE_SET_ACC)
+                                var_prefix, component, current_instance_name, node_label, node_set_name)
                             temp_xy_name = 'temp_node_%d_%s_%s' % (node_label, component, odb_name_base)
 
                             try:
@@ -307,13 +373,14 @@ def process_odb_files():
                                 if temp_xy_name in session.xyDataObjects.keys():
                                     del session.xyDataObjects[temp_xy_name]
 
-                                xy_node_accel = xyPlot.XYDataFromHistory(
-                                    odb=odb,
-                                    outputVariableName=hist_var_name,
-                                    steps=(current_step_name, ),
-                                    suppressQuery=True,
-                                    name=temp_xy_name
-                                )
+                                with _timed('odb.%s_node_history' % stage):
+                                    xy_node_accel = xyPlot.XYDataFromHistory(
+                                        odb=odb,
+                                        outputVariableName=hist_var_name,
+                                        steps=(current_step_name, ),
+                                        suppressQuery=True,
+                                        name=temp_xy_name
+                                    )
 
                                 if hasattr(xy_node_accel, 'data') and len(xy_node_accel.data) > 0:
                                     xyList_accel_comp.append(xy_node_accel)
@@ -334,22 +401,22 @@ def process_odb_files():
                                  print '        Tipo: %s' % type(e_node).__name__
                                  print '        Mensaje: %s' % e_node
 
+                        if stage_timing is not None: stage_timing.record('odb.%s_set_extract' % stage, time.time() - component_start)
+
                         # Reportes, promedio y limpieza
                         if not xyList_accel_comp:
                             print '    WARNING: No se extrajeron datos validos para %s.' % component
                             continue
 
-                        report_filename_indiv = os.path.join(odb_report_dir, '%s_Acc.rpt' % component)
-                        session.writeXYReport(
-                            fileName=report_filename_indiv,
-                            xyData=tuple(xyList_accel_comp),
-                            appendMode=OFF
-                        )
-                        print '    Reporte individual guardado: %s' % report_filename_indiv
+                        if write_per_node:
+                            report_filename_indiv = os.path.join(odb_report_dir, '%s_%s.rpt' % (component, report_tag))
+                            _write_xy_report(report_filename_indiv, tuple(xyList_accel_comp))
+                            print '    Reporte individual guardado: %s' % report_filename_indiv
 
-                        xy_avg_accel = avg(tuple(xyList_accel_comp))
+                        with _timed('odb.average'):
+                            xy_avg_accel = avg(tuple(xyList_accel_comp))
                         avg_name_temp = xy_avg_accel.name
-                        avg_name_final = '%s_Acc_mean' % component
+                        avg_name_final = '%s_%s_mean' % (component, report_tag)
 
                         try:
                             session.xyDataObjects.changeKey(fromName=avg_name_temp, toName=avg_name_final)
@@ -370,11 +437,7 @@ def process_odb_files():
                                  continue
 
                         report_filename_avg = os.path.join(odb_report_dir, '%s.rpt' % avg_name_final)
-                        session.writeXYReport(
-                            fileName=report_filename_avg,
-                            xyData=(xy_avg_accel,),
-                            appendMode=OFF
-                        )
+                        _write_xy_report(report_filename_avg, (xy_avg_accel,))
                         print '    Reporte promedio guardado: %s' % report_filename_avg
 
                         if avg_name_final in session.xyDataObjects.keys():
@@ -400,10 +463,6 @@ def process_odb_files():
                                     print '      WARNING: No se pudo borrar XYData "%s": %s' % (name, e_del)
                 # --- Fin bucle componentes ---
 
-            # --- Fin del if node_set_exists ---
-            else:
-                print 'INFO: Saltando procesamiento de aceleracion porque el NodeSet no fue validado.'
-
 
         # --- Bloque de Manejo de Errores General para el ODB ---
         except OdbError as e:
@@ -429,12 +488,17 @@ def process_odb_files():
                 if odb_name_in_session in session.odbs:
                     print 'INFO: Cerrando ODB: %s' % odb_file
                     try:
-                        session.odbs[odb_name_in_session].close()
+                        with _timed('odb.close'):
+                            session.odbs[odb_name_in_session].close()
                     except Exception as close_err:
                         print 'WARNING: Problema al cerrar ODB %s: %s' % (odb_file, close_err)
             odb = None
+            if stage_timing is not None: stage_timing.record('odb.total', time.time() - odb_start)
 
     print '\nINFO: Proceso completado para todos los ODB encontrados.'
+    if stage_timing is not None:
+        stage_timing.write_run_report(os.path.join(reports_base_dir, TIMING_REPORT_NAME), 'rpt_manager',
+                                      {'odb_files': odb_files})
 
 # --- Ejecutar la funcion principal ---
 if __name__ == '__main__':
@@ -458,4 +522,6 @@ if __name__ == '__main__':
              print "WARNING: No se pudo borrar XY Data '%s': %s" % (data_name, e)
     print "INFO: Limpieza completada (%d objetos XYData borrados)." % (deleted_count)
 
-    process_odb_files()
+    # ODB concretos: abaqus cae noGUI=rpt_manager.py -- Sim_A.odb Sim_B.odb
+    requested_odbs = [arg for arg in sys.argv[1:] if arg.lower().endswith('.odb')]
+    process_odb_files(requested_odbs or None)
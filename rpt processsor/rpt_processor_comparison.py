@@ -1,15 +1,28 @@
 import os
 import re
+import sys
 import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
 import traceback
 import string
+import contextlib
 from typing import List, Dict, Tuple, Optional, Any
 
+# Utilidades comunes (pipeline/tool_support.py, en la carpeta 'pipeline' del repositorio o copiado junto al script)
+_PIPELINE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'pipeline') if '__file__' in globals() else ''
+if _PIPELINE_DIR and os.path.isdir(_PIPELINE_DIR) and _PIPELINE_DIR not in sys.path: sys.path.append(_PIPELINE_DIR)
+try:
+    import tool_support
+except ImportError: # Script pegado en Colab o copiado sin pipeline/: se ejecuta como antes, sin medir tiempos ni módulos opcionales
+    tool_support = None
+
 # --- Configuración General ---
 REPORTS_ROOT_DIR = '/content/drive/MyDrive/Beca Colaboracion 2024-2025/10_Resultados Simulaciones/Reports_v3'
 RESULTS_COMPARISON_DIR = '/content/drive/MyDrive/Beca Colaboracion 2024-2025/10_Resultados Simulaciones/Results_Comparison_v3'
+CAMPAIGN_STORE_FILE = None # Archivo de campaña (.npz de pipeline/campaign_store.py); si se indica, se lee en lugar de REPORTS_ROOT_DIR
+# Reducir las series largas al mínimo y máximo de cada columna de píxeles (a PLOT_DPI) antes de dibujarlas
+# (pipeline/plot_decimation.py). False para dibujar todos los puntos (figuras de archivo).
+DECIMATE_PLOT_SERIES = True
+PLOT_DPI = 300
 
 # --- Configuración de Identificación de Simulaciones y Archivos ---
 NO_HELMET_KEYWORDS = ['nohelmet', 'sincasco', 'nahum']
@@ -26,9 +39,57 @@ PRESSURE_BOTTOM_RPT_SUFFIX = "_Pressure_BOTTOMREF_mean.rpt"
 TIME_COLUMN_INDEX = 0
 VALUE_COLUMN_INDEX = 1
 RPT_IGNORE_LINE_PATTERNS = [r'^\s*\*+', r'^\s*END STEP', r'^\s*THE ANALYSIS', r'^\s*FIELD OUTPUT']
-
-sns.set_theme(style="whitegrid", palette="deep")
-COMPARISON_PALETTE = sns.color_palette("deep", n_colors=4)
+# Leer los .rpt de ancho fijo de writeXYReport proyectándolos en memoria y convirtiendo solo las columnas usadas
+# (pipeline/rpt_fixed_width.py). Si el archivo no tiene ese formato se usa el lector línea a línea.
+USE_FIXED_WIDTH_RPT_READER = True
+
+
+def _init_plot_style():
+    sns.set_theme(style="whitegrid", palette="deep")
+
+if tool_support is not None: # matplotlib y seaborn solo se cargan (y se aplica el tema) al dibujar la primera figura
+    sns = tool_support.LazyModule('seaborn')
+    plt = tool_support.LazyModule('matplotlib.pyplot', on_load=_init_plot_style)
+    COMPARISON_PALETTE = tool_support.LazyPalette("deep", 4)
+else:
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+    _init_plot_style()
+    COMPARISON_PALETTE = sns.color_palette("deep", n_colors=4)
+
+# --- Utilidades de tool_support.py (sin él: sin medir tiempos, plt.savefig directo y pool.map) ---
+if tool_support is not None:
+    _optional_module = tool_support.optional_module
+    _timed = tool_support.timed
+    save_figure = tool_support.save_figure
+    _pool_map = tool_support.pool_map
+else:
+    _optional_module = lambda module_name: None
+    _timed = lambda stage: contextlib.nullcontext()
+    save_figure = lambda path, **savefig_kwargs: plt.savefig(path, **savefig_kwargs)
+    _pool_map = lambda pool, func, items: list(pool.map(func, items))
+
+# --- Módulos opcionales de pipeline/ (None si no están disponibles) ---
+campaign_store = _optional_module('campaign_store')
+stage_timing = tool_support.stage_timing if tool_support is not None else None
+accel_batch = _optional_module('accel_batch')
+
+TIMING_REPORT_NAME = "informe_tiempos_comparacion.json" # Informe de tiempos por etapa, en la carpeta de resultados
+
+def plot_series(fig, x, y) -> Tuple[Any, Any]:
+    """Serie (x, y) lista para ax.plot: reducida a la resolución de 'fig' si DECIMATE_PLOT_SERIES."""
+    if tool_support is None: return x, y
+    return tool_support.plot_series(fig, x, y, DECIMATE_PLOT_SERIES, PLOT_DPI)
+
+_ACTIVE_CAMPAIGN_STORE = None # Se abre en main() cuando CAMPAIGN_STORE_FILE está configurado
+
+def rpt_exists(file_path: Optional[str]) -> bool:
+    if tool_support is None: return bool(file_path) and os.path.exists(file_path)
+    return tool_support.rpt_exists(file_path, _ACTIVE_CAMPAIGN_STORE)
+
+def list_sim_files(directory: str) -> List[str]:
+    if tool_support is None: return os.listdir(directory)
+    return tool_support.list_sim_files(directory, _ACTIVE_CAMPAIGN_STORE)
 
 # --- NUEVA FUNCIÓN PARA EXTRAER INFORMACIÓN PARA TÍTULOS ---
 def extract_title_info(sim_name: str) -> Tuple[str, float, str]:
@@ -97,31 +158,44 @@ def extract_title_info(sim_name: str) -> Tuple[str, float, str]:
 def find_rpt_file_flexible(directory: str, primary_suffix: str, secondary_name: Optional[str] = None) -> Optional[str]:
     sim_name = os.path.basename(directory)
     expected_filename_option1 = sim_name + primary_suffix
-    if os.path.exists(os.path.join(directory, expected_filename_option1)):
+    if rpt_exists(os.path.join(directory, expected_filename_option1)):
         return os.path.join(directory, expected_filename_option1)
     if secondary_name:
-        if os.path.exists(os.path.join(directory, secondary_name)):
+        if rpt_exists(os.path.join(directory, secondary_name)):
             return os.path.join(directory, secondary_name)
     elif primary_suffix.startswith("_"):
         fallback_name = primary_suffix[1:]
-        if os.path.exists(os.path.join(directory, fallback_name)):
+        if rpt_exists(os.path.join(directory, fallback_name)):
             return os.path.join(directory, fallback_name)
     try:
-        for fname in os.listdir(directory):
+        for fname in list_sim_files(directory):
             if fname.endswith(primary_suffix):
                 return os.path.join(directory, fname)
     except FileNotFoundError:
         pass
     return None
 
+def read_rpt_fixed_width(file_path: str) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+    """Lectura de ancho fijo (tiempo en ms, valor), o None si no está disponible o el archivo no tiene ese formato."""
+    if not USE_FIXED_WIDTH_RPT_READER or tool_support is None: return None
+    data = tool_support.read_fixed_width_columns(file_path, (TIME_COLUMN_INDEX, VALUE_COLUMN_INDEX))
+    return (data[:, 0] * 1000, data[:, 1]) if data is not None else None
+
 def read_rpt_data(file_path: str) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+    if _ACTIVE_CAMPAIGN_STORE is not None and _ACTIVE_CAMPAIGN_STORE.exists(file_path):
+        with _timed('store.read'):
+            data = _ACTIVE_CAMPAIGN_STORE.read_path(file_path)
+        if data is None or data.shape[1] <= max(TIME_COLUMN_INDEX, VALUE_COLUMN_INDEX): return None
+        return data[:, TIME_COLUMN_INDEX] * 1000, data[:, VALUE_COLUMN_INDEX]
     if not file_path or not os.path.exists(file_path):
         print(f"      ERROR: Archivo RPT no encontrado o no accesible: {file_path}")
         return None
+    data = read_rpt_fixed_width(file_path)
+    if data is not None: return data
     time_data, value_data = [], []
     data_lines_found = 0
     try:
-        with open(file_path, 'r') as f:
+        with _timed('rpt.parse'), open(file_path, 'r') as f:
             for line_num, line_content in enumerate(f):
                 line = line_content.strip()
                 if not line: continue
@@ -141,6 +215,7 @@ def read_rpt_data(file_path: str) -> Optional[Tuple[np.ndarray, np.ndarray]]:
                         data_lines_found += 1
                 except ValueError:
                     continue
+        if stage_timing is not None: stage_timing.add_file_read(file_path)
         if not time_data or not value_data:
             # print(f"      WARNING: No se extrajeron datos numéricos de {file_path} (líneas leídas: {data_lines_found}).") # Comentado para reducir verbosidad
             return None
@@ -163,8 +238,7 @@ def calculate_acceleration_magnitude(dir_path: str, sim_name: str) -> Optional[T
             data = read_rpt_data(component_rpt)
             if data:
                 current_time_ms, current_values_mm_s2 = data
-                current_values_m_s2 = current_values_mm_s2 * conversion_factor_accel
-                components_values[comp_key] = current_values_m_s2
+                components_values[comp_key] = current_values_mm_s2 # Se pasan a m/s² al calcular el módulo
                 if common_time is None:
                     common_time = current_time_ms
                     min_len = len(common_time)
@@ -173,7 +247,7 @@ def calculate_acceleration_magnitude(dir_path: str, sim_name: str) -> Optional[T
                         new_min_len = min(len(common_time), len(current_time_ms))
                         if new_min_len < min_len: min_len = new_min_len
                         print(f"      WARNING: Tiempos de componentes de aceleración no idénticos para {sim_name}. Se truncará a {min_len} puntos.")
-                min_len = min(min_len, len(current_values_m_s2))
+                min_len = min(min_len, len(current_values_mm_s2))
             else:
                 print(f"      ERROR: No se pudieron leer datos para componente {comp_key} de {sim_name} desde {component_rpt}")
                 return None
@@ -194,7 +268,11 @@ def calculate_acceleration_magnitude(dir_path: str, sim_name: str) -> Optional[T
         print(f"      ERROR: Discrepancia en longitudes de componentes de aceleración para {sim_name} tras truncado.")
         return None
 
-    magnitude_m_s2 = np.sqrt(a1**2 + a2**2 + a3**2)
+    with _timed('accel.magnitude'):
+        if accel_batch is not None: # Mismo núcleo que el cálculo por lotes de rpt_processor_individual.py
+            magnitude_m_s2 = accel_batch.magnitude(a1, a2, a3, scale=conversion_factor_accel)
+        else:
+            magnitude_m_s2 = np.sqrt((a1 * conversion_factor_accel)**2 + (a2 * conversion_factor_accel)**2 + (a3 * conversion_factor_accel)**2)
     # print(f"  Magnitud de aceleración calculada (m/s²) para {sim_name} (longitud: {len(magnitude_m_s2)}). Tiempo en ms.") # Comentado
     return common_time, magnitude_m_s2
 
@@ -236,10 +314,10 @@ def plot_individual_pressures(sim_data: Dict[str, Any], results_dir: str):
     pressure_unit_label = 'Presión (MPa)'
     lines_for_legend = []
     if sim_data['time_p_top_ms'] is not None and sim_data['pressure_top_mpa'] is not None:
-        line_ptop, = ax.plot(sim_data['time_p_top_ms'], sim_data['pressure_top_mpa'], color=COMPARISON_PALETTE[1], linestyle='--', linewidth=2, label=f'Presión Top ({pressure_unit_label})')
+        line_ptop, = ax.plot(*plot_series(fig, sim_data['time_p_top_ms'], sim_data['pressure_top_mpa']), color=COMPARISON_PALETTE[1], linestyle='--', linewidth=2, label=f'Presión Top ({pressure_unit_label})')
         lines_for_legend.append(line_ptop)
     if sim_data['time_p_bottom_ms'] is not None and sim_data['pressure_bottom_mpa'] is not None:
-        line_pbottom, = ax.plot(sim_data['time_p_bottom_ms'], sim_data['pressure_bottom_mpa'], color=COMPARISON_PALETTE[2], linestyle=':', linewidth=2, label=f'Presión Bottom ({pressure_unit_label})')
+        line_pbottom, = ax.plot(*plot_series(fig, sim_data['time_p_bottom_ms'], sim_data['pressure_bottom_mpa']), color=COMPARISON_PALETTE[2], linestyle=':', linewidth=2, label=f'Presión Bottom ({pressure_unit_label})')
         lines_for_legend.append(line_pbottom)
 
     ax.set_xlabel(time_unit_label, fontsize=12)
@@ -253,7 +331,7 @@ def plot_individual_pressures(sim_data: Dict[str, Any], results_dir: str):
 
     fig.tight_layout()
     filename_safe_short_id = re.sub(r'[^\w\-_\.]', '_', short_id) # Sanitize for filename
-    plt.savefig(os.path.join(results_dir, f"Individual_Pressures_{filename_safe_short_id}.png"))
+    save_figure(os.path.join(results_dir, f"Individual_Pressures_{filename_safe_short_id}.png"))
     plt.close(fig)
 
 
@@ -274,7 +352,7 @@ def plot_individual_accel_and_pressures(sim_data: Dict[str, Any], results_dir: s
     color_acc = COMPARISON_PALETTE[0]
     ax1.set_xlabel(time_unit_label, fontsize=12)
     ax1.set_ylabel(f'Aceleración Magnitud ({acc_unit_label})', color=color_acc, fontsize=12)
-    line_acc, = ax1.plot(sim_data['time_acc_ms'], sim_data['acc_mag_m_s2'], color=color_acc, linestyle='-', linewidth=2, label=f'Aceleración Mag. ({acc_unit_label})')
+    line_acc, = ax1.plot(*plot_series(fig, sim_data['time_acc_ms'], sim_data['acc_mag_m_s2']), color=color_acc, linestyle='-', linewidth=2, label=f'Aceleración Mag. ({acc_unit_label})')
     ax1.tick_params(axis='y', labelcolor=color_acc)
     ax1.grid(True, which='major', axis='y', linestyle=':', linewidth=0.5, color=color_acc, alpha=0.5)
 
@@ -285,10 +363,10 @@ def plot_individual_accel_and_pressures(sim_data: Dict[str, Any], results_dir: s
 
     lines_for_legend = [line_acc]
     if sim_data['time_p_top_ms'] is not None and sim_data['pressure_top_mpa'] is not None:
-        line_ptop, = ax2.plot(sim_data['time_p_top_ms'], sim_data['pressure_top_mpa'], color=color_p_top, linestyle='--', linewidth=2, label=f'Presión Top ({pressure_unit_label})')
+        line_ptop, = ax2.plot(*plot_series(fig, sim_data['time_p_top_ms'], sim_data['pressure_top_mpa']), color=color_p_top, linestyle='--', linewidth=2, label=f'Presión Top ({pressure_unit_label})')
         lines_for_legend.append(line_ptop)
     if sim_data['time_p_bottom_ms'] is not None and sim_data['pressure_bottom_mpa'] is not None:
-        line_pbottom, = ax2.plot(sim_data['time_p_bottom_ms'], sim_data['pressure_bottom_mpa'], color=color_p_bottom, linestyle=':', linewidth=2, label=f'Presión Bottom ({pressure_unit_label})')
+        line_pbottom, = ax2.plot(*plot_series(fig, sim_data['time_p_bottom_ms'], sim_data['pressure_bottom_mpa']), color=color_p_bottom, linestyle=':', linewidth=2, label=f'Presión Bottom ({pressure_unit_label})')
         lines_for_legend.append(line_pbottom)
 
     ax2.tick_params(axis='y')
@@ -297,7 +375,7 @@ def plot_individual_accel_and_pressures(sim_data: Dict[str, Any], results_dir: s
     ax1.legend(lines_for_legend, labels, loc='upper right', fontsize=10, frameon=True, facecolor='white', framealpha=0.7)
     fig.tight_layout()
     filename_safe_short_id = re.sub(r'[^\w\-_\.]', '_', short_id) # Sanitize for filename
-    plt.savefig(os.path.join(results_dir, f"Individual_AccAndPressures_{filename_safe_short_id}.png"))
+    save_figure(os.path.join(results_dir, f"Individual_AccAndPressures_{filename_safe_short_id}.png"))
     plt.close(fig)
 
 
@@ -324,7 +402,7 @@ def plot_comparison_acceleration(sim_nh_data: Dict[str, Any], sim_h_data: Dict[s
     # Eje izquierdo para Sin Casco (m/s²)
     ax1.set_xlabel(time_unit_label, fontsize=12)
     ax1.set_ylabel(acc_unit_label_left, color=color_nh, fontsize=12)
-    line_nh, = ax1.plot(time_nh_ms, acc_nh_m_s2, label=f'Sin Casco ({short_id_nh}) - m/s²', color=color_nh, linewidth=2)
+    line_nh, = ax1.plot(*plot_series(fig, time_nh_ms, acc_nh_m_s2), label=f'Sin Casco ({short_id_nh}) - m/s²', color=color_nh, linewidth=2)
     ax1.tick_params(axis='y', labelcolor=color_nh)
     ax1.grid(True, which='major', axis='y', linestyle=':', linewidth=0.5, color=color_nh, alpha=0.5)
     # Aplicar notación científica al eje Y izquierdo
@@ -335,7 +413,7 @@ def plot_comparison_acceleration(sim_nh_data: Dict[str, Any], sim_h_data: Dict[s
     ax2 = ax1.twinx()
     acc_h_mm_s2 = acc_h_m_s2 * 1000
     ax2.set_ylabel(acc_unit_label_right, color=color_h, fontsize=12)
-    line_h, = ax2.plot(time_h_ms, acc_h_mm_s2, label=f'Con Casco ({short_id_h}) - mm/s²', color=color_h, linewidth=2, linestyle='--')
+    line_h, = ax2.plot(*plot_series(fig, time_h_ms, acc_h_mm_s2), label=f'Con Casco ({short_id_h}) - mm/s²', color=color_h, linewidth=2, linestyle='--')
     ax2.tick_params(axis='y', labelcolor=color_h)
     # Aplicar notación científica al eje Y derecho
     ax2.ticklabel_format(style='sci', axis='y', scilimits=(0,0), useMathText=True)
@@ -353,7 +431,7 @@ def plot_comparison_acceleration(sim_nh_data: Dict[str, Any], sim_h_data: Dict[s
 
     filename_safe_short_id_nh = re.sub(r'[^\w\-_\.]', '_', short_id_nh)
     filename_safe_short_id_h = re.sub(r'[^\w\-_\.]', '_', short_id_h)
-    plt.savefig(os.path.join(results_dir, f"Compare_AccMag_DualAxis_Sci_{filename_safe_short_id_nh}_vs_{filename_safe_short_id_h}.png"))
+    save_figure(os.path.join(results_dir, f"Compare_AccMag_DualAxis_Sci_{filename_safe_short_id_nh}_vs_{filename_safe_short_id_h}.png"))
     plt.close(fig)
 
 def plot_comparison_pressure(sim_nh_data: Dict[str, Any], sim_h_data: Dict[str, Any], results_dir: str):
@@ -381,7 +459,7 @@ def plot_comparison_pressure(sim_nh_data: Dict[str, Any], sim_h_data: Dict[str,
     lines_top, labels_top = [], []
 
     if sim_nh_data['time_p_top_ms'] is not None and sim_nh_data['pressure_top_mpa'] is not None:
-        line_nh_top, = ax_top_nh.plot(sim_nh_data['time_p_top_ms'], sim_nh_data['pressure_top_mpa'],
+        line_nh_top, = ax_top_nh.plot(*plot_series(fig, sim_nh_data['time_p_top_ms'], sim_nh_data['pressure_top_mpa']),
                                   label=f'Sin Casco ({short_id_nh}) - MPa', color=color_nh, linewidth=2)
         lines_top.append(line_nh_top); labels_top.append(f'Sin Casco ({short_id_nh}) - MPa')
     ax_top_nh.set_ylabel(f'{pressure_unit_nh_label} (Sin Casco)', color=color_nh, fontsize=12)
@@ -390,7 +468,7 @@ def plot_comparison_pressure(sim_nh_data: Dict[str, Any], sim_h_data: Dict[str,
 
     if sim_h_data['time_p_top_ms'] is not None and sim_h_data['pressure_top_mpa'] is not None:
         pressure_h_kpa = sim_h_data['pressure_top_mpa'] * 1000
-        line_h_top, = ax_top_h.plot(sim_h_data['time_p_top_ms'], pressure_h_kpa,
+        line_h_top, = ax_top_h.plot(*plot_series(fig, sim_h_data['time_p_top_ms'], pressure_h_kpa),
                                 label=f'Con Casco ({short_id_h}) - kPa', color=color_h, linewidth=2, linestyle='--')
         lines_top.append(line_h_top); labels_top.append(f'Con Casco ({short_id_h}) - kPa')
     ax_top_h.set_ylabel(f'{pressure_unit_h_label} (Con Casco)', color=color_h, fontsize=12)
@@ -405,7 +483,7 @@ def plot_comparison_pressure(sim_nh_data: Dict[str, Any], sim_h_data: Dict[str,
     lines_bottom, labels_bottom = [], []
 
     if sim_nh_data['time_p_bottom_ms'] is not None and sim_nh_data['pressure_bottom_mpa'] is not None:
-        line_nh_b, = ax_bottom_nh.plot(sim_nh_data['time_p_bottom_ms'], sim_nh_data['pressure_bottom_mpa'],
+        line_nh_b, = ax_bottom_nh.plot(*plot_series(fig, sim_nh_data['time_p_bottom_ms'], sim_nh_data['pressure_bottom_mpa']),
                                        label=f'Sin Casco ({short_id_nh}) - MPa', color=color_nh, linewidth=2)
         lines_bottom.append(line_nh_b); labels_bottom.append(f'Sin Casco ({short_id_nh}) - MPa')
     ax_bottom_nh.set_ylabel(f'{pressure_unit_nh_label} (Sin Casco)', color=color_nh, fontsize=12)
@@ -414,7 +492,7 @@ def plot_comparison_pressure(sim_nh_data: Dict[str, Any], sim_h_data: Dict[str,
 
     if sim_h_data['time_p_bottom_ms'] is not None and sim_h_data['pressure_bottom_mpa'] is not None:
         pressure_h_kpa_b = sim_h_data['pressure_bottom_mpa'] * 1000
-        line_h_b, = ax_bottom_h.plot(sim_h_data['time_p_bottom_ms'], pressure_h_kpa_b,
+        line_h_b, = ax_bottom_h.plot(*plot_series(fig, sim_h_data['time_p_bottom_ms'], pressure_h_kpa_b),
                                      label=f'Con Casco ({short_id_h}) - kPa', color=color_h, linewidth=2, linestyle='--')
         lines_bottom.append(line_h_b); labels_bottom.append(f'Con Casco ({short_id_h}) - kPa')
     ax_bottom_h.set_ylabel(f'{pressure_unit_h_label} (Con Casco)', color=color_h, fontsize=12)
@@ -434,28 +512,112 @@ def plot_comparison_pressure(sim_nh_data: Dict[str, Any], sim_h_data: Dict[str,
 
     filename_safe_short_id_nh = re.sub(r'[^\w\-_\.]', '_', short_id_nh)
     filename_safe_short_id_h = re.sub(r'[^\w\-_\.]', '_', short_id_h)
-    plt.savefig(os.path.join(results_dir, f"Compare_Pressure_DualAxes_{filename_safe_short_id_nh}_vs_{filename_safe_short_id_h}.png"))
+    save_figure(os.path.join(results_dir, f"Compare_Pressure_DualAxes_{filename_safe_short_id_nh}_vs_{filename_safe_short_id_h}.png"))
     plt.close(fig)
 
+# --- Selección y procesado de pares ---
+def parse_pair_selection(user_input: str, helmet_sims: List[Dict[str, str]], no_helmet_sims: List[Dict[str, str]],
+                         selected_pairs: List[Tuple[Dict[str, str], Dict[str, str]]]) -> Tuple[List[Tuple[Dict[str, str], Dict[str, str]]], bool]:
+    """
+    Interpreta una selección tipo "1a, 3b" (número = con casco, letra = sin casco).
+    Devuelve los pares nuevos (sin casco, con casco) y si hubo algún error en la selección.
+    """
+    current_input_valid_pairs = []
+    any_error_in_current_input = False
+    for pair_str in re.split(r'[,\s]+', user_input.lower().strip()):
+        if not pair_str: continue
+        match = re.fullmatch(r'(\d+)([a-z])', pair_str)
+        if match:
+            h_num_str, nh_letter_str = match.group(1), match.group(2)
+            idx_h, idx_nh = int(h_num_str) - 1, ord(nh_letter_str) - ord('a')
+            if 0 <= idx_h < len(helmet_sims) and 0 <= idx_nh < len(no_helmet_sims):
+                pair_to_add = (no_helmet_sims[idx_nh], helmet_sims[idx_h])
+                if pair_to_add not in selected_pairs and pair_to_add not in current_input_valid_pairs:
+                    current_input_valid_pairs.append(pair_to_add)
+                    print(f"  Par candidato: '{no_helmet_sims[idx_nh]['id']}' vs '{helmet_sims[idx_h]['id']}'")
+                else: print(f"  Advertencia: Par ya seleccionado o repetido. Omitiendo.")
+            else:
+                print(f"  Error: Selección '{pair_str}' fuera de rango.")
+                any_error_in_current_input = True
+        else:
+            print(f"  Error: Formato inválido '{pair_str}'.")
+            any_error_in_current_input = True
+    return current_input_valid_pairs, any_error_in_current_input
+
+def process_selected_pair(sim_nh_info: Dict[str, str], sim_h_info: Dict[str, str], results_dir: str) -> bool:
+    """Gráficas individuales de ambas simulaciones y comparativas del par. Devuelve False si faltan datos."""
+    data_nh = get_simulation_data(sim_nh_info['path'])
+    data_h = get_simulation_data(sim_h_info['path'])
+    if not data_nh or not data_h:
+        print(f"  ERROR: Faltan datos. Omitiendo par '{sim_nh_info['id']}' vs. '{sim_h_info['id']}'."); return False
+
+    print(f"  Generando gráficas individuales para '{data_nh['name']}'...")
+    plot_individual_pressures(data_nh, results_dir)
+    plot_individual_accel_and_pressures(data_nh, results_dir)
+    print(f"  Generando gráficas individuales para '{data_h['name']}'...")
+    plot_individual_pressures(data_h, results_dir)
+    plot_individual_accel_and_pressures(data_h, results_dir)
+
+    if data_nh.get('acc_mag_m_s2') is not None and data_h.get('acc_mag_m_s2') is not None:
+        print(f"  Generando gráfica comparativa de aceleración...")
+        plot_comparison_acceleration(data_nh, data_h, results_dir)
+    # else: print("  Advertencia: Faltan datos de aceleración. Omitiendo gráfica comparativa de aceleración.") # Comentado
+
+    can_plot_pressure_nh = data_nh.get('pressure_top_mpa') is not None or data_nh.get('pressure_bottom_mpa') is not None
+    can_plot_pressure_h = data_h.get('pressure_top_mpa') is not None or data_h.get('pressure_bottom_mpa') is not None
+    if can_plot_pressure_nh or can_plot_pressure_h:
+        print(f"  Generando gráfica comparativa de presión...")
+        plot_comparison_pressure(data_nh, data_h, results_dir)
+    # else: print("  Advertencia: No hay datos de presión. Omitiendo gráfica comparativa de presión.") # Comentado
+    return True
+
+def _process_selected_pair_worker(task: Tuple[Dict[str, str], Dict[str, str], str]) -> bool:
+    with _timed('pair.total'):
+        return process_selected_pair(*task)
+
 # --- Lógica Principal (sin cambios significativos, pero he limpiado algunos prints) ---
-def main():
+def main(pairs: Optional[str] = None, workers: int = 1) -> Optional[List[Tuple[Dict[str, str], Dict[str, str]]]]:
+    """
+    Sin 'pairs' pide los pares por consola. Con 'pairs' (p. ej. "1a, 3b") no pregunta nada; si la selección
+    tiene algún error no se procesa ningún par. workers > 1 procesa los pares en paralelo (no con CAMPAIGN_STORE_FILE).
+    Devuelve los pares procesados correctamente.
+    """
     global get_simulation_data, plot_individual_pressures, plot_individual_accel_and_pressures
     global plot_comparison_acceleration, plot_comparison_pressure
-
-    if not os.path.exists(REPORTS_ROOT_DIR):
+    global _ACTIVE_CAMPAIGN_STORE
+
+    if CAMPAIGN_STORE_FILE:
+        if campaign_store is None:
+            print("ERROR: CAMPAIGN_STORE_FILE configurado pero no se encontró el módulo 'campaign_store'.")
+            return
+        _ACTIVE_CAMPAIGN_STORE = campaign_store.open_campaign_store(CAMPAIGN_STORE_FILE)
+        if _ACTIVE_CAMPAIGN_STORE is None: return
+    elif not os.path.exists(REPORTS_ROOT_DIR):
         print(f"ERROR: El directorio raíz de reportes '{REPORTS_ROOT_DIR}' no existe.")
         return
+    try:
+        return _process_pairs(pairs, workers)
+    finally:
+        if _ACTIVE_CAMPAIGN_STORE is not None:
+            _ACTIVE_CAMPAIGN_STORE.close(); _ACTIVE_CAMPAIGN_STORE = None
+
+def _process_pairs(pairs: Optional[str], workers: int) -> Optional[List[Tuple[Dict[str, str], Dict[str, str]]]]:
+    """Cuerpo de main() con el archivo de campaña (si se usa) ya abierto; main() lo cierra al terminar."""
     if not os.path.exists(RESULTS_COMPARISON_DIR):
         os.makedirs(RESULTS_COMPARISON_DIR, exist_ok=True)
         print(f"Directorio de resultados creado: '{RESULTS_COMPARISON_DIR}'")
 
-    all_sim_dirs = [d for d in os.listdir(REPORTS_ROOT_DIR) if os.path.isdir(os.path.join(REPORTS_ROOT_DIR, d))]
+    if _ACTIVE_CAMPAIGN_STORE is not None:
+        if workers > 1: print(f"AVISO: workers = {workers}, pero con CAMPAIGN_STORE_FILE los pares se procesan en un solo proceso.")
+        all_sim_dirs = _ACTIVE_CAMPAIGN_STORE.simulations()
+    else:
+        all_sim_dirs = [d for d in os.listdir(REPORTS_ROOT_DIR) if os.path.isdir(os.path.join(REPORTS_ROOT_DIR, d))]
     no_helmet_sims, helmet_sims = [], []
 
     no_helmet_keywords_lower = [kw.lower() for kw in NO_HELMET_KEYWORDS]
     helmet_keywords_lower = [kw.lower() for kw in HELMET_KEYWORDS]
 
-    for sim_dir_name in all_sim_dirs:
+    for sim_dir_name in sorted(all_sim_dirs):
         dir_name_lower = sim_dir_name.lower()
         sim_full_path = os.path.join(REPORTS_ROOT_DIR, sim_dir_name)
         is_no_helmet = any(keyword in dir_name_lower for keyword in no_helmet_keywords_lower)
@@ -483,34 +645,18 @@ def main():
         print(f"  {label}: {sim['id']}")
 
     selected_pairs = []
-    while True:
+    if pairs is not None:
+        selected_pairs, any_error = parse_pair_selection(pairs, helmet_sims, no_helmet_sims, [])
+        if any_error: print("La selección de pares tiene errores. Saliendo."); return
+    while pairs is None:
         try:
             user_input = input(
                 "\nIntroduce pares para comparar (ej: 1a, 3b). 'fin' para terminar: "
             ).lower().strip()
             if user_input == 'fin': break
             if not user_input: continue
-            pair_strings = re.split(r'[,\s]+', user_input)
-            current_input_valid_pairs = []
-            any_error_in_current_input = False
-            for pair_str in pair_strings:
-                if not pair_str: continue
-                match = re.fullmatch(r'(\d+)([a-z])', pair_str)
-                if match:
-                    h_num_str, nh_letter_str = match.group(1), match.group(2)
-                    idx_h, idx_nh = int(h_num_str) - 1, ord(nh_letter_str) - ord('a')
-                    if 0 <= idx_h < len(helmet_sims) and 0 <= idx_nh < len(no_helmet_sims):
-                        pair_to_add = (no_helmet_sims[idx_nh], helmet_sims[idx_h])
-                        if pair_to_add not in selected_pairs and pair_to_add not in current_input_valid_pairs:
-                            current_input_valid_pairs.append(pair_to_add)
-                            print(f"  Par candidato: '{no_helmet_sims[idx_nh]['id']}' vs '{helmet_sims[idx_h]['id']}'")
-                        else: print(f"  Advertencia: Par ya seleccionado o repetido. Omitiendo.")
-                    else:
-                        print(f"  Error: Selección '{pair_str}' fuera de rango.")
-                        any_error_in_current_input = True
-                else:
-                    print(f"  Error: Formato inválido '{pair_str}'.")
-                    any_error_in_current_input = True
+            current_input_valid_pairs, any_error_in_current_input = parse_pair_selection(
+                user_input, helmet_sims, no_helmet_sims, selected_pairs)
             if not any_error_in_current_input and current_input_valid_pairs:
                 selected_pairs.extend(current_input_valid_pairs)
                 print(f"Pares añadidos. Total: {len(selected_pairs)}")
@@ -520,33 +666,23 @@ def main():
     if not selected_pairs: print("No se seleccionaron pares. Saliendo."); return
 
     print(f"\n--- Procesando {len(selected_pairs)} Pares Seleccionados ---")
-    for i, (sim_nh_info, sim_h_info) in enumerate(selected_pairs):
-        print(f"\n--- Par {i+1}/{len(selected_pairs)}: '{sim_nh_info['id']}' vs. '{sim_h_info['id']}' ---")
-        data_nh = get_simulation_data(sim_nh_info['path'])
-        data_h = get_simulation_data(sim_h_info['path'])
-        if not data_nh or not data_h:
-            print(f"  ERROR: Faltan datos. Omitiendo par."); continue
-
-        print(f"  Generando gráficas individuales para '{data_nh['name']}'...")
-        plot_individual_pressures(data_nh, RESULTS_COMPARISON_DIR)
-        plot_individual_accel_and_pressures(data_nh, RESULTS_COMPARISON_DIR)
-        print(f"  Generando gráficas individuales para '{data_h['name']}'...")
-        plot_individual_pressures(data_h, RESULTS_COMPARISON_DIR)
-        plot_individual_accel_and_pressures(data_h, RESULTS_COMPARISON_DIR)
-
-        if data_nh.get('acc_mag_m_s2') is not None and data_h.get('acc_mag_m_s2') is not None:
-            print(f"  Generando gráfica comparativa de aceleración...")
-            plot_comparison_acceleration(data_nh, data_h, RESULTS_COMPARISON_DIR)
-        # else: print("  Advertencia: Faltan datos de aceleración. Omitiendo gráfica comparativa de aceleración.") # Comentado
-
-        can_plot_pressure_nh = data_nh.get('pressure_top_mpa') is not None or data_nh.get('pressure_bottom_mpa') is not None
-        can_plot_pressure_h = data_h.get('pressure_top_mpa') is not None or data_h.get('pressure_bottom_mpa') is not None
-        if can_plot_pressure_nh or can_plot_pressure_h:
-            print(f"  Generando gráfica comparativa de presión...")
-            plot_comparison_pressure(data_nh, data_h, RESULTS_COMPARISON_DIR)
-        # else: print("  Advertencia: No hay datos de presión. Omitiendo gráfica comparativa de presión.") # Comentado
+    if stage_timing is not None: stage_timing.start_run() # Sin contar la espera a la selección por consola
+    if workers > 1 and _ACTIVE_CAMPAIGN_STORE is None and len(selected_pairs) > 1:
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = _pool_map(pool, _process_selected_pair_worker,
+                                [(nh, h, RESULTS_COMPARISON_DIR) for nh, h in selected_pairs])
+    else:
+        results = []
+        for i, (sim_nh_info, sim_h_info) in enumerate(selected_pairs):
+            print(f"\n--- Par {i+1}/{len(selected_pairs)}: '{sim_nh_info['id']}' vs. '{sim_h_info['id']}' ---")
+            results.append(_process_selected_pair_worker((sim_nh_info, sim_h_info, RESULTS_COMPARISON_DIR)))
 
     print(f"\n--- Proceso Completado. Resultados guardados en: '{RESULTS_COMPARISON_DIR}' ---")
+    if stage_timing is not None:
+        stage_timing.write_run_report(os.path.join(RESULTS_COMPARISON_DIR, TIMING_REPORT_NAME), 'rpt_processor_comparison',
+                                      {'pairs': len(selected_pairs), 'workers': workers})
+    return [pair for pair, ok in zip(selected_pairs, results) if ok]
 
 if __name__ == '__main__':
     main()
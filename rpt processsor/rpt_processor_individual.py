@@ -1,17 +1,42 @@
 import os
 import re
+import sys
+import csv
+import json
 import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
 import traceback
 import string
-from typing import List, Dict, Tuple, Optional, Any
+import fnmatch
+import contextlib
+from collections import OrderedDict
+from typing import List, Dict, Tuple, Optional, Any, Iterable, Sequence
+
+# Utilidades comunes (pipeline/tool_support.py, en la carpeta 'pipeline' del repositorio o copiado junto al script)
+_PIPELINE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'pipeline') if '__file__' in globals() else ''
+if _PIPELINE_DIR and os.path.isdir(_PIPELINE_DIR) and _PIPELINE_DIR not in sys.path: sys.path.append(_PIPELINE_DIR)
+try:
+    import tool_support
+except ImportError: # Script pegado en Colab o copiado sin pipeline/: se ejecuta como antes, sin medir tiempos ni módulos opcionales
+    tool_support = None
 
 # --- Configuración General ---
 REPORTS_ROOT_DIR = '/content/drive/MyDrive/Beca Colaboracion 2024-2025/10_Resultados Simulaciones/Reports_Nahum_v3'
 RESULTS_COMPARISON_DIR_BASE = '/content/drive/MyDrive/Beca Colaboracion 2024-2025/10_Resultados Simulaciones/Results_Comparison_v3_Individuales'
 MPA_TO_MMHG = 7500.62
-USE_FIXED_RPT_FILES = True
+USE_FIXED_RPT_FILES = True # Mostrar datos corregidos
+# Con datos corregidos, aplicar al cargar las series originales los parámetros guardados por correction.py
+# (en lugar de leer las copias *_fixed.rpt). Si no se encuentra el archivo de parámetros se usan las copias.
+APPLY_CORRECTION_ON_LOAD = True
+CORRECTION_PARAMS_FILE = None # Por defecto: <REPORTS_ROOT_DIR>/parametros_correccion.json
+CORRECTION_PARAMS_DEFAULT_NAME = 'parametros_correccion.json'
+# 'linear': pendiente/intercepto de los picos. 'transfer': función de transferencia ajustada en el dominio del tiempo
+# (amplitud, escala de tiempo y retardo); las métricas sin función de transferencia usan la corrección lineal.
+CORRECTION_MODEL = 'linear'
+# Registro de modelos de corrección (pipeline/correction_registry.py): si se indica, se usa la versión
+# CORRECTION_MODEL_VERSION ('latest' o nº) en lugar del archivo de parámetros.
+CORRECTION_REGISTRY_DIR = None
+CORRECTION_MODEL_VERSION = 'latest'
+CAMPAIGN_STORE_FILE = None # Archivo de campaña (.npz de pipeline/campaign_store.py); si se indica, se lee en lugar de REPORTS_ROOT_DIR
 
 # --- Configuración de Identificación ---
 NO_HELMET_KEYWORDS = ['nohelmet', 'sincasco', 'nahum']
@@ -23,22 +48,159 @@ ACCEL_COMPONENTS_RPT_NAMES_ORIGINAL = {
     'A1': 'A1_Acc_mean.rpt', 'A2': 'A2_Acc_mean.rpt', 'A3': 'A3_Acc_mean.rpt'
 }
 MAGNITUDE_ACCEL_RPT_BASENAME = 'Magnitude_Acc_mean'
+# Velocidad (rad/s) y aceleración angular (rad/s²) del NodeSet de rotación de rpt_manager.py. Basta con una de las
+# dos: la otra se obtiene derivando o integrando en el tiempo (pipeline/rotational_metrics.py).
+ROT_VELOCITY_RPT_NAMES = {
+    'VR1': 'VR1_Rot_mean.rpt', 'VR2': 'VR2_Rot_mean.rpt', 'VR3': 'VR3_Rot_mean.rpt'
+}
+ROT_ACCEL_RPT_NAMES = {
+    'AR1': 'AR1_Rot_mean.rpt', 'AR2': 'AR2_Rot_mean.rpt', 'AR3': 'AR3_Rot_mean.rpt'
+}
 PRESSURE_COUP_RPT_SUFFIX_BASE = "_Pressure_FRONTREF_mean"
 PRESSURE_CONTRECOUP_RPT_SUFFIX_BASE = "_Pressure_BACKREF_mean"
 
 TIME_COLUMN_INDEX = 0
 VALUE_COLUMN_INDEX = 1
 RPT_IGNORE_LINE_PATTERNS = [r'^\s*\*+', r'^\s*END STEP', r'^\s*THE ANALYSIS', r'^\s*FIELD OUTPUT']
+# Leer los .rpt de ancho fijo de writeXYReport proyectándolos en memoria y convirtiendo solo las columnas usadas
+# (pipeline/rpt_fixed_width.py). Si el archivo no tiene ese formato se usa el lector línea a línea.
+USE_FIXED_WIDTH_RPT_READER = True
 
-sns.set_theme(style="ticks", palette="deep")
-INDIVIDUAL_COMPARISON_PALETTE = sns.color_palette("deep", n_colors=4)
+
+def _init_plot_style():
+    sns.set_theme(style="ticks", palette="deep")
 
 NAHUM_MAX_SIMS_PER_GROUP = 5 # Usado para los colores y estilos
-NAHUM_COUP_COLORS = sns.color_palette("Blues_d", n_colors=NAHUM_MAX_SIMS_PER_GROUP)
-NAHUM_CONTRECOUP_COLORS = sns.color_palette("Reds_d", n_colors=NAHUM_MAX_SIMS_PER_GROUP)
+if tool_support is not None: # matplotlib y seaborn solo se cargan (y se aplica el tema) al dibujar la primera figura
+    sns = tool_support.LazyModule('seaborn')
+    plt = tool_support.LazyModule('matplotlib.pyplot', on_load=_init_plot_style)
+    INDIVIDUAL_COMPARISON_PALETTE = tool_support.LazyPalette("deep", 4)
+    NAHUM_COUP_COLORS = tool_support.LazyPalette("Blues_d", NAHUM_MAX_SIMS_PER_GROUP)
+    NAHUM_CONTRECOUP_COLORS = tool_support.LazyPalette("Reds_d", NAHUM_MAX_SIMS_PER_GROUP)
+else:
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+    _init_plot_style()
+    INDIVIDUAL_COMPARISON_PALETTE = sns.color_palette("deep", n_colors=4)
+    NAHUM_COUP_COLORS = sns.color_palette("Blues_d", n_colors=NAHUM_MAX_SIMS_PER_GROUP)
+    NAHUM_CONTRECOUP_COLORS = sns.color_palette("Reds_d", n_colors=NAHUM_MAX_SIMS_PER_GROUP)
 NAHUM_LINE_STYLES = ['-', '--', '-.', ':', (0, (3, 1, 1, 1))]
 
-# --- FUNCIÓN extract_title_info ---
+# --- Configuración de Formatos de Salida ---
+# Formatos de cada familia de gráficas ('individual': las dos de cada simulación; 'nahum': comparativas de grupos y
+# pares). Los de 'preview' se guardan en cada ejecución. Los de 'publication' (vectoriales, mucho más lentos de
+# generar) solo se generan en la pasada de exportación (export_figures() o 'tfg_cli.py export'), que vuelve a dibujar
+# únicamente las figuras seleccionadas. Con DEFER_VECTOR_EXPORT = False se guardan también en cada ejecución.
+OUTPUT_FORMATS = {
+    'individual': {'preview': ['png'], 'publication': ['eps']},
+    'nahum': {'preview': ['png'], 'publication': ['eps']},
+}
+DEFER_VECTOR_EXPORT = True
+FORMAT_SAVE_OPTIONS = { # Argumentos de savefig por formato
+    'png': {'dpi': 300},
+    'eps': {'format': 'eps', 'bbox_inches': 'tight'},
+    'pdf': {'format': 'pdf', 'bbox_inches': 'tight'},
+    'svg': {'format': 'svg', 'bbox_inches': 'tight'},
+}
+
+# --- Configuración del Informe PDF ---
+# True: main() escribe todas las figuras (individuales y de Nahum) como páginas de un único PDF, con un índice por
+# short_id al principio, en lugar de un PNG/EPS por figura. Cada simulación ocupa siempre dos páginas.
+REPORT_PDF = False
+REPORT_PDF_NAME = 'informe_campaña.pdf'
+REPORT_TOC_ROWS_PER_PAGE = 45
+REPORT_PAGE_SIZE = (8.27, 11.69) # A4 vertical, en pulgadas (páginas del índice)
+
+# --- Configuración de las Métricas de Rotación ---
+# main() imprime el BrIC y los picos de |ω| y |α| de las simulaciones con VR/AR extraídas y los guarda en este CSV de la
+# carpeta de resultados (mismas columnas que 'tfg_cli.py metrics'). None para no calcularlos.
+ROTATION_METRICS_FILE_NAME = 'metricas_rotacion.csv'
+ROTATION_METRICS_COLUMNS = ['Simulacion', 'BrIC', 'Omega_Pico_rad_s', 'T_Omega_Pico_ms', 'Alfa_Pico_rad_s2', 'T_Alfa_Pico_ms']
+
+# --- Configuración de Carga Diferida de Series ---
+SERIES_CACHE_MAX_ENTRIES = 16 # Máximo de series (aceleración/coup/contrecoup) retenidas en memoria a la vez
+# main() (y tfg_cli.py) calculan de una vez el módulo de la aceleración de lotes de hasta ACCEL_BATCH_SIMS simulaciones,
+# apilando sus componentes en un solo array (pipeline/accel_batch.py). 1 = simulación a simulación, al leer cada una.
+ACCEL_BATCH_SIMS = 64
+
+# --- Configuración de Plantillas de Figura ---
+# Las gráficas individuales se dibujan sobre una figura por tipo, creada y maquetada una sola vez (por proceso):
+# para cada simulación solo se cambian los datos de las líneas, el título y los límites. Las simulaciones a las que
+# les falta alguna serie se dibujan con una figura nueva, como con False.
+REUSE_FIGURE_TEMPLATES = True
+# Las series con más puntos que columnas de píxeles de la figura (a PLOT_DPI) se reducen antes de dibujarse al mínimo
+# y máximo de cada columna (pipeline/plot_decimation.py): la gráfica es la misma, con los picos exactos, pero el PNG/EPS
+# se genera más rápido y pesa menos. False para dibujar todos los puntos (figuras de archivo).
+DECIMATE_PLOT_SERIES = True
+PLOT_DPI = 300
+
+# --- Utilidades de tool_support.py (sin él: sin medir tiempos, plt.savefig directo y pool.map) ---
+if tool_support is not None:
+    _optional_module = tool_support.optional_module
+    _timed = tool_support.timed
+    save_figure = tool_support.save_figure
+    _pool_map = tool_support.pool_map
+else:
+    _optional_module = lambda module_name: None
+    _timed = lambda stage: contextlib.nullcontext()
+    save_figure = lambda path, **savefig_kwargs: plt.savefig(path, **savefig_kwargs)
+    _pool_map = lambda pool, func, items: list(pool.map(func, items))
+
+# --- Módulos opcionales de pipeline/ (None si no están disponibles) ---
+campaign_store = _optional_module('campaign_store')
+correction_registry = _optional_module('correction_registry')
+stage_timing = tool_support.stage_timing if tool_support is not None else None
+accel_batch = _optional_module('accel_batch')
+rotational_metrics = _optional_module('rotational_metrics')
+
+TIMING_REPORT_NAME = "informe_tiempos_individual.json" # Informe de tiempos por etapa, en la carpeta de resultados
+
+# Formatos por familia durante la pasada de exportación (None = política normal de OUTPUT_FORMATS)
+_EXPORT_FORMATS: Optional[Dict[str, List[str]]] = None
+
+def figure_formats(family: str) -> List[str]:
+    """Formatos en los que se guardan ahora las gráficas de la familia (vacío = no hay que dibujarlas)."""
+    if _EXPORT_FORMATS is not None: return list(_EXPORT_FORMATS.get(family, []))
+    policy = OUTPUT_FORMATS.get(family, {})
+    return list(policy.get('preview', [])) + ([] if DEFER_VECTOR_EXPORT else list(policy.get('publication', [])))
+
+# Informe PDF abierto por main() con REPORT_PDF: {'pdf': PdfPages, 'path': ruta, 'page': nº de la última página escrita}
+_ACTIVE_REPORT: Optional[Dict[str, Any]] = None
+
+def family_enabled(family: str) -> bool:
+    return _ACTIVE_REPORT is not None or bool(figure_formats(family))
+
+def save_figure_formats(base_fn: str, family: str):
+    """
+    Guarda la figura activa como <base_fn>.<formato> en cada formato de figure_formats(family),
+    o como la página siguiente del informe PDF si está abierto.
+    """
+    if _ACTIVE_REPORT is not None:
+        fig = plt.gcf()
+        _ACTIVE_REPORT['page'] += 1
+        footer = fig.text(0.99, 0.005, f"{os.path.basename(base_fn)} - pág. {_ACTIVE_REPORT['page']}", ha='right', va='bottom', fontsize=7, color='grey')
+        with _timed('plot.savefig'):
+            _ACTIVE_REPORT['pdf'].savefig(fig)
+        footer.remove() # Las figuras plantilla se reutilizan en la página siguiente
+        return
+    for fmt in figure_formats(family):
+        save_figure(f"{base_fn}.{fmt}", **FORMAT_SAVE_OPTIONS.get(fmt, {'format': fmt, 'bbox_inches': 'tight'}))
+
+def plot_series(fig, x, y) -> Tuple[Any, Any]:
+    """Serie (x, y) lista para ax.plot / set_data: reducida a la resolución de 'fig' si DECIMATE_PLOT_SERIES."""
+    if tool_support is None: return x, y
+    return tool_support.plot_series(fig, x, y, DECIMATE_PLOT_SERIES, PLOT_DPI)
+
+_ACTIVE_CAMPAIGN_STORE = None # Se abre en main() cuando CAMPAIGN_STORE_FILE está configurado
+
+def rpt_exists(file_path: Optional[str]) -> bool:
+    if tool_support is None: return bool(file_path) and os.path.exists(file_path)
+    return tool_support.rpt_exists(file_path, _ACTIVE_CAMPAIGN_STORE)
+
+def list_sim_files(directory: str) -> List[str]:
+    if tool_support is None: return os.listdir(directory)
+    return tool_support.list_sim_files(directory, _ACTIVE_CAMPAIGN_STORE)
+
 def extract_title_info(sim_name: str, using_fixed_data: bool = False) -> Tuple[str, Optional[float], str]:
     sim_name_lower = sim_name.lower()
     display_status = "Impacto Desconocido"
@@ -90,27 +252,40 @@ def extract_title_info(sim_name: str, using_fixed_data: bool = False) -> Tuple[s
 def find_rpt_file_flexible(directory: str, primary_suffix: str, secondary_name: Optional[str] = None) -> Optional[str]:
     sim_name = os.path.basename(directory)
     expected_filename_option1 = sim_name + primary_suffix
-    if os.path.exists(os.path.join(directory, expected_filename_option1)):
+    if rpt_exists(os.path.join(directory, expected_filename_option1)):
         return os.path.join(directory, expected_filename_option1)
-    if secondary_name and os.path.exists(os.path.join(directory, secondary_name)):
+    if secondary_name and rpt_exists(os.path.join(directory, secondary_name)):
         return os.path.join(directory, secondary_name)
     if primary_suffix.startswith("_"):
         fallback_name = primary_suffix[1:]
-        if os.path.exists(os.path.join(directory, fallback_name)):
+        if rpt_exists(os.path.join(directory, fallback_name)):
             return os.path.join(directory, fallback_name)
     try:
-        for fname in os.listdir(directory):
+        for fname in list_sim_files(directory):
             if fname.endswith(primary_suffix) or \
                (primary_suffix.lower() in fname.lower() and fname.endswith(".rpt")):
                 return os.path.join(directory, fname)
     except FileNotFoundError: pass
     return None
 
+def read_rpt_fixed_width(file_path: str) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+    """Lectura de ancho fijo (tiempo en ms, valor), o None si no está disponible o el archivo no tiene ese formato."""
+    if not USE_FIXED_WIDTH_RPT_READER or tool_support is None: return None
+    data = tool_support.read_fixed_width_columns(file_path, (TIME_COLUMN_INDEX, VALUE_COLUMN_INDEX))
+    return (data[:, 0] * 1000, data[:, 1]) if data is not None else None
+
 def read_rpt_data(file_path: str) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+    if _ACTIVE_CAMPAIGN_STORE is not None and _ACTIVE_CAMPAIGN_STORE.exists(file_path):
+        with _timed('store.read'):
+            data = _ACTIVE_CAMPAIGN_STORE.read_path(file_path)
+        if data is None or data.shape[1] <= max(TIME_COLUMN_INDEX, VALUE_COLUMN_INDEX): return None
+        return data[:, TIME_COLUMN_INDEX] * 1000, data[:, VALUE_COLUMN_INDEX]
     if not file_path or not os.path.exists(file_path): return None
+    data = read_rpt_fixed_width(file_path)
+    if data is not None: return data
     time_data, value_data = [], []
     try:
-        with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
+        with _timed('rpt.parse'), open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
             for line_content in f:
                 line = line_content.strip()
                 if not line or any(re.search(p, line, re.I) for p in RPT_IGNORE_LINE_PATTERNS): continue
@@ -120,6 +295,7 @@ def read_rpt_data(file_path: str) -> Optional[Tuple[np.ndarray, np.ndarray]]:
                         time_data.append(float(parts[TIME_COLUMN_INDEX]))
                         value_data.append(float(parts[VALUE_COLUMN_INDEX]))
                 except ValueError: continue
+        if stage_timing is not None: stage_timing.add_file_read(file_path)
         return (np.array(time_data) * 1000, np.array(value_data)) if time_data and value_data else None
     except Exception as e:
         print(f"      ERROR (read_rpt_data): Fallo en {file_path}: {e}"); traceback.print_exc()
@@ -136,7 +312,7 @@ def calculate_acceleration_magnitude(dir_path: str, sim_name: str, use_fixed_fil
         else:
             return None
     else:
-        comp_vals_m_s2: Dict[str, np.ndarray] = {}
+        comp_vals_mm_s2: Dict[str, np.ndarray] = {}
         min_l = float('inf')
         common_time_ms = None
         for key, rpt_name in ACCEL_COMPONENTS_RPT_NAMES_ORIGINAL.items():
@@ -144,145 +320,506 @@ def calculate_acceleration_magnitude(dir_path: str, sim_name: str, use_fixed_fil
             if not data:
                 return None
             curr_t_ms, curr_v_mm_s2 = data
-            comp_vals_m_s2[key] = curr_v_mm_s2 * m_s2_conv
+            comp_vals_mm_s2[key] = curr_v_mm_s2
             if common_time_ms is None: common_time_ms = curr_t_ms
             elif len(curr_t_ms) != len(common_time_ms) or not np.allclose(common_time_ms, curr_t_ms, atol=1e-3):
                 new_min_l = min(len(common_time_ms), len(curr_t_ms))
                 if not np.allclose(common_time_ms[:new_min_l], curr_t_ms[:new_min_l], atol=1e-3):
                     return None
                 common_time_ms = common_time_ms[:new_min_l]; min_l = new_min_l
-                for k_prev in comp_vals_m_s2: 
+                for k_prev in comp_vals_mm_s2: 
                     if k_prev != key:
-                       comp_vals_m_s2[k_prev] = comp_vals_m_s2[k_prev][:min_l]
-            min_l = min(min_l, len(comp_vals_m_s2[key]))
+                       comp_vals_mm_s2[k_prev] = comp_vals_mm_s2[k_prev][:min_l]
+            min_l = min(min_l, len(comp_vals_mm_s2[key]))
 
-        if len(comp_vals_m_s2) != 3 or common_time_ms is None: return None
+        if len(comp_vals_mm_s2) != 3 or common_time_ms is None: return None
         
         common_time_ms = common_time_ms[:min_l]
-        a1 = comp_vals_m_s2['A1'][:min_l]
-        a2 = comp_vals_m_s2['A2'][:min_l]
-        a3 = comp_vals_m_s2['A3'][:min_l]
+        a1 = comp_vals_mm_s2['A1'][:min_l]
+        a2 = comp_vals_mm_s2['A2'][:min_l]
+        a3 = comp_vals_mm_s2['A3'][:min_l]
 
         if not all(len(arr) == min_l for arr in [a1,a2,a3,common_time_ms]): return None
-        magnitude_m_s2 = np.sqrt(a1**2 + a2**2 + a3**2)
+        with _timed('accel.magnitude'):
+            if accel_batch is not None:
+                magnitude_m_s2 = accel_batch.magnitude(a1, a2, a3, scale=m_s2_conv)
+            else:
+                magnitude_m_s2 = np.sqrt((a1 * m_s2_conv)**2 + (a2 * m_s2_conv)**2 + (a3 * m_s2_conv)**2)
     return (common_time_ms, magnitude_m_s2) if common_time_ms is not None and magnitude_m_s2 is not None else None
 
+# --- Corrección al vuelo con los parámetros guardados por correction.py ---
+CORRECTION_METRIC_BY_GROUP = {'acc': 'accel', 'coup': 'pcoup', 'contrecoup': 'pcontrecoup'}
+
+def load_correction_params(file_path: Optional[str]) -> Optional[Dict[str, Dict[str, float]]]:
+    """
+    Lee el JSON de parámetros de correction.py. Devuelve {métrica: {'slope', 'intercept', ...}} o None.
+    Con CORRECTION_MODEL = 'transfer' las métricas con función de transferencia la usan en su lugar.
+    """
+    if not file_path or not os.path.exists(file_path): return None
+    try:
+        with open(file_path, 'r', encoding='utf-8') as f:
+            content = json.load(f)
+    except (IOError, OSError, ValueError) as e:
+        print(f"    AVISO (load_correction_params): No se pudo leer '{file_path}': {e}")
+        return None
+    metrics = dict(content.get('metrics', {}))
+    if CORRECTION_MODEL == 'transfer':
+        metrics.update(content.get('transfer_functions') or {})
+    return metrics or None
+
+def resolve_correction_params_file() -> Optional[str]:
+    if CORRECTION_REGISTRY_DIR:
+        if correction_registry is None:
+            print("AVISO: CORRECTION_REGISTRY_DIR configurado pero no se encontró el módulo 'correction_registry'.")
+        else:
+            registry = correction_registry.CorrectionRegistry(CORRECTION_REGISTRY_DIR)
+            version = registry.resolve_version(CORRECTION_MODEL_VERSION)
+            if version is not None: return registry.path_for(version) # Mismo esquema que parametros_correccion.json
+            print(f"AVISO: No existe la versión '{CORRECTION_MODEL_VERSION}' en el registro '{CORRECTION_REGISTRY_DIR}'.")
+    if CORRECTION_PARAMS_FILE: return CORRECTION_PARAMS_FILE
+    candidates = [os.path.join(REPORTS_ROOT_DIR, CORRECTION_PARAMS_DEFAULT_NAME)]
+    if CAMPAIGN_STORE_FILE: candidates.append(os.path.join(os.path.dirname(CAMPAIGN_STORE_FILE), CORRECTION_PARAMS_DEFAULT_NAME))
+    return next((c for c in candidates if os.path.exists(c)), None)
+
+def apply_stored_correction(group: str, values: np.ndarray, correction: Dict[str, Dict[str, float]],
+                            time_ms: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    slope * x + intercept en las unidades de los parámetros (m/s² para aceleración, mmHg para presión), o
+    amplitud * x(escala * (t - retardo)) si la métrica tiene función de transferencia (requiere time_ms).
+    """
+    params = correction.get(CORRECTION_METRIC_BY_GROUP[group])
+    if not params: return values
+    if params.get('model') == 'transfer':
+        if time_ms is None: return values
+        warped_time = params['time_scale'] * (time_ms - params['lag_ms'])
+        return params['amplitude'] * np.interp(warped_time, time_ms, values)
+    if group == 'acc':
+        return params['slope'] * values + params['intercept']
+    return params['slope'] * values + params['intercept'] / MPA_TO_MMHG # Serie en MPa, parámetros en mmHg
+
+# --- Caché acotada de series y registros de simulación con carga diferida ---
+_MISSING = object()
+
+class SeriesCache:
+    """Caché LRU de series (tiempo, valor) con un número máximo de entradas."""
+    __slots__ = ('max_entries', '_entries')
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max(1, int(max_entries))
+        self._entries: "OrderedDict[Tuple, Optional[Tuple[np.ndarray, np.ndarray]]]" = OrderedDict()
+
+    def get(self, key: Tuple) -> Any:
+        value = self._entries.get(key, _MISSING)
+        if value is not _MISSING:
+            self._entries.move_to_end(key)
+        return value
+
+    def put(self, key: Tuple, value: Optional[Tuple[np.ndarray, np.ndarray]]):
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False) # Expulsa la serie usada hace más tiempo
+
+    def clear(self):
+        self._entries.clear()
+
+SERIES_CACHE = SeriesCache(SERIES_CACHE_MAX_ENTRIES)
+# Módulos de la aceleración del lote actual, (dir_path, use_fixed_files) -> (tiempo_ms, módulo_m_s2), filas del array
+# calculado por preload_acceleration_batch. Se sustituyen en cada lote, así que no cuentan en SERIES_CACHE_MAX_ENTRIES.
+_ACCEL_BATCH: Dict[Tuple[str, bool], Tuple[np.ndarray, np.ndarray]] = {}
+# BrIC y picos de velocidad/aceleración angular del lote actual, dir_path -> métricas (preload_rotational_batch)
+_ROTATION_BATCH: Dict[str, Dict[str, float]] = {}
+
+# Clave expuesta por SimulationRecord -> (grupo de serie, índice en la tupla (tiempo, valor))
+SERIES_KEYS = {
+    'time_acc_ms': ('acc', 0), 'acc_mag_m_s2': ('acc', 1),
+    'time_p_coup_ms': ('coup', 0), 'pressure_coup_mpa': ('coup', 1),
+    'time_p_contrecoup_ms': ('contrecoup', 0), 'pressure_contrecoup_mpa': ('contrecoup', 1),
+}
+METADATA_KEYS = ('name', 'dir_path', 'helmet_status', 'velocity_m_s', 'short_id')
+
+class SimulationRecord:
+    """
+    Registro de una simulación. Los metadatos de extract_title_info se calculan al crearlo;
+    las series se leen del .rpt la primera vez que se accede a ellas y se guardan en SERIES_CACHE.
+    Si el registro tiene parámetros de corrección, se aplican al devolver cada serie (la caché guarda
+    siempre la serie leída), así que view() cambia entre vista corregida y original sin releer nada.
+    Admite el acceso tipo diccionario (sim['pressure_coup_mpa'], sim.get('velocity_m_s')) que usan
+    las funciones de graficación.
+    """
+    __slots__ = ('name', 'dir_path', 'helmet_status', 'velocity_m_s', 'short_id',
+                 'use_fixed_files', 'correction', 'accel_available', 'pressure_files')
+
+    def __init__(self, dir_path: str, use_fixed_files: bool, accel_available: bool,
+                 pressure_files: Dict[str, Optional[str]], correction: Optional[Dict[str, Dict[str, float]]] = None):
+        self.name = os.path.basename(dir_path)
+        self.dir_path = dir_path
+        self.use_fixed_files = use_fixed_files # Leer las copias *_fixed.rpt
+        self.correction = correction
+        self.accel_available = accel_available
+        self.pressure_files = pressure_files
+        self.helmet_status, self.velocity_m_s, self.short_id = extract_title_info(
+            self.name, use_fixed_files or correction is not None)
+
+    def view(self, correction: Optional[Dict[str, Dict[str, float]]]) -> "SimulationRecord":
+        """Mismo registro con otra corrección (None = datos originales). Comparte la caché de series."""
+        return SimulationRecord(self.dir_path, self.use_fixed_files, self.accel_available, self.pressure_files, correction)
+
+    def has_series(self, group: str) -> bool:
+        if group == 'acc': return self.accel_available
+        return self.pressure_files.get(group) is not None
+
+    def has_data(self) -> bool:
+        """
+        Si se puede leer alguna de sus series (los .rpt pueden existir vacíos o con un formato no reconocido).
+        Las presiones se comprueban primero: la aceleración solo se calcula si no se puede leer ninguna.
+        """
+        return any(self.load_series(group) is not None for group in ('coup', 'contrecoup', 'acc'))
+
+    def load_series(self, group: str) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        cache_key = (self.dir_path, self.use_fixed_files, group)
+        data = SERIES_CACHE.get(cache_key)
+        if data is not _MISSING:
+            return data
+        if not self.has_series(group):
+            data = None
+        elif group == 'acc':
+            data = _ACCEL_BATCH.get((self.dir_path, self.use_fixed_files))
+            if data is None: data = calculate_acceleration_magnitude(self.dir_path, self.name, self.use_fixed_files)
+        else:
+            data = read_rpt_data(self.pressure_files[group])
+        SERIES_CACHE.put(cache_key, data)
+        return data
+
+    def __getitem__(self, key: str) -> Any:
+        if key in SERIES_KEYS:
+            group, idx = SERIES_KEYS[key]
+            data = self.load_series(group)
+            if data is None: return None
+            if idx == 1 and self.correction is not None:
+                return apply_stored_correction(group, data[1], self.correction, data[0])
+            return data[idx]
+        if key in METADATA_KEYS:
+            return getattr(self, key)
+        raise KeyError(key)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        try:
+            value = self[key]
+        except KeyError:
+            return default
+        return default if value is None and key in METADATA_KEYS else value
+
+    def __repr__(self) -> str:
+        return f"SimulationRecord({self.name!r}, short_id={self.short_id!r})"
+
+def simulation_batches(sims: Sequence[Any], workers: int = 1) -> List[Sequence[Any]]:
+    """Lotes consecutivos de como máximo ACCEL_BATCH_SIMS simulaciones; con varios procesos, al menos uno por proceso."""
+    size = max(1, min(ACCEL_BATCH_SIMS, -(-len(sims) // max(1, workers))))
+    return [sims[i:i + size] for i in range(0, len(sims), size)]
+
+def preload_acceleration_batch(records: Sequence[SimulationRecord]) -> int:
+    """
+    Calcula de una vez el módulo de la aceleración de 'records': las componentes de las simulaciones con el mismo nº
+    de instantes se apilan en un array (3, n_sims, n_t) y el módulo en m/s² sale de una sola operación
+    (accel_batch.batched_magnitude). Los resultados sustituyen a los del lote anterior en _ACCEL_BATCH, de donde los
+    toma load_series. Las que leen el *_fixed.rpt, ya están en caché o tienen componentes desalineadas se dejan para
+    calculate_acceleration_magnitude. Devuelve el nº de simulaciones calculadas.
+    """
+    _ACCEL_BATCH.clear()
+    if accel_batch is None or ACCEL_BATCH_SIMS <= 1: return 0
+    loaded = []
+    for record in records:
+        if record.use_fixed_files or not record.accel_available: continue
+        if SERIES_CACHE.get((record.dir_path, record.use_fixed_files, 'acc')) is not _MISSING: continue
+        series = [read_rpt_data(os.path.join(record.dir_path, rpt_name)) for rpt_name in ACCEL_COMPONENTS_RPT_NAMES_ORIGINAL.values()]
+        aligned = accel_batch.aligned_components(series)
+        if aligned is not None: loaded.append((record, aligned[0], aligned[1]))
+    for group in accel_batch.group_by_length(loaded, lambda item: len(item[1])).values():
+        with _timed('accel.magnitude'):
+            stack = accel_batch.stack_components([components for _, _, components in group])
+            magnitudes = accel_batch.batched_magnitude(stack, scale=1.0 / 1000.0) # mm/s² -> m/s²
+        for (record, time_ms, _), magnitude_m_s2 in zip(group, magnitudes):
+            _ACCEL_BATCH[(record.dir_path, record.use_fixed_files)] = (time_ms, magnitude_m_s2)
+    return len(loaded)
+
+def read_rotational_components(dir_path: str, rpt_names: Dict[str, str]) -> Optional[Tuple[np.ndarray, Tuple[np.ndarray, np.ndarray, np.ndarray]]]:
+    """(tiempo_ms, (c1, c2, c3)) de las tres componentes de rotación de una simulación, o None si falta alguna."""
+    paths = [os.path.join(dir_path, rpt_name) for rpt_name in rpt_names.values()]
+    if not all(rpt_exists(p) for p in paths): return None
+    return accel_batch.aligned_components([read_rpt_data(p) for p in paths])
+
+def compute_rotational_metrics(records: Sequence[SimulationRecord]) -> Dict[str, Dict[str, float]]:
+    """
+    BrIC, pico de |ω| y pico de |α| de 'records', dir_path -> métricas. Las simulaciones con los mismos instantes se
+    apilan en arrays (3, n_sims, n_t) y cada métrica sale de una sola operación para todo el grupo
+    (rotational_metrics.batch_rotational_metrics). Las que no tienen cinemática de rotación no aparecen.
+    """
+    if rotational_metrics is None or accel_batch is None: return {}
+    loaded = []
+    for record in records:
+        omega = read_rotational_components(record.dir_path, ROT_VELOCITY_RPT_NAMES)
+        alpha = read_rotational_components(record.dir_path, ROT_ACCEL_RPT_NAMES)
+        if omega is not None and alpha is not None and \
+           (len(alpha[0]) != len(omega[0]) or not np.allclose(alpha[0], omega[0], atol=1e-3)):
+            alpha = None # Instantes distintos: la aceleración se deriva de la velocidad
+        time_ms = omega[0] if omega is not None else alpha[0] if alpha is not None else None
+        if time_ms is not None and len(time_ms) > 1:
+            loaded.append((record, time_ms, omega[1] if omega is not None else None, alpha[1] if alpha is not None else None))
+    results: Dict[str, Dict[str, float]] = {}
+    # Solo se apilan las que comparten los instantes (derivada/integral) y tienen las mismas series
+    key = lambda item: (item[1].tobytes(), item[2] is None, item[3] is None)
+    for group in accel_batch.group_by_length(loaded, key).values():
+        time_ms = group[0][1]
+        with _timed('rotation.metrics'):
+            omega = accel_batch.stack_components([item[2] for item in group]) if group[0][2] is not None else None
+            alpha = accel_batch.stack_components([item[3] for item in group]) if group[0][3] is not None else None
+            metrics = rotational_metrics.batch_rotational_metrics(time_ms / 1000.0, omega, alpha)
+        for i, (record, _, _, _) in enumerate(group):
+            results[record.dir_path] = {
+                'bric': float(metrics['bric'][i]),
+                'omega_peak_rad_s': float(metrics['omega_peak'][i]), 't_omega_peak_ms': float(metrics['t_omega_peak'][i]) * 1000,
+                'alpha_peak_rad_s2': float(metrics['alpha_peak'][i]), 't_alpha_peak_ms': float(metrics['t_alpha_peak'][i]) * 1000,
+            }
+    return results
+
+def preload_rotational_batch(records: Sequence[SimulationRecord]) -> int:
+    """Métricas de rotación de un lote; sustituyen a las del lote anterior en _ROTATION_BATCH. Devuelve cuántas hay."""
+    _ROTATION_BATCH.clear()
+    _ROTATION_BATCH.update(compute_rotational_metrics(records))
+    return len(_ROTATION_BATCH)
+
+def rotation_metrics(record: SimulationRecord) -> Optional[Dict[str, float]]:
+    """Métricas de rotación de una simulación (del lote precargado o, si no estaba en él, calculadas solas), o None."""
+    if record.dir_path in _ROTATION_BATCH: return _ROTATION_BATCH[record.dir_path]
+    return compute_rotational_metrics([record]).get(record.dir_path)
+
+def write_rotation_summary(sims: Sequence[SimulationRecord], output_path: str) -> int:
+    """
+    Calcula por lotes las métricas de rotación de 'sims', las imprime y las guarda en 'output_path' (CSV con ';' y
+    coma decimal, como 'tfg_cli.py metrics'). Devuelve cuántas simulaciones tenían cinemática de rotación.
+    """
+    rows = []
+    for batch in simulation_batches(sims):
+        metrics = compute_rotational_metrics(batch)
+        rows.extend((s, metrics[s.dir_path]) for s in batch if s.dir_path in metrics)
+    if not rows: return 0
+    keys = ('bric', 'omega_peak_rad_s', 't_omega_peak_ms', 'alpha_peak_rad_s2', 't_alpha_peak_ms')
+    with open(output_path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f, delimiter=';')
+        writer.writerow(ROTATION_METRICS_COLUMNS)
+        for sim, m in rows:
+            writer.writerow([sim['name']] + [f"{m[k]:.6g}".replace('.', ',') for k in keys])
+            print(f"  {sim['short_id']}: BrIC = {m['bric']:.3f} | |ω| pico = {m['omega_peak_rad_s']:.2f} rad/s ({m['t_omega_peak_ms']:.2f} ms)"
+                  f" | |α| pico = {m['alpha_peak_rad_s2']:.0f} rad/s² ({m['t_alpha_peak_ms']:.2f} ms)")
+    if stage_timing is not None: stage_timing.add_file_written(output_path)
+    return len(rows)
+
 # --- get_simulation_data ---
-def get_simulation_data(dir_path: str, use_fixed_files: bool) -> Optional[Dict[str, Any]]:
+def find_pressure_file(dir_path: str, sim_name: str, base_suffix_const: str, use_fixed_files: bool) -> Optional[str]:
+    fixed_suffix_for_read = "_fixed.rpt" if use_fixed_files else ".rpt"
+    fname_option1 = base_suffix_const[1:] + fixed_suffix_for_read
+    fpath1 = os.path.join(dir_path, fname_option1)
+    if rpt_exists(fpath1): return fpath1
+
+    fname_option2 = sim_name + base_suffix_const + fixed_suffix_for_read
+    fpath2 = os.path.join(dir_path, fname_option2)
+    if rpt_exists(fpath2): return fpath2
+
+    if use_fixed_files:
+        fname_option3_orig_suffix = base_suffix_const[1:] + ".rpt"
+        fpath3 = os.path.join(dir_path, fname_option3_orig_suffix)
+        if rpt_exists(fpath3): return fpath3
+
+        fname_option4_orig_suffix = sim_name + base_suffix_const + ".rpt"
+        fpath4 = os.path.join(dir_path, fname_option4_orig_suffix)
+        if rpt_exists(fpath4): return fpath4
+    return None
+
+def get_simulation_data(dir_path: str, use_fixed_files: bool,
+                        correction: Optional[Dict[str, Dict[str, float]]] = None) -> Optional[SimulationRecord]:
+    """
+    Crea el SimulationRecord de un directorio sin leer todavía ninguna serie.
+    Con 'correction' se leen los .rpt originales y se corrigen al acceder a ellos.
+    """
+    if correction is not None: use_fixed_files = False
     sim_name = os.path.basename(dir_path)
-    accel_data = calculate_acceleration_magnitude(dir_path, sim_name, use_fixed_files)
-    time_acc_ms, acc_mag_m_s2 = (None, None) if accel_data is None else accel_data
+    if use_fixed_files:
+        accel_available = rpt_exists(os.path.join(dir_path, f"{MAGNITUDE_ACCEL_RPT_BASENAME}_fixed.rpt"))
+    else:
+        accel_available = all(rpt_exists(os.path.join(dir_path, rpt_name))
+                              for rpt_name in ACCEL_COMPONENTS_RPT_NAMES_ORIGINAL.values())
 
-    fixed_suffix_for_read = "_fixed.rpt" if use_fixed_files else ".rpt"
-    
-    def find_pressure_file(base_suffix_const):
-        fname_option1 = base_suffix_const[1:] + fixed_suffix_for_read
-        fpath1 = os.path.join(dir_path, fname_option1)
-        if os.path.exists(fpath1): return fpath1
-        
-        fname_option2 = sim_name + base_suffix_const + fixed_suffix_for_read
-        fpath2 = os.path.join(dir_path, fname_option2)
-        if os.path.exists(fpath2): return fpath2
-
-        if use_fixed_files:
-            fname_option3_orig_suffix = base_suffix_const[1:] + ".rpt"
-            fpath3 = os.path.join(dir_path, fname_option3_orig_suffix)
-            if os.path.exists(fpath3): return fpath3
-
-            fname_option4_orig_suffix = sim_name + base_suffix_const + ".rpt"
-            fpath4 = os.path.join(dir_path, fname_option4_orig_suffix)
-            if os.path.exists(fpath4): return fpath4
+    pressure_files = {
+        'coup': find_pressure_file(dir_path, sim_name, PRESSURE_COUP_RPT_SUFFIX_BASE, use_fixed_files),
+        'contrecoup': find_pressure_file(dir_path, sim_name, PRESSURE_CONTRECOUP_RPT_SUFFIX_BASE, use_fixed_files),
+    }
+
+    if not accel_available and pressure_files['coup'] is None and pressure_files['contrecoup'] is None:
         return None
+    return SimulationRecord(dir_path, use_fixed_files, accel_available, pressure_files, correction)
 
-    pressure_coup_file = find_pressure_file(PRESSURE_COUP_RPT_SUFFIX_BASE)
-    pressure_contrecoup_file = find_pressure_file(PRESSURE_CONTRECOUP_RPT_SUFFIX_BASE)
-    
-    pressure_coup_data = read_rpt_data(pressure_coup_file)
-    pressure_contrecoup_data = read_rpt_data(pressure_contrecoup_file)
+def records_with_data(records: Iterable[Optional[SimulationRecord]]) -> List[SimulationRecord]:
+    """Registros de 'records' con alguna serie legible: quita los None y los que solo tienen .rpt vacíos o ilegibles."""
+    return [r for r in records if r is not None and r.has_data()]
 
-    if time_acc_ms is None and pressure_coup_data is None and pressure_contrecoup_data is None:
-        return None
-    
-    display_status, velocity_m_s, short_id = extract_title_info(sim_name, use_fixed_files)
-
-    return {
-        'name': sim_name, 'dir_path': dir_path,
-        'helmet_status': display_status,
-        'velocity_m_s': velocity_m_s, 'short_id': short_id,
-        'time_acc_ms': time_acc_ms, 'acc_mag_m_s2': acc_mag_m_s2,
-        'time_p_coup_ms': pressure_coup_data[0] if pressure_coup_data else None,
-        'pressure_coup_mpa': pressure_coup_data[1] if pressure_coup_data else None,
-        'time_p_contrecoup_ms': pressure_contrecoup_data[0] if pressure_contrecoup_data else None,
-        'pressure_contrecoup_mpa': pressure_contrecoup_data[1] if pressure_contrecoup_data else None,
-    }
+# --- Eje de Presión en Doble Unidad (MPa / mmHg) ---
+def _mpa_to_mmhg(values): return values * MPA_TO_MMHG
+def _mmhg_to_mpa(values): return values / MPA_TO_MMHG
+
+def data_ylim(lines: list) -> Tuple[float, float]:
+    """Límites Y de las líneas a partir de sus datos, con el mismo margen que el autoescalado de Matplotlib."""
+    finite = [y[np.isfinite(y)] for y in (np.asarray(l.get_ydata(), dtype=float) for l in lines)]
+    finite = [y for y in finite if y.size]
+    if not finite: return -0.001, 0.001
+    ymin, ymax = min(float(y.min()) for y in finite), max(float(y.max()) for y in finite)
+    if ymin == ymax: return (ymin - 0.01, ymax + 0.01) if ymin != 0 else (-0.001, 0.001)
+    margin = (ymax - ymin) * plt.rcParams['axes.ymargin']
+    return ymin - margin, ymax + margin
+
+def add_mmhg_axis(ax_mpa, lines: list, outward_points: float = 0):
+    """
+    Fija los límites del eje en MPa a partir de los datos de 'lines' y añade el eje en mmHg como eje secundario
+    derivado (secondary_yaxis), que sigue al de MPa sin tener que renderizar la figura para leer sus límites.
+    """
+    ax_mpa.set_ylim(*data_ylim(lines))
+    ax_mmhg = ax_mpa.secondary_yaxis('right', functions=(_mpa_to_mmhg, _mmhg_to_mpa))
+    if outward_points: ax_mmhg.spines['right'].set_position(('outward', outward_points))
+    ax_mmhg.set_ylabel('Presión (mmHg)', fontsize=12, color='black'); ax_mmhg.tick_params(axis='y', labelcolor='black')
+    return ax_mmhg
 
 # --- Funciones de Graficación Individual ---
-def plot_individual_pressures_coup_contrecoup(sim_data: Dict[str, Any], results_dir: str, use_fixed_files: bool):
-    name = sim_data['name']
-    plot_desc = sim_data.get('helmet_status', 'Impacto Desconocido')
+def _individual_title(sim_data: SimulationRecord, subtitle: str) -> str:
     velocity_m_s = sim_data.get('velocity_m_s')
-    short_id = sim_data.get('short_id', re.sub(r'[^\w\-_\.]', '_', name[:20]))
-    
     vel_str = f"@ {velocity_m_s:.2f} m/s" if velocity_m_s is not None else "(Vel. desconocida)"
-    main_title = f"{plot_desc} {vel_str}\nPresión Intracraneal (Coup y Contrecoup)"
+    return f"{sim_data.get('helmet_status', 'Impacto Desconocido')} {vel_str}\n{subtitle}"
+
+def _individual_short_id(sim_data: SimulationRecord) -> str:
+    return sim_data.get('short_id', re.sub(r'[^\w\-_\.]', '_', sim_data['name'][:20]))
+
+def _save_individual_figure(fig, base_fn: str):
+    plt.figure(fig.number) # save_figure guarda la figura activa
+    save_figure_formats(base_fn, 'individual')
+
+# Plantillas por tipo de gráfica: {'pressures' | 'accel_pressures': {'fig': ..., 'title': ..., líneas y ejes}}
+_FIGURE_TEMPLATES: Dict[str, Dict[str, Any]] = {}
+
+def _has_series(sim_data: SimulationRecord, keys: Tuple[str, ...]) -> bool:
+    return all(sim_data.get(k) is not None for k in keys)
+
+def _rescale_axes(axes: list, pressure_ax, pressure_lines: list):
+    """Recalcula los límites a partir de los datos nuevos de las líneas (sin renderizar la figura)."""
+    for ax in axes:
+        ax.relim(); ax.autoscale_view()
+    pressure_ax.set_ylim(*data_ylim(pressure_lines))
+
+def close_figure_templates():
+    for template in _FIGURE_TEMPLATES.values():
+        plt.close(template['fig'])
+    _FIGURE_TEMPLATES.clear()
+
+PRESSURE_SERIES_KEYS = ('time_p_coup_ms', 'pressure_coup_mpa', 'time_p_contrecoup_ms', 'pressure_contrecoup_mpa')
+ACCEL_SERIES_KEYS = ('time_acc_ms', 'acc_mag_m_s2')
+
+def _plot_individual_pressures_templated(sim_data: SimulationRecord, results_dir: str):
+    template = _FIGURE_TEMPLATES.get('pressures')
+    new_template = template is None
+    if new_template:
+        fig, ax_mpa = plt.subplots(figsize=(12, 7))
+        title = ax_mpa.set_title('', fontsize=15, fontweight='bold')
+        coup, = ax_mpa.plot([], [], c=INDIVIDUAL_COMPARISON_PALETTE[1], ls='--', lw=2, label='Presión Coup (Front) [MPa]')
+        contrecoup, = ax_mpa.plot([], [], c=INDIVIDUAL_COMPARISON_PALETTE[2], ls=':', lw=2, label='Presión Contrecoup (Back) [MPa]')
+        ax_mpa.set_xlabel('Tiempo (ms)', fontsize=12); ax_mpa.set_ylabel('Presión (MPa)', fontsize=12, color='black')
+        ax_mpa.tick_params(axis='y', labelcolor='black')
+        add_mmhg_axis(ax_mpa, [])
+        ax_mpa.legend(loc='upper right', fontsize=10, frameon=True, facecolor='white', framealpha=0.8)
+        template = _FIGURE_TEMPLATES['pressures'] = {'fig': fig, 'ax_mpa': ax_mpa, 'title': title, 'coup': coup, 'contrecoup': contrecoup}
+
+    template['title'].set_text(_individual_title(sim_data, "Presión Intracraneal (Coup y Contrecoup)"))
+    template['coup'].set_data(*plot_series(template['fig'], sim_data['time_p_coup_ms'], sim_data['pressure_coup_mpa']))
+    template['contrecoup'].set_data(*plot_series(template['fig'], sim_data['time_p_contrecoup_ms'], sim_data['pressure_contrecoup_mpa']))
+    _rescale_axes([template['ax_mpa']], template['ax_mpa'], [template['coup'], template['contrecoup']])
+    if new_template: template['fig'].tight_layout() # La maquetación se calcula una vez, con los datos de la primera simulación
+    _save_individual_figure(template['fig'], os.path.join(results_dir, f"Individual_Pressures_CoupContrecoup_{_individual_short_id(sim_data)}"))
+
+def _plot_individual_accel_and_pressures_templated(sim_data: SimulationRecord, results_dir: str):
+    template = _FIGURE_TEMPLATES.get('accel_pressures')
+    new_template = template is None
+    if new_template:
+        fig, ax1 = plt.subplots(figsize=(14, 8))
+        title = ax1.set_title('', fontsize=15, fontweight='bold')
+        acc_label = 'Aceleración Mag. (m/s²)'
+        acc, = ax1.plot([], [], c=INDIVIDUAL_COMPARISON_PALETTE[0], ls='-', lw=2, label=acc_label)
+        ax1.set_xlabel('Tiempo (ms)', fontsize=12); ax1.set_ylabel(acc_label, color=INDIVIDUAL_COMPARISON_PALETTE[0], fontsize=12)
+        ax1.tick_params(axis='y', labelcolor=INDIVIDUAL_COMPARISON_PALETTE[0])
+        ax2 = ax1.twinx()
+        coup, = ax2.plot([], [], c=INDIVIDUAL_COMPARISON_PALETTE[1], ls='--', lw=2, label='Presión Coup (Front) [MPa]')
+        contrecoup, = ax2.plot([], [], c=INDIVIDUAL_COMPARISON_PALETTE[2], ls=':', lw=2, label='Presión Contrecoup (Back) [MPa]')
+        ax2.set_ylabel('Presión (MPa)', fontsize=12, color='black'); ax2.tick_params(axis='y', labelcolor='black')
+        add_mmhg_axis(ax2, [], outward_points=70)
+        ax1.legend(loc='upper right', fontsize=10, frameon=True, facecolor='white', framealpha=0.8)
+        template = _FIGURE_TEMPLATES['accel_pressures'] = {'fig': fig, 'ax1': ax1, 'ax2': ax2, 'title': title,
+                                                           'acc': acc, 'coup': coup, 'contrecoup': contrecoup}
+
+    template['title'].set_text(_individual_title(sim_data, "Aceleración y Presión Intracraneal"))
+    template['acc'].set_data(*plot_series(template['fig'], sim_data['time_acc_ms'], sim_data['acc_mag_m_s2']))
+    template['coup'].set_data(*plot_series(template['fig'], sim_data['time_p_coup_ms'], sim_data['pressure_coup_mpa']))
+    template['contrecoup'].set_data(*plot_series(template['fig'], sim_data['time_p_contrecoup_ms'], sim_data['pressure_contrecoup_mpa']))
+    _rescale_axes([template['ax1'], template['ax2']], template['ax2'], [template['coup'], template['contrecoup']])
+    if new_template:
+        template['fig'].tight_layout(); template['fig'].subplots_adjust(right=0.78)
+    _save_individual_figure(template['fig'], os.path.join(results_dir, f"Individual_AccAndPressures_CoupContrecoup_{_individual_short_id(sim_data)}"))
+
+def plot_individual_pressures_coup_contrecoup(sim_data: SimulationRecord, results_dir: str, use_fixed_files: bool):
+    if REUSE_FIGURE_TEMPLATES and _has_series(sim_data, PRESSURE_SERIES_KEYS):
+        return _plot_individual_pressures_templated(sim_data, results_dir)
+    short_id = _individual_short_id(sim_data)
+    main_title = _individual_title(sim_data, "Presión Intracraneal (Coup y Contrecoup)")
     
     fig, ax_mpa = plt.subplots(figsize=(12, 7)); plt.title(main_title, fontsize=15, fontweight='bold')
     lines_for_legend = []
     if sim_data['time_p_coup_ms'] is not None and sim_data['pressure_coup_mpa'] is not None:
-        l, = ax_mpa.plot(sim_data['time_p_coup_ms'], sim_data['pressure_coup_mpa'], c=INDIVIDUAL_COMPARISON_PALETTE[1], ls='--', lw=2, label='Presión Coup (Front) [MPa]'); lines_for_legend.append(l)
+        l, = ax_mpa.plot(*plot_series(fig, sim_data['time_p_coup_ms'], sim_data['pressure_coup_mpa']), c=INDIVIDUAL_COMPARISON_PALETTE[1], ls='--', lw=2, label='Presión Coup (Front) [MPa]'); lines_for_legend.append(l)
     if sim_data['time_p_contrecoup_ms'] is not None and sim_data['pressure_contrecoup_mpa'] is not None:
-        l, = ax_mpa.plot(sim_data['time_p_contrecoup_ms'], sim_data['pressure_contrecoup_mpa'], c=INDIVIDUAL_COMPARISON_PALETTE[2], ls=':', lw=2, label='Presión Contrecoup (Back) [MPa]'); lines_for_legend.append(l)
+        l, = ax_mpa.plot(*plot_series(fig, sim_data['time_p_contrecoup_ms'], sim_data['pressure_contrecoup_mpa']), c=INDIVIDUAL_COMPARISON_PALETTE[2], ls=':', lw=2, label='Presión Contrecoup (Back) [MPa]'); lines_for_legend.append(l)
     
     ax_mpa.set_xlabel('Tiempo (ms)', fontsize=12); ax_mpa.set_ylabel('Presión (MPa)', fontsize=12, color='black')
     ax_mpa.tick_params(axis='y', labelcolor='black')
-    ax_mmhg = ax_mpa.twinx()
     if lines_for_legend:
-        ax_mmhg.set_ylabel('Presión (mmHg)', fontsize=12, color='black'); ax_mmhg.tick_params(axis='y', labelcolor='black'); fig.canvas.draw()
-        ymin, ymax = ax_mpa.get_ylim(); 
-        if ymin == ymax: ymin, ymax = (ymin - 0.01, ymax + 0.01) if ymin !=0 else (-0.001, 0.001)
-        ax_mpa.set_ylim(ymin, ymax); fig.canvas.draw(); ax_mmhg.set_ylim(ymin * MPA_TO_MMHG, ymax * MPA_TO_MMHG)
+        add_mmhg_axis(ax_mpa, lines_for_legend)
         ax_mpa.legend(loc='upper right', fontsize=10, frameon=True, facecolor='white', framealpha=0.8)
     else: 
-        ax_mmhg.set_yticks([]); ax_mmhg.set_yticklabels([]); ax_mmhg.set_ylabel("")
         ax_mpa.text(0.5, 0.5, "No hay datos de presión.", ha='center', va='center', transform=ax_mpa.transAxes)
     
     fig.tight_layout(); base_fn = os.path.join(results_dir, f"Individual_Pressures_CoupContrecoup_{short_id}")
-    plt.savefig(f"{base_fn}.png", dpi=300); plt.savefig(f"{base_fn}.eps", format='eps', bbox_inches='tight'); plt.close(fig)
+    save_figure_formats(base_fn, 'individual'); plt.close(fig)
 
-def plot_individual_accel_and_pressures_coup_contrecoup(sim_data: Dict[str, Any], results_dir: str, use_fixed_files: bool):
-    name = sim_data['name']
-    plot_desc = sim_data.get('helmet_status', 'Impacto Desconocido')
-    velocity_m_s = sim_data.get('velocity_m_s')
-    short_id = sim_data.get('short_id', re.sub(r'[^\w\-_\.]', '_', name[:20]))
-    
-    vel_str = f"@ {velocity_m_s:.2f} m/s" if velocity_m_s is not None else "(Vel. desconocida)"
-    main_title = f"{plot_desc} {vel_str}\nAceleración y Presión Intracraneal"
+def plot_individual_accel_and_pressures_coup_contrecoup(sim_data: SimulationRecord, results_dir: str, use_fixed_files: bool):
+    if REUSE_FIGURE_TEMPLATES and _has_series(sim_data, ACCEL_SERIES_KEYS + PRESSURE_SERIES_KEYS):
+        return _plot_individual_accel_and_pressures_templated(sim_data, results_dir)
+    short_id = _individual_short_id(sim_data)
+    main_title = _individual_title(sim_data, "Aceleración y Presión Intracraneal")
 
     fig, ax1 = plt.subplots(figsize=(14, 8)); plt.title(main_title, fontsize=15, fontweight='bold')
     lines = []
     acc_label = 'Aceleración Mag. (m/s²)'
     if sim_data['time_acc_ms'] is not None and sim_data['acc_mag_m_s2'] is not None:
-        l, = ax1.plot(sim_data['time_acc_ms'], sim_data['acc_mag_m_s2'], c=INDIVIDUAL_COMPARISON_PALETTE[0], ls='-', lw=2, label=acc_label); lines.append(l)
+        l, = ax1.plot(*plot_series(fig, sim_data['time_acc_ms'], sim_data['acc_mag_m_s2']), c=INDIVIDUAL_COMPARISON_PALETTE[0], ls='-', lw=2, label=acc_label); lines.append(l)
     
     ax1.set_xlabel('Tiempo (ms)', fontsize=12); ax1.set_ylabel(acc_label, color=INDIVIDUAL_COMPARISON_PALETTE[0], fontsize=12)
     ax1.tick_params(axis='y', labelcolor=INDIVIDUAL_COMPARISON_PALETTE[0])
     
     ax2 = ax1.twinx(); p_exists = False
     if sim_data['time_p_coup_ms'] is not None and sim_data['pressure_coup_mpa'] is not None:
-        l, = ax2.plot(sim_data['time_p_coup_ms'], sim_data['pressure_coup_mpa'], c=INDIVIDUAL_COMPARISON_PALETTE[1], ls='--', lw=2, label='Presión Coup (Front) [MPa]'); lines.append(l); p_exists = True
+        l, = ax2.plot(*plot_series(fig, sim_data['time_p_coup_ms'], sim_data['pressure_coup_mpa']), c=INDIVIDUAL_COMPARISON_PALETTE[1], ls='--', lw=2, label='Presión Coup (Front) [MPa]'); lines.append(l); p_exists = True
     if sim_data['time_p_contrecoup_ms'] is not None and sim_data['pressure_contrecoup_mpa'] is not None:
-        l, = ax2.plot(sim_data['time_p_contrecoup_ms'], sim_data['pressure_contrecoup_mpa'], c=INDIVIDUAL_COMPARISON_PALETTE[2], ls=':', lw=2, label='Presión Contrecoup (Back) [MPa]'); lines.append(l); p_exists = True
+        l, = ax2.plot(*plot_series(fig, sim_data['time_p_contrecoup_ms'], sim_data['pressure_contrecoup_mpa']), c=INDIVIDUAL_COMPARISON_PALETTE[2], ls=':', lw=2, label='Presión Contrecoup (Back) [MPa]'); lines.append(l); p_exists = True
     
     ax2.set_ylabel('Presión (MPa)', fontsize=12, color='black'); ax2.tick_params(axis='y', labelcolor='black')
-    ax3 = ax1.twinx(); ax3.spines["right"].set_position(("outward", 70)); ax3.spines["right"].set_visible(True)
     if p_exists:
-        ax3.set_ylabel('Presión (mmHg)', fontsize=12, color='black'); ax3.tick_params(axis='y', labelcolor='black'); fig.canvas.draw()
-        ymin, ymax = ax2.get_ylim();
-        if ymin == ymax: ymin, ymax = (ymin - 0.01, ymax + 0.01) if ymin !=0 else (-0.001, 0.001)
-        ax2.set_ylim(ymin, ymax); fig.canvas.draw(); ax3.set_ylim(ymin * MPA_TO_MMHG, ymax * MPA_TO_MMHG)
+        add_mmhg_axis(ax2, [l for l in lines if l.axes is ax2], outward_points=70)
     else: 
         ax2.set_yticks([]); ax2.set_yticklabels([]); ax2.set_ylabel("")
-        ax3.set_yticks([]); ax3.set_yticklabels([]); ax3.set_ylabel("")
     
     if lines: ax1.legend(loc='upper right', fontsize=10, frameon=True, facecolor='white', framealpha=0.8)
     elif not (sim_data.get('acc_mag_m_s2') is not None) and not p_exists: ax1.text(0.5,0.5,"No hay datos.", ha='center',va='center',transform=ax1.transAxes)
@@ -290,11 +827,11 @@ def plot_individual_accel_and_pressures_coup_contrecoup(sim_data: Dict[str, Any]
     
     fig.tight_layout(); fig.subplots_adjust(right=0.78)
     base_fn = os.path.join(results_dir, f"Individual_AccAndPressures_CoupContrecoup_{short_id}")
-    plt.savefig(f"{base_fn}.png", dpi=300); plt.savefig(f"{base_fn}.eps", format='eps', bbox_inches='tight'); plt.close(fig)
+    save_figure_formats(base_fn, 'individual'); plt.close(fig)
 
 # --- Funciones de Graficación Comparativa Nahum ---
 def plot_nahum_comparative_pressure_series_single_type(
-    sim_data_group: List[Dict[str, Any]], pressure_type: str,
+    sim_data_group: List[SimulationRecord], pressure_type: str,
     group_identifier: str, results_dir: str, use_fixed_files: bool
 ):
     if not sim_data_group: return
@@ -318,7 +855,7 @@ def plot_nahum_comparative_pressure_series_single_type(
             vel_m_s_actual = sim_data.get('velocity_m_s')
             label = f"{vel_m_s_actual:.3f} m/s" if vel_m_s_actual is not None else f"Sim {i+1}"
             color_to_use = NAHUM_COUP_COLORS[i % len(NAHUM_COUP_COLORS)]
-            l, = ax_mpa.plot(sim_data[time_k], sim_data[pressure_k], 
+            l, = ax_mpa.plot(*plot_series(fig, sim_data[time_k], sim_data[pressure_k]), 
                              color=color_to_use, 
                              linestyle=NAHUM_LINE_STYLES[i % len(NAHUM_LINE_STYLES)], 
                              lw=2, label=label)
@@ -326,27 +863,22 @@ def plot_nahum_comparative_pressure_series_single_type(
 
     ax_mpa.set_xlabel('Tiempo (ms)', fontsize=12); ax_mpa.set_ylabel('Presión (MPa)', fontsize=12, color='black')
     ax_mpa.tick_params(axis='y', labelcolor='black')
-    ax_mmhg = ax_mpa.twinx()
 
     if lines_for_legend:
-        ax_mmhg.set_ylabel('Presión (mmHg)', fontsize=12, color='black'); ax_mmhg.tick_params(axis='y', labelcolor='black'); fig.canvas.draw()
-        ymin, ymax = ax_mpa.get_ylim();
-        if ymin == ymax: ymin, ymax = (ymin - 0.01, ymax + 0.01) if ymin !=0 else (-0.001, 0.001)
-        ax_mpa.set_ylim(ymin, ymax); fig.canvas.draw(); ax_mmhg.set_ylim(ymin * MPA_TO_MMHG, ymax * MPA_TO_MMHG)
+        add_mmhg_axis(ax_mpa, lines_for_legend)
         ax_mpa.legend(loc='upper right', title="Velocidad Impacto", fontsize=10, title_fontsize=11, frameon=True, facecolor='white', framealpha=0.8)
     else: 
-        ax_mmhg.set_yticks([]); ax_mmhg.set_yticklabels([]); ax_mmhg.set_ylabel("")
         ax_mpa.text(0.5,0.5, f"No hay datos de presión {p_type_display} para este grupo.", ha='center',va='center',transform=ax_mpa.transAxes)
     
     fig.tight_layout()
     fname_base = f"Nahum_Comparative_{p_type_display}_Only_{group_identifier}{'_FIXED' if use_fixed_files else ''}"
     full_path_base = os.path.join(results_dir, fname_base)
-    plt.savefig(f"{full_path_base}.png", dpi=300); plt.savefig(f"{full_path_base}.eps", format='eps', bbox_inches='tight'); plt.close(fig)
+    save_figure_formats(full_path_base, 'nahum'); plt.close(fig)
 
 # MODIFICADO: Ahora la función puede manejar grupos de cualquier tamaño (1, 2, o más como antes)
 # El nombre del archivo y el título se ajustarán según el contexto de la llamada.
 def plot_nahum_comparative_coup_contrecoup_combined(
-    sim_data_group: List[Dict[str, Any]], 
+    sim_data_group: List[SimulationRecord], 
     group_identifier: str, # Será "Grupo_1_Vels_...", "Grupo_2_Vels_...", "Par_V1_vs_V2", o "Solo_V3"
     results_dir: str,
     use_fixed_files: bool,
@@ -401,31 +933,26 @@ def plot_nahum_comparative_coup_contrecoup_combined(
         contrecoup_color = NAHUM_CONTRECOUP_COLORS[style_idx % len(NAHUM_CONTRECOUP_COLORS)]
 
         if sim_data.get('time_p_coup_ms') is not None and sim_data.get('pressure_coup_mpa') is not None:
-            l_coup, = ax_mpa.plot(sim_data['time_p_coup_ms'], sim_data['pressure_coup_mpa'], 
+            l_coup, = ax_mpa.plot(*plot_series(fig, sim_data['time_p_coup_ms'], sim_data['pressure_coup_mpa']), 
                                   color=coup_color, linestyle=current_style, 
                                   lw=2, label=f'{vel_label_part} - Coup')
             lines_for_legend.append(l_coup)
 
         if sim_data.get('time_p_contrecoup_ms') is not None and sim_data.get('pressure_contrecoup_mpa') is not None:
-            l_cont, = ax_mpa.plot(sim_data['time_p_contrecoup_ms'], sim_data['pressure_contrecoup_mpa'], 
+            l_cont, = ax_mpa.plot(*plot_series(fig, sim_data['time_p_contrecoup_ms'], sim_data['pressure_contrecoup_mpa']), 
                                   color=contrecoup_color, linestyle=current_style, 
                                   lw=2, label=f'{vel_label_part} - Contrecoup')
             lines_for_legend.append(l_cont)
 
     ax_mpa.set_xlabel('Tiempo (ms)', fontsize=12); ax_mpa.set_ylabel('Presión (MPa)', fontsize=12, color='black')
     ax_mpa.tick_params(axis='y', labelcolor='black')
-    ax_mmhg = ax_mpa.twinx()
 
     if lines_for_legend:
-        ax_mmhg.set_ylabel('Presión (mmHg)', fontsize=12, color='black'); ax_mmhg.tick_params(axis='y', labelcolor='black'); fig.canvas.draw()
-        ymin, ymax = ax_mpa.get_ylim();
-        if ymin == ymax: ymin, ymax = (ymin - 0.01, ymax + 0.01) if ymin !=0 else (-0.001, 0.001)
-        ax_mpa.set_ylim(ymin, ymax); fig.canvas.draw(); ax_mmhg.set_ylim(ymin * MPA_TO_MMHG, ymax * MPA_TO_MMHG)
+        add_mmhg_axis(ax_mpa, lines_for_legend)
         
         legend_ncols = 1 if num_unique_sims_in_group == 1 else 2 # 2 columnas si hay más de 1 simulación
         ax_mpa.legend(loc='upper right', title="Velocidad - Tipo", fontsize=9, title_fontsize=10, frameon=True, facecolor='white', framealpha=0.8, ncol=legend_ncols)
     else: 
-        ax_mmhg.set_yticks([]); ax_mmhg.set_yticklabels([]); ax_mmhg.set_ylabel("")
         ax_mpa.text(0.5,0.5, "No hay datos de presión Coup/Contrecoup para este grupo.", ha='center',va='center',transform=ax_mpa.transAxes)
     
     fig.tight_layout()
@@ -436,127 +963,310 @@ def plot_nahum_comparative_coup_contrecoup_combined(
         
     fname_base = f"{fname_prefix}_{group_identifier}{'_FIXED' if use_fixed_files else ''}"
     full_path_base = os.path.join(results_dir, fname_base)
-    plt.savefig(f"{full_path_base}.png", dpi=300); plt.savefig(f"{full_path_base}.eps", format='eps', bbox_inches='tight'); plt.close(fig)
+    save_figure_formats(full_path_base, 'nahum'); plt.close(fig)
+
+
+def results_directory() -> str:
+    return RESULTS_COMPARISON_DIR_BASE + ("_CorrectedData" if USE_FIXED_RPT_FILES else "_OriginalData")
+
+def select_nahum_sims(all_sim_data: List[SimulationRecord]) -> List[SimulationRecord]:
+    return [s for s in all_sim_data if
+            (s.get('helmet_status') and NAHUM_SIM_IDENTIFIER in s['helmet_status'].lower()) or
+            (NAHUM_SIM_IDENTIFIER in s.get('name','').lower())]
+
+def plot_nahum_group_figures(nahum_sims: List[SimulationRecord], results_dir: str, use_fixed_files: bool):
+    """Gráficas comparativas de Nahum: por grupos grandes (alternos por velocidad) y por pares/individuales."""
+    print(f"  Se encontraron {len(nahum_sims)} simulaciones Nahum. Ordenando por velocidad...")
+    nahum_sims.sort(key=lambda s: s.get('velocity_m_s', float('inf')) if s.get('velocity_m_s') is not None else float('inf'))
+
+    # Grupos grandes para "Solo Coup", "Solo Contrecoup" y "Coup&Contrecoup Combinado por Grupo"
+    group1_sims_large = nahum_sims[0::2]
+    group2_sims_large = nahum_sims[1::2]
+    sim_groups_for_large_plots = {"Grupo_1": group1_sims_large, "Grupo_2": group2_sims_large}
+
+    print("\n  Generando gráficas comparativas Nahum por grupos grandes (Solo Coup, Solo Contrecoup, Combinado):")
+    for group_key_name, current_large_group in sim_groups_for_large_plots.items():
+        if not current_large_group:
+            print(f"    {group_key_name} de Nahum para gráficas de grupo grande está vacío, omitiendo.")
+            continue
+
+        group_vels_m_s_large = sorted([s['velocity_m_s'] for s in current_large_group if s.get('velocity_m_s') is not None])
+        group_id_str_large = group_key_name
+        if group_vels_m_s_large:
+             group_id_str_large += f"_Vels_{group_vels_m_s_large[0]:.2f}_a_{group_vels_m_s_large[-1]:.2f}mps".replace(".","p")
+        else:
+             group_id_str_large += "_Vels_Variadas"
+
+        print(f"    Procesando {group_key_name} ({len(current_large_group)} sims) ID: {group_id_str_large}")
+        # Solo Coup
+        plot_nahum_comparative_pressure_series_single_type(current_large_group, "coup", group_id_str_large, results_dir, use_fixed_files)
+        # Solo Contrecoup
+        plot_nahum_comparative_pressure_series_single_type(current_large_group, "contrecoup", group_id_str_large, results_dir, use_fixed_files)
+        # Coup & Contrecoup Combinado por Grupo Grande
+        plot_nahum_comparative_coup_contrecoup_combined(
+            current_large_group, 
+            group_id_str_large, 
+            results_dir, 
+            use_fixed_files, 
+            is_pair_or_solo_plot=False # MODIFICADO: Indicar que NO es un gráfico de par/solo
+        )
+        print(f"      Gráficas de grupo grande para {group_key_name} guardadas.")
 
+    # Gráficas combinadas Coup-Contrecoup de 2 en 2 (o individual)
+    print(f"\n  Generando gráficas comparativas Nahum (Coup-Contrecoup Combinado) por pares/individuales...")
+    num_nahum_sims = len(nahum_sims)
+    plotted_pair_solo_combined_count = 0
+    for i in range(0, num_nahum_sims, 2):
+        current_pair_group = nahum_sims[i : i + 2]
+        if not current_pair_group:
+            continue
+
+        group_id_str_pair_solo = ""
+        cleaned_ids = []
+        for sim_in_pair in current_pair_group:
+            s_id = sim_in_pair['short_id'].replace("_FIXED","")
+            s_id = s_id.replace(NAHUM_SIM_IDENTIFIER.capitalize() + "_", "")
+            s_id = s_id.replace(NAHUM_SIM_IDENTIFIER + "_", "")
+            s_id = s_id.replace("_", "")
+            cleaned_ids.append(s_id)
+
+        if len(cleaned_ids) == 2:
+            group_id_str_pair_solo = f"Par_{cleaned_ids[0]}_vs_{cleaned_ids[1]}"
+        elif len(cleaned_ids) == 1:
+            group_id_str_pair_solo = f"Solo_{cleaned_ids[0]}"
+
+        print(f"    Procesando par/individual de Nahum para gráfico combinado (ID: {group_id_str_pair_solo})")
+        plot_nahum_comparative_coup_contrecoup_combined(
+            current_pair_group, 
+            group_id_str_pair_solo, 
+            results_dir, 
+            use_fixed_files,
+            is_pair_or_solo_plot=True # MODIFICADO: Indicar que SÍ es un gráfico de par/solo
+        )
+        plotted_pair_solo_combined_count +=1
+        print(f"      Gráfica combinada par/solo para '{group_id_str_pair_solo}' guardada.")
+
+    if plotted_pair_solo_combined_count > 0:
+         print(f"  Se generaron {plotted_pair_solo_combined_count} gráficas combinadas de Nahum (pares/individuales).")
+
+def plot_individual_figures(sim_data: SimulationRecord, results_dir: str, use_fixed_files: bool) -> bool:
+    """Gráficas individuales de una simulación. Devuelve True si tenía datos suficientes para graficarla."""
+    has_p = sim_data.get('pressure_coup_mpa') is not None or sim_data.get('pressure_contrecoup_mpa') is not None
+    has_a = sim_data.get('acc_mag_m_s2') is not None
+
+    with _timed('plot.individual_simulation'):
+        in_report = _ACTIVE_REPORT is not None # En el informe cada simulación ocupa siempre dos páginas (para el índice)
+        if has_p or in_report:
+            plot_individual_pressures_coup_contrecoup(sim_data, results_dir, use_fixed_files)
+        if has_a or has_p or in_report:
+            plot_individual_accel_and_pressures_coup_contrecoup(sim_data, results_dir, use_fixed_files)
+    return has_a or has_p
+
+def individual_figure_files(sim_data: SimulationRecord, results_dir: str) -> List[str]:
+    """Archivos que guarda plot_individual_figures para la simulación (sin informe PDF), en los formatos actuales."""
+    has_p = sim_data.get('pressure_coup_mpa') is not None or sim_data.get('pressure_contrecoup_mpa') is not None
+    has_a = sim_data.get('acc_mag_m_s2') is not None
+    names = (["Individual_Pressures_CoupContrecoup"] if has_p else []) + (["Individual_AccAndPressures_CoupContrecoup"] if has_a or has_p else [])
+    short_id = _individual_short_id(sim_data)
+    return [os.path.join(results_dir, f"{name}_{short_id}.{fmt}") for name in names for fmt in figure_formats('individual')]
+
+def plot_individual_batch(sims: Sequence[SimulationRecord], results_dir: str, use_fixed_files: bool) -> int:
+    """Gráficas individuales de un lote, con el módulo de la aceleración de todo el lote calculado de una vez."""
+    preload_acceleration_batch(sims)
+    try:
+        return sum(plot_individual_figures(s, results_dir, use_fixed_files) for s in sims)
+    finally:
+        _ACCEL_BATCH.clear()
+
+def _plot_individual_figures_worker(task: Tuple[List[str], str, bool, Optional[Dict[str, Dict[str, float]]], Optional[Dict[str, List[str]]]]) -> int:
+    """Proceso auxiliar de main(workers > 1): vuelve a crear los registros de un lote de simulaciones y las grafica."""
+    global _EXPORT_FORMATS
+    dir_paths, results_dir, use_fixed_files, correction_params, _EXPORT_FORMATS = task
+    sims = [s for s in (get_simulation_data(p, use_fixed_files, correction_params) for p in dir_paths) if s is not None]
+    return plot_individual_batch(sims, results_dir, use_fixed_files)
+
+
+# --- Informe PDF de la Campaña ---
+def report_toc_pages(n_rows: int) -> int:
+    return max(1, -(-n_rows // REPORT_TOC_ROWS_PER_PAGE))
+
+def write_report_toc(pdf, rows: List[Tuple[str, str, str, int]], title: str):
+    """Páginas del índice: (short_id, estado, velocidad, página) por fila, en tantas páginas como haga falta."""
+    from matplotlib.figure import Figure # Sin pyplot: las páginas del índice no se muestran
+    n_pages = report_toc_pages(len(rows))
+    line_step = 0.84 / REPORT_TOC_ROWS_PER_PAGE
+    for k in range(n_pages):
+        fig = Figure(figsize=REPORT_PAGE_SIZE)
+        fig.text(0.08, 0.95, title if k == 0 else f"{title} (cont.)", fontsize=14, fontweight='bold')
+        y = 0.91
+        for col_x, header in ((0.08, 'Simulación (short_id)'), (0.50, 'Estado'), (0.74, 'Velocidad'), (0.92, 'Pág.')):
+            fig.text(col_x, y, header, fontsize=9, fontweight='bold', ha='right' if header == 'Pág.' else 'left')
+        for short_id, status, velocity, page in rows[k * REPORT_TOC_ROWS_PER_PAGE:(k + 1) * REPORT_TOC_ROWS_PER_PAGE]:
+            y -= line_step
+            fig.text(0.08, y, short_id, fontsize=8, family='monospace')
+            fig.text(0.50, y, status, fontsize=8)
+            fig.text(0.74, y, velocity, fontsize=8)
+            fig.text(0.92, y, str(page), fontsize=8, ha='right')
+        fig.text(0.92, 0.03, f"Índice {k + 1}/{n_pages}", fontsize=7, color='grey', ha='right')
+        pdf.savefig(fig)
+
+def open_report(report_path: str, sims: List[SimulationRecord], with_nahum: bool):
+    """
+    Abre el informe PDF (un único PdfPages para toda la ejecución) y escribe el índice. Como cada simulación
+    ocupa dos páginas, el número de página de cada una se conoce antes de dibujarlas.
+    """
+    global _ACTIVE_REPORT
+    from matplotlib.backends.backend_pdf import PdfPages
+    n_rows = len(sims) + (1 if with_nahum else 0)
+    first_page = report_toc_pages(n_rows) + 1
+    rows = [(s['short_id'], s.get('helmet_status', ''), f"{s['velocity_m_s']:.3f} m/s" if s.get('velocity_m_s') is not None else '-',
+             first_page + 2 * i) for i, s in enumerate(sims)]
+    if with_nahum: rows.append(('Comparativas Nahum', 'Grupos y pares', '', first_page + 2 * len(sims)))
+    pdf = PdfPages(report_path)
+    title = f"Informe de la campaña ({'datos corregidos' if USE_FIXED_RPT_FILES else 'datos originales'})"
+    info = pdf.infodict(); info['Title'] = title; info['Subject'] = os.path.basename(os.path.normpath(CAMPAIGN_STORE_FILE or REPORTS_ROOT_DIR))
+    write_report_toc(pdf, rows, title)
+    _ACTIVE_REPORT = {'pdf': pdf, 'path': report_path, 'page': first_page - 1}
+
+def close_report() -> int:
+    """Cierra el informe PDF abierto y devuelve su número de páginas."""
+    global _ACTIVE_REPORT
+    if _ACTIVE_REPORT is None: return 0
+    pages = _ACTIVE_REPORT['page']
+    _ACTIVE_REPORT['pdf'].close()
+    if stage_timing is not None: stage_timing.add_file_written(_ACTIVE_REPORT['path'])
+    _ACTIVE_REPORT = None
+    return pages
+
+def _sim_selected(name: str, only_sims: Optional[set]) -> bool:
+    return only_sims is None or name in only_sims or any(fnmatch.fnmatchcase(name, p) for p in only_sims)
 
 # --- Lógica Principal ---
-def main():
-    results_dir = RESULTS_COMPARISON_DIR_BASE + ("_CorrectedData" if USE_FIXED_RPT_FILES else "_OriginalData")
+def main(workers: int = 1, only_sims: Optional[Iterable[str]] = None) -> Optional[str]:
+    """
+    workers > 1 reparte las gráficas individuales entre procesos (no con CAMPAIGN_STORE_FILE).
+    only_sims (nombres o patrones como 'Nahum_*') limita las gráficas individuales a esas simulaciones; las de
+    grupo de Nahum solo se rehacen si alguna de ellas es de Nahum. Devuelve la carpeta de resultados, o None
+    si no se pudo procesar nada.
+    """
+    global _ACTIVE_CAMPAIGN_STORE
+    results_dir = results_directory()
+    if stage_timing is not None: stage_timing.start_run()
     print(f"\n--- Iniciando Script (Datos Corregidos: {USE_FIXED_RPT_FILES}) ---")
-    print(f"Directorio de Reportes: {REPORTS_ROOT_DIR}\nDirectorio de Salida: {results_dir}")
-    if not os.path.exists(REPORTS_ROOT_DIR): print(f"ERROR: El directorio de reportes '{REPORTS_ROOT_DIR}' no existe."); return
+    if CAMPAIGN_STORE_FILE:
+        if campaign_store is None: print("ERROR: CAMPAIGN_STORE_FILE configurado pero no se encontró el módulo 'campaign_store'."); return
+        _ACTIVE_CAMPAIGN_STORE = campaign_store.open_campaign_store(CAMPAIGN_STORE_FILE)
+        if _ACTIVE_CAMPAIGN_STORE is None: return
+    try:
+        return _process_simulations(results_dir, workers, only_sims)
+    finally:
+        if _ACTIVE_CAMPAIGN_STORE is not None:
+            _ACTIVE_CAMPAIGN_STORE.close(); _ACTIVE_CAMPAIGN_STORE = None
+
+def _process_simulations(results_dir: str, workers: int, only_sims: Optional[Iterable[str]]) -> Optional[str]:
+    """Cuerpo de main() con el archivo de campaña (si se usa) ya abierto; main() lo cierra al terminar."""
+    if _ACTIVE_CAMPAIGN_STORE is not None:
+        print(f"Archivo de Campaña: {CAMPAIGN_STORE_FILE}\nDirectorio de Salida: {results_dir}")
+        if workers > 1: print(f"AVISO: workers = {workers}, pero con CAMPAIGN_STORE_FILE las gráficas se generan en un solo proceso.")
+        all_sim_dirs = _ACTIVE_CAMPAIGN_STORE.simulations()
+    else:
+        print(f"Directorio de Reportes: {REPORTS_ROOT_DIR}\nDirectorio de Salida: {results_dir}")
+        if not os.path.exists(REPORTS_ROOT_DIR): print(f"ERROR: El directorio de reportes '{REPORTS_ROOT_DIR}' no existe."); return
+        all_sim_dirs = [d for d in os.listdir(REPORTS_ROOT_DIR) if os.path.isdir(os.path.join(REPORTS_ROOT_DIR, d))]
     os.makedirs(results_dir, exist_ok=True)
 
-    all_sim_dirs = [d for d in os.listdir(REPORTS_ROOT_DIR) if os.path.isdir(os.path.join(REPORTS_ROOT_DIR, d))]
+    correction_params = None
+    if USE_FIXED_RPT_FILES and APPLY_CORRECTION_ON_LOAD:
+        params_file = resolve_correction_params_file()
+        correction_params = load_correction_params(params_file)
+        if correction_params:
+            print(f"Corrección al vuelo con parámetros de: {params_file} ({', '.join(sorted(correction_params))})")
+        else:
+            print("AVISO: No se encontraron parámetros de corrección. Se leerán las copias *_fixed.rpt.")
+
     if not all_sim_dirs: print("No se encontraron directorios de simulación en el directorio de reportes."); return
 
-    all_sim_data: List[Dict[str, Any]] = []
     print(f"\n--- Procesando {len(all_sim_dirs)} Directorios de Simulación ---")
-    for i, sim_dir_name in enumerate(sorted(all_sim_dirs)):
-        sim_data_item = get_simulation_data(os.path.join(REPORTS_ROOT_DIR, sim_dir_name), USE_FIXED_RPT_FILES)
-        if sim_data_item:
-            all_sim_data.append(sim_data_item)
+    all_sim_data = records_with_data(get_simulation_data(os.path.join(REPORTS_ROOT_DIR, sim_dir_name), USE_FIXED_RPT_FILES, correction_params)
+                                     for sim_dir_name in sorted(all_sim_dirs))
     
     if not all_sim_data:
         print("No se pudieron procesar datos de ninguna simulación.")
         return
 
-    processed_individual_count = 0
-    print(f"\n--- Generando Gráficas Individuales para {len(all_sim_data)} simulaciones procesadas ---")
-    for sim_data in all_sim_data:
-        has_p = sim_data.get('pressure_coup_mpa') is not None or sim_data.get('pressure_contrecoup_mpa') is not None
-        has_a = sim_data.get('acc_mag_m_s2') is not None
-        
-        if has_p: 
-            plot_individual_pressures_coup_contrecoup(sim_data, results_dir, USE_FIXED_RPT_FILES)
-        if has_a or has_p: 
-            plot_individual_accel_and_pressures_coup_contrecoup(sim_data, results_dir, USE_FIXED_RPT_FILES)
-            processed_individual_count+=1
-    print(f"--- Gráficas Individuales Generadas: {processed_individual_count} simulaciones con datos suficientes graficadas. ---")
-
-    print(f"\n--- Generando Gráficos Comparativos de Presión para Simulaciones Nahum ---")
-    
-    nahum_sims = [s for s in all_sim_data if 
-                  (s.get('helmet_status') and NAHUM_SIM_IDENTIFIER in s['helmet_status'].lower()) or
-                  (NAHUM_SIM_IDENTIFIER in s.get('name','').lower())]
+    only_sims = set(only_sims) if only_sims is not None else None
+    selected_sims = [s for s in all_sim_data if _sim_selected(s['name'], only_sims)]
+    nahum_sims = select_nahum_sims(all_sim_data)
+    plot_nahum = bool(nahum_sims) and (only_sims is None or any(_sim_selected(s['name'], only_sims) for s in nahum_sims))
+    report_path = None
+    if REPORT_PDF and _EXPORT_FORMATS is None: # La pasada de exportación siempre escribe archivos sueltos
+        report_path = os.path.join(results_dir, REPORT_PDF_NAME)
+        open_report(report_path, selected_sims, plot_nahum)
+    try:
+        print(f"\n--- Generando Gráficas Individuales para {len(selected_sims)} de {len(all_sim_data)} simulaciones procesadas ---")
+        if not family_enabled('individual'):
+            print("  Sin formatos de salida para las gráficas individuales: se omiten.")
+            processed_individual_count = 0
+        elif workers > 1 and _ACTIVE_CAMPAIGN_STORE is None and _ACTIVE_REPORT is None and len(selected_sims) > 1:
+            from concurrent.futures import ProcessPoolExecutor
+            tasks = [([s['dir_path'] for s in batch], results_dir, USE_FIXED_RPT_FILES, correction_params, _EXPORT_FORMATS)
+                     for batch in simulation_batches(selected_sims, workers)]
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                processed_individual_count = sum(_pool_map(pool, _plot_individual_figures_worker, tasks))
+        else:
+            processed_individual_count = sum(plot_individual_batch(batch, results_dir, USE_FIXED_RPT_FILES)
+                                             for batch in simulation_batches(selected_sims))
+            close_figure_templates()
+        print(f"--- Gráficas Individuales Generadas: {processed_individual_count} simulaciones con datos suficientes graficadas. ---")
 
-    if not nahum_sims:
-        print("  No se encontraron simulaciones Nahum para los gráficos comparativos.");
-    else:
-        print(f"  Se encontraron {len(nahum_sims)} simulaciones Nahum. Ordenando por velocidad...")
-        nahum_sims.sort(key=lambda s: s.get('velocity_m_s', float('inf')) if s.get('velocity_m_s') is not None else float('inf'))
-        
-        # Grupos grandes para "Solo Coup", "Solo Contrecoup" y "Coup&Contrecoup Combinado por Grupo"
-        group1_sims_large = nahum_sims[0::2]
-        group2_sims_large = nahum_sims[1::2]
-        sim_groups_for_large_plots = {"Grupo_1": group1_sims_large, "Grupo_2": group2_sims_large}
-
-        print("\n  Generando gráficas comparativas Nahum por grupos grandes (Solo Coup, Solo Contrecoup, Combinado):")
-        for group_key_name, current_large_group in sim_groups_for_large_plots.items():
-            if not current_large_group:
-                print(f"    {group_key_name} de Nahum para gráficas de grupo grande está vacío, omitiendo.")
-                continue
-
-            group_vels_m_s_large = sorted([s['velocity_m_s'] for s in current_large_group if s.get('velocity_m_s') is not None])
-            group_id_str_large = group_key_name
-            if group_vels_m_s_large:
-                 group_id_str_large += f"_Vels_{group_vels_m_s_large[0]:.2f}_a_{group_vels_m_s_large[-1]:.2f}mps".replace(".","p")
-            else:
-                 group_id_str_large += "_Vels_Variadas"
-            
-            print(f"    Procesando {group_key_name} ({len(current_large_group)} sims) ID: {group_id_str_large}")
-            # Solo Coup
-            plot_nahum_comparative_pressure_series_single_type(current_large_group, "coup", group_id_str_large, results_dir, USE_FIXED_RPT_FILES)
-            # Solo Contrecoup
-            plot_nahum_comparative_pressure_series_single_type(current_large_group, "contrecoup", group_id_str_large, results_dir, USE_FIXED_RPT_FILES)
-            # Coup & Contrecoup Combinado por Grupo Grande
-            plot_nahum_comparative_coup_contrecoup_combined(
-                current_large_group, 
-                group_id_str_large, 
-                results_dir, 
-                USE_FIXED_RPT_FILES, 
-                is_pair_or_solo_plot=False # MODIFICADO: Indicar que NO es un gráfico de par/solo
-            )
-            print(f"      Gráficas de grupo grande para {group_key_name} guardadas.")
-
-        # Gráficas combinadas Coup-Contrecoup de 2 en 2 (o individual)
-        print(f"\n  Generando gráficas comparativas Nahum (Coup-Contrecoup Combinado) por pares/individuales...")
-        num_nahum_sims = len(nahum_sims)
-        plotted_pair_solo_combined_count = 0
-        for i in range(0, num_nahum_sims, 2):
-            current_pair_group = nahum_sims[i : i + 2]
-            if not current_pair_group:
-                continue
-
-            group_id_str_pair_solo = ""
-            cleaned_ids = []
-            for sim_in_pair in current_pair_group:
-                s_id = sim_in_pair['short_id'].replace("_FIXED","")
-                s_id = s_id.replace(NAHUM_SIM_IDENTIFIER.capitalize() + "_", "")
-                s_id = s_id.replace(NAHUM_SIM_IDENTIFIER + "_", "")
-                s_id = s_id.replace("_", "")
-                cleaned_ids.append(s_id)
-
-            if len(cleaned_ids) == 2:
-                group_id_str_pair_solo = f"Par_{cleaned_ids[0]}_vs_{cleaned_ids[1]}"
-            elif len(cleaned_ids) == 1:
-                group_id_str_pair_solo = f"Solo_{cleaned_ids[0]}"
-            
-            print(f"    Procesando par/individual de Nahum para gráfico combinado (ID: {group_id_str_pair_solo})")
-            plot_nahum_comparative_coup_contrecoup_combined(
-                current_pair_group, 
-                group_id_str_pair_solo, 
-                results_dir, 
-                USE_FIXED_RPT_FILES,
-                is_pair_or_solo_plot=True # MODIFICADO: Indicar que SÍ es un gráfico de par/solo
-            )
-            plotted_pair_solo_combined_count +=1
-            print(f"      Gráfica combinada par/solo para '{group_id_str_pair_solo}' guardada.")
-        
-        if plotted_pair_solo_combined_count > 0:
-             print(f"  Se generaron {plotted_pair_solo_combined_count} gráficas combinadas de Nahum (pares/individuales).")
+        print(f"\n--- Generando Gráficos Comparativos de Presión para Simulaciones Nahum ---")
+
+        if not nahum_sims:
+            print("  No se encontraron simulaciones Nahum para los gráficos comparativos.");
+        elif not family_enabled('nahum'):
+            print("  Sin formatos de salida para los gráficos comparativos de Nahum: se omiten.")
+        elif not plot_nahum:
+            print("  Ninguna simulación Nahum ha cambiado: se conservan los gráficos comparativos existentes.")
+        else:
+            with _timed('plot.nahum_groups'):
+                plot_nahum_group_figures(nahum_sims, results_dir, USE_FIXED_RPT_FILES)
+    finally:
+        if report_path is not None:
+            pages = close_report()
+            print(f"\n--- Informe PDF: {pages} páginas en '{report_path}' ---")
+
+    if ROTATION_METRICS_FILE_NAME and _EXPORT_FORMATS is None and rotational_metrics is not None:
+        print(f"\n--- Métricas de Rotación (BrIC, picos de velocidad y aceleración angular) ---")
+        rotation_path = os.path.join(results_dir, ROTATION_METRICS_FILE_NAME)
+        n_rotation = write_rotation_summary(selected_sims, rotation_path)
+        if n_rotation: print(f"--- Métricas de rotación de {n_rotation} simulaciones guardadas en: '{rotation_path}' ---")
+        else: print("  Ninguna simulación tiene velocidad ni aceleración angular extraídas (VR/AR): se omiten.")
 
     print(f"\n--- Proceso Completado. Resultados en: '{results_dir}' ---")
+    if stage_timing is not None:
+        stage_timing.write_run_report(os.path.join(results_dir, TIMING_REPORT_NAME), 'rpt_processor_individual',
+                                      {'simulations': len(all_sim_data), 'workers': workers})
+    return results_dir
+
+def export_figures(only_sims: Optional[Iterable[str]] = None, families: Optional[Iterable[str]] = None,
+                   formats: Optional[Iterable[str]] = None, workers: int = 1) -> Optional[str]:
+    """
+    Pasada de exportación: vuelve a dibujar, a partir de los .rpt (o del archivo de campaña), solo las figuras de
+    las simulaciones 'only_sims' (nombres o patrones) y de las familias 'families' (por defecto todas), y las
+    guarda únicamente en 'formats' (por defecto los formatos 'publication' de OUTPUT_FORMATS).
+    """
+    global _EXPORT_FORMATS
+    families = list(families) if families else list(OUTPUT_FORMATS)
+    unknown = [f for f in families if f not in OUTPUT_FORMATS]
+    if unknown: print(f"ERROR: Familias de gráficas desconocidas: {', '.join(unknown)} (disponibles: {', '.join(OUTPUT_FORMATS)})."); return
+    formats = list(formats) if formats else None
+    _EXPORT_FORMATS = {f: formats if formats is not None else list(OUTPUT_FORMATS[f].get('publication', [])) for f in families}
+    summary = ', '.join(f"{family} -> {'/'.join(fmts) or '-'}" for family, fmts in _EXPORT_FORMATS.items())
+    print(f"\n--- Exportación de Figuras ({summary}) ---")
+    try:
+        return main(workers=workers, only_sims=only_sims)
+    finally:
+        _EXPORT_FORMATS = None
 
 if __name__ == '__main__':
     main()
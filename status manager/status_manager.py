@@ -2,8 +2,10 @@
 # SCRIPT PYTHON PARA VERIFICAR ESTADO DE ARCHIVOS .STA DE ABAQUS
 
 # --- Importaciones ---
+from __future__ import print_function # Compatible con el Python 2 de Abaqus y con Python 3
 import os         # Para interactuar con el sistema operativo (archivos, directorios)
 import glob       # Para encontrar archivos que coincidan con un patron (ej. *.sta)
+import sys        # Para localizar los modulos opcionales de pipeline/
 import traceback  # Para imprimir detalles de errores inesperados
 
 # --- Constantes ---
@@ -20,45 +22,90 @@ STATUS_OK = "EJECUTADO CORRECTAMENTE"
 STATUS_FAIL = "NO COMPLETADO O FALLIDO"
 STATUS_UNKNOWN = "ESTADO DESCONOCIDO (frase no encontrada)"
 
+# Informe de tiempos (pipeline/stage_timing.py), junto al reporte de estado
+TIMING_REPORT_NAME = "informe_tiempos_status.json"
+
+# --- Medicion de tiempos opcional (pipeline/tool_support.py, en la carpeta 'pipeline' del repositorio o copiado junto al script) ---
+_SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__)) if '__file__' in globals() else os.getcwd()
+_PIPELINE_DIR = os.path.join(os.path.dirname(_SCRIPT_DIR), 'pipeline')
+for _path in (_SCRIPT_DIR, _PIPELINE_DIR):
+    if os.path.isdir(_path) and _path not in sys.path: sys.path.append(_path)
+try:
+    import tool_support
+    stage_timing = tool_support.stage_timing # None si pipeline/stage_timing.py no esta disponible
+    _timed = tool_support.timed
+except ImportError: # Script copiado solo junto a los .sta: se ejecuta sin medir tiempos
+    stage_timing = None
+
+    class _NoTiming(object):
+        def __enter__(self): return self
+        def __exit__(self, *exc_info): return False
+
+    def _timed(stage):
+        return _NoTiming()
+
+# --- Lectura de un archivo .sta ---
+def read_sta_status(sta_file_path):
+    """
+    Devuelve STATUS_OK, STATUS_FAIL o STATUS_UNKNOWN segun las frases de finalizacion del archivo .sta.
+    Los errores de lectura se propagan (IOError/OSError).
+    """
+    # Leer el contenido del archivo .sta
+    with _timed('sta.read'):
+        with open(sta_file_path, 'r') as f_sta:
+            content = f_sta.read()
+    if stage_timing is not None: stage_timing.add_file_read(sta_file_path)
+
+    # Buscar las frases clave (insensible a mayusculas/minusculas al inicio/fin,
+    # pero las frases de Abaqus suelen ser exactas)
+    # Se busca la frase exacta incluyendo los espacios iniciales
+    if SUCCESS_PHRASE in content:
+        return STATUS_OK
+    if FAILURE_PHRASE in content:
+        return STATUS_FAIL
+    return STATUS_UNKNOWN
+
 # --- Funcion Principal ---
-def check_analysis_status():
+def check_analysis_status(script_dir=None):
     """
-    Busca archivos .sta en el directorio actual, verifica su estado de finalizacion
-    y genera un archivo de reporte con los resultados.
+    Busca archivos .sta en el directorio indicado (por defecto, el actual), verifica su estado
+    de finalizacion y genera un archivo de reporte con los resultados.
     """
-    script_dir = os.getcwd() # Obtiene el directorio actual donde se ejecuta el script
-    print 'INFO: Directorio de trabajo actual: %s' % script_dir
+    if script_dir is None:
+        script_dir = os.getcwd() # Obtiene el directorio actual donde se ejecuta el script
+    if stage_timing is not None: stage_timing.start_run()
+    print('INFO: Directorio de trabajo actual: %s' % script_dir)
 
     # --- Buscar archivos .sta ---
     sta_files = glob.glob(os.path.join(script_dir, '*.sta'))
 
     if not sta_files:
-        print 'ADVERTENCIA: No se encontraron archivos .sta en el directorio: %s' % script_dir
-        print 'INFO: Saliendo del script.'
+        print('ADVERTENCIA: No se encontraron archivos .sta en el directorio: %s' % script_dir)
+        print('INFO: Saliendo del script.')
         return # Salir si no hay archivos .sta
 
-    print 'INFO: Se encontraron %d archivos .sta:' % len(sta_files)
+    print('INFO: Se encontraron %d archivos .sta:' % len(sta_files))
     # Imprimir solo los nombres de archivo, no la ruta completa
     for f_path in sta_files:
-        print '  - %s' % os.path.basename(f_path)
+        print('  - %s' % os.path.basename(f_path))
 
     # --- Crear directorio de Status si no existe ---
     status_dir_path = os.path.join(script_dir, STATUS_DIR_NAME)
     if not os.path.exists(status_dir_path):
-        print 'INFO: Creando directorio para el reporte: %s' % status_dir_path
+        print('INFO: Creando directorio para el reporte: %s' % status_dir_path)
         try:
             os.makedirs(status_dir_path)
         except (OSError, IOError) as e:
-            print 'ERROR: No se pudo crear el directorio "%s".' % STATUS_DIR_NAME
-            print '  Error: %s' % e
-            print 'INFO: Saliendo del script.'
+            print('ERROR: No se pudo crear el directorio "%s".' % STATUS_DIR_NAME)
+            print('  Error: %s' % e)
+            print('INFO: Saliendo del script.')
             return # Salir si no se puede crear el directorio
     else:
-        print 'INFO: El directorio "%s" ya existe.' % STATUS_DIR_NAME
+        print('INFO: El directorio "%s" ya existe.' % STATUS_DIR_NAME)
 
     # --- Procesar cada archivo .sta ---
     status_report_path = os.path.join(status_dir_path, STATUS_FILE_NAME)
-    print 'INFO: Escribiendo reporte de estado en: %s' % status_report_path
+    print('INFO: Escribiendo reporte de estado en: %s' % status_report_path)
 
     try:
         # Abrir el archivo de reporte en modo escritura ('w')
@@ -73,58 +120,50 @@ def check_analysis_status():
                 simulation_name = os.path.splitext(sta_filename)[0] # Nombre sin extension .sta
                 current_status = STATUS_UNKNOWN # Estado por defecto
 
-                print 'INFO: Procesando archivo: %s' % sta_filename
+                print('INFO: Procesando archivo: %s' % sta_filename)
 
                 try:
-                    # Leer el contenido del archivo .sta
-                    with open(sta_file_path, 'r') as f_sta:
-                        content = f_sta.read()
-
-                    # Buscar las frases clave (insensible a mayusculas/minusculas al inicio/fin,
-                    # pero las frases de Abaqus suelen ser exactas)
-                    # Se busca la frase exacta incluyendo los espacios iniciales
-                    if SUCCESS_PHRASE in content:
-                        current_status = STATUS_OK
-                        print '  - Estado encontrado: %s' % STATUS_OK
-                    elif FAILURE_PHRASE in content:
-                        current_status = STATUS_FAIL
-                        print '  - Estado encontrado: %s' % STATUS_FAIL
+                    current_status = read_sta_status(sta_file_path)
+                    if current_status != STATUS_UNKNOWN:
+                        print('  - Estado encontrado: %s' % current_status)
                     else:
                         # Si no se encuentra ninguna de las frases exactas al final
                         # podria ser que el analisis este en curso o termino abruptamente
-                        print '  - ADVERTENCIA: No se encontro la frase de exito ni la de fallo estandar.'
-                        print '    El analisis podria estar incompleto, en ejecucion o haber terminado de forma anormal.'
-                        current_status = STATUS_UNKNOWN # Mantenemos desconocido
+                        print('  - ADVERTENCIA: No se encontro la frase de exito ni la de fallo estandar.')
+                        print('    El analisis podria estar incompleto, en ejecucion o haber terminado de forma anormal.')
 
                 except (IOError, OSError) as e_read:
-                    print '  ERROR: No se pudo leer el archivo "%s". Saltando.' % sta_filename
-                    print '    Error: %s' % e_read
+                    print('  ERROR: No se pudo leer el archivo "%s". Saltando.' % sta_filename)
+                    print('    Error: %s' % e_read)
                     current_status = "ERROR AL LEER ARCHIVO"
                 except Exception as e_unexpected:
-                    print '  ERROR: Ocurrio un error inesperado al procesar "%s". Saltando.' % sta_filename
-                    print '    Tipo: %s' % type(e_unexpected).__name__
-                    print '    Mensaje: %s' % e_unexpected
-                    print traceback.format_exc() # Imprime mas detalles del error
+                    print('  ERROR: Ocurrio un error inesperado al procesar "%s". Saltando.' % sta_filename)
+                    print('    Tipo: %s' % type(e_unexpected).__name__)
+                    print('    Mensaje: %s' % e_unexpected)
+                    print(traceback.format_exc()) # Imprime mas detalles del error
                     current_status = "ERROR INESPERADO"
 
                 # Escribir la linea en el archivo de reporte
                 report_line = '%s: %s\n' % (simulation_name, current_status)
                 report_file.write(report_line)
 
-        print '\nINFO: Reporte de estado generado exitosamente en "%s".' % status_report_path
+        print('\nINFO: Reporte de estado generado exitosamente en "%s".' % status_report_path)
+        if stage_timing is not None:
+            stage_timing.add_file_written(status_report_path)
+            stage_timing.write_run_report(os.path.join(status_dir_path, TIMING_REPORT_NAME), 'status_manager')
 
     except (IOError, OSError) as e_write:
-        print 'ERROR: No se pudo escribir en el archivo de reporte "%s".' % status_report_path
-        print '  Error: %s' % e_write
+        print('ERROR: No se pudo escribir en el archivo de reporte "%s".' % status_report_path)
+        print('  Error: %s' % e_write)
     except Exception as e_general:
-        print 'ERROR: Ocurrio un error inesperado durante la escritura del reporte.'
-        print '  Tipo: %s' % type(e_general).__name__
-        print '  Mensaje: %s' % e_general
-        print traceback.format_exc()
+        print('ERROR: Ocurrio un error inesperado durante la escritura del reporte.')
+        print('  Tipo: %s' % type(e_general).__name__)
+        print('  Mensaje: %s' % e_general)
+        print(traceback.format_exc())
 
 
 # --- Punto de entrada del script ---
 if __name__ == '__main__':
-    print "--- Iniciando Script Verificador de Estado STA ---"
+    print("--- Iniciando Script Verificador de Estado STA ---")
     check_analysis_status()
-    print "--- Script Verificador de Estado STA Finalizado ---"
+    print("--- Script Verificador de Estado STA Finalizado ---")